@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Benchmark memoria/CPU di sync_structure + merge_preserving_structure su una run KB simulata.
+
+Per ogni lingua (default: le 53 reduced_locales di config/kb-locale-mapping.json):
+- carica il target da JSON (paesi già tradotti, alcuni con chiavi EN nuove mancanti)
+- sync_structure(EN, target)
+- "traduce" i paesi mancanti (risposta JSON pseudo-tradotta) e li unisce con
+  merge_preserving_structure, come translate_locale per fused_by_iso
+- serializza il risultato (come il salvataggio del file)
+
+Ogni implementazione gira in sottoprocessi separati: peak RSS (ru_maxrss) e CPU
+non si influenzano a vicenda; un secondo passaggio con tracemalloc misura la memoria
+allocata dalle sole sync_structure + merge_preserving_structure. I fixture di ogni lingua sono generati al momento (stesso seed
+per entrambe le implementazioni) e scartati subito, così il peak RSS misura il working set
+di una lingua come nella run reale. "legacy" = copie profonde via json.loads(json.dumps(...))
+e dict nuovi a ogni livello; "cow" = structural sharing (sync_and_translate_grok_2026).
+
+Uso:
+    python scripts/benchmark_structure_sync.py
+    python scripts/benchmark_structure_sync.py --locales 10 --existing 0.8 --output structure-bench.json
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.append(str(Path(__file__).parent))
+
+import sync_and_translate_grok_2026 as sync
+
+ROOT_DIR = Path(__file__).parent.parent
+KB_SOURCE = ROOT_DIR / "scripts" / "builders" / "compliance_builder" / "compliance.v3.json"
+KB_MAPPING = ROOT_DIR / "config" / "kb-locale-mapping.json"
+
+# ============================================================================
+# IMPLEMENTAZIONI LEGACY (riferimento per il confronto)
+# ============================================================================
+
+def legacy_merge_preserving_structure(original, translated):
+    if not isinstance(original, dict) or not isinstance(translated, dict):
+        if translated is not None and translated != original:
+            return translated
+        return original
+    merged = {}
+    for key, original_value in original.items():
+        if key in translated:
+            translated_value = translated[key]
+            if isinstance(original_value, dict) and isinstance(translated_value, dict):
+                merged[key] = legacy_merge_preserving_structure(original_value, translated_value)
+            else:
+                merged[key] = translated_value
+        else:
+            merged[key] = original_value
+    for key, translated_value in translated.items():
+        if key not in merged:
+            merged[key] = translated_value
+    return merged
+
+def legacy_sync_structure(en_data: Dict, target_data: Dict) -> Dict:
+    synced = {}
+
+    def sync_recursive(en_dict: Dict, target_dict: Dict, result: Dict):
+        for key, en_value in en_dict.items():
+            if isinstance(en_value, dict):
+                if key not in target_dict or not isinstance(target_dict[key], dict):
+                    result[key] = json.loads(json.dumps(en_value))
+                else:
+                    result[key] = {}
+                    sync_recursive(en_value, target_dict[key], result[key])
+            elif isinstance(en_value, list):
+                if key in target_dict and isinstance(target_dict[key], list):
+                    result[key] = target_dict[key]
+                else:
+                    result[key] = json.loads(json.dumps(en_value))
+            else:
+                result[key] = target_dict[key] if key in target_dict else en_value
+
+    sync_recursive(en_data, target_data, synced)
+    return synced
+
+IMPLEMENTATIONS = {
+    "legacy": (legacy_sync_structure, legacy_merge_preserving_structure),
+    "cow": (sync.sync_structure, sync.merge_preserving_structure),
+}
+
+# ============================================================================
+# FIXTURE
+# ============================================================================
+
+def pseudo_translate(value, locale: str):
+    if isinstance(value, str):
+        return f"[{locale}] {value}" if value else value
+    if isinstance(value, dict):
+        return {k: pseudo_translate(v, locale) for k, v in value.items()}
+    if isinstance(value, list):
+        return [pseudo_translate(v, locale) for v in value]
+    return value
+
+def drop_one_leaf(country: Dict, rng: random.Random) -> Dict:
+    """Toglie una chiave foglia (simula una chiave EN aggiunta dopo l'ultima traduzione)"""
+    node = country
+    while True:
+        dict_keys = [k for k, v in node.items() if isinstance(v, dict) and v]
+        if not dict_keys or rng.random() < 0.3:
+            break
+        node = node[rng.choice(dict_keys)]
+    if node:
+        node.pop(rng.choice(list(node.keys())))
+    return country
+
+def build_locale_fixture(en_data: Dict, locale: str, existing: float, seed: int) -> Dict[str, str]:
+    """JSON del target su disco e JSON delle risposte Grok per i paesi da tradurre"""
+    rng = random.Random(f"{seed}-{locale}")
+    countries = list(en_data["fused_by_iso"].keys())
+    rng.shuffle(countries)
+    split = int(len(countries) * existing)
+    done, todo = countries[:split], countries[split:]
+
+    target_countries = {}
+    for iso in done:
+        country = pseudo_translate(en_data["fused_by_iso"][iso], locale)
+        target_countries[iso] = drop_one_leaf(country, rng) if rng.random() < 0.1 else country
+    responses = {iso: pseudo_translate(sync.filter_empty_values_recursive(en_data["fused_by_iso"][iso]), locale) for iso in todo}
+
+    return {
+        "target": json.dumps({"fused_by_iso": target_countries}, ensure_ascii=False),
+        "responses": json.dumps(responses, ensure_ascii=False),
+    }
+
+# ============================================================================
+# RUN (nel sottoprocesso)
+# ============================================================================
+
+def run_locale(en_data: Dict, fixture: Dict[str, str], sync_structure, merge_preserving_structure, timings: Dict[str, float]) -> str:
+    target_data = json.loads(fixture["target"])
+    responses = json.loads(fixture["responses"])
+    tracing = tracemalloc.is_tracing()
+    if tracing:
+        tracemalloc.reset_peak()
+        traced_before = tracemalloc.get_traced_memory()[0]
+
+    started = time.process_time()
+    synced_data = sync_structure(en_data, target_data)
+    timings["sync_cpu_sec"] += time.process_time() - started
+
+    original_countries = en_data["fused_by_iso"]
+
+    started = time.process_time()
+    translated_countries = {}
+    for iso, original in original_countries.items():
+        if iso in responses:
+            translated_countries[iso] = merge_preserving_structure(original, responses[iso])
+        else:
+            translated_countries[iso] = synced_data["fused_by_iso"][iso]
+    synced_data["fused_by_iso"] = translated_countries
+    timings["merge_cpu_sec"] += time.process_time() - started
+
+    if tracing:
+        current, peak = tracemalloc.get_traced_memory()
+        timings["alloc_peak_bytes"] = max(timings.get("alloc_peak_bytes", 0), peak - traced_before)
+        timings["retained_bytes"] = max(timings.get("retained_bytes", 0), current - traced_before)
+
+    return json.dumps(synced_data, ensure_ascii=False)
+
+def run_child(impl: str, locales: List[str], existing: float, seed: int, trace: bool = False) -> Dict:
+    sync_structure, merge_preserving_structure = IMPLEMENTATIONS[impl]
+    en_data = {"fused_by_iso": sync.load_json(KB_SOURCE)["fused_by_iso"]}
+    rss_baseline_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if trace:
+        tracemalloc.start()
+
+    timings = {"sync_cpu_sec": 0.0, "merge_cpu_sec": 0.0}
+    digest = hashlib.sha256()
+    started = time.perf_counter()
+    for locale in locales:
+        fixture = build_locale_fixture(en_data, locale, existing, seed)
+        output = run_locale(en_data, fixture, sync_structure, merge_preserving_structure, timings)
+        digest.update(output.encode("utf-8"))
+        del fixture, output
+
+    peak_rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if trace:
+        return {
+            "alloc_peak_mb": round(timings["alloc_peak_bytes"] / 1024 / 1024, 2),
+            "retained_mb": round(timings["retained_bytes"] / 1024 / 1024, 2),
+        }
+    return {
+        "impl": impl,
+        "locales": len(locales),
+        "wall_sec": round(time.perf_counter() - started, 3),
+        "sync_cpu_sec": round(timings["sync_cpu_sec"], 3),
+        "merge_cpu_sec": round(timings["merge_cpu_sec"], 3),
+        "rss_en_loaded_mb": round(rss_baseline_kb / 1024, 1),
+        "peak_rss_mb": round(peak_rss_kb / 1024, 1),
+        "peak_rss_growth_mb": round((peak_rss_kb - rss_baseline_kb) / 1024, 1),
+        "output_sha256": digest.hexdigest(),
+    }
+
+# ============================================================================
+# MAIN
+# ============================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark memoria/CPU di sync_structure e merge_preserving_structure (KB)')
+    parser.add_argument('--locales', type=int, default=0, help='Numero di lingue (0 = tutte le reduced_locales KB, 53)')
+    parser.add_argument('--existing', type=float, default=0.5, help='Quota di paesi già tradotti nel target (0-1)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='Salva il report JSON in questo file')
+    parser.add_argument('--child', choices=sorted(IMPLEMENTATIONS), help=argparse.SUPPRESS)
+    parser.add_argument('--locale-list', help=argparse.SUPPRESS)
+    parser.add_argument('--trace', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_child(args.child, args.locale_list.split(","), args.existing, args.seed, args.trace)))
+        return
+
+    locales = sync.load_json(KB_MAPPING)["reduced_locales"]
+    if args.locales:
+        locales = locales[:args.locales]
+    print(f"🧪 KB: {len(locales)} lingue, {args.existing:.0%} dei paesi già tradotti nel target", flush=True)
+
+    def child(impl: str, trace: bool) -> Dict:
+        command = [sys.executable, __file__, "--child", impl, "--locale-list", ",".join(locales),
+                   "--existing", str(args.existing), "--seed", str(args.seed)]
+        completed = subprocess.run(command + (["--trace"] if trace else []), capture_output=True, text=True, check=True)
+        return json.loads(completed.stdout.strip().splitlines()[-1])
+
+    results = []
+    for impl in ("legacy", "cow"):
+        print(f"▶️  {impl}...", flush=True)
+        results.append({**child(impl, trace=False), **child(impl, trace=True)})
+
+    print(f"\n{'='*86}")
+    print("📊 BENCHMARK sync_structure / merge_preserving_structure (KB)")
+    print('='*86)
+    print(f"{'Impl.':<8} {'Lingue':>7} {'Wall (s)':>9} {'Sync CPU':>9} {'Merge CPU':>10} {'Alloc MB':>9} {'Tenuti MB':>10} {'Peak RSS MB':>12}")
+    print('─'*86)
+    for r in results:
+        print(f"{r['impl']:<8} {r['locales']:>7} {r['wall_sec']:>9.2f} {r['sync_cpu_sec']:>9.3f} {r['merge_cpu_sec']:>10.3f} "
+              f"{r['alloc_peak_mb']:>9.2f} {r['retained_mb']:>10.2f} {r['peak_rss_mb']:>12.1f}")
+    print('─'*86)
+    print("   Alloc/Tenuti = picco e residuo di memoria allocata da sync+merge per lingua (tracemalloc)")
+    legacy, cow = results
+    same_output = legacy["output_sha256"] == cow["output_sha256"]
+    structure_legacy = legacy["sync_cpu_sec"] + legacy["merge_cpu_sec"]
+    structure_cow = cow["sync_cpu_sec"] + cow["merge_cpu_sec"]
+    if structure_cow:
+        print(f"   CPU sync+merge: {structure_legacy:.3f}s → {structure_cow:.3f}s ({structure_legacy / structure_cow:.1f}x)")
+    print(f"   Memoria sync+merge per lingua: {legacy['alloc_peak_mb']:.2f} MB → {cow['alloc_peak_mb']:.2f} MB")
+    print(f"   Peak RSS: {legacy['peak_rss_mb']:.1f} MB → {cow['peak_rss_mb']:.1f} MB "
+          f"(oltre EN caricato: {legacy['peak_rss_growth_mb']:.1f} → {cow['peak_rss_growth_mb']:.1f} MB)")
+    print(f"   Output identico: {'✅ sì' if same_output else '❌ NO'}")
+
+    if args.output:
+        sync.save_json(Path(args.output), {"locales": locales, "existing": args.existing, "seed": args.seed,
+                                           "results": results, "same_output": same_output})
+        print(f"\n💾 Report salvato in {args.output}")
+    if not same_output:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
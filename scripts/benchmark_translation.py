@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Benchmark offline della pipeline di traduzione (site / app / kb) contro il mock Grok.
+
+- Crea un workspace temporaneo con i file EN di esempio (data/translations, compliance.v3.json)
+- Avvia mock_grok_server.py in-process con la fault injection richiesta
+- Esegue sync_and_translate_grok_2026.main() per ogni progetto (o per tutti insieme con --single-process) puntando al mock
+- Riporta wall time, richieste al mock per esito, retry/fallimenti del traduttore
+  e copertura finale (stringhe effettivamente pseudo-tradotte)
+
+Uso:
+    python scripts/benchmark_translation.py --projects site,app,kb --locales it-IT,fr-FR
+    python scripts/benchmark_translation.py --projects kb --rate-429 0.1 --rate-truncate 0.05 --seed 42
+    python scripts/benchmark_translation.py --projects site,app,kb --single-process   # un solo processo, KB in parallelo a site/app
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.append(str(Path(__file__).parent))
+
+import sync_and_translate_grok_2026 as sync
+from mock_grok_server import add_fault_arguments, options_from_args, start_mock_server
+
+ROOT_DIR = Path(__file__).parent.parent
+KB_SOURCE = ROOT_DIR / "scripts" / "builders" / "compliance_builder" / "compliance.v3.json"
+
+# Fixture EN per progetto: (file sorgente nel repo, path relativo nel workspace)
+FIXTURES = {
+    "site": [(ROOT_DIR / "data" / "translations" / "sito" / "en-gb.json", "web/src/i18n/en-gb.json")],
+    "app": [
+        (ROOT_DIR / "data" / "translations" / "app" / "en-gb-pages.json", "locales/en-gb/pages.json"),
+        (ROOT_DIR / "data" / "translations" / "app" / "en-gb-email.json", "locales/en-gb/email.json"),
+    ],
+    "kb": [(KB_SOURCE, "locales/en-GB/compliance.json")],
+}
+
+BENCH_PROJECTS = {
+    "projects": [
+        {
+            "id": "site",
+            "name": "Sito (benchmark)",
+            "basePath": "src/i18n",
+            "sourceFile": "en-gb.json",
+            "sourceLocale": "en-GB",
+            "filePattern": "{locale}.json",
+            "snapshotPattern": "{locale}.snapshot.json",
+        },
+        {
+            "id": "app",
+            "name": "App (benchmark)",
+            "basePath": "locales",
+            "sourceFile": "en-GB/pages.json",
+            "sourceLocale": "en-GB",
+            "filePattern": "{locale}/pages.json",
+            "snapshotPattern": "{locale}/pages.snapshot.json",
+            "files": [
+                {"pattern": "{locale}/pages.json", "snapshotPattern": "{locale}/pages.snapshot.json"},
+                {"pattern": "{locale}/email.json", "snapshotPattern": "{locale}/email.snapshot.json"},
+            ],
+        },
+        {
+            "id": "kb",
+            "name": "Knowledge Base (benchmark)",
+            "basePath": "locales",
+            "sourceFile": "en-GB/compliance.json",
+            "sourceLocale": "en-GB",
+            "filePattern": "{locale}/compliance.json",
+            "snapshotPattern": "{locale}/compliance.snapshot.json",
+        },
+    ]
+}
+
+# ============================================================================
+# WORKSPACE
+# ============================================================================
+
+def trim_fixture(project_id: str, data: Dict, max_blocks: int, kb_countries: int) -> Dict:
+    """Riduce i fixture per run brevi: primi N blocchi (site/app) o primi N paesi (kb)"""
+    if project_id == "kb":
+        countries = data.get("fused_by_iso", {})
+        if kb_countries:
+            countries = dict(list(countries.items())[:kb_countries])
+        return {"fused_by_iso": countries}
+    if max_blocks:
+        return dict(list(data.items())[:max_blocks])
+    return data
+
+def build_workspace(workspace: Path, projects: List[str], locales: List[str], max_blocks: int, kb_countries: int):
+    """Prepara config progetti, lingue, mapping KB e file EN nel workspace"""
+    (workspace / "config").mkdir(parents=True, exist_ok=True)
+    sync.save_json(workspace / "config" / "i18n-projects.json", BENCH_PROJECTS)
+
+    names = {locale: {"name": locale} for locale in locales}
+    sync.save_json(workspace / "model_language_config.json", {"language_model_config": names})
+
+    mapping_target = workspace / "web" / "src" / "config" / "kb-locale-mapping.json"
+    mapping_target.parent.mkdir(parents=True, exist_ok=True)
+    shutil.copy(ROOT_DIR / "config" / "kb-locale-mapping.json", mapping_target)
+
+    for project_id in projects:
+        for source, relative in FIXTURES[project_id]:
+            data = trim_fixture(project_id, sync.load_json(source), max_blocks, kb_countries)
+            sync.save_json(workspace / relative, data)
+
+def point_translator_at(workspace: Path, base_url: str):
+    """Reindirizza il modulo di traduzione su workspace e mock"""
+    sync.ROOT_DIR = workspace
+    sync.PROJECTS_CONFIG = workspace / "config" / "i18n-projects.json"
+    sync.CONFIG_FILE = workspace / "model_language_config.json"
+    sync.GROK_API_KEY = "mock-key"
+    sync.GROK_BASE_URL = base_url
+    # Le risposte del mock non devono finire in scripts/.llm_cache (né falsare i tempi con hit di cache):
+    # main() riconfigura la cache dall'env, quindi la si spegne e la si confina nel workspace
+    os.environ["LLM_CACHE"] = "off"
+    os.environ["LLM_CACHE_DIR"] = str(workspace / ".llm_cache")
+
+# ============================================================================
+# MISURE
+# ============================================================================
+
+def count_coverage(project_id: str, locale: str) -> Dict[str, int]:
+    """Conta stringhe EN traducibili e stringhe pseudo-tradotte ([locale]) nel target"""
+    project = sync.load_project_config(project_id)
+    en_data = {}
+    for file_info in sync.get_source_files(project):
+        en_data.update(sync.load_json(sync.resolve_project_path(project, file_info["file"])))
+    if project_id == "kb":
+        en_data = {k: sync.filter_empty_values_recursive(v) for k, v in en_data.items()}
+
+    target_data = {}
+    for file_info in sync.get_files_for_locale(project, locale):
+        target_data.update(sync.load_target_file(project, file_info))
+
+    en_strings = [p for p, v in sync.flatten_json(en_data).items() if isinstance(v, str) and v]
+    target_flat = sync.flatten_json(target_data)
+    marker = f"[{locale}]"
+    translated = sum(1 for p in en_strings if isinstance(target_flat.get(p), str) and target_flat[p].startswith(marker))
+    return {"en_strings": len(en_strings), "translated": translated}
+
+def count_log_events(log: str) -> Dict[str, int]:
+    """Eventi di recovery dal log del traduttore"""
+    return {
+        "retries": log.count("🔄 Retry"),
+        "early_stops": log.count("FERMANDO"),
+        "failed_batches": log.count("Batch fallito"),
+        "failed_blocks": log.count("❌ Fallito"),
+        "failed_chunks": log.count("fallito - uso originali"),
+        "truncation_splits": log.count("✂️"),
+    }
+
+def run_project(project_ids: List[str], locales: List[str], server, verbose: bool) -> Dict:
+    """Esegue la pipeline per uno o più progetti (una sola invocazione di main) e raccoglie le metriche"""
+    server.reset_stats()
+    log_buffer = io.StringIO()
+    argv = ["--project", ",".join(project_ids)]
+    if len(locales) == 1:
+        argv += ["--locale", locales[0]]
+
+    started = time.perf_counter()
+    exit_code = 0
+    output = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(log_buffer)
+    with output:
+        try:
+            sync.main(argv)
+        except SystemExit as e:
+            exit_code = e.code if isinstance(e.code, int) else 1
+    wall_time = time.perf_counter() - started
+
+    if len(project_ids) == 1:
+        coverage = {locale: count_coverage(project_ids[0], locale) for locale in locales}
+    else:
+        coverage = {f"{project_id}:{locale}": count_coverage(project_id, locale) for project_id in project_ids for locale in locales}
+    en_total = sum(c["en_strings"] for c in coverage.values())
+    translated_total = sum(c["translated"] for c in coverage.values())
+
+    return {
+        "project": "+".join(project_ids),
+        "exit_code": exit_code,
+        "wall_time_sec": round(wall_time, 3),
+        "mock": server.snapshot_stats(),
+        "translator": count_log_events(log_buffer.getvalue()),
+        "coverage": coverage,
+        "coverage_pct": round(translated_total / en_total * 100, 1) if en_total else 100.0,
+    }
+
+def print_report(results: List[Dict]):
+    print(f"\n{'='*78}")
+    print("📊 BENCHMARK TRADUZIONE (mock)")
+    print('='*78)
+    print(f"{'Progetto':<14} {'Wall (s)':>9} {'Richieste':>10} {'Max conc.':>10} {'Retry':>6} {'Falliti':>8} {'Copertura':>10}")
+    print('─'*78)
+    for r in results:
+        failures = r["translator"]["failed_batches"] + r["translator"]["failed_blocks"] + r["translator"]["failed_chunks"]
+        print(f"{r['project']:<14} {r['wall_time_sec']:>9.2f} {r['mock']['requests']:>10} {r['mock']['max_in_flight']:>10} "
+              f"{r['translator']['retries']:>6} {failures:>8} {r['coverage_pct']:>9.1f}%")
+    print('─'*78)
+    for r in results:
+        outcomes = ", ".join(f"{k}={v}" for k, v in sorted(r["mock"]["outcomes"].items()))
+        print(f"   {r['project']}: esiti mock → {outcomes or 'nessuna richiesta'}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark offline della pipeline di traduzione contro il mock Grok')
+    parser.add_argument('--projects', default='site,app,kb', help='Progetti da eseguire (comma-separated)')
+    parser.add_argument('--locales', default='it-IT', help='Locale target (comma-separated)')
+    parser.add_argument('--max-blocks', type=int, default=10, help='Blocchi top-level per site/app (0 = tutti)')
+    parser.add_argument('--kb-countries', type=int, default=36, help='Paesi KB inclusi (0 = tutti)')
+    parser.add_argument('--output', help='Salva il report JSON in questo file')
+    parser.add_argument('--keep-workspace', action='store_true', help='Non cancellare il workspace temporaneo')
+    parser.add_argument('--verbose', action='store_true', help='Mostra il log completo del traduttore')
+    parser.add_argument('--single-process', action='store_true', help='Tutti i progetti in una sola invocazione (--project site,app,kb) invece che in sequenza')
+    add_fault_arguments(parser)
+    args = parser.parse_args()
+
+    projects = [p.strip() for p in args.projects.split(",") if p.strip()]
+    locales = [l.strip() for l in args.locales.split(",") if l.strip()]
+    unknown = [p for p in projects if p not in FIXTURES]
+    if unknown:
+        print(f"❌ Progetti sconosciuti: {', '.join(unknown)}")
+        sys.exit(2)
+
+    workspace = Path(tempfile.mkdtemp(prefix="i18n-bench-"))
+    server, base_url = start_mock_server(**options_from_args(args))
+    print(f"🧪 Mock: {base_url} | Workspace: {workspace}")
+
+    try:
+        build_workspace(workspace, projects, locales, args.max_blocks, args.kb_countries)
+        point_translator_at(workspace, base_url)
+        results = []
+        runs = [projects] if args.single_process else [[project_id] for project_id in projects]
+        for run_projects in runs:
+            print(f"▶️  {','.join(run_projects)} ({', '.join(locales)})...", flush=True)
+            results.append(run_project(run_projects, locales, server, args.verbose))
+    finally:
+        server.shutdown()
+        server.server_close()
+        if not args.keep_workspace:
+            shutil.rmtree(workspace, ignore_errors=True)
+
+    print_report(results)
+
+    if args.output:
+        report = {
+            "mock_options": options_from_args(args),
+            "projects": projects,
+            "locales": locales,
+            "single_process": args.single_process,
+            "max_blocks": args.max_blocks,
+            "kb_countries": args.kb_countries,
+            "results": results,
+        }
+        sync.save_json(Path(args.output), report)
+        print(f"\n💾 Report salvato in {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Matrice di copertura i18n progetto × lingua × blocco, servita da /api/i18n/status.
+
+Per ogni progetto (config/i18n-projects.json) e lingua configurata:
+- tradotte   → valore diverso da EN, o identico ma confermato dalla memoria
+- identiche  → valore identico a EN, non confermato (da tradurre)
+- mancanti   → path EN assente nei file target
+- stale      → tradotte ma con EN cambiato rispetto allo snapshot
+
+Lo stato per lingua viene dall'indice del traduttore (translation_state_{progetto}.json,
+un byte per path EN): i file target vengono riletti solo per le lingue il cui stato non è
+più valido, i conteggi per blocco sono count() sui range dei blocchi.
+
+Output (colonnare, una colonna per metrica, allineata a "locales"):
+    data/i18n-status.json
+
+Uso:
+    python scripts/build_i18n_status.py
+    python scripts/build_i18n_status.py --project site,app --output data/i18n-status.json
+"""
+
+import argparse
+import json
+import math
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.append(str(Path(__file__).parent))
+
+import sync_and_translate_grok_2026 as sync
+
+STATUS_SCHEMA = 1
+DEFAULT_OUTPUT = Path(__file__).parent.parent / "data" / "i18n-status.json"
+
+METRICS = ("translated", "identical", "missing", "stale")
+
+def load_raw_target(project_config: Dict, locale: str) -> Dict:
+    """File target della lingua così come sono su disco (senza sync con EN)"""
+    target_data = {}
+    for file_info in sync.get_files_for_locale(project_config, locale):
+        target_file = sync.resolve_project_path(project_config, file_info["file"])
+        if target_file.exists():
+            target_data = {**target_data, **sync.load_target_file(project_config, file_info)}
+    return target_data
+
+def block_counts(state: bytearray, stale_mask: bytearray, start: int, end: int) -> Dict[str, int]:
+    translated = state.count(sync.STATE_TRANSLATED, start, end)
+    stale = 0
+    if stale_mask.count(1, start, end):
+        stale = sum(1 for i in range(start, end) if stale_mask[i] and state[i] == sync.STATE_TRANSLATED)
+    return {
+        "translated": translated,
+        "identical": state.count(sync.STATE_PENDING, start, end),
+        "missing": state.count(sync.STATE_MISSING, start, end),
+        "stale": stale,
+    }
+
+def build_project_status(project_config: Dict) -> Dict:
+    """Colonne di copertura per un progetto (stati dall'indice, ricalcolati solo se i file sono cambiati)"""
+    project_id = project_config["id"]
+    # Come il traduttore: en-GB è sempre la sorgente
+    source_locale = project_config["sourceLocale"] = "en-GB"
+
+    en_data = sync.load_en_data(project_config)
+    if not en_data:
+        return {"error": "No source files found", "basePath": project_config.get("basePath")}
+
+    _, changed_paths, _ = sync.diff_en(en_data, sync.load_en_snapshot(project_config))
+    layout = sync.build_en_layout(en_data, project_id)
+    stale_mask = bytearray(len(layout["paths"]))
+    for idx, (path, _) in enumerate(layout["paths"]):
+        if path in changed_paths:
+            stale_mask[idx] = 1
+
+    state_index = sync.load_state_index(project_id)
+    memory = sync.load_memory(project_id)
+    recomputed = 0
+
+    locales = [l for l in sync.select_locales(project_id, None) if l.lower() != source_locale.lower()]
+    block_names = list(layout["blocks"].keys())
+    columns = {metric: [] for metric in METRICS}
+    block_columns = {metric: [] for metric in METRICS}
+    files = []
+
+    for locale in locales:
+        mem_for_locale = memory.get(locale, {})
+        state = sync.cached_locale_state(state_index, layout, project_config, locale, mem_for_locale)
+        if state is None:
+            state = sync.compute_locale_state(layout, load_raw_target(project_config, locale), mem_for_locale)
+            sync.store_locale_state(state_index, layout, project_config, locale, state, mem_for_locale)
+            recomputed += 1
+
+        per_block = [block_counts(state, stale_mask, start, end) for start, end in layout["blocks"].values()]
+        for metric in METRICS:
+            block_columns[metric].append([counts[metric] for counts in per_block])
+            columns[metric].append(sum(counts[metric] for counts in per_block))
+        files.append([name for name, signature in sync.locale_files_signature(project_config, locale).items() if signature])
+
+    if recomputed:
+        sync.save_state_index(state_index, project_id)
+
+    return {
+        "name": project_config.get("name", project_id),
+        "sourceLocale": source_locale,
+        "sourceKeyCount": len(layout["paths"]),
+        # Stessa stima di estimateTokens() in src/lib/i18n-config.ts (~4 caratteri per token)
+        "sourceTokens": math.ceil(len(json.dumps(en_data, ensure_ascii=False, separators=(",", ":"))) / 4),
+        "enFingerprint": layout["fingerprint"],
+        "staleSourceKeys": int(stale_mask.count(1)),
+        "locales": locales,
+        "files": files,
+        **columns,
+        "blocks": {
+            "names": block_names,
+            "sizes": [end - start for start, end in layout["blocks"].values()],
+            **block_columns,
+        },
+        "recomputedLocales": recomputed,
+    }
+
+def print_summary(project_id: str, status: Dict, elapsed_ms: float):
+    if "error" in status:
+        print(f"❌ {project_id}: {status['error']} ({status.get('basePath')})")
+        return
+    total = status["sourceKeyCount"] * len(status["locales"])
+    translated = sum(status["translated"])
+    pct = translated / total * 100 if total else 100.0
+    complete = sum(1 for t in status["translated"] if t == status["sourceKeyCount"])
+    print(f"✅ {project_id}: {len(status['locales'])} lingue × {status['sourceKeyCount']} path × {len(status['blocks']['names'])} blocchi "
+          f"→ {pct:.1f}% tradotto, {complete} lingue complete, "
+          f"{sum(status['missing'])} mancanti, {sum(status['stale'])} stale "
+          f"({elapsed_ms:.0f} ms, {status['recomputedLocales']} lingue ricalcolate)")
+
+def update_status_file(projects: List[Dict], output_path: Path = DEFAULT_OUTPUT, verbose: bool = True) -> Path:
+    """
+    Ricalcola le colonne dei progetti indicati e riscrive il file (gli altri progetti restano).
+    Chiamato anche dal traduttore a fine run e dopo ogni aggiornamento --watch, così la route
+    non serve una matrice più vecchia dei file di lingua.
+    """
+    output_path = Path(output_path)
+    artifact = sync.load_json(output_path) if output_path.exists() else {}
+    if artifact.get("_schema") != STATUS_SCHEMA:
+        artifact = {"_schema": STATUS_SCHEMA, "projects": {}}
+
+    for project_config in projects:
+        started = time.perf_counter()
+        status = build_project_status(project_config)
+        status["generatedAt"] = round(time.time(), 3)
+        artifact["projects"][project_config["id"]] = status
+        if verbose:
+            print_summary(project_config["id"], status, (time.perf_counter() - started) * 1000)
+
+    artifact["generatedAt"] = round(time.time(), 3)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = output_path.with_name(f"{output_path.name}.tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        # Compatto: il file viene letto dalla route a ogni richiesta
+        f.write(json.dumps(artifact, ensure_ascii=False, separators=(",", ":")))
+        f.write('\n')
+    # Rimpiazzo atomico: la route non deve mai leggere un file scritto a metà
+    tmp_path.replace(output_path)
+    return output_path
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description='Genera la matrice di copertura i18n servita da /api/i18n/status')
+    parser.add_argument('--project', default='all', help='Progetti (comma-separated) o "all" (default)')
+    parser.add_argument('--output', default=str(DEFAULT_OUTPUT), help=f'File di output (default: {DEFAULT_OUTPUT})')
+    args = parser.parse_args(argv)
+
+    projects = sync.load_json(sync.PROJECTS_CONFIG).get("projects", [])
+    if args.project != "all":
+        wanted = {p.strip() for p in args.project.split(",") if p.strip()}
+        projects = [p for p in projects if p.get("id") in wanted]
+
+    output_path = update_status_file(projects, Path(args.output))
+    print(f"\n💾 {output_path} ({output_path.stat().st_size / 1024:.0f} KB)")
+
+if __name__ == "__main__":
+    main()
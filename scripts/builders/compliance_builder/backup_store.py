@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Backup deduplicati per contenuto dei file compliance (compliance.v3*.json).
+
+Invece di una copia completa backup_<ts>.json (2.4 MB) per ogni salvataggio:
+- objects/<sha[:2]>/<sha256>.json  → un blob per paese, indirizzato dal hash del contenuto
+                                     (un paese invariato tra due snapshot è salvato una volta sola)
+- snapshots/<ts>_<label>.json      → manifest piccolo: campi top-level + {iso: sha256} nell'ordine originale
+
+Uno snapshot costa quindi ~ la dimensione dei paesi cambiati + il manifest.
+
+Uso:
+    python backup_store.py list
+    python backup_store.py save compliance.v3.json --label manuale
+    python backup_store.py restore 20261019T101500_grok --output compliance.v3.restored.json
+    python backup_store.py prune --keep 20
+    python backup_store.py import-legacy --delete     # backups/backup_*.json → snapshot + blob
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+BASE_DIR = Path(__file__).parent
+BACKUP_DIR = BASE_DIR / "backups"
+SNAPSHOT_SCHEMA = 1
+DEFAULT_BLOCK = "fused_by_iso"
+
+def _objects_dir(directory: Path) -> Path:
+    return Path(directory) / "objects"
+
+def _snapshots_dir(directory: Path) -> Path:
+    return Path(directory) / "snapshots"
+
+def _write_atomic(path: Path, content: bytes):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp_path.write_bytes(content)
+    os.replace(tmp_path, path)
+
+def _blob_path(directory: Path, digest: str) -> Path:
+    return _objects_dir(directory) / digest[:2] / f"{digest}.json"
+
+def put_blob(directory: Path, value: Any) -> tuple:
+    """Salva il valore come blob (se non c'è già). Ritorna (sha256, byte scritti: 0 se già presente)"""
+    content = json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    digest = hashlib.sha256(content).hexdigest()
+    path = _blob_path(directory, digest)
+    if path.exists():
+        return digest, 0
+    _write_atomic(path, content)
+    return digest, len(content)
+
+def get_blob(directory: Path, digest: str) -> Any:
+    with _blob_path(directory, digest).open("r", encoding="utf-8") as f:
+        return json.load(f)
+
+# ============================================================================
+# SNAPSHOT
+# ============================================================================
+
+def save_snapshot(data: Dict, label: str = "backup", directory: Path = BACKUP_DIR, block: str = DEFAULT_BLOCK,
+                  source: Optional[str] = None, created: Optional[datetime] = None) -> Dict:
+    """
+    Salva uno snapshot di data: un blob per paese di data[block], il resto nel manifest.
+    Ritorna {"id", "path", "countries", "new_blobs", "new_bytes"}.
+    """
+    directory = Path(directory)
+    countries = {}
+    new_blobs = 0
+    new_bytes = 0
+    for iso, country in data.get(block, {}).items():
+        digest, written = put_blob(directory, country)
+        countries[iso] = digest
+        if written:
+            new_blobs += 1
+            new_bytes += written
+
+    created = created or datetime.now(timezone.utc)
+    safe_label = re.sub(r"[^A-Za-z0-9_-]+", "-", label).strip("-") or "backup"
+    snapshot_id = f"{created.strftime('%Y%m%dT%H%M%S')}_{safe_label}"
+    path = _snapshots_dir(directory) / f"{snapshot_id}.json"
+    suffix = 1
+    while path.exists():
+        suffix += 1
+        path = _snapshots_dir(directory) / f"{snapshot_id}-{suffix}.json"
+    manifest = {
+        "_schema": SNAPSHOT_SCHEMA,
+        "created_at": created.isoformat(),
+        "label": label,
+        "source": source,
+        "block": block,
+        "fields": {k: v for k, v in data.items() if k != block},
+        "countries": countries,
+    }
+    content = json.dumps(manifest, ensure_ascii=False, indent=1).encode("utf-8")
+    _write_atomic(path, content)
+    return {"id": path.stem, "path": path, "countries": len(countries), "new_blobs": new_blobs,
+            "new_bytes": new_bytes + len(content)}
+
+def list_snapshots(directory: Path = BACKUP_DIR) -> List[Dict]:
+    """Manifest degli snapshot, dal più vecchio al più recente"""
+    snapshots = []
+    for path in sorted(_snapshots_dir(directory).glob("*.json")):
+        try:
+            with path.open("r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            continue
+        manifest["id"] = path.stem
+        manifest["path"] = path
+        snapshots.append(manifest)
+    return snapshots
+
+def find_snapshot(snapshot_id: str, directory: Path = BACKUP_DIR) -> Dict:
+    """Snapshot per id esatto o prefisso univoco ("latest" = il più recente)"""
+    snapshots = list_snapshots(directory)
+    if snapshot_id == "latest" and snapshots:
+        return snapshots[-1]
+    matches = [s for s in snapshots if s["id"] == snapshot_id] or [s for s in snapshots if s["id"].startswith(snapshot_id)]
+    if len(matches) != 1:
+        raise KeyError(f"snapshot '{snapshot_id}' {'ambiguo' if matches else 'non trovato'}")
+    return matches[0]
+
+def load_snapshot(manifest: Dict, directory: Path = BACKUP_DIR) -> Dict:
+    """Ricostruisce il documento completo (campi top-level nell'ordine originale + paesi)"""
+    data = dict(manifest.get("fields", {}))
+    data[manifest.get("block", DEFAULT_BLOCK)] = {iso: get_blob(directory, digest) for iso, digest in manifest["countries"].items()}
+    return data
+
+def prune(keep: int, directory: Path = BACKUP_DIR) -> Dict:
+    """Tiene gli ultimi `keep` snapshot e cancella i blob non più referenziati"""
+    snapshots = list_snapshots(directory)
+    removed = snapshots[:-keep] if keep > 0 else snapshots
+    for manifest in removed:
+        manifest["path"].unlink()
+
+    referenced = {digest for manifest in snapshots[len(removed):] for digest in manifest["countries"].values()}
+    freed_blobs = 0
+    freed_bytes = 0
+    for path in _objects_dir(directory).glob("*/*.json"):
+        if path.stem not in referenced:
+            freed_bytes += path.stat().st_size
+            path.unlink()
+            freed_blobs += 1
+    return {"snapshots_removed": len(removed), "blobs_removed": freed_blobs, "bytes_freed": freed_bytes}
+
+def store_size(directory: Path = BACKUP_DIR) -> int:
+    return sum(p.stat().st_size for p in Path(directory).glob("*/**/*.json") if p.is_file())
+
+# ============================================================================
+# CLI
+# ============================================================================
+
+def _format_bytes(size: float) -> str:
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+def main():
+    parser = argparse.ArgumentParser(description="Backup deduplicati (blob per paese + manifest) dei file compliance")
+    parser.add_argument("--dir", type=Path, default=BACKUP_DIR, help="Cartella backup (default: backups/)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("list", help="Elenca gli snapshot")
+    save_cmd = commands.add_parser("save", help="Snapshot di un file JSON")
+    save_cmd.add_argument("file", type=Path)
+    save_cmd.add_argument("--label", default="manuale")
+    save_cmd.add_argument("--block", default=DEFAULT_BLOCK)
+    restore_cmd = commands.add_parser("restore", help="Ricostruisce il JSON di uno snapshot")
+    restore_cmd.add_argument("snapshot", help="Id (o prefisso univoco) dello snapshot, oppure 'latest'")
+    restore_cmd.add_argument("--output", type=Path, help="File di output (default: <id>.restored.json)")
+    prune_cmd = commands.add_parser("prune", help="Tiene gli ultimi N snapshot e cancella i blob orfani")
+    prune_cmd.add_argument("--keep", type=int, default=20)
+    legacy_cmd = commands.add_parser("import-legacy", help="Converte i vecchi backup completi (backup_*.json) in snapshot")
+    legacy_cmd.add_argument("--delete", action="store_true", help="Cancella i file importati")
+    args = parser.parse_args()
+
+    if args.command == "list":
+        snapshots = list_snapshots(args.dir)
+        for manifest in snapshots:
+            print(f"  {manifest['id']:<40} {len(manifest['countries']):>4} paesi  {manifest.get('source') or ''}")
+        print(f"📦 {len(snapshots)} snapshot, {_format_bytes(store_size(args.dir))} su disco")
+    elif args.command == "save":
+        with args.file.open("r", encoding="utf-8") as f:
+            data = json.load(f)
+        result = save_snapshot(data, args.label, args.dir, block=args.block, source=args.file.name)
+        print(f"✅ {result['id']}: {result['countries']} paesi, {result['new_blobs']} blob nuovi ({_format_bytes(result['new_bytes'])})")
+    elif args.command == "restore":
+        try:
+            manifest = find_snapshot(args.snapshot, args.dir)
+        except KeyError as e:
+            print(f"❌ {e.args[0]}")
+            raise SystemExit(1)
+        output_file = args.output or Path(f"{manifest['id']}.restored.json")
+        data = load_snapshot(manifest, args.dir)
+        _write_atomic(output_file, json.dumps(data, ensure_ascii=False, indent=2).encode("utf-8"))
+        print(f"✅ {manifest['id']} → {output_file} ({len(manifest['countries'])} paesi)")
+    elif args.command == "prune":
+        result = prune(args.keep, args.dir)
+        print(f"🧹 {result['snapshots_removed']} snapshot e {result['blobs_removed']} blob rimossi ({_format_bytes(result['bytes_freed'])} liberati)")
+    elif args.command == "import-legacy":
+        started = time.time()
+        legacy = sorted(args.dir.glob("backup_*.json"), key=lambda p: p.stat().st_mtime)
+        before = sum(p.stat().st_size for p in legacy)
+        written = 0
+        for path in legacy:
+            with path.open("r", encoding="utf-8") as f:
+                data = json.load(f)
+            label = "sources" if path.name.startswith("backup_sources_") else "legacy"
+            created = datetime.fromtimestamp(path.stat().st_mtime, timezone.utc)
+            result = save_snapshot(data, label, args.dir, source=path.name, created=created)
+            written += result["new_bytes"]
+            if args.delete:
+                path.unlink()
+        print(f"✅ {len(legacy)} backup importati in {time.time() - started:.1f}s: "
+              f"{_format_bytes(before)} → {_format_bytes(written)} nuovi nello store")
+
+if __name__ == "__main__":
+    main()
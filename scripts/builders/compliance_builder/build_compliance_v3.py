@@ -4,16 +4,28 @@ import json
 import os
 import sys
 from datetime import datetime, timezone
+from functools import partial
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 
 import httpx
 
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from llm_runtime.cache import configure_response_cache, get_response_cache
+from llm_runtime.calls import add_runtime_arguments, post_json_cached
+from llm_runtime.concurrency import get_controller
+from llm_runtime.jobs import JobResult, run_jobs
+from llm_runtime.retry import get_retry_policy
+
+from compliance_index import index_path_for, write_index
+from compliance_journal import CountryJournal, compact, journal_path_for
+
 BASE_DIR = Path(__file__).parent
 
 COUNTRIES_CSV = BASE_DIR / "countries.csv"
 V2_JSON = BASE_DIR / "compliance.v2.json"  # optional
 OUTPUT_JSON = BASE_DIR / "compliance.v3.json"
+JOURNAL_FILE = journal_path_for(OUTPUT_JSON)
 
 
 def load_countries() -> list[dict]:
@@ -224,12 +236,13 @@ seed_data:
     return instructions.strip()
 
 
-def call_llm_for_country(prompt: str, model: str = "sonar") -> tuple[Dict[str, Any], list[str]]:
+def call_llm_for_country(prompt: str, model: str = "sonar", refresh: bool = False) -> tuple[Dict[str, Any], list[str]]:
     """Call Perplexity API (Grounded LLM) and return the JSON dict for the country and citations.
     
     Args:
         prompt: The prompt to send to the model
         model: Perplexity model to use. Options: "sonar" (cheaper) or "sonar-pro" (better quality)
+        refresh: Skip the response cache lookup (the new response is still cached)
     
     Returns:
         Tuple of (country_json_dict, citations_list)
@@ -268,10 +281,10 @@ def call_llm_for_country(prompt: str, model: str = "sonar") -> tuple[Dict[str, A
         "return_citations": True,  # Get source citations
     }
 
-    with httpx.Client(timeout=120.0) as client:  # 2 minutes timeout (reduced from 5 to avoid long waits)
-        response = client.post(url, headers=headers, json=payload)
-        response.raise_for_status()
-        data = response.json()
+    # Identical prompts (reruns, --resume) are answered from the on-disk response cache
+    data, cached_request = post_json_cached("perplexity", url, headers, payload, label=model, refresh=refresh)
+    if cached_request.hit:
+        print(f"  💾 Response from cache (no API call)", flush=True)
 
     content = data["choices"][0]["message"]["content"]
     
@@ -330,6 +343,8 @@ def call_llm_for_country(prompt: str, model: str = "sonar") -> tuple[Dict[str, A
             # If still fails, raise with more context
             raise ValueError(f"Failed to parse JSON from response: {str(e)}\nContent preview: {content[:500]}")
     
+    # Only responses that parsed are cached
+    cached_request.store(data)
     return country_json, citations
 
 
@@ -525,6 +540,77 @@ def post_process_country_data(country_json: Dict[str, Any], iso: str, country_na
     return country_json
 
 
+def process_country(row: dict, model: str, v2_data: Dict[str, Any], template: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Build, call, post-process and validate one country (job run by llm_runtime.jobs).
+
+    Returns None when every attempt failed.
+    """
+    iso = row["ISO2"]
+    name = row["Country"]
+    print(f"\n▶ Processing {name} ({iso})...", flush=True)
+
+    seed = build_seed(row, v2_data)
+    prompt = build_prompt(seed)
+
+    # Retry logic: max 2 attempts (reduced from 3 to save time/API calls)
+    max_retries = 2
+    country_json = None
+    citations = []
+    
+    for attempt in range(1, max_retries + 1):
+        try:
+            # Try with specified model first, fallback to sonar if sonar-pro fails
+            current_model = model
+            if attempt > 1 and model == "sonar-pro":
+                # If sonar-pro fails, try sonar on retry
+                current_model = "sonar"
+                print(f"  🔄 {iso}: retrying with model 'sonar' instead of 'sonar-pro'...", flush=True)
+            
+            # A retry follows a rejected response: skip the cache so the model is asked again
+            country_json, citations = call_llm_for_country(prompt, model=current_model, refresh=attempt > 1)
+            
+            # Post-process first
+            country_json = post_process_country_data(country_json, iso, name, citations)
+            
+            # Validate structure
+            is_valid, errors = validate_json_structure(country_json, template)
+            
+            if is_valid:
+                print(f"  ✓ Valid JSON structure - {name} ({iso}) completed", flush=True)
+                break
+            else:
+                if attempt < max_retries:
+                    print(f"  ⚠ {iso} attempt {attempt}: JSON structure validation failed ({len(errors)} errors), retrying...", flush=True)
+                    if len(errors) <= 5:  # Show errors if not too many
+                        for error in errors[:5]:
+                            print(f"    - {error}", flush=True)
+                else:
+                    print(f"  ⚠ {iso} attempt {attempt}: JSON structure validation failed after {max_retries} attempts", flush=True)
+                    print(f"    Continuing anyway with {len(errors)} structural errors", flush=True)
+                    # Show first few errors
+                    for error in errors[:10]:
+                        print(f"    - {error}", flush=True)
+                    break
+        except Exception as e:
+            # HTTP errors were already retried by the shared policy: retry here only to switch model
+            if attempt < max_retries and (not isinstance(e, httpx.HTTPError) or model == "sonar-pro"):
+                print(f"  ⚠ {iso} attempt {attempt}: Error occurred, retrying... ({str(e)[:100]})", flush=True)
+            else:
+                print(f"  ✗ ERROR for {iso} after {attempt} attempts: {e}", flush=True)
+                return None
+
+    if country_json is None:
+        return None
+
+    # Minimal sanity checks
+    if country_json.get("iso") != iso:
+        print(f"  WARNING: iso mismatch in response for {iso}, fixing.", flush=True)
+        country_json["iso"] = iso
+    if country_json.get("country") is None:
+        country_json["country"] = name
+    return country_json
+
+
 def main() -> None:
     parser = argparse.ArgumentParser(description="Build compliance v3 JSON for countries")
     parser.add_argument(
@@ -549,7 +635,9 @@ def main() -> None:
         choices=["sonar", "sonar-pro"],
         help="Perplexity model to use: 'sonar' (cheaper) or 'sonar-pro' (better quality). Default: sonar",
     )
+    add_runtime_arguments(parser)
     args = parser.parse_args()
+    configure_response_cache(no_cache=args.no_cache, refresh=args.refresh_cache)
 
     countries = load_countries()
     v2_data = load_v2()
@@ -589,6 +677,15 @@ def main() -> None:
         }
         already_processed = set()
 
+    # Completed countries go to an append-only journal (fsync per country); the JSON is written once at the end.
+    # --resume replays it, so a crash loses at most the countries in flight
+    journal = CountryJournal(JOURNAL_FILE, resume=args.resume)
+    if args.resume and len(journal):
+        journal.apply(fused["fused_by_iso"])
+        already_processed |= set(journal.records)
+        print(f"Found {len(journal)} countries in {JOURNAL_FILE.name}"
+              f"{f' ({journal.torn} incomplete line dropped)' if journal.torn else ''}", flush=True)
+
     # Load template for validation
     template_path = BASE_DIR / "template_country.json"
     with template_path.open(encoding="utf-8") as f:
@@ -602,92 +699,45 @@ def main() -> None:
         print(f"✅ Already processed: {len(already_processed)} countries", flush=True)
     print(f"\n{'='*70}\n", flush=True)
 
-    for idx, row in enumerate(countries, start=1):
-        iso = row["ISO2"]
-        name = row["Country"]
-        
-        # Skip if already processed and resuming
-        if args.resume and iso in already_processed:
-            print(f"[{idx}/{total_countries}] ({idx/total_countries*100:.1f}%) Skipping {name} ({iso}) - already processed", flush=True)
-            continue
-        
-        progress_pct = (idx / total_countries) * 100
-        print(f"\n[{idx}/{total_countries}] ({progress_pct:.1f}%) Processing {name} ({iso})...", flush=True)
-
-        seed = build_seed(row, v2_data)
-        prompt = build_prompt(seed)
+    pending = [row for row in countries if not (args.resume and row["ISO2"] in already_processed)]
+    if len(pending) < total_countries:
+        print(f"⏭️  Skipping {total_countries - len(pending)} countries already processed", flush=True)
 
-        # Retry logic: max 2 attempts (reduced from 3 to save time/API calls)
-        max_retries = 2
-        country_json = None
-        citations = []
-        
-        for attempt in range(1, max_retries + 1):
-            try:
-                # Try with specified model first, fallback to sonar if sonar-pro fails
-                current_model = args.model
-                if attempt > 1 and args.model == "sonar-pro":
-                    # If sonar-pro fails, try sonar on retry
-                    current_model = "sonar"
-                    print(f"  🔄 Retrying with model 'sonar' instead of 'sonar-pro'...", flush=True)
-                
-                country_json, citations = call_llm_for_country(prompt, model=current_model)
-                
-                # Post-process first
-                country_json = post_process_country_data(country_json, iso, name, citations)
-                
-                # Validate structure
-                is_valid, errors = validate_json_structure(country_json, template)
-                
-                if is_valid:
-                    print(f"  ✓ Valid JSON structure - {name} ({iso}) completed", flush=True)
-                    break
-                else:
-                    if attempt < max_retries:
-                        print(f"  ⚠ Attempt {attempt}: JSON structure validation failed ({len(errors)} errors), retrying...", flush=True)
-                        if len(errors) <= 5:  # Show errors if not too many
-                            for error in errors[:5]:
-                                print(f"    - {error}", flush=True)
-                    else:
-                        print(f"  ⚠ Attempt {attempt}: JSON structure validation failed after {max_retries} attempts", flush=True)
-                        print(f"    Continuing anyway with {len(errors)} structural errors", flush=True)
-                        # Show first few errors
-                        for error in errors[:10]:
-                            print(f"    - {error}", flush=True)
-                        break
-            except Exception as e:
-                if attempt < max_retries:
-                    print(f"  ⚠ Attempt {attempt}: Error occurred, retrying... ({str(e)[:100]})", flush=True)
-                else:
-                    print(f"  ✗ ERROR for {iso} after {max_retries} attempts: {e}", flush=True)
-                    country_json = None
-                    break
-        
-        if country_json is None:
+    def on_result(result: JobResult) -> None:
+        row = result.item
+        iso = row["ISO2"]
+        if not result.ok:
+            print(f"  ✗ ERROR for {iso}: {result.error}", flush=True)
+            return
+        if result.value is None:
             print(f"  ✗ Skipping {iso} due to persistent errors", flush=True)
-            continue
-
-        # Minimal sanity checks
-        if country_json.get("iso") != iso:
-            print(f"  WARNING: iso mismatch in response for {iso}, fixing.", flush=True)
-            country_json["iso"] = iso
-        if country_json.get("country") is None:
-            country_json["country"] = name
-
-        fused["fused_by_iso"][iso] = country_json
-        
-        # Save progress periodically (every 10 countries) to avoid losing data
-        if len(fused["fused_by_iso"]) % 10 == 0:
-            with OUTPUT_JSON.open("w", encoding="utf-8") as f:
-                json.dump(fused, f, ensure_ascii=False, indent=2)
-            completed = len(fused["fused_by_iso"])
-            print(f"\n📊 Progress saved: {completed}/{total_countries} countries completed ({completed/total_countries*100:.1f}%)\n", flush=True)
+            return
+        fused["fused_by_iso"][iso] = result.value
+        journal.append(iso, result.value)
+
+    # Countries run concurrently (AIMD "perplexity" limit + --rpm); merge and saves happen as each one completes
+    get_controller("perplexity", max_limit=args.max_concurrency)
+    run_jobs(
+        pending,
+        partial(process_country, model=args.model, v2_data=v2_data, template=template),
+        label=lambda row: row["ISO2"],
+        provider="perplexity",
+        rpm=args.rpm,
+        on_result=on_result,
+    )
 
-    with OUTPUT_JSON.open("w", encoding="utf-8") as f:
-        json.dump(fused, f, ensure_ascii=False, indent=2)
+    journal.close()
+    # Compaction: jobs complete out of order, the output keeps the countries.csv order
+    compact(journal, fused, OUTPUT_JSON, order=[row["ISO2"] for row in load_countries()])
+    # Facet index next to the catalogue (compliance_index.py): consumers query it instead of scanning the full JSON
+    write_index(OUTPUT_JSON, data=fused)
 
     print(f"\n✅ Completed! Saved {OUTPUT_JSON}", flush=True)
+    print(f"🗂️  Index: {index_path_for(OUTPUT_JSON).name}", flush=True)
     print(f"📈 Total countries processed: {len(fused['fused_by_iso'])}", flush=True)
+    print(f"⚙️  Concurrency {get_controller('perplexity').describe()}", flush=True)
+    print(f"🔁 {get_retry_policy('perplexity').describe()}", flush=True)
+    print(f"💾 {get_response_cache().describe()}", flush=True)
 
 
 if __name__ == "__main__":
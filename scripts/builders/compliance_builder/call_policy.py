@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+"""
+Decisione di compliance per singola chiamata, compilata dal catalogo.
+
+I blocchi regime, relationship_requirements, existing_customer_exemption, dnc, recording e
+ai_disclosure vengono letti UNA volta e ridotti per paese a pochi flag (compile_rules); da questi
+si precalcola la tabella di tutte le combinazioni di input (segmento, consenso, relazione, cliente,
+AI, registrazione, stato DNC = 192 casi per paese). decide() calcola l'indice con qualche OR di bit
+e restituisce una Decision condivisa: nessun parsing o attraversamento del JSON a chiamata.
+
+Regole (evaluate), nell'ordine:
+1. consenso richiesto se il regime del segmento è opt-in / consent / permission / prohibition o
+   opt_in_always_required; regime non specificato, non classificabile ("other") o diverso per canale
+   senza una regola per le chiamate ("mixed") → unknown_regime ("allow" di default, "consent")
+2. senza consenso: eccezione cliente esistente / soft opt-in (salvo opt_in_always_required) se la
+   chiamata è verso un cliente o una relazione di un tipo accettato; requires_existing_relationship
+   senza relazione né consenso → deny
+3. registro DNC: numero iscritto → deny (salvo consenso o esenzione clienti del registro);
+   stato non verificato → obbligo dnc_check
+4. registrazione vietata (recording.allowed false) con chiamata registrata → deny
+5. obblighi: ai_disclosure, recording_notice / recording_consent, opt_out_offer, relationship_proof
+6. con local_time e un QuietHoursEngine: fuori finestra → deny (quiet_hours)
+
+Uso:
+    policy = get_policy()
+    decision = policy.decide("DE", "b2c", is_existing_customer=True, is_ai=True)
+    decision.allowed, decision.reason, decision.obligations
+
+    python call_policy.py decide IT b2c --existing-customer --ai
+    python call_policy.py bench --calls 1000000
+"""
+
+import argparse
+import json
+import random
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from compliance_index import MIXED, UNKNOWN, normalize_regime
+from quiet_hours_engine import QuietHoursEngine
+
+BASE_DIR = Path(__file__).parent
+CATALOGUE_FILE = BASE_DIR / "compliance.v3.json"
+
+SEGMENTS = ("b2b", "b2c")
+CONSENT_REGIMES = ("opt-in", "consent-based", "permission-based", "prohibition-based")
+# Categorie da cui non si deduce se serva il consenso: decide unknown_regime
+UNRESOLVED_REGIMES = (UNKNOWN, "other", MIXED)
+
+ALLOW, DENY = "allow", "deny"
+OBLIGATIONS = ("dnc_check", "ai_disclosure", "recording_notice", "recording_consent", "opt_out_offer",
+               "relationship_proof")
+
+# Bit dell'indice nella tabella del paese; lo stato DNC (0 = non verificato, 1 = non iscritto, 2 = iscritto)
+# occupa le due posizioni più alte
+_B2C, _CONSENT, _RELATIONSHIP, _CUSTOMER, _AI, _RECORDED = 1, 2, 4, 8, 16, 32
+_DNC_SHIFT = 6
+_DNC_STATES = {None: 0, False: 1, True: 2}
+TABLE_SIZE = 3 << _DNC_SHIFT
+
+class Decision:
+    """Esito di una chiamata: allow/deny, motivo e obblighi (istanze condivise, da non modificare)"""
+    __slots__ = ("verdict", "reason", "obligations")
+
+    def __init__(self, verdict: str, reason: str, obligations: Tuple[str, ...] = ()):
+        self.verdict = verdict
+        self.reason = reason
+        self.obligations = obligations
+
+    @property
+    def allowed(self) -> bool:
+        return self.verdict == ALLOW
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"verdict": self.verdict, "reason": self.reason, "obligations": list(self.obligations)}
+
+    def __repr__(self):
+        return f"Decision({self.verdict}, {self.reason}, {list(self.obligations)})"
+
+QUIET_HOURS_DENIAL = Decision(DENY, "quiet_hours")
+
+# ============================================================================
+# COMPILAZIONE
+# ============================================================================
+
+def compile_rules(country: Dict, unknown_regime: str = "allow") -> Dict[str, Any]:
+    """Flag compatti di un paese: {"b2b": {...}, "b2c": {...}, "dnc": {...}, "recording": {...}, "ai_disclosure": bool}"""
+    regime = country.get("regime") or {}
+    relationships = country.get("relationship_requirements") or {}
+    exemptions = country.get("existing_customer_exemption") or {}
+    dnc = country.get("dnc") or {}
+    recording = country.get("recording") or {}
+    ai = country.get("ai_disclosure") or {}
+
+    rules: Dict[str, Any] = {}
+    for segment in SEGMENTS:
+        category = normalize_regime((regime.get(segment) or {}).get("type"))
+        relationship = relationships.get(segment) or {}
+        exemption = exemptions.get(segment) or {}
+        opt_in_always = relationship.get("opt_in_always_required") is True
+        rules[segment] = {
+            "regime": category,
+            "consent_required": (category in CONSENT_REGIMES or opt_in_always
+                                 or (category in UNRESOLVED_REGIMES and unknown_regime == "consent")),
+            "customer_exemption": not opt_in_always and (exemption.get("exemption_applies") is True
+                                                          or relationship.get("soft_opt_in_allowed") is True),
+            "relationship_basis": bool(relationship.get("relationship_types_accepted"))
+                                  or relationship.get("requires_existing_relationship") is True,
+            "relationship_required": relationship.get("requires_existing_relationship") is True,
+            "opt_out_applies": exemption.get("opt_out_still_applies") is True,
+            "relationship_proof": relationship.get("relationship_proof_required") is True
+                                  or relationship.get("requires_recent_interaction") is True,
+        }
+    rules["dnc"] = {
+        "registry": dnc.get("has_registry") is True or dnc.get("check_required") is True,
+        "customer_exemption": dnc.get("existing_customer_exemption") is True,
+    }
+    rules["recording"] = {
+        "forbidden": recording.get("allowed") is False,
+        "notice": recording.get("notification_required") is True,
+        "consent": recording.get("consent_required") is True,
+    }
+    rules["ai_disclosure"] = ai.get("required") is True or ai.get("mandatory") is True
+    return rules
+
+def evaluate(rules: Dict[str, Any], segment: str, has_consent: bool = False, has_relationship: bool = False,
+             is_existing_customer: bool = False, is_ai: bool = False, is_recorded: bool = False,
+             dnc_listed: Optional[bool] = None) -> Decision:
+    """Versione leggibile delle regole: usata per compilare le tabelle, non sul percorso caldo"""
+    seg = rules[segment]
+    dnc = rules["dnc"]
+    recording = rules["recording"]
+    related = is_existing_customer or (has_relationship and seg["relationship_basis"])
+    obligations = []
+
+    if seg["relationship_required"] and not (has_consent or has_relationship or is_existing_customer):
+        return Decision(DENY, "relationship_required")
+    if has_consent:
+        reason = "consent"
+    elif not seg["consent_required"]:
+        reason = "regime_unknown" if seg["regime"] in UNRESOLVED_REGIMES else "no_consent_required"
+    elif seg["customer_exemption"] and related:
+        reason = "existing_customer_exemption"
+        if seg["opt_out_applies"]:
+            obligations.append("opt_out_offer")
+        if seg["relationship_proof"]:
+            obligations.append("relationship_proof")
+    else:
+        return Decision(DENY, "consent_required")
+
+    if dnc["registry"] and not has_consent and not (is_existing_customer and dnc["customer_exemption"]):
+        if dnc_listed is True:
+            return Decision(DENY, "dnc_listed")
+        if dnc_listed is None:
+            obligations.append("dnc_check")
+    if is_recorded:
+        if recording["forbidden"]:
+            return Decision(DENY, "recording_not_allowed")
+        if recording["notice"]:
+            obligations.append("recording_notice")
+        if recording["consent"]:
+            obligations.append("recording_consent")
+    if is_ai and rules["ai_disclosure"]:
+        obligations.append("ai_disclosure")
+    return Decision(ALLOW, reason, tuple(sorted(obligations, key=OBLIGATIONS.index)))
+
+def compile_table(rules: Dict[str, Any], interned: Dict[Tuple, Decision]) -> Tuple[Decision, ...]:
+    """Tutte le combinazioni di input → Decision (le decisioni uguali tra paesi sono la stessa istanza)"""
+    table = []
+    for index in range(TABLE_SIZE):
+        decision = evaluate(
+            rules, SEGMENTS[index & _B2C],
+            has_consent=bool(index & _CONSENT), has_relationship=bool(index & _RELATIONSHIP),
+            is_existing_customer=bool(index & _CUSTOMER), is_ai=bool(index & _AI),
+            is_recorded=bool(index & _RECORDED), dnc_listed=(None, False, True)[index >> _DNC_SHIFT],
+        )
+        key = (decision.verdict, decision.reason, decision.obligations)
+        table.append(interned.setdefault(key, decision))
+    return tuple(table)
+
+# ============================================================================
+# POLICY
+# ============================================================================
+
+class CallPolicy:
+    """Tabelle di decisione di tutti i paesi, compilate una volta dal catalogo"""
+
+    def __init__(self, fused: Dict[str, Dict], unknown_regime: str = "allow",
+                 quiet_hours: Optional[QuietHoursEngine] = None):
+        if unknown_regime not in ("allow", "consent"):
+            raise ValueError(f"unknown_regime non valido: {unknown_regime} (valori: allow, consent)")
+        interned: Dict[Tuple, Decision] = {}
+        self.rules = {iso: compile_rules(country, unknown_regime) for iso, country in fused.items()}
+        self.tables = {iso: compile_table(rules, interned) for iso, rules in self.rules.items()}
+        self.distinct_decisions = len(interned)
+        self.quiet_hours = quiet_hours
+
+    @classmethod
+    def from_file(cls, path: Path = CATALOGUE_FILE, with_quiet_hours: bool = True, **options) -> "CallPolicy":
+        with Path(path).open("r", encoding="utf-8") as f:
+            fused = json.load(f).get("fused_by_iso", {})
+        return cls(fused, quiet_hours=QuietHoursEngine(fused) if with_quiet_hours else None, **options)
+
+    def decide(self, iso: str, segment: str, has_relationship: bool = False, is_existing_customer: bool = False,
+               is_ai: bool = False, has_consent: bool = False, is_recorded: bool = False,
+               dnc_listed: Optional[bool] = None, local_time: Optional[datetime] = None) -> Decision:
+        """
+        Decisione per una chiamata verso iso. dnc_listed: True/False se il numero è già stato
+        verificato sul registro, None se no (→ obbligo dnc_check dove c'è un registro).
+        local_time: ora locale del destinatario, verificata sulle quiet hours se c'è il motore.
+        """
+        if segment == "b2c":
+            index = _B2C
+        elif segment == "b2b":
+            index = 0
+        else:
+            raise ValueError(f"segmento non valido: {segment} (valori: b2b, b2c)")
+        if has_consent:
+            index |= _CONSENT
+        if has_relationship:
+            index |= _RELATIONSHIP
+        if is_existing_customer:
+            index |= _CUSTOMER
+        if is_ai:
+            index |= _AI
+        if is_recorded:
+            index |= _RECORDED
+        if dnc_listed is not None:
+            index |= _DNC_STATES[dnc_listed] << _DNC_SHIFT
+        try:
+            decision = self.tables[iso][index]
+        except KeyError:
+            raise KeyError(f"paese sconosciuto: {iso}") from None
+        if local_time is not None and self.quiet_hours is not None and decision.allowed \
+                and not self.quiet_hours.is_allowed_local(iso, local_time):
+            return QUIET_HOURS_DENIAL
+        return decision
+
+    def decide_batch(self, calls: Iterable[Dict[str, Any]]) -> List[Decision]:
+        """Decisioni per una lista di dict con gli argomenti di decide()"""
+        decide = self.decide
+        return [decide(**call) for call in calls]
+
+_policies: Dict[Path, CallPolicy] = {}
+
+def get_policy(catalogue_file: Path = CATALOGUE_FILE) -> CallPolicy:
+    """Policy compilata del catalogo, una sola volta per processo"""
+    catalogue_file = Path(catalogue_file).resolve()
+    if catalogue_file not in _policies:
+        _policies[catalogue_file] = CallPolicy.from_file(catalogue_file)
+    return _policies[catalogue_file]
+
+# ============================================================================
+# CLI
+# ============================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description="Decisione di compliance per chiamata, compilata dal catalogo")
+    parser.add_argument("--file", type=Path, default=CATALOGUE_FILE, help="Catalogo (default: compliance.v3.json)")
+    parser.add_argument("--unknown-regime", choices=("allow", "consent"), default="allow",
+                        help="Regime non specificato, other o mixed: nessun consenso richiesto (default) o consenso richiesto")
+    commands = parser.add_subparsers(dest="command", required=True)
+    decide_cmd = commands.add_parser("decide", help="Decisione per una chiamata")
+    decide_cmd.add_argument("iso")
+    decide_cmd.add_argument("segment", choices=SEGMENTS)
+    decide_cmd.add_argument("--consent", action="store_true", help="Consenso esplicito del destinatario")
+    decide_cmd.add_argument("--relationship", action="store_true", help="Relazione commerciale esistente")
+    decide_cmd.add_argument("--existing-customer", action="store_true")
+    decide_cmd.add_argument("--ai", action="store_true", help="Chiamata condotta da un agente AI")
+    decide_cmd.add_argument("--recorded", action="store_true")
+    decide_cmd.add_argument("--dnc", choices=("unknown", "listed", "clear"), default="unknown",
+                            help="Esito della verifica sul registro DNC")
+    decide_cmd.add_argument("--local-time", help="Ora locale del destinatario (YYYY-MM-DD HH:MM)")
+    bench_cmd = commands.add_parser("bench", help="Decisioni al secondo su chiamate casuali")
+    bench_cmd.add_argument("--calls", type=int, default=1_000_000)
+    bench_cmd.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    with args.file.open("r", encoding="utf-8") as f:
+        fused = json.load(f).get("fused_by_iso", {})
+    loaded = time.perf_counter()
+    policy = CallPolicy(fused, unknown_regime=args.unknown_regime, quiet_hours=QuietHoursEngine(fused))
+    print(f"🧭 {len(policy.tables)} paesi × {TABLE_SIZE} casi compilati in {(time.perf_counter() - loaded) * 1000:.0f} ms "
+          f"(lettura catalogo {(loaded - started) * 1000:.0f} ms, {policy.distinct_decisions} decisioni distinte)")
+
+    if args.command == "decide":
+        iso = args.iso.upper()
+        if iso not in policy.tables:
+            print(f"❌ Paese sconosciuto: {iso}")
+            raise SystemExit(1)
+        decision = policy.decide(
+            iso, args.segment, has_relationship=args.relationship, is_existing_customer=args.existing_customer,
+            is_ai=args.ai, has_consent=args.consent, is_recorded=args.recorded,
+            dnc_listed={"unknown": None, "listed": True, "clear": False}[args.dnc],
+            local_time=datetime.fromisoformat(args.local_time) if args.local_time else None,
+        )
+        icon = "✅" if decision.allowed else "⛔"
+        print(f"{icon} {iso} {args.segment}: {decision.verdict} ({decision.reason})")
+        for obligation in decision.obligations:
+            print(f"   • {obligation}")
+    elif args.command == "bench":
+        rng = random.Random(args.seed)
+        isos = list(policy.tables)
+        calls = [
+            (rng.choice(isos), rng.choice(SEGMENTS), rng.random() < 0.3, rng.random() < 0.3,
+             rng.random() < 0.5, rng.random() < 0.2, rng.random() < 0.5, rng.choice((None, False, True)))
+            for _ in range(args.calls)
+        ]
+        decide = policy.decide
+        started = time.perf_counter()
+        decisions = [decide(iso, segment, relationship, customer, ai, consent, recorded, dnc)
+                     for iso, segment, relationship, customer, ai, consent, recorded, dnc in calls]
+        elapsed = time.perf_counter() - started
+        allowed = sum(1 for decision in decisions if decision.allowed)
+        print(f"⚡ {args.calls:,} decisioni in {elapsed:.2f}s ({args.calls / elapsed:,.0f}/s, "
+              f"{elapsed / args.calls * 1e9:.0f} ns/decisione) · allow {allowed:,} · deny {args.calls - allowed:,}")
+
+        local_times = [datetime(2026, 1, 5, rng.randrange(24), rng.randrange(60)) for _ in range(min(args.calls, 100_000))]
+        started = time.perf_counter()
+        for call, local_time in zip(calls, local_times):
+            decide(*call, local_time=local_time)
+        elapsed = time.perf_counter() - started
+        print(f"⚡ con quiet hours (ora locale): {len(local_times) / elapsed:,.0f} decisioni/s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+"""
+Diff strutturato (JSON Patch, RFC 6902) tra due versioni del catalogo compliance.
+
+Le versioni possono essere file (compliance.v3.json, compliance.v3.updated.json, ...) o snapshot
+dello store backup (snapshot:<id|prefisso|latest>). Il changeset elenca operazioni add / remove /
+replace con path JSON Pointer sul documento intero (/fused_by_iso/IT/dnc/has_registry), più le path
+per paese: KB retranslation, pubblicazione e review lavorano solo su ciò che è cambiato.
+
+- Paesi identici si saltano con un confronto diretto (tra due snapshot: stesso sha256 del blob,
+  senza nemmeno caricarli); solo i paesi cambiati vengono visitati campo per campo
+- Array: confronto per indice, elementi in più/in meno come add/remove in coda
+- apply_patch() riapplica il changeset (verifica: apply(old, patch) == new)
+
+Uso:
+    python compliance_diff.py diff compliance.v3.json compliance.v3.updated.json --output changeset.json
+    python compliance_diff.py diff snapshot:latest compliance.v3.updated.json
+    python compliance_diff.py apply changeset.json --base compliance.v3.json --output compliance.v3.patched.json
+"""
+
+import argparse
+import copy
+import json
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from backup_store import BACKUP_DIR, find_snapshot, get_blob
+from compliance_journal import write_json_atomic
+
+CHANGESET_SCHEMA = 1
+DEFAULT_BLOCK = "fused_by_iso"
+SNAPSHOT_PREFIX = "snapshot:"
+
+# ============================================================================
+# JSON POINTER
+# ============================================================================
+
+def escape_token(token: Any) -> str:
+    return str(token).replace("~", "~0").replace("/", "~1")
+
+def unescape_token(token: str) -> str:
+    return token.replace("~1", "/").replace("~0", "~")
+
+def split_pointer(pointer: str) -> List[str]:
+    if pointer == "":
+        return []
+    if not pointer.startswith("/"):
+        raise ValueError(f"JSON Pointer non valido: {pointer!r}")
+    return [unescape_token(token) for token in pointer[1:].split("/")]
+
+# ============================================================================
+# DIFF
+# ============================================================================
+
+def _same(old: Any, new: Any) -> bool:
+    # 1 == True e 1 == 1.0 in Python, ma in JSON sono valori diversi: il controllo sul tipo
+    # scende nei container, altrimenti {"a": 1} == {"a": True} li farebbe sembrare uguali
+    if type(old) is not type(new):
+        return False
+    if isinstance(old, dict):
+        return old.keys() == new.keys() and all(_same(value, new[key]) for key, value in old.items())
+    if isinstance(old, list):
+        return len(old) == len(new) and all(_same(a, b) for a, b in zip(old, new))
+    return old == new
+
+def diff_values(old: Any, new: Any, path: str = "", ops: Optional[List[Dict]] = None) -> List[Dict]:
+    """Operazioni RFC 6902 che trasformano old in new (path relative a `path`)"""
+    ops = [] if ops is None else ops
+    if _same(old, new):
+        return ops
+    if isinstance(old, dict) and isinstance(new, dict):
+        for key in old:
+            if key not in new:
+                ops.append({"op": "remove", "path": f"{path}/{escape_token(key)}"})
+        for key, value in new.items():
+            child = f"{path}/{escape_token(key)}"
+            if key not in old:
+                ops.append({"op": "add", "path": child, "value": value})
+            else:
+                diff_values(old[key], value, child, ops)
+    elif isinstance(old, list) and isinstance(new, list):
+        common = min(len(old), len(new))
+        for index in range(common):
+            diff_values(old[index], new[index], f"{path}/{index}", ops)
+        # Dalla coda: gli indici dei remove restano validi mentre si applicano
+        for index in range(len(old) - 1, common - 1, -1):
+            ops.append({"op": "remove", "path": f"{path}/{index}"})
+        for index in range(common, len(new)):
+            ops.append({"op": "add", "path": f"{path}/{index}", "value": new[index]})
+    else:
+        ops.append({"op": "replace", "path": path, "value": new})
+    return ops
+
+def diff_catalogues(old: "CatalogueVersion", new: "CatalogueVersion", block: str = DEFAULT_BLOCK) -> Dict:
+    """
+    Diff di due versioni del catalogo: {"patch": [...], "countries": {iso: {"status", "paths"}}, "stats"}.
+    Le operazioni sui paesi sono raggruppate per paese, nell'ordine della versione nuova.
+    """
+    patch: List[Dict] = []
+    countries: Dict[str, Dict] = {}
+    block_pointer = f"/{escape_token(block)}"
+
+    # Campi top-level (generated_at, metadata, ...) fuori dal blocco paesi
+    old_fields, new_fields = old.fields(), new.fields()
+    for key in old_fields:
+        if key not in new_fields:
+            patch.append({"op": "remove", "path": f"/{escape_token(key)}"})
+    for key, value in new_fields.items():
+        if key not in old_fields:
+            patch.append({"op": "add", "path": f"/{escape_token(key)}", "value": value})
+        else:
+            diff_values(old_fields[key], value, f"/{escape_token(key)}", patch)
+
+    old_isos = old.isos()
+    new_isos = new.isos()
+    if old_isos is None and new_isos is not None:
+        patch.append({"op": "add", "path": block_pointer, "value": {}})
+        old_isos = []
+    if new_isos is None:
+        if old_isos is not None:
+            patch.append({"op": "remove", "path": block_pointer})
+        return _changeset(patch, countries, old, new, block)
+
+    new_set = set(new_isos)
+    for iso in old_isos:
+        if iso not in new_set:
+            pointer = f"{block_pointer}/{escape_token(iso)}"
+            patch.append({"op": "remove", "path": pointer})
+            countries[iso] = {"status": "removed", "paths": [""]}
+    old_set = set(old_isos)
+    for iso in new_isos:
+        pointer = f"{block_pointer}/{escape_token(iso)}"
+        if iso not in old_set:
+            patch.append({"op": "add", "path": pointer, "value": new.country(iso)})
+            countries[iso] = {"status": "added", "paths": [""]}
+            continue
+        if old.same_country(new, iso):
+            continue
+        ops = diff_values(old.country(iso), new.country(iso), pointer)
+        if ops:
+            patch.extend(ops)
+            countries[iso] = {"status": "changed", "paths": [op["path"][len(pointer):] for op in ops]}
+    return _changeset(patch, countries, old, new, block)
+
+def _changeset(patch: List[Dict], countries: Dict[str, Dict], old: "CatalogueVersion", new: "CatalogueVersion",
+               block: str) -> Dict:
+    statuses = Counter(info["status"] for info in countries.values())
+    sections = Counter()
+    for info in countries.values():
+        if info["status"] == "changed":
+            sections.update({unescape_token(path.split("/")[1]) for path in info["paths"] if path})
+    return {
+        "_schema": CHANGESET_SCHEMA,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "from": old.label,
+        "to": new.label,
+        "block": block,
+        "stats": {
+            "operations": len(patch),
+            "countries_changed": statuses["changed"],
+            "countries_added": statuses["added"],
+            "countries_removed": statuses["removed"],
+            "sections": dict(sections.most_common()),
+        },
+        "countries": countries,
+        "patch": patch,
+    }
+
+# ============================================================================
+# VERSIONI DEL CATALOGO (file o snapshot)
+# ============================================================================
+
+class CatalogueVersion:
+    """Una versione del catalogo: documento JSON completo, oppure snapshot con blob caricati solo se servono"""
+
+    def __init__(self, label: str, data: Optional[Dict] = None, manifest: Optional[Dict] = None,
+                 directory: Path = BACKUP_DIR, block: str = DEFAULT_BLOCK):
+        self.label = label
+        self.data = data
+        self.manifest = manifest
+        self.directory = Path(directory)
+        self.block = block
+
+    def fields(self) -> Dict:
+        if self.manifest is not None:
+            return self.manifest.get("fields", {})
+        return {k: v for k, v in self.data.items() if k != self.block}
+
+    def isos(self) -> Optional[List[str]]:
+        if self.manifest is not None:
+            return list(self.manifest["countries"])
+        countries = self.data.get(self.block)
+        return list(countries) if isinstance(countries, dict) else None
+
+    def country(self, iso: str) -> Any:
+        if self.manifest is not None:
+            return get_blob(self.directory, self.manifest["countries"][iso])
+        return self.data[self.block][iso]
+
+    def digest(self, iso: str) -> Optional[str]:
+        return self.manifest["countries"][iso] if self.manifest is not None else None
+
+    def same_country(self, other: "CatalogueVersion", iso: str) -> bool:
+        mine, theirs = self.digest(iso), other.digest(iso)
+        if mine is not None and theirs is not None:
+            return mine == theirs
+        return _same(self.country(iso), other.country(iso))
+
+def load_version(spec: str, block: str = DEFAULT_BLOCK, directory: Path = BACKUP_DIR) -> CatalogueVersion:
+    """File JSON, oppure snapshot:<id|prefisso|latest> dello store backup"""
+    if spec.startswith(SNAPSHOT_PREFIX):
+        manifest = find_snapshot(spec[len(SNAPSHOT_PREFIX):], directory)
+        if manifest.get("block", DEFAULT_BLOCK) != block:
+            raise ValueError(f"lo snapshot {manifest['id']} contiene il blocco {manifest.get('block')}, non {block}")
+        return CatalogueVersion(f"{SNAPSHOT_PREFIX}{manifest['id']}", manifest=manifest, directory=directory, block=block)
+    path = Path(spec)
+    with path.open("r", encoding="utf-8") as f:
+        return CatalogueVersion(path.name, data=json.load(f), block=block)
+
+def diff_documents(old: Dict, new: Dict, block: str = DEFAULT_BLOCK, old_label: str = "old",
+                   new_label: str = "new") -> Dict:
+    """Diff di due documenti già in memoria (es. input e output di uno script di update)"""
+    return diff_catalogues(CatalogueVersion(old_label, data=old, block=block),
+                           CatalogueVersion(new_label, data=new, block=block), block=block)
+
+def changeset_path_for(output_file: Path) -> Path:
+    """compliance.v3.updated.json → compliance.v3.updated.changeset.json"""
+    output_file = Path(output_file)
+    return output_file.with_name(f"{output_file.stem}.changeset.json")
+
+def write_changeset(changeset: Dict, path: Path) -> Path:
+    write_json_atomic(path, changeset)
+    return Path(path)
+
+def describe_changeset(changeset: Dict) -> str:
+    stats = changeset["stats"]
+    sections = ", ".join(f"{name} {count}" for name, count in list(stats["sections"].items())[:6])
+    return (f"{stats['operations']} operazioni · {stats['countries_changed']} paesi cambiati, "
+            f"{stats['countries_added']} aggiunti, {stats['countries_removed']} rimossi"
+            f"{f' · sezioni: {sections}' if sections else ''}")
+
+# ============================================================================
+# APPLY
+# ============================================================================
+
+def _resolve_parent(document: Any, tokens: List[str]) -> Tuple[Any, str]:
+    target = document
+    for token in tokens[:-1]:
+        target = target[int(token)] if isinstance(target, list) else target[token]
+    return target, tokens[-1]
+
+def apply_patch(document: Any, patch: List[Dict], in_place: bool = False) -> Any:
+    """Applica operazioni add / remove / replace (RFC 6902) e ritorna il documento risultante"""
+    if not in_place:
+        document = copy.deepcopy(document)
+    for op in patch:
+        tokens = split_pointer(op["path"])
+        if not tokens:
+            if op["op"] == "remove":
+                raise ValueError("remove sulla radice del documento")
+            document = copy.deepcopy(op["value"])
+            continue
+        parent, key = _resolve_parent(document, tokens)
+        value = copy.deepcopy(op.get("value"))
+        if isinstance(parent, list):
+            index = len(parent) if key == "-" else int(key)
+            if op["op"] == "add":
+                parent.insert(index, value)
+            elif op["op"] == "remove":
+                del parent[index]
+            elif op["op"] == "replace":
+                parent[index] = value
+            else:
+                raise ValueError(f"operazione non supportata: {op['op']}")
+        else:
+            if op["op"] in ("add", "replace"):
+                if op["op"] == "replace" and key not in parent:
+                    raise KeyError(f"replace su path inesistente: {op['path']}")
+                parent[key] = value
+            elif op["op"] == "remove":
+                del parent[key]
+            else:
+                raise ValueError(f"operazione non supportata: {op['op']}")
+    return document
+
+# ============================================================================
+# CLI
+# ============================================================================
+def _materialize(version: CatalogueVersion) -> Dict:
+    if version.data is not None:
+        return version.data
+    data = dict(version.fields())
+    data[version.block] = {iso: version.country(iso) for iso in version.isos()}
+    return data
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Diff JSON Patch (RFC 6902) tra versioni del catalogo compliance")
+    parser.add_argument("--dir", type=Path, default=BACKUP_DIR, help="Cartella backup per snapshot:<id> (default: backups/)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    diff_cmd = commands.add_parser("diff", help="Changeset tra due versioni (file o snapshot:<id>)")
+    diff_cmd.add_argument("old")
+    diff_cmd.add_argument("new")
+    diff_cmd.add_argument("--output", type=Path, help="File changeset (default: <new>.changeset.json, o stdout per uno snapshot)")
+    diff_cmd.add_argument("--block", default=DEFAULT_BLOCK)
+    diff_cmd.add_argument("--verify", action="store_true", help="Riapplica il patch alla versione vecchia e confronta con la nuova")
+    apply_cmd = commands.add_parser("apply", help="Applica un changeset a un documento")
+    apply_cmd.add_argument("changeset", type=Path)
+    apply_cmd.add_argument("--base", required=True, help="Documento di partenza (file o snapshot:<id>)")
+    apply_cmd.add_argument("--output", type=Path, required=True)
+    args = parser.parse_args()
+
+    if args.command == "diff":
+        started = time.time()
+        try:
+            old = load_version(args.old, args.block, args.dir)
+            new = load_version(args.new, args.block, args.dir)
+        except (KeyError, ValueError) as e:
+            print(f"❌ {e.args[0]}")
+            raise SystemExit(1)
+        changeset = diff_catalogues(old, new, block=args.block)
+        elapsed = time.time() - started
+        if args.verify:
+            old_doc = _materialize(old)
+            ok = _same(apply_patch(old_doc, changeset["patch"], in_place=True), _materialize(new))
+            print(f"{'✅' if ok else '❌'} Verifica apply(old, patch) == new: {'ok' if ok else 'FALLITA'}")
+            if not ok:
+                raise SystemExit(1)
+        output_file = args.output
+        if output_file is None and not args.new.startswith(SNAPSHOT_PREFIX):
+            output_file = changeset_path_for(Path(args.new))
+        if output_file is None:
+            print(json.dumps(changeset, ensure_ascii=False, indent=2))
+        else:
+            write_changeset(changeset, output_file)
+            print(f"💾 Changeset → {output_file}")
+        print(f"🔍 {old.label} → {new.label}: {describe_changeset(changeset)} ({elapsed:.2f}s)")
+    elif args.command == "apply":
+        with args.changeset.open("r", encoding="utf-8") as f:
+            changeset = json.load(f)
+        try:
+            base = _materialize(load_version(args.base, changeset.get("block", DEFAULT_BLOCK), args.dir))
+        except (KeyError, ValueError) as e:
+            print(f"❌ {e.args[0]}")
+            raise SystemExit(1)
+        write_json_atomic(args.output, apply_patch(base, changeset["patch"], in_place=True))
+        print(f"✅ {len(changeset['patch'])} operazioni applicate → {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""
+Indice a faccette precalcolato su fused_by_iso, scritto accanto al catalogo
+(compliance.v3.json → compliance.v3.index.json).
+
+I consumer (API cataloghi, merge_quote_requests, analisi) non devono più caricare i 2.4 MB del
+catalogo e scorrerlo tutto per domande tipo "paesi europei B2C opt-in con AI disclosure":
+- faccette: continent, regime_b2c / regime_b2b (normalizzati: opt-in, opt-out, permission-based, ...;
+  regole per canale → quella delle chiamate, "mixed" se non univoca), dnc_registry, recording_consent,
+  ai_disclosure, quiet_hours (true / false / unknown), risk_level
+- multe massime convertite in EUR (EUR_RATES, tassi indicativi) per filtri per soglia
+- nel file: faccetta → valore → lista ISO (leggibile anche dal codice TS); al caricamento ogni valore
+  diventa una bitmask (int Python) sulle posizioni dei paesi → una query è qualche AND/OR tra interi
+
+Query API:
+    index = get_index()                        # ricostruisce l'indice se il catalogo è cambiato
+    index.query(continent="Europe", regime_b2c="opt-in", ai_disclosure="true")   # → ISO nell'ordine del catalogo
+    index.query(risk_level=["high", "medium"], fine_eur_min=1_000_000)
+    index.rows(index.query(dnc_registry="true"))   # record compatti per paese
+
+CLI:
+    python compliance_index.py build
+    python compliance_index.py query --continent Europe --regime-b2c opt-in --ai-disclosure true
+"""
+
+import argparse
+import bisect
+import hashlib
+import json
+import re
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+from compliance_journal import write_json_atomic
+
+BASE_DIR = Path(__file__).parent
+CATALOGUE_FILE = BASE_DIR / "compliance.v3.json"
+INDEX_SCHEMA = 2
+UNKNOWN = "unknown"
+
+FACETS = ("continent", "regime_b2c", "regime_b2b", "dnc_registry", "recording_consent", "ai_disclosure",
+          "quiet_hours", "risk_level")
+
+# Tipo di regime (testo libero) → categoria, per prefisso/parola chiave nell'ordine dato
+REGIME_CATEGORIES = (
+    ("opt-in", "opt-in"),
+    ("opt-out", "opt-out"),
+    ("permission", "permission-based"),
+    ("consent", "consent-based"),
+    ("unregulated", "unregulated"),
+    ("limited", "limited-regulation"),
+    ("prohibit", "prohibition-based"),
+)
+# Regole diverse per canale o per fase ("opt-in (proposed); opt-out (current)") senza una regola
+# univoca per le chiamate
+MIXED = "mixed"
+VOICE_CHANNEL_WORDS = ("call", "telephone", "phone", "voice")
+AUTOMATED_CALL_WORDS = ("automat", "prerecord", "robocall")
+
+# EUR per unità di valuta: tassi indicativi, bastano per soglie e ordinamenti (override: --rates file.json)
+EUR_RATES = {
+    "EUR": 1.0, "USD": 0.86, "GBP": 1.15, "CHF": 1.07, "NOK": 0.085, "SEK": 0.091, "DKK": 0.134,
+    "PLN": 0.235, "CZK": 0.041, "HUF": 0.0025, "RON": 0.197, "TRY": 0.021, "RUB": 0.0107,
+    "CAD": 0.62, "AUD": 0.57, "NZD": 0.50, "BBD": 0.43, "BMD": 0.86, "FJD": 0.38,
+    "BRL": 0.16, "MXN": 0.047, "CLP": 0.0009,
+    "AED": 0.235, "SAR": 0.23, "QAR": 0.236, "KWD": 2.8, "ILS": 0.26, "NIS": 0.26, "EGP": 0.018, "LBP": 0.0000096,
+    "INR": 0.0098, "CNY": 0.12, "RMB": 0.12, "JPY": 0.0058, "KRW": 0.00062, "SGD": 0.66, "HKD": 0.11,
+    "MYR": 0.20, "PHP": 0.015, "VND": 0.000033, "KHR": 0.00021, "KZT": 0.0016, "AZN": 0.51, "AFN": 0.0125,
+    "ZAR": 0.049, "KES": 0.0067, "TZS": 0.00035, "UGX": 0.00024, "BIF": 0.00029, "BWP": 0.064,
+    "MUR": 0.019, "NGN": 0.00057, "GHS": 0.08,
+    "CFA": 0.001524, "XOF": 0.001524, "XAF": 0.001524,  # franco CFA: cambio fisso 655.957 per EUR
+}
+
+# ============================================================================
+# NORMALIZZAZIONE CAMPI → VALORI DI FACCETTA
+# ============================================================================
+
+def _tri_state(*values: Any) -> str:
+    """true se un valore è True, false se nessuno è True ma uno è False, altrimenti unknown"""
+    if any(v is True for v in values):
+        return "true"
+    if any(v is False for v in values):
+        return "false"
+    return UNKNOWN
+
+def _channel_regime(text: str) -> Optional[str]:
+    """Regime per canale ("opt-in for email, opt-out for calls"): categoria della clausola chiamate,
+    "mixed" se le clausole non si riducono a una sola regola per le chiamate, None se non è multi-canale"""
+    if text.startswith(MIXED):
+        text = text[len(MIXED):].lstrip(" :-")
+    clauses = [c.strip() for c in re.split(r"[;,]", text) if c.strip()]
+    regimes = [(c, category) for c in clauses for keyword, category in REGIME_CATEGORIES[:2] if c.startswith(keyword)]
+    if len({category for _, category in regimes}) < 2:
+        return None
+    calls = [(c, category) for c, category in regimes if any(w in c for w in VOICE_CHANNEL_WORDS)]
+    # "opt-in for automated; opt-out for live calls": anche l'altra clausola riguarda chiamate
+    others = [c for c, _ in regimes if c != calls[0][0]] if len(calls) == 1 else []
+    if len(calls) == 1 and not any(w in c for c in others for w in AUTOMATED_CALL_WORDS):
+        return calls[0][1]
+    return MIXED
+
+def normalize_regime(value: Any) -> str:
+    if not isinstance(value, str) or not value.strip():
+        return UNKNOWN
+    text = value.strip().lower()
+    channel = _channel_regime(text)
+    if channel is not None:
+        return channel
+    if text.startswith(MIXED):
+        return MIXED
+    for keyword, category in REGIME_CATEGORIES:
+        if text.startswith(keyword):
+            return category
+    for keyword, category in REGIME_CATEGORIES:
+        if keyword in text:
+            return category
+    return "other"
+
+def quiet_hours_state(quiet_hours: Any) -> str:
+    """true se ci sono ore vietate (enabled o orari/giorni valorizzati), false se esplicitamente assenti"""
+    if not isinstance(quiet_hours, dict):
+        return UNKNOWN
+    weekdays = quiet_hours.get("weekdays") or {}
+    if (quiet_hours.get("enabled") is True or (isinstance(weekdays, dict) and weekdays.get("start"))
+            or quiet_hours.get("saturday") or quiet_hours.get("sunday")):
+        return "true"
+    return "false" if quiet_hours.get("enabled") is False else UNKNOWN
+
+def fine_to_eur(max_fine: Any, rates: Dict[str, float] = EUR_RATES) -> Optional[float]:
+    """Multa massima in EUR (None se assente o in una valuta/unità non convertibile)"""
+    if not isinstance(max_fine, dict):
+        return None
+    amount = max_fine.get("amount")
+    currency = str(max_fine.get("currency") or "").strip().upper()
+    if not isinstance(amount, (int, float)) or isinstance(amount, bool) or currency not in rates:
+        return None
+    return round(amount * rates[currency], 2)
+
+def facet_values(country: Dict, rates: Dict[str, float] = EUR_RATES) -> Dict[str, Any]:
+    """Valori di faccetta di un paese + fine_eur"""
+    regime = country.get("regime") or {}
+    ai = country.get("ai_disclosure") or {}
+    enforcement = country.get("enforcement") or {}
+    risk = enforcement.get("risk_level")
+    return {
+        "continent": country.get("continent") or UNKNOWN,
+        "regime_b2c": normalize_regime((regime.get("b2c") or {}).get("type")),
+        "regime_b2b": normalize_regime((regime.get("b2b") or {}).get("type")),
+        "dnc_registry": _tri_state((country.get("dnc") or {}).get("has_registry")),
+        "recording_consent": _tri_state((country.get("recording") or {}).get("consent_required")),
+        "ai_disclosure": _tri_state(ai.get("required"), ai.get("mandatory")),
+        "quiet_hours": quiet_hours_state(country.get("quiet_hours")),
+        "risk_level": risk.strip().lower() if isinstance(risk, str) and risk.strip() else UNKNOWN,
+        "fine_eur": fine_to_eur(enforcement.get("max_fine"), rates),
+    }
+
+# ============================================================================
+# BUILD
+# ============================================================================
+
+def index_path_for(catalogue_file: Path) -> Path:
+    """compliance.v3.json → compliance.v3.index.json"""
+    catalogue_file = Path(catalogue_file)
+    return catalogue_file.with_name(f"{catalogue_file.stem}.index.json")
+
+def file_sha256(path: Path) -> str:
+    return hashlib.sha256(Path(path).read_bytes()).hexdigest()
+
+def build_index(data: Dict, source: Optional[str] = None, source_sha256: Optional[str] = None,
+                rates: Dict[str, float] = EUR_RATES) -> Dict:
+    fused = data.get("fused_by_iso", {})
+    countries = list(fused)
+    rows: Dict[str, Dict] = {}
+    facets: Dict[str, Dict[str, List[str]]] = {facet: {} for facet in FACETS}
+    fines = []
+    for iso, country in fused.items():
+        values = facet_values(country, rates)
+        for facet in FACETS:
+            facets[facet].setdefault(values[facet], []).append(iso)
+        if values["fine_eur"] is not None:
+            fines.append([values["fine_eur"], iso])
+        rows[iso] = {"country": country.get("country") or iso, **values}
+    fines.sort()
+    return {
+        "_schema": INDEX_SCHEMA,
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "source": source,
+        "source_sha256": source_sha256,
+        "countries": countries,
+        "facets": {facet: dict(sorted(values.items())) for facet, values in facets.items()},
+        "fines_eur": fines,
+        "rows": rows,
+    }
+
+def write_index(catalogue_file: Path, data: Optional[Dict] = None, output_file: Optional[Path] = None,
+                rates: Dict[str, float] = EUR_RATES) -> Path:
+    """Costruisce e scrive l'indice accanto al catalogo (data già in memoria → niente rilettura del JSON)"""
+    catalogue_file = Path(catalogue_file)
+    if data is None:
+        with catalogue_file.open("r", encoding="utf-8") as f:
+            data = json.load(f)
+    index = build_index(data, source=catalogue_file.name, source_sha256=file_sha256(catalogue_file), rates=rates)
+    output_file = output_file or index_path_for(catalogue_file)
+    write_json_atomic(output_file, index)
+    return Path(output_file)
+
+# ============================================================================
+# QUERY
+# ============================================================================
+
+class ComplianceIndex:
+    """Indice caricato: ogni valore di faccetta è una bitmask sulle posizioni dei paesi"""
+
+    def __init__(self, index: Dict):
+        self.schema = index.get("_schema")
+        self.source = index.get("source")
+        self.source_sha256 = index.get("source_sha256")
+        self.countries: List[str] = index["countries"]
+        self._position = {iso: i for i, iso in enumerate(self.countries)}
+        self._rows: Dict[str, Dict] = index["rows"]
+        self._all = (1 << len(self.countries)) - 1
+        self._masks: Dict[str, Dict[str, int]] = {
+            facet: {value: self._mask(isos) for value, isos in values.items()}
+            for facet, values in index["facets"].items()
+        }
+        self._fine_values = [fine for fine, _ in index["fines_eur"]]
+        # _fine_prefix[i] = paesi delle prime i multe (ordinate): un intervallo è lo XOR di due prefissi
+        self._fine_prefix = [0]
+        for _, iso in index["fines_eur"]:
+            self._fine_prefix.append(self._fine_prefix[-1] | 1 << self._position[iso])
+
+    @classmethod
+    def load(cls, path: Path) -> "ComplianceIndex":
+        with Path(path).open("r", encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def _mask(self, isos: Iterable[str]) -> int:
+        mask = 0
+        for iso in isos:
+            mask |= 1 << self._position[iso]
+        return mask
+
+    def values(self, facet: str) -> Dict[str, int]:
+        """Valori della faccetta con il numero di paesi"""
+        return {value: bin(mask).count("1") for value, mask in self._masks[facet].items()}
+
+    def mask(self, fine_eur_min: Optional[float] = None, fine_eur_max: Optional[float] = None,
+             **filters: Union[str, bool, Iterable[str]]) -> int:
+        """Bitmask dei paesi che soddisfano i filtri (AND tra faccette, OR tra i valori di una faccetta)"""
+        result = self._all
+        for facet, wanted in filters.items():
+            if facet not in self._masks:
+                raise KeyError(f"faccetta sconosciuta: {facet} (disponibili: {', '.join(self._masks)})")
+            if isinstance(wanted, (str, bool)):
+                wanted = [wanted]
+            facet_mask = 0
+            for value in wanted:
+                value = str(value).lower() if isinstance(value, bool) else value
+                facet_mask |= self._masks[facet].get(value, 0)
+            result &= facet_mask
+            if not result:
+                return 0
+        if fine_eur_min is not None or fine_eur_max is not None:
+            # fines_eur è ordinato: l'intervallo si trova con due bisect
+            lo = bisect.bisect_left(self._fine_values, fine_eur_min) if fine_eur_min is not None else 0
+            hi = bisect.bisect_right(self._fine_values, fine_eur_max) if fine_eur_max is not None else len(self._fine_values)
+            result &= self._fine_prefix[max(hi, lo)] ^ self._fine_prefix[lo]
+        return result
+
+    def query(self, **filters) -> List[str]:
+        """ISO dei paesi che soddisfano i filtri, nell'ordine del catalogo"""
+        mask = self.mask(**filters)
+        isos = []
+        while mask:
+            low = mask & -mask
+            isos.append(self.countries[low.bit_length() - 1])
+            mask ^= low
+        return isos
+
+    def count(self, **filters) -> int:
+        return bin(self.mask(**filters)).count("1")
+
+    def rows(self, isos: Iterable[str]) -> List[Dict]:
+        return [{"iso": iso, **self._rows[iso]} for iso in isos]
+
+def get_index(catalogue_file: Path = CATALOGUE_FILE, rebuild: bool = False) -> ComplianceIndex:
+    """Indice del catalogo: riusa <catalogo>.index.json se costruito da questo stesso file, altrimenti lo ricostruisce"""
+    catalogue_file = Path(catalogue_file)
+    index_file = index_path_for(catalogue_file)
+    if not rebuild and index_file.exists():
+        index = ComplianceIndex.load(index_file)
+        if index.schema == INDEX_SCHEMA and index.source_sha256 == file_sha256(catalogue_file):
+            return index
+    return ComplianceIndex.load(write_index(catalogue_file))
+
+# ============================================================================
+# CLI
+# ============================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description="Indice a faccette del catalogo compliance")
+    parser.add_argument("--file", type=Path, default=CATALOGUE_FILE, help="Catalogo (default: compliance.v3.json)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build_cmd = commands.add_parser("build", help="Scrive <catalogo>.index.json")
+    build_cmd.add_argument("--rates", type=Path, help="JSON {valuta: EUR per unità} che sostituisce/integra i tassi indicativi")
+    query_cmd = commands.add_parser("query", help="Paesi che soddisfano i filtri (valori multipli separati da virgola)")
+    for facet in FACETS:
+        query_cmd.add_argument(f"--{facet.replace('_', '-')}", dest=facet)
+    query_cmd.add_argument("--fine-eur-min", type=float)
+    query_cmd.add_argument("--fine-eur-max", type=float)
+    query_cmd.add_argument("--values", action="store_true", help="Mostra i valori disponibili per ogni faccetta")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        rates = dict(EUR_RATES)
+        if args.rates:
+            rates.update({k.upper(): float(v) for k, v in json.loads(args.rates.read_text(encoding="utf-8")).items()})
+        started = time.time()
+        index_file = write_index(args.file, rates=rates)
+        index = ComplianceIndex.load(index_file)
+        print(f"✅ {index_file.name}: {len(index.countries)} paesi, {len(FACETS)} faccette, "
+              f"{len(index._fine_values)} multe in EUR ({time.time() - started:.2f}s)")
+    elif args.command == "query":
+        index = get_index(args.file)
+        if args.values:
+            for facet in FACETS:
+                print(f"  {facet:<18} " + ", ".join(f"{v} ({n})" for v, n in index.values(facet).items()))
+            return
+        filters = {facet: getattr(args, facet).split(",") for facet in FACETS if getattr(args, facet)}
+        started = time.perf_counter()
+        isos = index.query(fine_eur_min=args.fine_eur_min, fine_eur_max=args.fine_eur_max, **filters)
+        elapsed_us = (time.perf_counter() - started) * 1e6
+        for row in index.rows(isos):
+            fine = f"€{row['fine_eur']:,.0f}" if row["fine_eur"] is not None else "-"
+            print(f"  {row['iso']:<3} {row['country'][:30]:<30} b2c {row['regime_b2c']:<17} rischio {row['risk_level']:<8} multa {fine}")
+        print(f"🔎 {len(isos)} paesi ({elapsed_us:.0f} µs)")
+
+if __name__ == "__main__":
+    main()
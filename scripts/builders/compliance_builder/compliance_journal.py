@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Journal append-only (JSONL) per gli script del compliance builder.
+
+Ogni paese completato è una riga {"iso", "data", ...extra} scritta con flush + fsync: un crash
+perde al massimo il paese in corso, e gli script non riscrivono più l'intero compliance.v3.json
+(2.4 MB, indent=2) ogni 10 paesi o a ogni batch. A fine run compact() applica il journal al
+documento base e scrive il JSON finale una sola volta (scrittura atomica tmp + rename).
+
+- CountryJournal(path, resume=False): nuova run → journal azzerato; resume=True → rilegge le
+  righe (l'ultima per paese vince) e tronca un'eventuale riga finale incompleta
+- Il journal resta su disco dopo la compattazione: un --resume successivo lo rilegge,
+  una nuova run senza --resume lo azzera
+
+Compattazione manuale di un journal rimasto da una run interrotta:
+    python compliance_journal.py compliance.v3.journal.jsonl --base compliance.v3.json
+    python compliance_journal.py quote_requests_ai.journal.jsonl --base quote_requests_ai.json --block countries
+"""
+
+import argparse
+import json
+import os
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+JOURNAL_SCHEMA = 1
+
+def journal_path_for(output_file: Path) -> Path:
+    """compliance.v3.json → compliance.v3.journal.jsonl (accanto al file finale)"""
+    output_file = Path(output_file)
+    return output_file.with_name(f"{output_file.stem}.journal.jsonl")
+
+def write_json_atomic(path: Path, data: Any):
+    """Scrive il JSON su un file temporaneo e lo rinomina: mai un file finale a metà"""
+    path = Path(path)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with tmp_path.open("w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+class CountryJournal:
+    """Journal di una run: append() per paese completato, records per il resume"""
+
+    def __init__(self, path: Path, resume: bool = False, meta: Optional[Dict] = None):
+        self.path = Path(path)
+        self.meta: Dict = dict(meta or {})
+        self.records: Dict[str, Dict] = {}
+        self.torn = 0  # righe finali incomplete scartate al resume
+        self._lock = threading.Lock()
+
+        if resume and self.path.exists():
+            self._load()
+            self._file = self.path.open("a", encoding="utf-8")
+        else:
+            self._file = self.path.open("w", encoding="utf-8")
+            header = {"_schema": JOURNAL_SCHEMA, "started_at": datetime.now(timezone.utc).isoformat(), "meta": self.meta}
+            self._write_line(header)
+
+    def _load(self):
+        raw = self.path.read_bytes()
+        good_offset = 0
+        for line in raw.splitlines(keepends=True):
+            try:
+                if not line.endswith(b"\n"):
+                    raise ValueError("riga incompleta")
+                record = json.loads(line)
+            except ValueError:
+                # Solo l'ultima riga può essere a metà (crash durante la scrittura): si scarta
+                self.torn += 1
+                break
+            good_offset += len(line)
+            if "_schema" in record:
+                self.meta = record.get("meta", self.meta)
+            elif record.get("iso"):
+                self.records[record["iso"]] = record
+        if good_offset < len(raw):
+            with self.path.open("r+b") as f:
+                f.truncate(good_offset)
+
+    def _write_line(self, record: Dict):
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def append(self, iso: str, data: Any, **extra):
+        """Registra il risultato finale di un paese (data = oggetto paese completo) + campi extra (changes, cost, ...)"""
+        record = {"iso": iso, "data": data, "at": datetime.now(timezone.utc).isoformat(), **extra}
+        with self._lock:
+            self._write_line(record)
+            self.records[iso] = record
+
+    def __contains__(self, iso: str) -> bool:
+        return iso in self.records
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def apply(self, block: Dict[str, Any]) -> int:
+        """Copia nel blocco (es. fused_by_iso) i dati dei paesi nel journal; ritorna quanti"""
+        for iso, record in self.records.items():
+            block[iso] = record["data"]
+        return len(self.records)
+
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+def compact(journal: CountryJournal, base: Dict, output_file: Path, block: str = "fused_by_iso",
+            order: Optional[Iterable[str]] = None) -> Dict:
+    """
+    Applica il journal a base[block] e scrive output_file (atomico). order (es. ISO da
+    countries.csv) fissa l'ordine dei paesi; quelli non elencati restano in coda.
+    """
+    countries = base.setdefault(block, {})
+    journal.apply(countries)
+    if order is not None:
+        position = {iso: idx for idx, iso in enumerate(order)}
+        base[block] = dict(sorted(countries.items(), key=lambda kv: position.get(kv[0], len(position))))
+    write_json_atomic(output_file, base)
+    return base
+
+def main():
+    parser = argparse.ArgumentParser(description="Compatta un journal JSONL nel file JSON finale")
+    parser.add_argument("journal", type=Path, help="File journal (*.journal.jsonl)")
+    parser.add_argument("--base", type=Path, required=True, help="Documento base a cui applicare il journal")
+    parser.add_argument("--output", type=Path, help="File di output (default: --base)")
+    parser.add_argument("--block", default="fused_by_iso", help="Blocco paesi nel documento (default: fused_by_iso)")
+    args = parser.parse_args()
+
+    if not args.journal.exists():
+        print(f"❌ Journal non trovato: {args.journal}")
+        raise SystemExit(1)
+    base = json.loads(args.base.read_text(encoding="utf-8")) if args.base.exists() else {}
+    journal = CountryJournal(args.journal, resume=True)
+    journal.close()
+    output_file = args.output or args.base
+    compact(journal, base, output_file, block=args.block)
+    print(f"✅ {len(journal)} paesi dal journal applicati → {output_file}"
+          f"{f' ({journal.torn} riga incompleta scartata)' if journal.torn else ''}")
+
+if __name__ == "__main__":
+    main()
@@ -8,14 +8,22 @@ import argparse
 import csv
 import json
 import os
+import sys
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Dict, Any, List
 
-import httpx
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from llm_runtime.cache import configure_response_cache
+from llm_runtime.calls import add_runtime_arguments, post_json_cached
+from llm_runtime.concurrency import get_controller
+from llm_runtime.jobs import JobResult, run_jobs
+
+from compliance_journal import CountryJournal, compact, journal_path_for
 
 BASE_DIR = Path(__file__).parent
 OUTPUT_JSON = BASE_DIR / "quote_requests_ai.json"
+JOURNAL_FILE = journal_path_for(OUTPUT_JSON)
 
 
 def call_perplexity_for_quote_requests(country_name: str, iso: str, model: str = "sonar") -> Dict[str, Any]:
@@ -78,10 +86,8 @@ Return ONLY valid JSON, no additional text."""
         "return_citations": True,
     }
 
-    with httpx.Client(timeout=120.0) as client:
-        response = client.post(url, headers=headers, json=payload)
-        response.raise_for_status()
-        data = response.json()
+    # Richieste identiche (rerun, --resume) servite dalla cache risposte su disco
+    data, cached_request = post_json_cached("perplexity", url, headers, payload, label=model)
 
     content = data["choices"][0]["message"]["content"]
     
@@ -107,6 +113,7 @@ Return ONLY valid JSON, no additional text."""
     
     try:
         result = json.loads(content)
+        cached_request.store(data)  # solo risposte con JSON valido
         
         # Extract sources from citations if available
         citations = data.get("citations", [])
@@ -176,8 +183,10 @@ def main() -> None:
         action="store_true",
         help="Resume from existing file",
     )
+    add_runtime_arguments(parser)
     
     args = parser.parse_args()
+    configure_response_cache(no_cache=args.no_cache, refresh=args.refresh_cache)
     
     # Load countries
     all_countries = load_countries()
@@ -210,69 +219,74 @@ def main() -> None:
         "countries": existing_data.get("countries", {})
     }
     
+    # Un paese completato = una riga nel journal (fsync); il JSON si scrive una volta sola a fine run
+    journal = CountryJournal(JOURNAL_FILE, resume=args.resume)
+    if args.resume and len(journal):
+        journal.apply(output["countries"])
+        print(f"✅ Trovati {len(journal)} paesi nel journal {JOURNAL_FILE.name}")
+    
     print(f"\n🚀 Processando {len(countries_to_process)} paesi...")
     print(f"📊 Model: {args.model}")
     if args.resume:
         print("🔄 Resume mode: True\n")
     
+    pending = [c for c in countries_to_process if not (args.resume and c["iso"] in output["countries"])]
+    skipped = len(countries_to_process) - len(pending)
     processed = 0
-    skipped = 0
     
-    for idx, country_seed in enumerate(countries_to_process, 1):
-        iso = country_seed["iso"]
-        name = country_seed["country"]
-        
-        # Skip if already processed (in resume mode)
-        if args.resume and iso in output["countries"]:
-            skipped += 1
-            continue
-        
-        print(f"[{idx}/{len(countries_to_process)}] {name} ({iso})...", flush=True)
+    def on_result(result: JobResult) -> None:
+        nonlocal processed
+        iso = result.item["iso"]
+        name = result.item["country"]
+        print(f"[{result.done}/{len(pending)}] {name} ({iso})...", flush=True)
         
-        try:
-            result = call_perplexity_for_quote_requests(name, iso, args.model)
-            
+        if result.ok:
+            res = result.value
             output["countries"][iso] = {
                 "iso": iso,
                 "country": name,
-                "allowed_without_disclosure": result["allowed_without_disclosure"],
-                "exceptions": result["exceptions"],
-                "note": result["note"],
-                "sources": result["sources"]
+                "allowed_without_disclosure": res["allowed_without_disclosure"],
+                "exceptions": res["exceptions"],
+                "note": res["note"],
+                "sources": res["sources"]
             }
             
-            if result["allowed_without_disclosure"] is True:
-                print(f"  ✅ Allowed without disclosure: {result['exceptions']}", flush=True)
-            elif result["allowed_without_disclosure"] is False:
+            if res["allowed_without_disclosure"] is True:
+                print(f"  ✅ Allowed without disclosure: {res['exceptions']}", flush=True)
+            elif res["allowed_without_disclosure"] is False:
                 print(f"  ❌ Disclosure required", flush=True)
             else:
                 print(f"  ⚠️  Unclear/No data", flush=True)
             
             processed += 1
-            
-        except Exception as e:
-            print(f"  ⚠️  Errore: {str(e)[:100]}", flush=True)
+        else:
+            print(f"  ⚠️  Errore: {str(result.error)[:100]}", flush=True)
             output["countries"][iso] = {
                 "iso": iso,
                 "country": name,
                 "allowed_without_disclosure": None,
                 "exceptions": [],
-                "note": f"Error: {str(e)[:100]}",
+                "note": f"Error: {str(result.error)[:100]}",
                 "sources": []
             }
-            continue
         
-        # Save periodically
-        if idx % 10 == 0:
-            output["generated_at"] = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
-            with OUTPUT_JSON.open("w", encoding="utf-8") as f:
-                json.dump(output, f, ensure_ascii=False, indent=2)
-            print(f"  💾 Progress saved ({idx}/{len(countries_to_process)})", flush=True)
+        journal.append(iso, output["countries"][iso])
+    
+    # Paesi in parallelo (limite AIMD "perplexity" + --rpm), merge e salvataggi al completamento di ciascuno
+    get_controller("perplexity", max_limit=args.max_concurrency)
+    run_jobs(
+        pending,
+        lambda c: call_perplexity_for_quote_requests(c["country"], c["iso"], args.model),
+        label=lambda c: c["iso"],
+        provider="perplexity",
+        rpm=args.rpm,
+        on_result=on_result,
+    )
     
-    # Final save
+    # Compattazione: journal → quote_requests_ai.json
+    journal.close()
     output["generated_at"] = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
-    with OUTPUT_JSON.open("w", encoding="utf-8") as f:
-        json.dump(output, f, ensure_ascii=False, indent=2)
+    compact(journal, output, OUTPUT_JSON, block="countries")
     
     print(f"\n✅ Completato!")
     print(f"  Processati: {processed}")
@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+"""
+Motore quiet hours: quali paesi si possono chiamare adesso / all'istante T, e se una singola
+chiamata (paese, ora locale) è permessa, senza riparsare il JSON a ogni decisione.
+
+Compilazione (una volta, da fused_by_iso):
+- per paese una bitmask della settimana in minuti locali (10080 bit, lunedì 00:00 = bit 0), 1 = chiamata permessa
+- quiet_hours.weekdays start/end = finestra VIETATA (anche a cavallo di mezzanotte, es. 21:00 → 08:00)
+- saturday / sunday: {start, end} = finestra vietata di quel giorno, null = vale la finestra dei giorni
+  feriali; true / false non hanno un significato univoco nel catalogo (US true con 8-21 permesso,
+  FR false con weekend vietato) → solo quel giorno è incerto e lo decide unknown_policy, i giorni
+  feriali restano compilati dalla finestra weekdays
+- holidays: true = giorno intero vietato nelle date passate in holidays={iso: {date, ...}}
+- paesi senza regole = sempre permessi; regole presenti ma non interpretabili ("daytime hours")
+  → unknown_policy ("allow" di default, come "non specificato = permesso" nei prompt; "deny" per i dialer prudenti)
+- fuso: quiet_hours.timezone se è un nome IANA, altrimenti i fusi del paese (zone.tab); con più fusi
+  ("recipient's local time": US, CA, AU, ...) il paese è permesso solo dove lo è in tutti i fusi
+
+Tabella UTC (per insieme di offset, quindi ricalcolata solo ai cambi di ora legale): le bitmask locali
+ruotate in minuti UTC della settimana e fuse in segmenti → "chi si può chiamare all'istante T" è un
+bisect + una bitmask su tutti i 204 paesi insieme. Le decisioni (paese, ora locale) sono uno shift
+su un intero.
+
+Uso:
+    python quiet_hours_engine.py now
+    python quiet_hours_engine.py at 2026-10-19T20:30:00Z
+    python quiet_hours_engine.py check IT "2026-10-19 21:30" FR "2026-10-18 11:00"
+    python quiet_hours_engine.py bench
+"""
+
+import argparse
+import bisect
+import json
+import re
+import time
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError, TZPATH
+
+BASE_DIR = Path(__file__).parent
+CATALOGUE_FILE = BASE_DIR / "compliance.v3.json"
+
+DAY_MINUTES = 24 * 60
+WEEK_MINUTES = 7 * DAY_MINUTES
+FULL_WEEK = (1 << WEEK_MINUTES) - 1
+SATURDAY, SUNDAY = 5, 6
+WEEKEND_KEYS = ("saturday", "sunday")
+UTC_BUCKET_SECONDS = 15 * 60  # i cambi di offset cadono su multipli di 15 minuti UTC
+
+STATUS_RESTRICTED = "restricted"      # finestre vietate compilate
+STATUS_UNRESTRICTED = "unrestricted"  # nessuna regola: sempre permesso
+STATUS_UNPARSED = "unparsed"          # regole presenti ma non interpretabili → unknown_policy
+
+_TIME_RE = re.compile(r"^\s*(\d{1,2})[:.](\d{2})\s*$")
+
+# ============================================================================
+# FUSI ORARI
+# ============================================================================
+
+_country_zones: Optional[Dict[str, List[str]]] = None
+
+def country_zones(iso: str) -> List[str]:
+    """Fusi IANA del paese da zone.tab (tzdata di sistema)"""
+    global _country_zones
+    if _country_zones is None:
+        _country_zones = {}
+        for directory in TZPATH:
+            path = Path(directory) / "zone.tab"
+            if not path.exists():
+                continue
+            for line in path.read_text(encoding="utf-8").splitlines():
+                if line.startswith("#") or not line.strip():
+                    continue
+                fields = line.split("\t")
+                if len(fields) >= 3:
+                    _country_zones.setdefault(fields[0], []).append(fields[2])
+            break
+    return _country_zones.get(iso.upper(), [])
+
+def resolve_zones(iso: str, timezone_value: Any) -> List[str]:
+    """Nome IANA esplicito, altrimenti i fusi del paese; UTC se non si trova nulla"""
+    # Solo nomi IANA veri: le sigle (GST, IST, HKT) sono ambigue e "recipient's local time" non è un fuso
+    if isinstance(timezone_value, str) and ("/" in timezone_value or timezone_value in ("UTC", "CET", "EET", "WET")):
+        try:
+            ZoneInfo(timezone_value)
+            return [timezone_value]
+        except (ZoneInfoNotFoundError, ValueError):
+            pass
+    return country_zones(iso) or ["UTC"]
+
+# ============================================================================
+# COMPILAZIONE REGOLE → BITMASK LOCALE
+# ============================================================================
+
+def parse_time(value: Any) -> Optional[int]:
+    """'21:00' → minuti dalla mezzanotte (24:00 = 1440); None se non interpretabile"""
+    if not isinstance(value, str):
+        return None
+    match = _TIME_RE.match(value)
+    if not match:
+        return None
+    hours, minutes = int(match.group(1)), int(match.group(2))
+    if hours > 24 or minutes > 59 or (hours == 24 and minutes):
+        return None
+    return hours * 60 + minutes
+
+def _range_mask(start: int, end: int) -> int:
+    """Bit [start, end) della settimana, con giro su lunedì 00:00"""
+    start %= WEEK_MINUTES
+    length = end - start if end > start else end % WEEK_MINUTES + WEEK_MINUTES - start
+    length = min(length, WEEK_MINUTES)
+    mask = ((1 << length) - 1) << start
+    return (mask | (mask >> WEEK_MINUTES)) & FULL_WEEK
+
+def _window(rule: Any) -> Optional[Tuple[int, int]]:
+    if not isinstance(rule, dict):
+        return None
+    start, end = parse_time(rule.get("start")), parse_time(rule.get("end"))
+    if start is None or end is None or start == end:
+        return None
+    return start, end
+
+def _has_rules(quiet_hours: Dict) -> bool:
+    weekdays = quiet_hours.get("weekdays") or {}
+    return bool((isinstance(weekdays, dict) and (weekdays.get("start") or weekdays.get("end")))
+                or any(quiet_hours.get(day) or isinstance(quiet_hours.get(day), bool) for day in WEEKEND_KEYS))
+
+def compile_local_mask(quiet_hours: Any) -> Tuple[int, int, str]:
+    """(minuti locali permessi, minuti incerti, stato) della settimana per un oggetto quiet_hours.
+
+    Incerti = giorni del weekend con un booleano (e tutta la settimana se nulla è interpretabile):
+    né permessi né vietati, li risolve unknown_policy. La finestra notturna feriale resta valida
+    anche a cavallo di un giorno incerto (venerdì 21:00 → sabato 08:00, domenica notte → lunedì)."""
+    if not isinstance(quiet_hours, dict) or quiet_hours.get("enabled") is False or not _has_rules(quiet_hours):
+        return FULL_WEEK, 0, STATUS_UNRESTRICTED
+    weekday_window = _window(quiet_hours.get("weekdays"))
+    forbidden = spill = unknown_days = 0
+    parsed_any = False
+    for day in range(7):
+        rule = quiet_hours.get("saturday") if day == SATURDAY else quiet_hours.get("sunday") if day == SUNDAY else None
+        if isinstance(rule, bool):
+            unknown_days |= _range_mask(day * DAY_MINUTES, (day + 1) * DAY_MINUTES)
+            # Del giorno incerto resta solo la coda notturna sul giorno dopo
+            if weekday_window is not None and weekday_window[1] <= weekday_window[0]:
+                next_day = (day + 1) % 7 * DAY_MINUTES
+                spill |= _range_mask(next_day, next_day + weekday_window[1])
+            continue
+        window = _window(rule) or weekday_window
+        if window is None:
+            continue
+        start, end = window
+        # Finestra che attraversa la mezzanotte: finisce il giorno dopo
+        forbidden |= _range_mask(day * DAY_MINUTES + start, (day + (1 if end <= start else 0)) * DAY_MINUTES + end)
+        parsed_any = True
+    if not parsed_any:
+        return 0, FULL_WEEK, STATUS_UNPARSED
+    forbidden |= spill & ~unknown_days
+    unknown = unknown_days & ~forbidden
+    return FULL_WEEK & ~forbidden & ~unknown, unknown, STATUS_RESTRICTED
+
+def rotate(mask: int, shift: int) -> int:
+    """Ruota la bitmask settimanale di shift minuti (positivo = verso minuti successivi)"""
+    shift %= WEEK_MINUTES
+    if not shift:
+        return mask
+    return ((mask << shift) | (mask >> (WEEK_MINUTES - shift))) & FULL_WEEK
+
+def mask_runs(mask: int) -> Iterable[Tuple[int, int]]:
+    """Intervalli [start, end) di bit a 1"""
+    bits = format(mask, f"0{WEEK_MINUTES}b")[::-1]
+    for match in re.finditer("1+", bits):
+        yield match.start(), match.end()
+
+# ============================================================================
+# MOTORE
+# ============================================================================
+
+class QuietHoursEngine:
+    """Regole compilate di tutti i paesi; decisioni senza rileggere il catalogo"""
+
+    def __init__(self, fused: Dict[str, Dict], holidays: Optional[Dict[str, Set[date]]] = None,
+                 unknown_policy: str = "allow"):
+        if unknown_policy not in ("allow", "deny"):
+            raise ValueError(f"unknown_policy non valida: {unknown_policy} (valori: allow, deny)")
+        self.countries: List[str] = list(fused)
+        self._position = {iso: i for i, iso in enumerate(self.countries)}
+        self.local_masks: Dict[str, int] = {}
+        self.unknown_masks: Dict[str, int] = {}
+        self.status: Dict[str, str] = {}
+        self.zones: Dict[str, List[str]] = {}
+        self.holidays = {iso.upper(): set(days) for iso, days in (holidays or {}).items()}
+        self._holiday_rule: Set[str] = set()
+        for iso, country in fused.items():
+            quiet_hours = country.get("quiet_hours") or {}
+            mask, unknown, status = compile_local_mask(quiet_hours)
+            self.local_masks[iso] = mask | unknown if unknown_policy == "allow" else mask
+            self.unknown_masks[iso] = unknown
+            self.status[iso] = status
+            self.zones[iso] = resolve_zones(iso, quiet_hours.get("timezone") or (quiet_hours.get("weekdays") or {}).get("timezone"))
+            if quiet_hours.get("holidays") is True:
+                self._holiday_rule.add(iso)
+        self._tz = {name: ZoneInfo(name) for zones in self.zones.values() for name in zones}
+        self._tables: Dict[Tuple, Tuple[List[int], List[int]]] = {}
+        self._bucket: Optional[int] = None
+        self._bucket_key: Optional[Tuple] = None
+
+    @classmethod
+    def from_file(cls, path: Path = CATALOGUE_FILE, **options) -> "QuietHoursEngine":
+        with Path(path).open("r", encoding="utf-8") as f:
+            return cls(json.load(f).get("fused_by_iso", {}), **options)
+
+    # ---------------- tabella UTC ----------------
+
+    def _offsets_key(self, moment: datetime) -> Tuple:
+        """Offset (minuti) di ogni fuso all'istante: chiave della tabella, costante dentro un bucket di 15 minuti"""
+        bucket = int(moment.timestamp()) // UTC_BUCKET_SECONDS
+        if bucket != self._bucket:
+            self._bucket_key = tuple(sorted(
+                (name, int(tz.utcoffset(moment).total_seconds() // 60)) for name, tz in self._tz.items()
+            ))
+            self._bucket = bucket
+        return self._bucket_key
+
+    def _compile_table(self, offsets: Dict[str, int]) -> Tuple[List[int], List[int]]:
+        """Segmenti della settimana UTC: boundaries[i] = minuto d'inizio, masks[i] = paesi permessi"""
+        events: Dict[int, int] = {0: 0}
+        for iso, local_mask in self.local_masks.items():
+            bit = 1 << self._position[iso]
+            if local_mask == FULL_WEEK:
+                events[0] ^= bit
+                continue
+            # locale = UTC + offset → minuto UTC = minuto locale - offset; con più fusi vale l'intersezione
+            utc_mask = FULL_WEEK
+            for name in self.zones[iso]:
+                utc_mask &= rotate(local_mask, -offsets[name])
+            for start, end in mask_runs(utc_mask):
+                events[start] = events.get(start, 0) ^ bit
+                if end < WEEK_MINUTES:
+                    events[end] = events.get(end, 0) ^ bit
+        boundaries, masks, current = [], [], 0
+        for minute in sorted(events):
+            current ^= events[minute]
+            boundaries.append(minute)
+            masks.append(current)
+        return boundaries, masks
+
+    def _table(self, moment: datetime) -> Tuple[List[int], List[int]]:
+        key = self._offsets_key(moment)
+        table = self._tables.get(key)
+        if table is None:
+            table = self._compile_table(dict(key))
+            self._tables[key] = table
+        return table
+
+    # ---------------- query ----------------
+
+    def allowed_mask(self, moment: Optional[datetime] = None) -> int:
+        """Bitmask (posizioni in self.countries) dei paesi chiamabili all'istante (default: adesso)"""
+        moment = moment or datetime.now(timezone.utc)
+        if moment.tzinfo is None:
+            raise ValueError("serve un datetime con fuso (es. UTC)")
+        utc = moment.astimezone(timezone.utc)
+        boundaries, masks = self._table(utc)
+        minute = utc.weekday() * DAY_MINUTES + utc.hour * 60 + utc.minute
+        mask = masks[bisect.bisect_right(boundaries, minute) - 1]
+        for iso in self._holiday_rule:
+            if iso in self.holidays and any(utc.astimezone(self._tz[name]).date() in self.holidays[iso] for name in self.zones[iso]):
+                mask &= ~(1 << self._position[iso])
+        return mask
+
+    def allowed_countries(self, moment: Optional[datetime] = None) -> List[str]:
+        mask = self.allowed_mask(moment)
+        isos = []
+        while mask:
+            low = mask & -mask
+            isos.append(self.countries[low.bit_length() - 1])
+            mask ^= low
+        return isos
+
+    def is_allowed_local(self, iso: str, local_time: datetime) -> bool:
+        """Chiamata permessa all'ora locale del destinatario (datetime naive = già locale, aware = istante)"""
+        mask = self.local_masks.get(iso)
+        if mask is None:
+            raise KeyError(f"paese sconosciuto: {iso}")
+        if local_time.tzinfo is not None:
+            # Istante senza fuso del destinatario: permesso solo se lo è in tutti i fusi del paese
+            return all(self.is_allowed_local(iso, local_time.astimezone(self._tz[name]).replace(tzinfo=None))
+                       for name in self.zones[iso])
+        if iso in self._holiday_rule and local_time.date() in self.holidays.get(iso, ()):
+            return False
+        minute = local_time.weekday() * DAY_MINUTES + local_time.hour * 60 + local_time.minute
+        return bool(mask >> minute & 1)
+
+    def check_batch(self, calls: Iterable[Tuple[str, datetime]]) -> List[bool]:
+        """Decisioni per una lista di (ISO, ora locale del destinatario)"""
+        return [self.is_allowed_local(iso, local_time) for iso, local_time in calls]
+
+    def describe(self) -> str:
+        counts = {s: list(self.status.values()).count(s) for s in (STATUS_RESTRICTED, STATUS_UNRESTRICTED, STATUS_UNPARSED)}
+        uncertain = sum(1 for iso, status in self.status.items() if status == STATUS_RESTRICTED and self.unknown_masks[iso])
+        return (f"{len(self.countries)} paesi: {counts[STATUS_RESTRICTED]} con finestre ({uncertain} con giorni incerti), "
+                f"{counts[STATUS_UNRESTRICTED]} senza regole, {counts[STATUS_UNPARSED]} non interpretabili")
+
+# ============================================================================
+# CLI
+# ============================================================================
+
+def _parse_moment(value: str) -> datetime:
+    moment = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return moment if moment.tzinfo else moment.replace(tzinfo=timezone.utc)
+
+def main():
+    parser = argparse.ArgumentParser(description="Quiet hours: paesi chiamabili a un istante e verifica di chiamate")
+    parser.add_argument("--file", type=Path, default=CATALOGUE_FILE, help="Catalogo (default: compliance.v3.json)")
+    parser.add_argument("--unknown-policy", choices=("allow", "deny"), default="allow",
+                        help="Paesi o giorni con regole non interpretabili: permessi (default) o vietati")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("now", help="Paesi chiamabili adesso")
+    at_cmd = commands.add_parser("at", help="Paesi chiamabili a un istante (ISO 8601, default UTC)")
+    at_cmd.add_argument("moment")
+    check_cmd = commands.add_parser("check", help="Coppie ISO \"YYYY-MM-DD HH:MM\" (ora locale del destinatario)")
+    check_cmd.add_argument("pairs", nargs="+")
+    bench_cmd = commands.add_parser("bench", help="Decisioni al secondo (batch locali e istanti UTC)")
+    bench_cmd.add_argument("--calls", type=int, default=100_000)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    engine = QuietHoursEngine.from_file(args.file, unknown_policy=args.unknown_policy)
+    print(f"🕘 {engine.describe()} ({(time.perf_counter() - started) * 1000:.0f} ms)")
+
+    if args.command in ("now", "at"):
+        moment = _parse_moment(args.moment) if args.command == "at" else datetime.now(timezone.utc)
+        isos = engine.allowed_countries(moment)
+        blocked = [iso for iso in engine.countries if iso not in set(isos)]
+        print(f"✅ {len(isos)} paesi chiamabili alle {moment.astimezone(timezone.utc):%Y-%m-%d %H:%M} UTC")
+        print(f"⛔ {len(blocked)} in quiet hours: {', '.join(blocked)}")
+    elif args.command == "check":
+        if len(args.pairs) % 2:
+            print("❌ Servono coppie ISO + ora locale")
+            raise SystemExit(1)
+        calls = [(args.pairs[i].upper(), datetime.fromisoformat(args.pairs[i + 1])) for i in range(0, len(args.pairs), 2)]
+        for (iso, local_time), allowed in zip(calls, engine.check_batch(calls)):
+            print(f"  {iso} {local_time:%a %Y-%m-%d %H:%M} → {'✅ permessa' if allowed else '⛔ vietata'} ({engine.status[iso]})")
+    elif args.command == "bench":
+        base = datetime(2026, 1, 5)
+        calls = [(engine.countries[i % len(engine.countries)], base + timedelta(minutes=(i * 37) % WEEK_MINUTES))
+                 for i in range(args.calls)]
+        started = time.perf_counter()
+        engine.check_batch(calls)
+        local_rate = args.calls / (time.perf_counter() - started)
+        moments = [datetime(2026, 3, 1, tzinfo=timezone.utc) + timedelta(seconds=i) for i in range(args.calls)]
+        started = time.perf_counter()
+        for moment in moments:
+            engine.allowed_mask(moment)
+        utc_rate = len(moments) / (time.perf_counter() - started)
+        print(f"⚡ (paese, ora locale): {local_rate:,.0f} decisioni/s · istante UTC × {len(engine.countries)} paesi: "
+              f"{utc_rate:,.0f} query/s ({len(engine._tables)} tabelle UTC compilate)")
+
+if __name__ == "__main__":
+    main()
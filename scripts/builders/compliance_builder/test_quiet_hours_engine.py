@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Test del motore quiet hours sui casi del catalogo con saturday / sunday booleani.
+
+    python -m unittest test_quiet_hours_engine      (dalla cartella compliance_builder)
+"""
+
+import unittest
+from datetime import datetime
+
+from quiet_hours_engine import (DAY_MINUTES, SATURDAY, STATUS_RESTRICTED, STATUS_UNPARSED, SUNDAY,
+                                QuietHoursEngine, compile_local_mask)
+
+# quiet_hours come in compliance.v3.json (exceptions: solo testo, non interpretate dal motore)
+US = {"enabled": True, "weekdays": {"start": "21:00", "end": "08:00", "timezone": "recipient's local time"},
+      "saturday": True, "sunday": True, "holidays": None, "timezone": "recipient's local time",
+      "exceptions": ["Calls may be made between 8 a.m. and 9 p.m. recipient's local time"]}
+FR = {"enabled": True, "weekdays": {"start": "20:00", "end": "10:00", "timezone": "Europe/Paris"},
+      "saturday": False, "sunday": False, "holidays": False, "timezone": "Europe/Paris",
+      "exceptions": ["No calls on Saturday, Sunday, or public holidays"]}
+AU = {"enabled": True, "weekdays": {"start": "20:00", "end": "09:00", "timezone": "Local time of person called"},
+      "saturday": {"start": "17:00", "end": "09:00"}, "sunday": False, "holidays": False,
+      "timezone": "Local time of person called", "exceptions": []}
+# Solo finestre {start, end}: compilato
+IT = {"enabled": True, "weekdays": {"start": "21:00", "end": "09:00", "timezone": "Europe/Rome"},
+      "saturday": {"start": "15:00", "end": "09:00"}, "sunday": None, "timezone": "Europe/Rome"}
+
+FUSED = {iso: {"quiet_hours": quiet_hours} for iso, quiet_hours in
+         (("US", US), ("FR", FR), ("AU", AU), ("IT", IT))}
+
+# Ore locali del destinatario (naive): 17 ottobre 2026 è sabato
+SATURDAY_NOON = datetime(2026, 10, 17, 12, 0)
+SUNDAY_MORNING = datetime(2026, 10, 18, 11, 0)
+MONDAY_NIGHT = datetime(2026, 10, 19, 3, 0)
+MONDAY_NOON = datetime(2026, 10, 19, 12, 0)
+TUESDAY_LATE = datetime(2026, 10, 20, 23, 0)
+
+
+def _day_bits(mask: int, day: int) -> int:
+    return mask >> day * DAY_MINUTES & (1 << DAY_MINUTES) - 1
+
+
+class BooleanWeekendTest(unittest.TestCase):
+
+    def test_only_boolean_days_are_unknown(self):
+        expected = {"US": (SATURDAY, SUNDAY), "FR": (SATURDAY, SUNDAY), "AU": (SUNDAY,)}
+        for iso, days in expected.items():
+            with self.subTest(iso=iso):
+                allowed, unknown, status = compile_local_mask(FUSED[iso]["quiet_hours"])
+                self.assertEqual(status, STATUS_RESTRICTED)
+                self.assertFalse(allowed & unknown)
+                for day in range(7):
+                    self.assertEqual(bool(_day_bits(unknown, day)), day in days)
+
+    def test_weekend_flags_without_windows_are_unparsed(self):
+        allowed, unknown, status = compile_local_mask({"enabled": True, "saturday": True, "sunday": False})
+        self.assertEqual((allowed, status), (0, STATUS_UNPARSED))
+
+    def test_weekday_window_still_applies(self):
+        for policy in ("allow", "deny"):
+            engine = QuietHoursEngine(FUSED, unknown_policy=policy)
+            with self.subTest(policy=policy):
+                # La notte domenica → lunedì resta vietata anche se la domenica è incerta
+                self.assertFalse(engine.is_allowed_local("US", MONDAY_NIGHT))
+                self.assertTrue(engine.is_allowed_local("US", MONDAY_NOON))
+                self.assertFalse(engine.is_allowed_local("FR", TUESDAY_LATE))
+                self.assertFalse(engine.is_allowed_local("AU", MONDAY_NIGHT))
+                # Venerdì 21:00 → sabato 08:00
+                self.assertFalse(engine.is_allowed_local("US", datetime(2026, 10, 17, 3, 0)))
+
+    def test_allow_policy_permits_weekend(self):
+        engine = QuietHoursEngine(FUSED, unknown_policy="allow")
+        # US: true non vieta il sabato intero (le eccezioni permettono 8-21)
+        self.assertTrue(engine.is_allowed_local("US", SATURDAY_NOON))
+        self.assertTrue(engine.is_allowed_local("FR", SUNDAY_MORNING))
+        self.assertTrue(engine.is_allowed_local("AU", SUNDAY_MORNING))
+
+    def test_deny_policy_blocks_weekend(self):
+        engine = QuietHoursEngine(FUSED, unknown_policy="deny")
+        # FR / AU: false non applica in silenzio la finestra feriale alla domenica
+        self.assertFalse(engine.is_allowed_local("US", SATURDAY_NOON))
+        self.assertFalse(engine.is_allowed_local("FR", SUNDAY_MORNING))
+        self.assertFalse(engine.is_allowed_local("AU", SUNDAY_MORNING))
+        self.assertNotIn("FR", engine.allowed_countries(datetime.fromisoformat("2026-10-18T09:00:00+00:00")))
+
+
+class WindowWeekendTest(unittest.TestCase):
+
+    def test_window_weekend_is_compiled(self):
+        engine = QuietHoursEngine(FUSED, unknown_policy="deny")
+        self.assertEqual(engine.status["IT"], STATUS_RESTRICTED)
+        self.assertTrue(engine.is_allowed_local("IT", SATURDAY_NOON))
+        self.assertFalse(engine.is_allowed_local("IT", datetime(2026, 10, 17, 16, 0)))
+        # null: vale la finestra feriale
+        self.assertTrue(engine.is_allowed_local("IT", SUNDAY_MORNING))
+        self.assertFalse(engine.is_allowed_local("IT", datetime(2026, 10, 18, 22, 0)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -7,14 +7,22 @@ Non rigenera tutto il file, solo aggiorna ai_disclosure.exceptions dove trova in
 import argparse
 import json
 import os
+import sys
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Dict, Any
 
-import httpx
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from llm_runtime.cache import configure_response_cache
+from llm_runtime.calls import add_runtime_arguments, post_json_cached
+from llm_runtime.concurrency import get_controller
+from llm_runtime.jobs import JobResult, run_jobs
+
+from compliance_journal import CountryJournal, compact
 
 BASE_DIR = Path(__file__).parent
 OUTPUT_JSON = BASE_DIR / "compliance.v3.json"
+JOURNAL_FILE = BASE_DIR / "ai_quote_requests.journal.jsonl"
 
 
 def call_perplexity_for_ai_quote_requests(country_name: str, iso: str, model: str = "sonar") -> tuple[list[str], str]:
@@ -74,10 +82,8 @@ Return ONLY valid JSON, no additional text."""
         "return_citations": True,
     }
 
-    with httpx.Client(timeout=120.0) as client:
-        response = client.post(url, headers=headers, json=payload)
-        response.raise_for_status()
-        data = response.json()
+    # Richieste identiche (rerun, --resume) servite dalla cache risposte su disco
+    data, cached_request = post_json_cached("perplexity", url, headers, payload, label=model)
 
     content = data["choices"][0]["message"]["content"]
     
@@ -99,6 +105,7 @@ Return ONLY valid JSON, no additional text."""
     
     try:
         result = json.loads(content)
+        cached_request.store(data)  # solo risposte con JSON valido
         exceptions = result.get("exceptions", [])
         note = result.get("note", "")
         return exceptions, note
@@ -128,13 +135,20 @@ def main() -> None:
         choices=["sonar", "sonar-pro"],
         help="Perplexity model to use",
     )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Resume from the journal of an interrupted run (skip countries already updated)",
+    )
     parser.add_argument(
         "--dry-run",
         action="store_true",
         help="Show what would be updated without making changes",
     )
+    add_runtime_arguments(parser)
     
     args = parser.parse_args()
+    configure_response_cache(no_cache=args.no_cache, refresh=args.refresh_cache)
     
     # Load existing file
     if not OUTPUT_JSON.exists():
@@ -159,59 +173,77 @@ def main() -> None:
     elif args.limit:
         countries_to_process = countries_to_process[:args.limit]
     
+    # Paesi completati nel journal (fsync per paese): compliance.v3.json si riscrive una volta sola a fine run
+    journal = None
+    if not args.dry_run:
+        journal = CountryJournal(JOURNAL_FILE, resume=args.resume)
+        if args.resume and len(journal):
+            journal.apply(countries)
+            countries_to_process = [(iso, countries[iso]) for iso, _ in countries_to_process if iso not in journal]
+            print(f"🔄 Riprendo: {len(journal)} paesi già nel journal {JOURNAL_FILE.name}")
+    
     print(f"\n🚀 Processando {len(countries_to_process)} paesi...")
     print(f"📊 Model: {args.model}")
     if args.dry_run:
         print("🔍 DRY RUN - Nessuna modifica verrà fatta\n")
     
     updated_count = 0
-    for idx, (iso, country) in enumerate(countries_to_process, 1):
+    
+    def on_result(result: JobResult) -> None:
+        nonlocal updated_count
+        iso, country = result.item
         name = country.get("country", iso)
-        print(f"\n[{idx}/{len(countries_to_process)}] {name} ({iso})...", flush=True)
+        print(f"\n[{result.done}/{len(countries_to_process)}] {name} ({iso})...", flush=True)
+        
+        if not result.ok:
+            print(f"  ⚠️  Errore: {str(result.error)[:100]}", flush=True)
+            return
         
-        try:
-            exceptions, note = call_perplexity_for_ai_quote_requests(name, iso, args.model)
+        exceptions, note = result.value
+        if exceptions or note:
+            print(f"  ✅ Trovate {len(exceptions)} exceptions: {exceptions}", flush=True)
             
-            if exceptions or note:
-                print(f"  ✅ Trovate {len(exceptions)} exceptions: {exceptions}", flush=True)
+            if not args.dry_run:
+                # Update ai_disclosure
+                if "ai_disclosure" not in country:
+                    country["ai_disclosure"] = {}
                 
-                if not args.dry_run:
-                    # Update ai_disclosure
-                    if "ai_disclosure" not in country:
-                        country["ai_disclosure"] = {}
-                    
-                    # Merge exceptions (avoid duplicates)
-                    existing_exceptions = set(country["ai_disclosure"].get("exceptions", []))
-                    new_exceptions = set(exceptions)
-                    country["ai_disclosure"]["exceptions"] = sorted(list(existing_exceptions | new_exceptions))
-                    
-                    # Update note if provided
-                    if note:
-                        existing_note = country["ai_disclosure"].get("note", "")
-                        if existing_note and note not in existing_note:
-                            country["ai_disclosure"]["note"] = f"{existing_note}\n\n{note}".strip()
-                        elif not existing_note:
-                            country["ai_disclosure"]["note"] = note
-                    
-                    updated_count += 1
-            else:
-                print(f"  ℹ️  Nessuna exception trovata", flush=True)
+                # Merge exceptions (avoid duplicates)
+                existing_exceptions = set(country["ai_disclosure"].get("exceptions", []))
+                new_exceptions = set(exceptions)
+                country["ai_disclosure"]["exceptions"] = sorted(list(existing_exceptions | new_exceptions))
                 
-        except Exception as e:
-            print(f"  ⚠️  Errore: {str(e)[:100]}", flush=True)
-            continue
+                # Update note if provided
+                if note:
+                    existing_note = country["ai_disclosure"].get("note", "")
+                    if existing_note and note not in existing_note:
+                        country["ai_disclosure"]["note"] = f"{existing_note}\n\n{note}".strip()
+                    elif not existing_note:
+                        country["ai_disclosure"]["note"] = note
+                
+                updated_count += 1
+        else:
+            print(f"  ℹ️  Nessuna exception trovata", flush=True)
         
-        # Save periodically
-        if not args.dry_run and (idx % 10 == 0):
-            with OUTPUT_JSON.open("w", encoding="utf-8") as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
-            print(f"  💾 Progress saved ({idx}/{len(countries_to_process)})", flush=True)
+        if journal:
+            journal.append(iso, country)
+    
+    # Paesi in parallelo (limite AIMD "perplexity" + --rpm), merge e salvataggi al completamento di ciascuno
+    get_controller("perplexity", max_limit=args.max_concurrency)
+    run_jobs(
+        countries_to_process,
+        lambda entry: call_perplexity_for_ai_quote_requests(entry[1].get("country", entry[0]), entry[0], args.model),
+        label=lambda entry: entry[0],
+        provider="perplexity",
+        rpm=args.rpm,
+        on_result=on_result,
+    )
     
     # Final save
     if not args.dry_run:
+        journal.close()
         data["generated_at"] = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
-        with OUTPUT_JSON.open("w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        compact(journal, data, OUTPUT_JSON)
         print(f"\n✅ Completato! Aggiornati {updated_count} paesi")
         print(f"💾 File salvato: {OUTPUT_JSON}")
     else:
@@ -8,17 +8,32 @@ import json
 import time
 import os
 import re
+import sys
 from pathlib import Path
-from typing import Dict, Any, List, Set
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
 from datetime import datetime, timezone
 from openai import OpenAI
 import argparse
 
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from llm_runtime.cache import completion_from_cache, completion_to_cache, configure_response_cache, get_response_cache
+from llm_runtime.concurrency import OUTCOME_ERROR, get_controller
+from llm_runtime.jobs import JobResult, run_jobs
+from llm_runtime.retry import classify_error, get_retry_policy, start_retry_run
+
+from backup_store import save_snapshot
+from compliance_diff import changeset_path_for, describe_changeset, diff_documents, write_changeset
+from compliance_index import write_index
+from compliance_journal import CountryJournal, journal_path_for, write_json_atomic
+from verification_scheduler import (MIN_AGE_DAYS, REASONING_TOKENS, add_schedule_arguments, estimate_tokens, parse_confidence,
+                                    schedule, schedule_requested)
+
 # ===================== CONFIGURAZIONE =====================
 BASE_DIR = Path(__file__).parent
 INPUT_FILE = BASE_DIR / "compliance.v3.json"
 OUTPUT_FILE = BASE_DIR / "compliance.v3.updated.json"
 PROGRESS_FILE = BASE_DIR / "progress_grok.json"
+JOURNAL_FILE = journal_path_for(OUTPUT_FILE)
 BACKUP_DIR = BASE_DIR / "backups"
 BACKUP_DIR.mkdir(exist_ok=True)
 
@@ -40,6 +55,22 @@ MODEL = MODEL_POWERFUL  # Default: usa modello reasoning per massima accuratezza
 # Se ci sono errori JSON troncati, usa BATCH_SIZE = 1 per processare un paese alla volta
 BATCH_SIZE = 1  # Ridotto a 1 per paesi problematici (massima sicurezza, evita JSON troncati)
 
+# Aggiornamento per sezione (default, --full-country per il prompt sul paese intero):
+# ogni richiesta rivede un gruppo di sezioni per più paesi, con payload compatto dei soli
+# campi in revisione, e Grok restituisce solo le patch → prompt corti, niente troncamenti
+SECTION_GROUPS: Dict[str, List[str]] = {
+    "regime": ["regime", "relationship_requirements", "existing_customer_exemption"],
+    "dnc": ["dnc"],
+    "recording": ["recording"],
+    "ai_disclosure": ["ai_disclosure"],
+    "quiet_hours": ["quiet_hours", "frequency_limits"],
+    "caller_id": ["caller_id_requirements"],
+    "restrictions": ["legal_restrictions", "extra_unstructured_rules"],
+    "enforcement": ["enforcement"],
+}
+SECTION_BATCH_SIZE = 5  # paesi per richiesta in modalità sezioni
+SECTION_PATCH_TOKENS = 300  # output stimato per paese e gruppo (solo patch)
+
 # ===================== CLIENT API =====================
 def get_client() -> OpenAI:
     # Prova prima da variabile d'ambiente
@@ -64,13 +95,16 @@ def get_client() -> OpenAI:
             "GROK_API_KEY non trovata. Esportala con: export GROK_API_KEY='your-key'\n"
             "Oppure crea un file .env nella directory compliance_builder con: GROK_API_KEY=your-key"
         )
-    return OpenAI(api_key=api_key, base_url="https://api.x.ai/v1")
+    # max_retries=0: i retry li gestisce solo la policy condivisa (llm_runtime.retry)
+    return OpenAI(api_key=api_key, base_url="https://api.x.ai/v1", max_retries=0)
 
 def validate_api_key(client: OpenAI) -> bool:
     """Valida l'API key facendo una chiamata di test."""
     try:
         # Prova una chiamata molto semplice per validare la chiave
-        response = client.chat.completions.create(
+        # Errori temporanei (429/5xx) ritentati dalla policy: l'SDK ha max_retries=0
+        response = get_retry_policy("grok").call(
+            client.chat.completions.create,
             model="grok-4-fast-non-reasoning",
             messages=[{"role": "user", "content": "test"}],
             max_tokens=5
@@ -87,6 +121,100 @@ def validate_api_key(client: OpenAI) -> bool:
             return False
 
 # ===================== PROMPT OTTIMIZZATO =====================
+# Blocchi condivisi dal prompt completo (build_prompt) e da quelli per sezione (build_section_prompt)
+SOURCES_RULES = """FONTI RICHIESTE - SOLO FONTI UFFICIALI O AFFIDABILI:
+PREDILIGI ESCLUSIVAMENTE fonti ufficiali o altamente affidabili:
+- Siti governativi (.gov, .gouv, .govt, .go, .gov.uk, ecc.)
+- Autorità di regolamentazione ufficiali (agenzie di protezione dati, autorità telecom, ecc.)
+- Leggi e regolamenti ufficiali pubblicati su siti governativi
+- Organizzazioni internazionali ufficiali (UE, ONU, OECD, ecc.)
+- Università e istituzioni accademiche riconosciute (.edu, .ac.uk, ecc.)
+
+NON usare:
+- Blog, siti commerciali, siti di marketing/SEO
+- Siti generici di business o consulenza
+- Fonti non verificate o non ufficiali
+- Articoli di news o media generalisti (a meno che non citino fonti ufficiali)
+
+Cerca ESPLICITAMENTE su internet (usa web search):
+- Leggi sulla protezione dei dati personali (solo da siti ufficiali)
+- Autorità di protezione dati (solo siti ufficiali dell'autorità)
+- Regolamenti sul telemarketing (solo da fonti governative)
+- Leggi sulle telecomunicazioni (solo da fonti ufficiali)
+- Consumer protection laws (solo da fonti governative)
+- Regole su AI disclosure per quote requests o existing customers
+- Novità normative pubblicate nel 2024-2025"""
+
+FUNDAMENTAL_RULES = """Regole fondamentali CRITICHE:
+- NON inventare informazioni. Se non trovi una regola specifica, lascia il campo INVARIATO.
+- NON assumere regole da altri paesi. Focus SOLO su normative specifiche del paese.
+- Se una cosa NON è specificata o vietata, considerala COME PERMESSA (ma non modificare il campo se già presente).
+- Per boolean: usa true SOLO se trovi una regola esplicita che lo richiede; usa false SOLO se trovi una regola esplicita che lo vieta; altrimenti usa null.
+- Se trovi informazioni contraddittorie, usa quelle più recenti o da fonti più autorevoli (siti governativi > agenzie > articoli)."""
+
+DISCLAIMER_RULES = """DISCLAIMER GENERICI - NON AGGIUNGERLI:
+- NON aggiungere frasi generiche tipo "You should consult current laws" o "seek local legal advice" nei campi note
+- NON aggiungere frasi tipo "It is not possible to determine" o "not available in this environment"
+- Se non trovi informazioni, scrivi semplicemente "No specific [campo] requirements found in [fonte]" senza disclaimer generici
+- Le note devono essere CONCISE e INFORMATIVE, non disclaimer legali generici"""
+
+# Istruzioni per campo: (intestazione, righe) → "N. intestazione" + righe rientrate sotto
+FIELD_INSTRUCTIONS = {
+    "regime": ('"regime": Struttura {"b2b": {"description": ..., "type": ...}, "b2c": {"description": ..., "type": ...}}', [
+        "- Aggiorna solo se trovi nuove normative che cambiano il regime legale.",
+    ]),
+    "relationship_requirements": ('"relationship_requirements": Struttura b2b/b2c con campi specifici.', [
+        "- Aggiorna solo se trovi nuove regole su existing relationship, opt-in, soft opt-in.",
+    ]),
+    "existing_customer_exemption": ('"existing_customer_exemption": Struttura b2b/b2c.', [
+        "- Aggiorna solo se trovi nuove normative su esenzioni per clienti esistenti.",
+    ]),
+    "dnc": ('"dnc": Campi: api_available, check_required, existing_customer_exemption, has_registry, name, url.', [
+        "- Aggiorna solo se trovi nuove informazioni su registry DNC o API disponibili.",
+    ]),
+    "ai_disclosure": ('"ai_disclosure": Campi: required, mandatory, timing, text_suggested, exceptions, note.', [
+        "- IMPORTANTE: Cerca ESPLICITAMENTE se ci sono eccezioni per quote requests o existing customers.",
+        '- Aggiorna "exceptions" solo se trovi fonti ufficiali che confermano eccezioni specifiche.',
+    ]),
+    "recording": ('"recording": Campi: allowed, basis, notification_timing, notification_required, consent_required, retention.', [
+        "- Aggiorna solo se trovi nuove normative su registrazione chiamate.",
+    ]),
+    "quiet_hours": ('"quiet_hours": Campi: enabled, weekdays (start, end, timezone), saturday, sunday, holidays.', [
+        '- CRITICO: "quiet_hours" sono le ore PROIBITE (NON CONSENTITE) per chiamare, NON le ore consentite.',
+        '- Esempio: se le chiamate sono vietate dalle 20:00 alle 09:00, allora weekdays.start = "20:00" e weekdays.end = "09:00".',
+        "- Se le chiamate sono vietate tutto il sabato, saturday = true (o un range orario se specificato).",
+        "- Aggiorna solo se trovi nuove normative su orari PROIBITI per le chiamate.",
+    ]),
+    "caller_id_requirements": ('"caller_id_requirements": Campi: mandatory, prefix_required, company_name_required, spoofing_prohibited, anonymous_calls_prohibited.', [
+        '- IMPORTANTE: Se trovi solo "principi generali" senza regole specifiche, NON modificare (lascia invariato).',
+    ]),
+    "frequency_limits": ('"frequency_limits": Campi: max_calls_per_day, max_calls_per_week, max_calls_per_month.', [
+        "- Aggiorna solo se trovi nuove normative su limiti di frequenza.",
+    ]),
+    "legal_restrictions": ('"legal_restrictions": Array di OGGETTI con struttura {"type": ..., "description": ..., "value": ..., "applies_to": ..., "enforcement_level": ...}.', [
+        "- Aggiorna solo se trovi nuove restrizioni legali.",
+    ]),
+    "enforcement": ('"enforcement": Campi: max_fine (amount, currency, per_violation), regulator (name, url, type), risk_level.', [
+        "- Aggiorna solo se trovi nuove informazioni su multe o autorità di regolamentazione.",
+    ]),
+    "sources": ('"sources": Campi: primary (array), recent_changes, source_last_updated.', [
+        '- Aggiungi nuove fonti ufficiali in "primary" se trovi nuove informazioni.',
+        '- Aggiorna "recent_changes" con data e link se modifichi qualcosa.',
+    ]),
+    "extra_unstructured_rules": ('"extra_unstructured_rules": Array di OGGETTI con {"topic": ..., "text": ..., "reason_not_structured": ..., "source": ...}.', [
+        "- Aggiungi solo se trovi regole importanti che non si adattano ai campi strutturati.",
+    ]),
+}
+
+def format_field_instructions(sections) -> str:
+    """Istruzioni numerate per i campi indicati (nell'ordine dato)"""
+    blocks = []
+    for number, section in enumerate(sections, 1):
+        header, lines = FIELD_INSTRUCTIONS[section]
+        prefix = f"{number}. "
+        blocks.append("\n".join([prefix + header] + [" " * len(prefix) + line for line in lines]))
+    return "\n\n".join(blocks)
+
 def build_prompt(countries_block: str, json_snippet: str) -> str:
     """Costruisce il prompt completo con template JSON incluso."""
     template_path = BASE_DIR / "template_country.json"
@@ -131,35 +259,9 @@ Paesi da analizzare:
 JSON attuale (parziale) - struttura completa per ogni paese:
 {json_snippet}
 
-FONTI RICHIESTE - SOLO FONTI UFFICIALI O AFFIDABILI:
-PREDILIGI ESCLUSIVAMENTE fonti ufficiali o altamente affidabili:
-- Siti governativi (.gov, .gouv, .govt, .go, .gov.uk, ecc.)
-- Autorità di regolamentazione ufficiali (agenzie di protezione dati, autorità telecom, ecc.)
-- Leggi e regolamenti ufficiali pubblicati su siti governativi
-- Organizzazioni internazionali ufficiali (UE, ONU, OECD, ecc.)
-- Università e istituzioni accademiche riconosciute (.edu, .ac.uk, ecc.)
-
-NON usare:
-- Blog, siti commerciali, siti di marketing/SEO
-- Siti generici di business o consulenza
-- Fonti non verificate o non ufficiali
-- Articoli di news o media generalisti (a meno che non citino fonti ufficiali)
+{SOURCES_RULES}
 
-Cerca ESPLICITAMENTE su internet (usa web search):
-- Leggi sulla protezione dei dati personali (solo da siti ufficiali)
-- Autorità di protezione dati (solo siti ufficiali dell'autorità)
-- Regolamenti sul telemarketing (solo da fonti governative)
-- Leggi sulle telecomunicazioni (solo da fonti ufficiali)
-- Consumer protection laws (solo da fonti governative)
-- Regole su AI disclosure per quote requests o existing customers
-- Novità normative pubblicate nel 2024-2025
-
-Regole fondamentali CRITICHE:
-- NON inventare informazioni. Se non trovi una regola specifica, lascia il campo INVARIATO.
-- NON assumere regole da altri paesi. Focus SOLO su normative specifiche del paese.
-- Se una cosa NON è specificata o vietata, considerala COME PERMESSA (ma non modificare il campo se già presente).
-- Per boolean: usa true SOLO se trovi una regola esplicita che lo richiede; usa false SOLO se trovi una regola esplicita che lo vieta; altrimenti usa null.
-- Se trovi informazioni contraddittorie, usa quelle più recenti o da fonti più autorevoli (siti governativi > agenzie > articoli).
+{FUNDAMENTAL_RULES}
 
 Regole di aggiornamento CRITICHE:
 - Se trovi ERRORI EVIDENTI nei dati esistenti (es. "TEST MODIFIED", valori contraddittori con leggi ufficiali, URL fake) → CORREGGILI IMMEDIATAMENTE
@@ -170,11 +272,7 @@ Regole di aggiornamento CRITICHE:
 - PRESERVA la struttura JSON esistente (non cambiare nomi di campi, non aggiungere campi nuovi, non rimuovere campi esistenti)
 - Per ai_disclosure.exceptions: aggiungi "quote requests" solo se trovi fonti ufficiali che lo confermano esplicitamente
 
-DISCLAIMER GENERICI - NON AGGIUNGERLI:
-- NON aggiungere frasi generiche tipo "You should consult current laws" o "seek local legal advice" nei campi note
-- NON aggiungere frasi tipo "It is not possible to determine" o "not available in this environment"
-- Se non trovi informazioni, scrivi semplicemente "No specific [campo] requirements found in [fonte]" senza disclaimer generici
-- Le note devono essere CONCISE e INFORMATIVE, non disclaimer legali generici
+{DISCLAIMER_RULES}
 
 ESEMPI di correzione errori (CORREGGI SEMPRE):
 - "country": "Andorra TEST MODIFIED" → "country": "Andorra"
@@ -188,67 +286,135 @@ ESEMPI di correzione errori (CORREGGI SEMPRE):
 
 ISTRUZIONI SPECIFICHE PER CAMPO (aggiorna solo se trovi novità):
 
-1. "regime": Struttura {{"b2b": {{"description": ..., "type": ...}}, "b2c": {{"description": ..., "type": ...}}}}
-   - Aggiorna solo se trovi nuove normative che cambiano il regime legale.
+{format_field_instructions(FIELD_INSTRUCTIONS)}
 
-2. "relationship_requirements": Struttura b2b/b2c con campi specifici.
-   - Aggiorna solo se trovi nuove regole su existing relationship, opt-in, soft opt-in.
+Template JSON (struttura esatta da rispettare):
+{template_json_str}
 
-3. "existing_customer_exemption": Struttura b2b/b2c.
-   - Aggiorna solo se trovi nuove normative su esenzioni per clienti esistenti.
+Output ESATTAMENTE questo formato JSON (niente testo extra, solo JSON valido):
+{{
+  "updated": {{
+    "ISO2": {{ /* JSON completo del paese aggiornato, stessa struttura di input, SOLO campi modificati o tutti se necessario */ }},
+    "ISO2": {{ /* ... */ }}
+  }},
+  "changes": ["ISO2: campo cambiato → nuovo valore (fonte URL)"]
+}}
 
-4. "dnc": Campi: api_available, check_required, existing_customer_exemption, has_registry, name, url.
-   - Aggiorna solo se trovi nuove informazioni su registry DNC o API disponibili.
+IMPORTANTE: 
+- Restituisci SOLO JSON valido, senza markdown, senza commenti.
+- In "updated" includi SOLO i paesi per cui hai trovato novità (o tutti se necessario per preservare struttura).
+- Se non trovi novità per un paese, NON includerlo in "updated".
+- In "changes" elenca tutte le modifiche con formato: "ISO2: campo → nuovo valore (URL fonte)"."""
 
-5. "ai_disclosure": Campi: required, mandatory, timing, text_suggested, exceptions, note.
-   - IMPORTANTE: Cerca ESPLICITAMENTE se ci sono eccezioni per quote requests o existing customers.
-   - Aggiorna "exceptions" solo se trovi fonti ufficiali che confermano eccezioni specifiche.
+def compact_json(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
 
-6. "recording": Campi: allowed, basis, notification_timing, notification_required, consent_required, retention.
-   - Aggiorna solo se trovi nuove normative su registrazione chiamate.
+def build_section_payload(fused: Dict, batch: List[str], sections: List[str]) -> str:
+    """Solo le sezioni in revisione dei paesi del batch, serializzazione compatta"""
+    return compact_json({iso: {section: fused[iso].get(section) for section in sections} for iso in batch if iso in fused})
 
-7. "quiet_hours": Campi: enabled, weekdays (start, end, timezone), saturday, sunday, holidays.
-   - CRITICO: "quiet_hours" sono le ore PROIBITE (NON CONSENTITE) per chiamare, NON le ore consentite.
-   - Esempio: se le chiamate sono vietate dalle 20:00 alle 09:00, allora weekdays.start = "20:00" e weekdays.end = "09:00".
-   - Se le chiamate sono vietate tutto il sabato, saturday = true (o un range orario se specificato).
-   - Aggiorna solo se trovi nuove normative su orari PROIBITI per le chiamate.
+def build_section_prompt(group: str, countries_block: str, payload: str) -> str:
+    """Prompt per un gruppo di sezioni (SECTION_GROUPS): stesse regole del prompt completo, risposta = solo patch."""
+    sections = SECTION_GROUPS[group]
+    template_path = BASE_DIR / "template_country.json"
+    with template_path.open(encoding="utf-8") as f:
+        template = json.load(f)
+    
+    template_json_str = compact_json({section: template.get(section) for section in sections})
+    
+    return f"""Sei un esperto mondiale di compliance telemarketing e AI voice calls.
+Il tuo compito è VERIFICARE e CORREGGERE dati esistenti, NON generare da zero.
+In questa richiesta rivedi SOLO queste sezioni: {", ".join(sections)}.
+Gli altri campi dei paesi non ti vengono mostrati: non restituirli.
 
-8. "caller_id_requirements": Campi: mandatory, prefix_required, company_name_required, spoofing_prohibited, anonymous_calls_prohibited.
-   - IMPORTANTE: Se trovi solo "principi generali" senza regole specifiche, NON modificare (lascia invariato).
+Paesi da analizzare:
+{countries_block}
 
-9. "frequency_limits": Campi: max_calls_per_day, max_calls_per_week, max_calls_per_month.
-   - Aggiorna solo se trovi nuove normative su limiti di frequenza.
+Dati attuali (JSON compatto, solo le sezioni in revisione):
+{payload}
 
-10. "legal_restrictions": Array di OGGETTI con struttura {{"type": ..., "description": ..., "value": ..., "applies_to": ..., "enforcement_level": ...}}.
-    - Aggiorna solo se trovi nuove restrizioni legali.
+{SOURCES_RULES}
 
-11. "enforcement": Campi: max_fine (amount, currency, per_violation), regulator (name, url, type), risk_level.
-    - Aggiorna solo se trovi nuove informazioni su multe o autorità di regolamentazione.
+{FUNDAMENTAL_RULES}
 
-12. "sources": Campi: primary (array), recent_changes, source_last_updated.
-    - Aggiungi nuove fonti ufficiali in "primary" se trovi nuove informazioni.
-    - Aggiorna "recent_changes" con data e link se modifichi qualcosa.
+Regole di aggiornamento CRITICHE:
+- Verifica ogni campo delle sezioni con fonti ufficiali e CORREGGI errori evidenti (es. "TEST MODIFIED", valori contraddittori con leggi ufficiali, URL fake)
+- Se non trovi nulla di nuovo dal 2024 MA i dati esistenti sono corretti → NON includere il paese in "patches"
+- Restituisci SOLO i campi da cambiare, come oggetti parziali con la stessa struttura (es. {{"dnc": {{"has_registry": false}}}}), non la sezione intera
+- Se cambi un array (es. legal_restrictions, ai_disclosure.exceptions) restituiscilo completo
+- PRESERVA la struttura JSON esistente (non cambiare nomi di campi, non aggiungere campi nuovi, non rimuovere campi esistenti)
+- Per ogni paese modificato elenca in "sources" le fonti ufficiali usate
 
-13. "extra_unstructured_rules": Array di OGGETTI con {{"topic": ..., "text": ..., "reason_not_structured": ..., "source": ...}}.
-    - Aggiungi solo se trovi regole importanti che non si adattano ai campi strutturati.
+{DISCLAIMER_RULES}
 
-Template JSON (struttura esatta da rispettare):
+ISTRUZIONI SPECIFICHE PER CAMPO (aggiorna solo se trovi novità):
+
+{format_field_instructions(sections)}
+
+Template delle sezioni (struttura esatta da rispettare):
 {template_json_str}
 
 Output ESATTAMENTE questo formato JSON (niente testo extra, solo JSON valido):
 {{
-  "updated": {{
-    "ISO2": {{ /* JSON completo del paese aggiornato, stessa struttura di input, SOLO campi modificati o tutti se necessario */ }},
-    "ISO2": {{ /* ... */ }}
-  }},
-  "changes": ["ISO2: campo cambiato → nuovo valore (fonte URL)"]
+  "patches": {{"ISO2": {{"<sezione>": {{ /* SOLO i campi cambiati */ }}}}}},
+  "sources": {{"ISO2": [{{"name": "Nome documento", "url": "https://..."}}]}},
+  "confidence": {{"ISO2": "high"}},
+  "changes": ["ISO2: sezione.campo → nuovo valore (URL fonte)"]
 }}
 
-IMPORTANTE: 
+IMPORTANTE:
 - Restituisci SOLO JSON valido, senza markdown, senza commenti.
-- In "updated" includi SOLO i paesi per cui hai trovato novità (o tutti se necessario per preservare struttura).
-- Se non trovi novità per un paese, NON includerlo in "updated".
-- In "changes" elenca tutte le modifiche con formato: "ISO2: campo → nuovo valore (URL fonte)"."""
+- In "patches" includi SOLO i paesi con modifiche; "confidence" invece per OGNI paese analizzato.
+- confidence: "high" se sei sicuro al 100% delle sezioni verificate, altrimenti "medium" ("low" se non trovi fonti ufficiali).
+- In "changes" elenca tutte le modifiche con formato: "ISO2: sezione.campo → nuovo valore (URL fonte)"."""
+
+def merge_patch(target: Dict, patch: Dict) -> Dict:
+    """Merge ricorsivo: oggetti fusi campo per campo, scalari e array sostituiti"""
+    for key, value in patch.items():
+        if isinstance(value, dict) and isinstance(target.get(key), dict):
+            merge_patch(target[key], value)
+        else:
+            target[key] = value
+    return target
+
+def apply_section_result(fused: Dict, batch: List[str], sections: List[str], result: Dict,
+                         only: Optional[Set[str]] = None) -> Dict[str, List[str]]:
+    """
+    Applica una risposta per sezione ai paesi del batch (o solo a quelli in only): patch (solo sulle
+    sezioni in revisione), fonti nuove (dedup per URL) e recent_changes. Ritorna i changes per paese.
+    """
+    today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+    changes = result.get("changes") or []
+    changes_by_iso: Dict[str, List[str]] = {}
+    for iso in batch:
+        if iso not in fused or (only is not None and iso not in only):
+            continue
+        country = fused[iso]
+        patch = (result.get("patches") or {}).get(iso) or {}
+        for section, value in patch.items():
+            if section not in sections:
+                continue  # il resto del paese non era in revisione: non si tocca
+            if isinstance(value, dict) and isinstance(country.get(section), dict):
+                merge_patch(country[section], value)
+            else:
+                country[section] = value
+        
+        sources = country.setdefault("sources", {})
+        bucket = "governamental" if "governamental" in sources else "primary"
+        known = {s.get("url") for s in sources.get(bucket) or [] if isinstance(s, dict)}
+        for source in (result.get("sources") or {}).get(iso) or []:
+            if isinstance(source, dict) and source.get("url") and source["url"] not in known:
+                sources[bucket] = (sources.get(bucket) or []) + [source]
+                known.add(source["url"])
+        
+        # Con un solo paese nel batch i changes senza prefisso ISO sono comunque suoi
+        country_changes = [c for c in changes if str(c).startswith(f"{iso}:") or len(batch) == 1]
+        if country_changes and patch:
+            note = f"{today}: " + "; ".join(str(c) for c in country_changes)
+            previous = sources.get("recent_changes")
+            sources["recent_changes"] = f"{previous} | {note}" if previous else note
+        changes_by_iso[iso] = country_changes
+    return changes_by_iso
 
 # ===================== FUNZIONI =====================
 def load_json() -> Dict[str, Any]:
@@ -257,23 +423,30 @@ def load_json() -> Dict[str, Any]:
         return json.load(f)
 
 def save_progress(data: Dict, changes: List[str], processed: Set[str]):
-    """Salva progresso e backup."""
-    # Backup
-    backup_path = BACKUP_DIR / f"backup_{int(time.time())}.json"
-    with backup_path.open("w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    """Salva backup, file aggiornato e progresso (a fine run: durante la run fa fede il journal)."""
+    # Backup deduplicato: blob per paese indirizzati dal contenuto, solo i paesi cambiati occupano spazio
+    # (python backup_store.py list / restore / prune)
+    backup = save_snapshot(data, label="grok", directory=BACKUP_DIR, source=OUTPUT_FILE.name)
+    print(f"🗄️  Backup {backup['id']}: {backup['new_blobs']} paesi nuovi su {backup['countries']} ({backup['new_bytes'] / 1024:.1f} KB)")
     
     # Aggiorna generated_at
     data["generated_at"] = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
     
     # Salva file aggiornato
-    with OUTPUT_FILE.open("w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    write_json_atomic(OUTPUT_FILE, data)
+    
+    # Changeset JSON Patch input → output: KB, pubblicazione e review lavorano solo sulle path cambiate
+    changeset = diff_documents(load_json(), data, old_label=INPUT_FILE.name, new_label=OUTPUT_FILE.name)
+    changeset_file = write_changeset(changeset, changeset_path_for(OUTPUT_FILE))
+    print(f"🔍 Changeset {changeset_file.name}: {describe_changeset(changeset)}")
+    print(f"🗂️  Indice {write_index(OUTPUT_FILE, data=data).name}")
     
     # Salva progresso per resume
     progress = {
         "processed": sorted(list(processed)),
         "changes": changes,
+        "concurrency": get_controller("grok").snapshot(),
+        "retries": get_retry_policy("grok").snapshot(),
         "last_update": datetime.now(timezone.utc).isoformat()
     }
     with PROGRESS_FILE.open("w", encoding="utf-8") as f:
@@ -321,29 +494,101 @@ def extract_json_from_response(content: str) -> Dict[str, Any]:
     
     return json.loads(content)
 
+def full_result_matches(result: Any, batch: List[str]) -> bool:
+    """Risposta --full-country utilizzabile: "updated" con soli paesi del batch, ognuno un oggetto"""
+    if not isinstance(result, dict) or not isinstance(result.get("updated", {}), dict):
+        return False
+    return all(iso in batch and isinstance(country, dict) for iso, country in result.get("updated", {}).items())
+
+def section_result_matches(result: Any, batch: List[str], sections: List[str]) -> bool:
+    """Risposta per sezione utilizzabile: "patches" presente, solo paesi del batch e sezioni richieste"""
+    if not isinstance(result, dict) or not isinstance(result.get("patches"), dict):
+        return False
+    for iso, patch in result["patches"].items():
+        if iso not in batch or not isinstance(patch, dict) or not set(patch) <= set(sections):
+            return False
+    return all(isinstance(result.get(key, {}), dict) for key in ("sources", "confidence"))
+
+def _response_matches(response, matches: Optional[Callable[[Any], bool]]) -> bool:
+    if not response.choices or response.choices[0].finish_reason == "length":
+        return False
+    try:
+        result = extract_json_from_response(response.choices[0].message.content or "")
+    except ValueError:
+        return False
+    return matches is None or matches(result)
+
+def request_batch_update(client: OpenAI, model: str, prompt: str, max_tokens: int,
+                         matches: Optional[Callable[[Any], bool]] = None):
+    """Chiamata Grok per un batch (eseguita nel pool di thread, concorrenza AIMD, retry e cache risposte condivisi).
+    matches(result): forma attesa della risposta; solo risposte che la rispettano vanno (o restano) in cache."""
+    body = {
+        "model": model,
+        "messages": [{"role": "user", "content": prompt}],
+        "response_format": {"type": "json_object"},
+        "temperature": 0.0,
+        "max_tokens": max_tokens,
+    }
+    cached_request = get_response_cache().request(str(client.base_url), body)
+    cached = cached_request.lookup()
+    if cached is not None:
+        response = completion_from_cache(cached)
+        if _response_matches(response, matches):
+            return response
+        # Voce malformata (scritta prima della validazione): si scarta e si richiede
+        cached_request.discard()
+
+    def attempt():
+        with get_controller("grok").slot(size=len(prompt) / 4) as slot:
+            response = client.chat.completions.create(**body)
+            if response.choices and response.choices[0].finish_reason == "length":
+                slot.fail(OUTCOME_ERROR)
+        return response
+
+    # Solo 429/timeout/5xx vengono ritentati; risposte troncate tornano al chiamante
+    response = get_retry_policy("grok").call(attempt, label=model)
+    # In cache solo risposte complete, con JSON valido e la forma attesa (paesi/sezioni del batch)
+    if _response_matches(response, matches):
+        cached_request.store(completion_to_cache(response))
+    return response
+
 def main():
     parser = argparse.ArgumentParser(description="Update compliance.v3.json using Grok API")
     parser.add_argument("--iso", type=str, action="append", help="Process only specific country (ISO2). Can be used multiple times: --iso HU --iso ID")
     parser.add_argument("--limit", type=int, help="Process only first N countries")
     parser.add_argument("--model", type=str, default=MODEL, help="Grok model to use")
-    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="Countries per batch")
+    parser.add_argument("--batch-size", type=int, help=f"Countries per batch (default: {SECTION_BATCH_SIZE} by section, {BATCH_SIZE} with --full-country)")
+    parser.add_argument("--sections", type=str, help=f"Gruppi di sezioni da rivedere, separati da virgola (default tutti: {','.join(SECTION_GROUPS)})")
+    parser.add_argument("--full-country", action="store_true", help="Prompt sul paese intero (JSON completo in input e in output) invece che per sezione")
     parser.add_argument("--resume", action="store_true", help="Resume from progress.json")
     parser.add_argument("--test-models", action="store_true", help="Test with both fast and powerful models (only for --iso)")
     parser.add_argument("--compare", type=str, help="Confronta due modelli su un paese: --compare IT")
     parser.add_argument("--fast-only", action="store_true", help="Usa solo modello veloce (default produzione)")
     parser.add_argument("--powerful-only", action="store_true", help="Usa solo modello potente")
+    parser.add_argument("--max-concurrency", type=int, help="Tetto richieste Grok in volo (concorrenza adattiva AIMD, default: env LLM_MAX_CONCURRENCY o 16)")
+    parser.add_argument("--rpm", type=float, help="Richieste Grok al minuto (default: env GROK_RPM / LLM_RPM, nessun limite)")
+    parser.add_argument("--retry-budget", type=int, help="Retry massimi per questa run (default: env LLM_RETRY_BUDGET o 50)")
+    parser.add_argument("--no-cache", action="store_true", help="Non usa la cache delle risposte LLM (né lettura né scrittura)")
+    parser.add_argument("--refresh-cache", action="store_true", help="Ignora le risposte in cache ma salva quelle nuove")
+    add_schedule_arguments(parser)
     
     args = parser.parse_args()
     
     # Override configurazione con argomenti CLI
-    only_countries = ONLY_COUNTRIES.copy()
     model = MODEL
-    batch_size = BATCH_SIZE
+    if args.full_country:
+        section_groups = []
+    else:
+        section_groups = [g.strip() for g in args.sections.split(",")] if args.sections else list(SECTION_GROUPS)
+        unknown = [g for g in section_groups if g not in SECTION_GROUPS]
+        if unknown:
+            print(f"❌ Gruppi di sezioni sconosciuti: {', '.join(unknown)} (disponibili: {', '.join(SECTION_GROUPS)})")
+            return
+    batch_size = BATCH_SIZE if args.full_country else SECTION_BATCH_SIZE
     models_to_test = []
     
     # Gestione flag per modelli
     if args.compare:
-        only_countries = [args.compare.upper()]
         models_to_test = [MODEL_FAST, MODEL_POWERFUL]
         print(f"🧪 Modalità confronto attivata per {args.compare.upper()}")
     elif args.powerful_only:
@@ -353,12 +598,6 @@ def main():
         model = MODEL_FAST
         models_to_test = [MODEL_FAST]
     else:
-        if args.iso:
-            # Supporta sia singolo che multipli --iso
-            if isinstance(args.iso, list):
-                only_countries = [iso.upper() for iso in args.iso]
-            else:
-                only_countries = [args.iso.upper()]
         if args.model:
             model = args.model
         if args.batch_size:
@@ -381,6 +620,17 @@ def main():
         except Exception as e:
             print(f"⚠️  Errore caricamento progress: {e}")
     
+    # Journal append-only (fsync per paese): nessuna riscrittura del JSON completo dopo ogni batch.
+    # --resume riapplica i paesi già aggiornati (anche quelli di una run interrotta prima del salvataggio finale)
+    # (il confronto modelli non scrive nulla: non deve azzerare il journal di una run interrotta)
+    comparing = bool(args.compare) or bool(args.test_models and args.iso)
+    journal = CountryJournal(JOURNAL_FILE, resume=args.resume or comparing)
+    if args.resume and len(journal):
+        journal.apply(data.get("fused_by_iso", {}))
+        processed |= set(journal.records)
+        all_changes = [c for record in journal.records.values() for c in record.get("changes", [])]
+        print(f"🔄 Journal {JOURNAL_FILE.name}: {len(journal)} paesi già aggiornati riapplicati")
+    
     # Filtra paesi in base a --iso o --compare se specificato
     filter_iso = None
     if args.compare:
@@ -401,6 +651,37 @@ def main():
         return
     
     to_process = [c for c in countries if c not in processed]
+    
+    # Scheduler: priorità per staleness / confidence bassa / rischio, primi N entro il budget
+    if schedule_requested(args) and not comparing:
+        schedule_max_tokens = 20000 if model == MODEL_POWERFUL else 8000
+        
+        def estimate_country(iso: str):
+            country = data["fused_by_iso"][iso]
+            if section_groups:
+                # Parte fissa del prompt (regole, template) divisa tra i paesi del batch + sezioni del paese
+                input_tokens = output_tokens = 0
+                for group in section_groups:
+                    fixed = estimate_tokens(build_section_prompt(group, "", ""))
+                    payload = build_section_payload(data["fused_by_iso"], [iso], SECTION_GROUPS[group])
+                    prompt = build_section_prompt(group, f"- {iso} ({country.get('country', 'Unknown')})", payload)
+                    input_tokens += fixed // batch_size + estimate_tokens(prompt) - fixed
+                    output_tokens += REASONING_TOKENS // batch_size + SECTION_PATCH_TOKENS
+                return input_tokens, output_tokens
+            json_snippet = json.dumps({iso: country}, ensure_ascii=False, indent=2)
+            prompt = build_prompt(f"- {iso} ({country.get('country', 'Unknown')})", json_snippet)
+            return estimate_tokens(prompt), min(estimate_tokens(json_snippet) + REASONING_TOKENS, schedule_max_tokens)
+        
+        to_process = schedule(
+            data.get("fused_by_iso", {}), to_process, estimate=estimate_country, field="verified",
+            top=args.top, budget_usd=args.budget_usd, budget_tokens=args.budget_tokens,
+            min_age_days=args.min_age_days if args.min_age_days is not None else MIN_AGE_DAYS,
+        )
+        if not to_process:
+            print("❌ Nessun paese selezionato dallo scheduler (budget o --min-age-days).")
+            journal.close()
+            return
+    
     print(f"🚀 Paesi da elaborare: {len(to_process)} / {len(countries)}")
     if args.iso or args.compare:
         if args.compare:
@@ -420,7 +701,10 @@ def main():
         else:
             models_to_test = [model]
     
-    print(f"📊 Model(s): {', '.join(models_to_test)}, Batch size: {batch_size}\n")
+    print(f"📊 Model(s): {', '.join(models_to_test)}, Batch size: {batch_size}")
+    if len(models_to_test) == 1:
+        print(f"🧩 Sezioni: {', '.join(section_groups) if section_groups else 'paese intero (--full-country)'}")
+    print()
     
     # Valida API key prima di iniziare
     print("🔑 Validazione API key...", end=" ", flush=True)
@@ -430,6 +714,8 @@ def main():
         return
     print("✅ API key valida\n")
     
+    start_retry_run("grok", budget=args.retry_budget)
+    configure_response_cache(no_cache=args.no_cache, refresh=args.refresh_cache)
     fused = data.get("fused_by_iso", {})
     
     # Se test con due modelli, processa ogni paese con entrambi i modelli
@@ -442,26 +728,30 @@ def main():
         print(f"{'='*80}\n")
         
         results = {}
+        prompt = build_prompt(
+            countries_block=f"- {iso} ({fused[iso].get('country')})",
+            json_snippet=json.dumps({iso: fused[iso]}, ensure_ascii=False, indent=2)
+        )
+        
+        # I modelli rispondono in parallelo (un job per modello); il tempo è quello del singolo job
+        jobs = run_jobs(
+            models_to_test,
+            lambda test_model: request_batch_update(client, test_model, prompt, 12000,
+                                                    matches=lambda result: full_result_matches(result, [iso])),
+            provider="grok",
+            progress_every=0,
+        )
         
-        for test_model in models_to_test:
+        for job in jobs:
+            test_model = job.item
             print(f"📊 Modello: {test_model}")
             print(f"{'─'*60}")
             
             try:
-                prompt = build_prompt(
-                    countries_block=f"- {iso} ({fused[iso].get('country')})",
-                    json_snippet=json.dumps({iso: fused[iso]}, ensure_ascii=False, indent=2)
-                )
-                
-                start_time = time.time()
-                response = client.chat.completions.create(
-                    model=test_model,
-                    messages=[{"role": "user", "content": prompt}],
-                    response_format={"type": "json_object"},
-                    temperature=0.0,
-                    max_tokens=12000
-                )
-                elapsed = time.time() - start_time
+                if not job.ok:
+                    raise job.error
+                response = job.value
+                elapsed = job.elapsed
                 
                 result = extract_json_from_response(response.choices[0].message.content)
                 updated = result.get("updated", {}).get(iso, {})
@@ -487,8 +777,6 @@ def main():
             except Exception as e:
                 print(f"   ❌ ERRORE: {str(e)[:120]}")
                 results[test_model] = {"error": str(e)}
-            
-            time.sleep(2)
         
         # === CONFRONTO FINALE VISIVO ===
         print(f"{'='*80}")
@@ -516,16 +804,17 @@ def main():
             json.dump({"country": iso, "results": results}, f, ensure_ascii=False, indent=2)
         print(f"\n💾 Confronto salvato in: {compare_file}")
         
+        journal.close()
         return  # esce dopo il test singolo
     else:
-        # Processamento normale con un solo modello
-        for i in range(0, len(to_process), batch_size):
-            batch = to_process[i:i+batch_size]
-            batch_num = i // batch_size + 1
-            total_batches = (len(to_process) + batch_size - 1) // batch_size
-            
-            print(f"[Batch {batch_num}/{total_batches}] {', '.join(batch)}...", end=" ", flush=True)
-            
+        # Processamento normale con un solo modello: un job per batch (llm_runtime.jobs)
+        controller = get_controller("grok", max_limit=args.max_concurrency)
+        # Aumenta max_tokens per modello reasoning (fa analisi più approfondite)
+        max_tokens_value = 20000 if model == MODEL_POWERFUL else 8000
+        batches = [to_process[i:i+batch_size] for i in range(0, len(to_process), batch_size)]
+        total_batches = len(batches)
+        
+        def run_batch(batch: List[str]):
             # Prepara snippet JSON (solo i paesi del batch)
             batch_data = {iso: fused[iso] for iso in batch if iso in fused}
             json_snippet = json.dumps(batch_data, ensure_ascii=False, indent=2)
@@ -534,23 +823,19 @@ def main():
                 f"- {iso} ({fused[iso].get('country', 'Unknown')})"
                 for iso in batch if iso in fused
             ])
+            prompt = build_prompt(countries_block, json_snippet)
+            return request_batch_update(client, model, prompt, max_tokens_value,
+                                        matches=lambda result: full_result_matches(result, batch))
+        
+        def on_result(job: JobResult):
+            batch = job.item
+            print(f"[Batch {job.done}/{total_batches}] {', '.join(batch)}...", end=" ", flush=True)
+            response = job.value
+            result_content = ""
             
             try:
-                prompt = build_prompt(countries_block, json_snippet)
-                
-                # Aumenta max_tokens per modello reasoning (fa analisi più approfondite)
-                max_tokens_value = 20000 if model == MODEL_POWERFUL else 8000
-                
-                response = client.chat.completions.create(
-                    model=model,
-                    messages=[{
-                        "role": "user",
-                        "content": prompt
-                    }],
-                    response_format={"type": "json_object"},
-                    temperature=0.0,
-                    max_tokens=max_tokens_value
-                )
+                if not job.ok:
+                    raise job.error  # stessi rami di gestione errori sotto
                 
                 result_content = response.choices[0].message.content
                 result = extract_json_from_response(result_content)
@@ -565,7 +850,7 @@ def main():
                     print(f"    'updated' è vuoto: {updated_countries}")
                     print(f"    'changes': {batch_changes}")
                     # Mostra un sample della risposta per debug
-                    if 'result_content' in locals():
+                    if result_content:
                         print(f"    Response preview (primi 500 char): {result_content[:500]}")
                 else:
                     print(f"📝 Grok ha processato {len(updated_countries)} paesi: {list(updated_countries.keys())}")
@@ -591,6 +876,10 @@ def main():
                 # Aggiungi ai cambiamenti
                 all_changes.extend(batch_changes)
                 
+                # Journal: stato finale dei paesi del batch (i cambiamenti del batch sulla prima riga)
+                for position, iso in enumerate([iso for iso in batch if iso in fused]):
+                    journal.append(iso, fused[iso], changes=batch_changes if position == 0 else [])
+                
                 if batch_changes:
                     print(f"✅ {len(batch_changes)} cambiamenti trovati")
                     for change in batch_changes[:3]:  # Mostra primi 3 cambiamenti
@@ -607,7 +896,7 @@ def main():
                     print(f"    ⚠️  JSON troncato - max_tokens potrebbe essere troppo basso")
                     print(f"    💡 Suggerimento: riduci batch_size o aumenta max_tokens")
                 
-                if 'result_content' in locals():
+                if result_content:
                     preview_len = min(500, len(result_content))
                     print(f"    Response preview (primi {preview_len} char): {result_content[:preview_len]}...")
                     print(f"    Lunghezza totale response: {len(result_content)} caratteri")
@@ -620,12 +909,94 @@ def main():
                 # Continua con prossimo batch (non bloccare tutto il processo)
                 print(f"    ⏭️  Saltando questo batch, continuo con il prossimo...")
             except Exception as e:
-                print(f"⚠️  Errore: {str(e)[:100]}")
-                time.sleep(5)
+                print(f"⚠️  Errore [{classify_error(e)}]: {str(e)[:100]}")
+        
+        # Modalità per sezione: un job per (gruppo di sezioni, batch); le risposte restano in attesa per paese
+        # e vengono applicate (patch, journal, last_verified, confidence) solo quando tutti i suoi gruppi sono
+        # andati a buon fine: un paese con un gruppo fallito resta com'era, in memoria, nel file e nel journal
+        section_max_tokens = 12000 if model == MODEL_POWERFUL else 4000
+        section_jobs = [(group, batch) for batch in batches for group in section_groups]
+        pending = {iso: len(section_groups) for iso in to_process}
+        failed: Set[str] = set()
+        staged: Dict[str, List[Tuple[str, List[str], Dict]]] = {}
+        confidences: Dict[str, List[str]] = {}
+        
+        def run_section(job_item):
+            group, batch = job_item
+            countries_block = "\n".join([
+                f"- {iso} ({fused[iso].get('country', 'Unknown')})"
+                for iso in batch if iso in fused
+            ])
+            payload = build_section_payload(fused, batch, SECTION_GROUPS[group])
+            prompt = build_section_prompt(group, countries_block, payload)
+            return request_batch_update(client, model, prompt, section_max_tokens,
+                                        matches=lambda result: section_result_matches(result, batch, SECTION_GROUPS[group]))
+        
+        def finish_country(iso: str):
+            changes = []
+            for group, batch, result in staged.pop(iso, []):
+                changes.extend(apply_section_result(fused, batch, SECTION_GROUPS[group], result, only={iso}).get(iso, []))
+            country = fused[iso]
+            country["last_verified"] = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+            if confidences.get(iso):
+                # La confidence del paese è quella della sezione meno sicura
+                country["confidence"] = min(confidences[iso], key=parse_confidence)
+            all_changes.extend(changes)
+            processed.add(iso)
+            journal.append(iso, country, changes=changes)
+        
+        def on_section_result(job: JobResult):
+            group, batch = job.item
+            print(f"[{job.done}/{len(section_jobs)}] {group}: {', '.join(batch)}...", end=" ", flush=True)
+            try:
+                if not job.ok:
+                    raise job.error  # stessi rami di gestione errori sotto
+                response = job.value
+                if response.choices[0].finish_reason == "length":
+                    raise ValueError(f"risposta troncata (max_tokens {section_max_tokens}): riduci --batch-size")
+                result = extract_json_from_response(response.choices[0].message.content)
+                if not section_result_matches(result, batch, SECTION_GROUPS[group]):
+                    raise ValueError("risposta senza \"patches\" o con paesi/sezioni fuori dal batch")
+                
+                for iso in batch:
+                    staged.setdefault(iso, []).append((group, batch, result))
+                for iso, level in (result.get("confidence") or {}).items():
+                    if iso in batch and isinstance(level, str):
+                        confidences.setdefault(iso, []).append(level)
+                batch_changes = result.get("changes") or []
+                
+                if batch_changes:
+                    print(f"✅ {len(batch_changes)} cambiamenti trovati")
+                    for change in batch_changes[:3]:
+                        print(f"   • {change}")
+                else:
+                    print("✅ Nessun cambiamento")
+            except Exception as e:
+                failed.update(batch)
+                print(f"⚠️  Errore [{classify_error(e)}]: {str(e)[:100]}")
             
-            # Salva ogni batch (progressivo)
-            save_progress(data, all_changes, processed)
-            time.sleep(1)  # Gentile coi rate limit
+            for iso in batch:
+                pending[iso] -= 1
+                if pending[iso] == 0 and iso not in failed and iso in fused:
+                    finish_country(iso)
+                elif iso in failed:
+                    staged.pop(iso, None)  # patch dei gruppi riusciti scartate: il paese si riprende intero
+        
+        # Batch in parallelo (limite AIMD "grok"): merge e salvataggi nel thread dell'event loop, man mano che finiscono
+        if section_groups:
+            run_jobs(section_jobs, run_section, label=lambda job_item: f"{job_item[0]}:{','.join(job_item[1])}",
+                     provider="grok", rpm=args.rpm, on_result=on_section_result)
+            if failed:
+                print(f"⚠️  {len(failed)} paesi con sezioni fallite, non marcati come processati (ripresi con --resume): "
+                      f"{', '.join(sorted(failed))}")
+        else:
+            run_jobs(batches, run_batch, label=lambda batch: ",".join(batch), provider="grok", rpm=args.rpm, on_result=on_result)
+        journal.close()
+        # Compattazione: backup + file aggiornato + progresso, una volta sola
+        save_progress(data, all_changes, processed)
+        print(f"⚙️  Concorrenza {controller.describe()}")
+        print(f"🔁 {get_retry_policy('grok').describe()}")
+    print(f"💾 {get_response_cache().describe()}")
     
     print("\n" + "="*70)
     print("✅ COMPLETATO!")
@@ -8,20 +8,33 @@ Aggiorna le sources usando Grok API.
 """
 
 import json
-import time
 import os
 import re
+import sys
 from pathlib import Path
 from typing import Dict, Any, List, Set
 from datetime import datetime, timezone
 from openai import OpenAI
 import argparse
 
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from llm_runtime.cache import completion_from_cache, completion_to_cache, configure_response_cache, get_response_cache
+from llm_runtime.concurrency import OUTCOME_ERROR, get_controller
+from llm_runtime.jobs import JobResult, run_jobs
+from llm_runtime.retry import classify_error, get_retry_policy, start_retry_run
+
+from backup_store import save_snapshot
+from compliance_diff import changeset_path_for, describe_changeset, diff_documents, write_changeset
+from compliance_index import write_index
+from compliance_journal import CountryJournal, journal_path_for, write_json_atomic
+from verification_scheduler import MIN_AGE_DAYS, REASONING_TOKENS, add_schedule_arguments, estimate_tokens, schedule, schedule_requested
+
 # ===================== CONFIGURAZIONE =====================
 BASE_DIR = Path(__file__).parent
 INPUT_FILE = BASE_DIR / "compliance.v3.migrated.json"
 OUTPUT_FILE = BASE_DIR / "compliance.v3.sources_updated.json"
 PROGRESS_FILE = BASE_DIR / "progress_sources.json"
+JOURNAL_FILE = journal_path_for(OUTPUT_FILE)
 BACKUP_DIR = BASE_DIR / "backups"
 BACKUP_DIR.mkdir(exist_ok=True)
 
@@ -50,13 +63,16 @@ def get_client() -> OpenAI:
             "GROK_API_KEY non trovata. Esportala con: export GROK_API_KEY='your-key'\n"
             "Oppure crea un file .env nella directory compliance_builder con: GROK_API_KEY=your-key"
         )
-    return OpenAI(api_key=api_key, base_url="https://api.x.ai/v1")
+    # max_retries=0: i retry li gestisce solo la policy condivisa (llm_runtime.retry)
+    return OpenAI(api_key=api_key, base_url="https://api.x.ai/v1", max_retries=0)
 
 
 def validate_api_key(client: OpenAI) -> bool:
     """Valida l'API key."""
     try:
-        response = client.chat.completions.create(
+        # Errori temporanei (429/5xx) ritentati dalla policy: l'SDK ha max_retries=0
+        response = get_retry_policy("grok").call(
+            client.chat.completions.create,
             model="grok-4-fast-non-reasoning",
             messages=[{"role": "user", "content": "test"}],
             max_tokens=5
@@ -191,22 +207,29 @@ def load_json() -> Dict[str, Any]:
 
 
 def save_progress(data: Dict, processed: Set[str], costs: Dict[str, Dict] = None):
-    """Salva progresso e backup."""
-    # Backup
-    backup_path = BACKUP_DIR / f"backup_sources_{int(time.time())}.json"
-    with backup_path.open("w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    """Salva backup, file aggiornato e progresso (a fine run: durante la run fa fede il journal)."""
+    # Backup deduplicato: blob per paese indirizzati dal contenuto, solo i paesi cambiati occupano spazio
+    # (python backup_store.py list / restore / prune)
+    backup = save_snapshot(data, label="sources", directory=BACKUP_DIR, source=OUTPUT_FILE.name)
+    print(f"🗄️  Backup {backup['id']}: {backup['new_blobs']} paesi nuovi su {backup['countries']} ({backup['new_bytes'] / 1024:.1f} KB)")
     
     # Aggiorna generated_at
     data["generated_at"] = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
     
     # Salva file aggiornato
-    with OUTPUT_FILE.open("w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    write_json_atomic(OUTPUT_FILE, data)
+    
+    # Changeset JSON Patch input → output: KB, pubblicazione e review lavorano solo sulle path cambiate
+    changeset = diff_documents(load_json(), data, old_label=INPUT_FILE.name, new_label=OUTPUT_FILE.name)
+    changeset_file = write_changeset(changeset, changeset_path_for(OUTPUT_FILE))
+    print(f"🔍 Changeset {changeset_file.name}: {describe_changeset(changeset)}")
+    print(f"🗂️  Indice {write_index(OUTPUT_FILE, data=data).name}")
     
     # Salva progresso con costi
     progress = {
         "processed": sorted(list(processed)),
+        "concurrency": get_controller("grok").snapshot(),
+        "retries": get_retry_policy("grok").snapshot(),
         "last_update": datetime.now(timezone.utc).isoformat()
     }
     
@@ -221,12 +244,51 @@ def save_progress(data: Dict, processed: Set[str], costs: Dict[str, Dict] = None
     print(f"\n💾 Progresso salvato → {len(processed)} paesi elaborati\n")
 
 
+def request_sources_update(client: OpenAI, model: str, prompt: str):
+    """Chiamata Grok per un paese (eseguita nel pool di thread, concorrenza AIMD, retry e cache risposte condivisi)."""
+    body = {
+        "model": model,
+        "messages": [{"role": "user", "content": prompt}],
+        "response_format": {"type": "json_object"},
+        "temperature": 0.0,
+        "max_tokens": 16000,
+    }
+    cached_request = get_response_cache().request(str(client.base_url), body)
+    cached = cached_request.lookup()
+    if cached is not None:
+        return completion_from_cache(cached)
+
+    def attempt():
+        with get_controller("grok").slot(size=len(prompt) / 4) as slot:
+            response = client.chat.completions.create(**body)
+            if response.choices and response.choices[0].finish_reason == "length":
+                slot.fail(OUTCOME_ERROR)
+        return response
+
+    # Solo 429/timeout/5xx vengono ritentati; risposte troncate tornano al chiamante
+    response = get_retry_policy("grok").call(attempt, label=model)
+    # In cache solo risposte complete con JSON valido
+    if response.choices and response.choices[0].finish_reason != "length":
+        try:
+            extract_json_from_response(response.choices[0].message.content or "")
+            cached_request.store(completion_to_cache(response))
+        except ValueError:
+            pass
+    return response
+
+
 def main():
     parser = argparse.ArgumentParser(description="Update sources using Grok API")
     parser.add_argument("--iso", type=str, action="append", help="Process only specific country (ISO2). Can be used multiple times")
     parser.add_argument("--limit", type=int, help="Process only first N countries")
     parser.add_argument("--resume", action="store_true", help="Resume from progress.json")
     parser.add_argument("--model", type=str, default=MODEL, help="Grok model to use")
+    parser.add_argument("--max-concurrency", type=int, help="Max in-flight Grok requests (adaptive AIMD, default: env LLM_MAX_CONCURRENCY or 16)")
+    parser.add_argument("--rpm", type=float, help="Max Grok requests per minute (default: env GROK_RPM / LLM_RPM, no limit)")
+    parser.add_argument("--retry-budget", type=int, help="Max retries for this run (default: env LLM_RETRY_BUDGET or 50)")
+    parser.add_argument("--no-cache", action="store_true", help="Do not use the LLM response cache (no reads, no writes)")
+    parser.add_argument("--refresh-cache", action="store_true", help="Ignore cached responses but store the new ones")
+    add_schedule_arguments(parser)
     
     args = parser.parse_args()
     
@@ -235,6 +297,14 @@ def main():
     
     # Riprendi da dove eri rimasto
     processed: Set[str] = set()
+    previous_costs: Dict[str, Dict] = {}  # token reali delle run precedenti (stime dello scheduler)
+    
+    if schedule_requested(args) and PROGRESS_FILE.exists():
+        try:
+            with PROGRESS_FILE.open("r", encoding="utf-8") as f:
+                previous_costs = json.load(f).get("costs", {})
+        except Exception:
+            pass
     
     if args.resume and PROGRESS_FILE.exists():
         try:
@@ -245,6 +315,16 @@ def main():
         except Exception as e:
             print(f"⚠️  Errore caricamento progress: {e}")
     
+    # Journal append-only (fsync per paese) al posto della riscrittura completa dopo ogni paese;
+    # --resume riapplica fonti e costi dei paesi già fatti
+    journal = CountryJournal(JOURNAL_FILE, resume=args.resume)
+    costs = {}
+    if args.resume and len(journal):
+        journal.apply(data.get("fused_by_iso", {}))
+        processed |= set(journal.records)
+        costs = {iso: record["cost"] for iso, record in journal.records.items() if record.get("cost")}
+        print(f"🔄 Journal {JOURNAL_FILE.name}: {len(journal)} paesi già aggiornati riapplicati")
+    
     # Filtra paesi
     countries = list(data.get("fused_by_iso", {}).keys())
     
@@ -259,6 +339,25 @@ def main():
         countries = countries[:args.limit]
     
     to_process = [c for c in countries if c not in processed]
+    
+    # Scheduler: fonti più vecchie / confidence bassa / rischio alto prima, entro il budget della run
+    if schedule_requested(args):
+        def estimate_country(iso: str):
+            # Token reali dell'ultima run per il paese, altrimenti stima da prompt e fonti esistenti
+            previous = previous_costs.get(iso)
+            if previous and previous.get("prompt_tokens"):
+                return previous["prompt_tokens"], previous.get("completion_tokens", 0)
+            country_data = data["fused_by_iso"][iso]
+            sources = country_data.get("sources", {})
+            prompt = build_prompt(country_data.get("country", iso), iso, sources.get("non-governamental", []))
+            return estimate_tokens(prompt), min(2 * estimate_tokens(json.dumps(sources, ensure_ascii=False)) + REASONING_TOKENS, 16000)
+        
+        to_process = schedule(
+            data.get("fused_by_iso", {}), to_process, estimate=estimate_country, field="sources",
+            top=args.top, budget_usd=args.budget_usd, budget_tokens=args.budget_tokens,
+            min_age_days=args.min_age_days if args.min_age_days is not None else MIN_AGE_DAYS,
+        )
+    
     print(f"🚀 Paesi da elaborare: {len(to_process)} / {len(countries)}")
     
     if not to_process:
@@ -273,35 +372,38 @@ def main():
         return
     print("✅ API key valida\n")
     
+    start_retry_run("grok", budget=args.retry_budget)
+    configure_response_cache(no_cache=args.no_cache, refresh=args.refresh_cache)
     fused = data.get("fused_by_iso", {})
     
-    # Traccia costi
-    costs = {}
-    total_cost = 0.0
+    # Un job per paese (llm_runtime.jobs): richieste in parallelo sotto il limite AIMD "grok",
+    # aggiornamenti e salvataggi nel thread dell'event loop man mano che i paesi finiscono
+    controller = get_controller("grok", max_limit=args.max_concurrency)
+    
+    def request_country(iso: str):
+        country_data = fused[iso]
+        existing_sources = country_data.get("sources", {}).get("non-governamental", [])
+        prompt = build_prompt(country_data.get("country", iso), iso, existing_sources)
+        return request_sources_update(client, args.model, prompt)
     
-    # Processa paesi
-    for i, iso in enumerate(to_process, 1):
+    def on_result(job: JobResult):
+        iso = job.item
         country_data = fused[iso]
         country_name = country_data.get("country", iso)
         
-        print(f"\n[{i}/{len(to_process)}] {country_name} ({iso})...", flush=True)
+        print(f"\n[{job.done}/{len(to_process)}] {country_name} ({iso})...", flush=True)
         
         # Prepara fonti esistenti
         sources = country_data.get("sources", {})
         existing_sources = sources.get("non-governamental", [])
+        result_content = ""
         
         print(f"  Fonti esistenti: {len(existing_sources)}")
         
         try:
-            prompt = build_prompt(country_name, iso, existing_sources)
-            
-            response = client.chat.completions.create(
-                model=args.model,
-                messages=[{"role": "user", "content": prompt}],
-                response_format={"type": "json_object"},
-                temperature=0.0,
-                max_tokens=16000
-            )
+            if not job.ok:
+                raise job.error  # stessi rami di gestione errori sotto
+            response = job.value
             
             # Traccia token e costi
             usage = response.usage
@@ -349,20 +451,21 @@ def main():
                 "output_cost": output_cost,
                 "total_cost": total_cost
             }
-            total_cost_all = sum(c.get("total_cost", 0) for c in costs.values())
             
             processed.add(iso)
+            journal.append(iso, country_data, cost=costs[iso])
             
         except json.JSONDecodeError as e:
             print(f"  ⚠️  Errore parsing JSON: {str(e)[:100]}")
-            if 'result_content' in locals():
+            if result_content:
                 print(f"    Response preview: {result_content[:500]}")
         except Exception as e:
-            print(f"  ⚠️  Errore: {str(e)[:100]}")
-        
-        # Salva ogni paese
-        save_progress(data, processed, costs)
-        time.sleep(2)  # Gentile coi rate limit
+            print(f"  ⚠️  Errore [{classify_error(e)}]: {str(e)[:100]}")
+    
+    run_jobs(to_process, request_country, provider="grok", rpm=args.rpm, on_result=on_result)
+    journal.close()
+    # Compattazione: backup + file aggiornato + progresso, una volta sola
+    save_progress(data, processed, costs)
     
     # Calcola totale
     total_cost_all = sum(c.get("total_cost", 0) for c in costs.values())
@@ -375,6 +478,9 @@ def main():
     print(f"📊 Paesi processati: {len(processed)}")
     print(f"💰 Costo totale: ${total_cost_all:.4f}")
     print(f"📈 Token totali: {total_tokens_all:,}")
+    print(f"⚙️  Concorrenza {controller.describe()}")
+    print(f"🔁 {get_retry_policy('grok').describe()}")
+    print(f"💾 {get_response_cache().describe()}")
     if len(processed) > 0:
         avg_cost = total_cost_all / len(processed)
         print(f"📊 Costo medio per paese: ${avg_cost:.4f}")
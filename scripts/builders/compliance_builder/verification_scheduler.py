@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Scheduler delle ri-verifiche: quali paesi mandare al modello reasoning in questa run.
+
+Invece di ri-verificare tutti i 204 paesi in ordine alfabetico, ogni paese riceve una priorità
+dai campi che ha già:
+- staleness  → giorni da last_verified (o sources.source_last_updated per le fonti);
+               1 - exp(-giorni / STALE_SCALE_DAYS), una data mancante conta come massima
+- confidence → "high" / "medium" / "low - ..." (testo libero: conta la parola iniziale);
+               priorità = 1 - confidence, mancante = "low"
+- rischio    → enforcement.risk_level (high / medium / low, mancante = medium)
+priorità = somma pesata (WEIGHTS), poi selezione dei primi N entro un budget di token o dollari
+per run (stima: prompt / CHARS_PER_TOKEN in input + output atteso, prezzi PRICE_PER_M).
+I paesi verificati da meno di min_age_days giorni non vengono riproposti.
+
+Piano senza chiamate API:
+    python verification_scheduler.py --top 20 --budget-usd 5
+    python verification_scheduler.py --file compliance.v3.migrated.json --field sources --budget-tokens 500000
+"""
+
+import argparse
+import json
+import math
+import os
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+BASE_DIR = Path(__file__).parent
+
+WEIGHTS = {"staleness": 0.5, "confidence": 0.3, "risk": 0.2}
+STALE_SCALE_DAYS = 180      # dopo ~6 mesi la staleness vale 0.63, dopo un anno 0.87
+MIN_AGE_DAYS = 30           # default di --min-age-days negli script
+CHARS_PER_TOKEN = 4
+REASONING_TOKENS = 3000     # token di ragionamento stimati per paese (modello reasoning)
+# $ per milione di token (input, output), come il calcolo costi di update_sources_grok
+PRICE_PER_M = (
+    float(os.getenv("GROK_PRICE_INPUT_PER_M", "3.00")),
+    float(os.getenv("GROK_PRICE_OUTPUT_PER_M", "15.00")),
+)
+
+CONFIDENCE_LEVELS = {
+    "very_low": 0.1, "very low": 0.1,
+    "low": 0.25,
+    "low-to-medium": 0.4, "low-medium": 0.4,
+    "medium": 0.5,
+    "medium-high": 0.7, "medium-to-high": 0.7,
+    "high": 0.9,
+}
+RISK_LEVELS = {"low": 0.3, "medium": 0.6, "high": 1.0}
+DEFAULT_RISK = 0.6
+
+STALENESS_FIELDS = ("verified", "sources")
+
+class Candidate:
+    """Un paese con priorità e costo stimato della sua ri-verifica"""
+
+    def __init__(self, iso: str, country: str, age_days: Optional[int], confidence: float, risk: float):
+        self.iso = iso
+        self.country = country
+        self.age_days = age_days  # None = data mancante
+        self.confidence = confidence
+        self.risk = risk
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.cost = 0.0
+
+    @property
+    def staleness(self) -> float:
+        if self.age_days is None:
+            return 1.0
+        return 1 - math.exp(-max(self.age_days, 0) / STALE_SCALE_DAYS)
+
+    @property
+    def score(self) -> float:
+        return (WEIGHTS["staleness"] * self.staleness
+                + WEIGHTS["confidence"] * (1 - self.confidence)
+                + WEIGHTS["risk"] * self.risk)
+
+    @property
+    def tokens(self) -> int:
+        return self.input_tokens + self.output_tokens
+
+# ============================================================================
+# SEGNALI DAI DATI DEL PAESE
+# ============================================================================
+
+def parse_date(value: Any) -> Optional[date]:
+    """'2025-12-04' o '2025-12-27T19:15:51Z' → date (None se mancante o non valida)"""
+    if not value or not isinstance(value, str):
+        return None
+    try:
+        return datetime.strptime(value[:10], "%Y-%m-%d").date()
+    except ValueError:
+        return None
+
+def parse_confidence(value: Any) -> float:
+    """Confidence in [0, 1]: 'high', 'medium-high', 'low - No official sources ...' (conta il livello iniziale)"""
+    if isinstance(value, (int, float)):
+        return min(max(float(value), 0.0), 1.0)
+    if not isinstance(value, str) or not value.strip():
+        return CONFIDENCE_LEVELS["low"]
+    level = value.strip().lower().split(" - ")[0].split(" for ")[0].strip()
+    if level in CONFIDENCE_LEVELS:
+        return CONFIDENCE_LEVELS[level]
+    first_word = level.split()[0].strip(",.;:")
+    return CONFIDENCE_LEVELS.get(first_word, CONFIDENCE_LEVELS["low"])
+
+def parse_risk(value: Any) -> float:
+    if not isinstance(value, str):
+        return DEFAULT_RISK
+    return RISK_LEVELS.get(value.strip().lower(), DEFAULT_RISK)
+
+def staleness_date(country: Dict, field: str = "verified") -> Optional[date]:
+    """Data di riferimento: last_verified (verifica compliance) o sources.source_last_updated (fonti)"""
+    last_verified = parse_date(country.get("last_verified"))
+    sources_updated = parse_date((country.get("sources") or {}).get("source_last_updated"))
+    if field == "sources":
+        return sources_updated or last_verified
+    return last_verified or sources_updated
+
+def rank_countries(fused: Dict[str, Dict], isos: Optional[List[str]] = None, field: str = "verified",
+                   today: Optional[date] = None, min_age_days: int = 0) -> List[Candidate]:
+    """Candidati ordinati per priorità decrescente (a parità: più vecchi prima, poi ISO)"""
+    if field not in STALENESS_FIELDS:
+        raise ValueError(f"campo staleness non valido: {field} (valori: {', '.join(STALENESS_FIELDS)})")
+    today = today or date.today()
+    candidates = []
+    for iso in (isos if isos is not None else list(fused)):
+        country = fused.get(iso)
+        if country is None:
+            continue
+        reference = staleness_date(country, field)
+        age_days = (today - reference).days if reference else None
+        if age_days is not None and age_days < min_age_days:
+            continue
+        candidates.append(Candidate(
+            iso=iso,
+            country=country.get("country", ""),
+            age_days=age_days,
+            confidence=parse_confidence(country.get("confidence")),
+            risk=parse_risk((country.get("enforcement") or {}).get("risk_level")),
+        ))
+    candidates.sort(key=lambda c: (-c.score, -(c.age_days if c.age_days is not None else 10**6), c.iso))
+    return candidates
+
+# ============================================================================
+# STIMA COSTI E SELEZIONE
+# ============================================================================
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+def estimate_cost(input_tokens: int, output_tokens: int, price_per_m: Tuple[float, float] = PRICE_PER_M) -> float:
+    return input_tokens / 1_000_000 * price_per_m[0] + output_tokens / 1_000_000 * price_per_m[1]
+
+def default_estimate(country: Dict) -> Tuple[int, int]:
+    """Stima generica: il JSON del paese va in input (più il prompt fisso) e torna in output, più il ragionamento"""
+    country_tokens = estimate_tokens(json.dumps(country, ensure_ascii=False, indent=2))
+    return country_tokens + 2500, country_tokens + REASONING_TOKENS
+
+def select(candidates: List[Candidate], estimate: Callable[[str], Tuple[int, int]], top: Optional[int] = None,
+           budget_usd: Optional[float] = None, budget_tokens: Optional[int] = None,
+           price_per_m: Tuple[float, float] = PRICE_PER_M) -> Tuple[List[Candidate], List[Candidate]]:
+    """
+    Primi `top` candidati (in ordine di priorità) che stanno nel budget. Un paese che da solo
+    sforerebbe il budget rimasto viene saltato, ma quelli dopo (più economici) possono entrare.
+    Ritorna (selezionati, esclusi per budget).
+    """
+    selected: List[Candidate] = []
+    over_budget: List[Candidate] = []
+    spent_usd = 0.0
+    spent_tokens = 0
+    for candidate in candidates:
+        if top is not None and len(selected) >= top:
+            break
+        candidate.input_tokens, candidate.output_tokens = estimate(candidate.iso)
+        candidate.cost = estimate_cost(candidate.input_tokens, candidate.output_tokens, price_per_m)
+        if ((budget_usd is not None and spent_usd + candidate.cost > budget_usd)
+                or (budget_tokens is not None and spent_tokens + candidate.tokens > budget_tokens)):
+            over_budget.append(candidate)
+            continue
+        selected.append(candidate)
+        spent_usd += candidate.cost
+        spent_tokens += candidate.tokens
+    return selected, over_budget
+
+def schedule(fused: Dict[str, Dict], isos: Optional[List[str]] = None, estimate: Optional[Callable[[str], Tuple[int, int]]] = None,
+             field: str = "verified", top: Optional[int] = None, budget_usd: Optional[float] = None,
+             budget_tokens: Optional[int] = None, min_age_days: int = 0, today: Optional[date] = None,
+             log: Callable = print) -> List[str]:
+    """Entry point per gli script: ranking + selezione, stampa il piano e ritorna gli ISO nell'ordine di priorità"""
+    estimate = estimate or (lambda iso: default_estimate(fused[iso]))
+    ranked = rank_countries(fused, isos, field=field, today=today, min_age_days=min_age_days)
+    skipped_recent = len([iso for iso in (isos if isos is not None else fused) if iso in fused]) - len(ranked)
+    selected, over_budget = select(ranked, estimate, top=top, budget_usd=budget_usd, budget_tokens=budget_tokens)
+    print_plan(selected, log=log)
+    budget = " · ".join(filter(None, [
+        f"budget ${budget_usd:.2f}" if budget_usd is not None else "",
+        f"budget {budget_tokens:,} token" if budget_tokens is not None else "",
+    ]))
+    log(f"🗓️  Scheduler: {len(selected)}/{len(ranked)} paesi selezionati"
+        f"{f' ({budget})' if budget else ''}, stima ${sum(c.cost for c in selected):.2f} / "
+        f"{sum(c.tokens for c in selected):,} token"
+        f"{f' · {len(over_budget)} fuori budget' if over_budget else ''}"
+        f"{f' · {skipped_recent} verificati da meno di {min_age_days} giorni' if skipped_recent else ''}")
+    return [c.iso for c in selected]
+
+def print_plan(candidates: List[Candidate], limit: int = 15, log: Callable = print):
+    if not candidates:
+        return
+    log(f"  {'ISO':<4} {'Priorità':>8} {'Giorni':>6} {'Conf.':>5} {'Rischio':>7} {'Token':>8} {'Costo':>8}")
+    for c in candidates[:limit]:
+        age = str(c.age_days) if c.age_days is not None else "?"
+        log(f"  {c.iso:<4} {c.score:>8.3f} {age:>6} {c.confidence:>5.2f} {c.risk:>7.2f} {c.tokens:>8,} {'$' + format(c.cost, '.4f'):>8}")
+    if len(candidates) > limit:
+        log(f"  … altri {len(candidates) - limit} paesi")
+
+def add_schedule_arguments(parser: argparse.ArgumentParser):
+    """Flag comuni agli script Grok (--top / --budget-* / --min-age-days implicano --schedule)"""
+    parser.add_argument("--schedule", action="store_true", help="Ordina i paesi per priorità (staleness, confidence bassa, rischio) invece che alfabeticamente")
+    parser.add_argument("--top", type=int, help="Con lo scheduler: al massimo N paesi per run")
+    parser.add_argument("--budget-usd", type=float, help="Con lo scheduler: spesa massima stimata per run in dollari")
+    parser.add_argument("--budget-tokens", type=int, help="Con lo scheduler: token massimi stimati per run")
+    parser.add_argument("--min-age-days", type=int, help=f"Con lo scheduler: salta i paesi verificati da meno di N giorni (default {MIN_AGE_DAYS})")
+
+def schedule_requested(args: argparse.Namespace) -> bool:
+    return bool(args.schedule or args.top is not None or args.budget_usd is not None
+                or args.budget_tokens is not None or args.min_age_days is not None)
+
+# ============================================================================
+# CLI
+# ============================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description="Piano delle ri-verifiche per priorità e budget (nessuna chiamata API)")
+    parser.add_argument("--file", type=Path, default=BASE_DIR / "compliance.v3.json", help="File compliance (default: compliance.v3.json)")
+    parser.add_argument("--field", choices=STALENESS_FIELDS, default="verified", help="Data per la staleness: last_verified o sources.source_last_updated")
+    parser.add_argument("--iso", type=str, action="append", help="Limita ai paesi indicati (ripetibile)")
+    parser.add_argument("--top", type=int, help="Al massimo N paesi")
+    parser.add_argument("--budget-usd", type=float, help="Spesa massima stimata in dollari")
+    parser.add_argument("--budget-tokens", type=int, help="Token massimi stimati")
+    parser.add_argument("--min-age-days", type=int, default=0, help="Salta i paesi verificati da meno di N giorni")
+    parser.add_argument("--today", type=str, help="Data di riferimento YYYY-MM-DD (default: oggi)")
+    args = parser.parse_args()
+
+    with args.file.open("r", encoding="utf-8") as f:
+        fused = json.load(f).get("fused_by_iso", {})
+    isos = [iso.upper() for iso in args.iso] if args.iso else None
+    today = parse_date(args.today) if args.today else None
+    schedule(fused, isos, field=args.field, top=args.top, budget_usd=args.budget_usd,
+             budget_tokens=args.budget_tokens, min_age_days=args.min_age_days, today=today)
+
+if __name__ == "__main__":
+    main()
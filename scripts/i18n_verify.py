@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+"""
+Verifica offline dei file i18n: nessuna API key, nessuna rete, tutti i progetti e tutte le
+lingue in parallelo su più processi (una lingua per task).
+
+Per ogni (progetto, lingua), rispetto a EN (en-GB, source of truth):
+- struttura   → path mancanti, path extra, tipi diversi, liste di lunghezza diversa
+- placeholder → {nome}, {{nome}} e argomenti ICU ({count, plural, ...}) uguali a EN
+- tag HTML    → stessi tag di apertura/chiusura di EN, stesso numero
+- identiche   → quota di stringhe identiche a EN non confermate dalla memoria traduzioni
+
+Exit code 1 se c'è almeno un errore (o se la quota di identiche supera --max-identical),
+report JSON leggibile dalla CI con --output.
+
+Uso:
+    python scripts/i18n_verify.py                                   # tutti i progetti
+    python scripts/i18n_verify.py --project app --locale it-IT,fr-FR --output verify.json
+    python scripts/i18n_verify.py --max-identical 0.2 --workers 8
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+sys.path.append(str(Path(__file__).parent))
+
+import sync_and_translate_grok_2026 as sync
+
+VERIFY_SCHEMA = 1
+
+# Check che fanno fallire la verifica; gli altri sono solo segnalati
+ERROR_CHECKS = ("missing_file", "invalid_file", "missing", "type", "list_length", "placeholder", "html_tag")
+WARNING_CHECKS = ("extra",)
+
+# {nome}, {{nome}} (i18next) e {arg, plural|select|...} (ICU): dentro i rami ICU ("one {item}") il testo
+# è tradotto, si raccolgono solo gli argomenti annidati
+I18NEXT_ARG_RE = re.compile(r"\{\{\s*([\w.]+)\s*\}\}")
+ICU_ARG_RE = re.compile(r"\s*([A-Za-z_][\w.]*)\s*(?:,\s*([a-z]+)\s*)?([,}])")
+ICU_BRANCH_TYPES = ("plural", "select", "selectordinal")
+HTML_TAG_RE = re.compile(r"<(/?)([A-Za-z][\w-]*)\b[^<>]*?(/?)>")
+LETTER_RE = re.compile(r"[^\W\d_]")
+
+DEFAULT_MAX_ISSUES = 50
+
+# ============================================================================
+# CHECK SU UNA LINGUA (eseguiti nei processi worker)
+# ============================================================================
+
+# Cache per processo: EN e memoria di un progetto vengono letti una volta per worker
+_SOURCE_CACHE: Dict[Tuple[str, ...], Dict] = {}
+_MEMORY_CACHE: Dict[str, Dict] = {}
+
+def value_kind(value: object) -> str:
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "boolean"
+    if isinstance(value, (int, float)):
+        return "number"
+    if isinstance(value, str):
+        return "string"
+    if isinstance(value, list):
+        return "array"
+    return "object"
+
+def _skip_braces(text: str, i: int) -> int:
+    """Indice dopo la } che chiude il blocco aperto prima di i"""
+    depth = 1
+    while i < len(text) and depth:
+        depth += {"{": 1, "}": -1}.get(text[i], 0)
+        i += 1
+    return i
+
+def _scan_argument(text: str, i: int, tokens: set) -> int:
+    """Argomento ICU che inizia dopo la { in i-1; ritorna l'indice dopo la } di chiusura
+    (i stesso se non è un argomento: la { è testo)"""
+    match = ICU_ARG_RE.match(text, i)
+    if not match:
+        return i
+    name, kind, separator = match.groups()
+    tokens.add(f"{name},{kind}" if kind else name)
+    i = match.end()
+    if separator == "}":
+        return i
+    if kind not in ICU_BRANCH_TYPES:
+        return _skip_braces(text, i)  # stile di number/date/time: non è testo tradotto
+    # Selettori (one, other, =0, offset:1) e rami {messaggio}
+    while i < len(text):
+        if text[i] == "}":
+            return i + 1
+        i = _scan_message(text, i + 1, tokens, nested=True) if text[i] == "{" else i + 1
+    return i
+
+def _scan_message(text: str, i: int, tokens: set, nested: bool = False) -> int:
+    while i < len(text):
+        if nested and text[i] == "}":
+            return i + 1
+        match = I18NEXT_ARG_RE.match(text, i)
+        if match:
+            tokens.add(match.group(1))
+            i = match.end()
+        elif text[i] == "{":
+            i = _scan_argument(text, i + 1, tokens)
+        else:
+            i += 1
+    return i
+
+def placeholders(text: str) -> set:
+    tokens = set()
+    _scan_message(text, 0, tokens)
+    return tokens
+
+def html_tags(text: str) -> Counter:
+    return Counter(f"<{closing}{name.lower()}{self_closing}>" for closing, name, self_closing in HTML_TAG_RE.findall(text))
+
+def load_merged(files: List[str], sharded: bool = False) -> Dict:
+    merged = {}
+    for file_path in files:
+        if sharded:
+            merged = {**merged, **sync.load_sharded_data(Path(file_path), strict=True)}
+            continue
+        with open(file_path, 'r', encoding='utf-8') as f:
+            merged = {**merged, **json.load(f)}
+    return merged
+
+def load_source(en_files: List[str]) -> Dict:
+    key = tuple(en_files)
+    if key not in _SOURCE_CACHE:
+        _SOURCE_CACHE[key] = load_merged([f for f in en_files if os.path.exists(f)])
+    return _SOURCE_CACHE[key]
+
+def load_memory_for(memory_file: Optional[str], locale: str) -> Dict:
+    if not memory_file:
+        return {}
+    if memory_file not in _MEMORY_CACHE:
+        try:
+            with open(memory_file, 'r', encoding='utf-8') as f:
+                _MEMORY_CACHE[memory_file] = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            _MEMORY_CACHE[memory_file] = {}
+    return _MEMORY_CACHE[memory_file].get(locale, {})
+
+class LocaleChecker:
+    """Confronta un albero target con EN e accumula conteggi + primi N problemi"""
+
+    def __init__(self, memory: Dict, max_issues: int):
+        self.memory = memory
+        self.max_issues = max_issues
+        self.counts = Counter()
+        self.issues: List[Dict] = []
+        self.strings = 0
+        self.identical = 0
+
+    def report(self, check: str, path: str, detail: str = ""):
+        self.counts[check] += 1
+        if len(self.issues) < self.max_issues:
+            self.issues.append({"check": check, "path": path, "detail": detail})
+
+    def compare(self, en_value: object, target_value: object, path: str):
+        en_kind, target_kind = value_kind(en_value), value_kind(target_value)
+        if en_kind != target_kind:
+            self.report("type", path, f"{en_kind} → {target_kind}")
+            return
+
+        if en_kind == "object":
+            for key, en_child in en_value.items():
+                child_path = f"{path}.{key}" if path else key
+                if key in target_value:
+                    self.compare(en_child, target_value[key], child_path)
+                else:
+                    self.report("missing", child_path)
+            for key in target_value.keys() - en_value.keys():
+                self.report("extra", f"{path}.{key}" if path else key)
+        elif en_kind == "array":
+            if len(en_value) != len(target_value):
+                self.report("list_length", path, f"{len(en_value)} → {len(target_value)}")
+            for idx, (en_item, target_item) in enumerate(zip(en_value, target_value)):
+                self.compare(en_item, target_item, f"{path}[{idx}]")
+        elif en_kind == "string":
+            self.compare_strings(en_value, target_value, path)
+
+    def compare_strings(self, en_text: str, target_text: str, path: str):
+        if not LETTER_RE.search(en_text):
+            return
+        self.strings += 1
+        if en_text == target_text:
+            # Identica a EN: tradotta solo se la memoria lo conferma (come nel traduttore)
+            entry = self.memory.get(path)
+            if entry is None or sync.memory_entry_value(entry) != target_text:
+                self.identical += 1
+            return
+
+        en_placeholders, target_placeholders = placeholders(en_text), placeholders(target_text)
+        if en_placeholders != target_placeholders:
+            missing = sorted(en_placeholders - target_placeholders)
+            extra = sorted(target_placeholders - en_placeholders)
+            self.report("placeholder", path, f"mancanti {missing}, extra {extra}")
+
+        if "<" in en_text or "<" in target_text:
+            en_tags, target_tags = html_tags(en_text), html_tags(target_text)
+            if en_tags != target_tags:
+                missing = sorted((en_tags - target_tags).elements())
+                extra = sorted((target_tags - en_tags).elements())
+                self.report("html_tag", path, f"mancanti {missing}, extra {extra}")
+
+def verify_locale(task: Dict) -> Dict:
+    """Verifica una lingua di un progetto (task serializzabile: solo path e opzioni)"""
+    started = time.perf_counter()
+    result = {"project": task["project"], "locale": task["locale"]}
+    checker = LocaleChecker(load_memory_for(task.get("memory_file"), task["locale"]), task["max_issues"])
+
+    existing = [f for f in task["target_files"] if os.path.exists(f)]
+    for missing_file in sorted(set(task["target_files"]) - set(existing)):
+        checker.report("missing_file", missing_file)
+
+    target_data = None
+    if existing:
+        try:
+            target_data = load_merged(existing, task.get("sharded", False))
+        except (OSError, json.JSONDecodeError, KeyError) as e:
+            checker.report("invalid_file", ", ".join(existing), str(e))
+
+    if target_data is not None:
+        checker.compare(load_source(task["en_files"]), target_data, "")
+
+    result.update({
+        "files": len(existing),
+        "strings": checker.strings,
+        "identical": checker.identical,
+        "identicalRatio": round(checker.identical / checker.strings, 4) if checker.strings else 0.0,
+        "errors": sum(checker.counts[c] for c in ERROR_CHECKS),
+        "warnings": sum(checker.counts[c] for c in WARNING_CHECKS),
+        "counts": dict(checker.counts),
+        "issues": checker.issues,
+        "ms": round((time.perf_counter() - started) * 1000, 1),
+    })
+    return result
+
+# ============================================================================
+# ORCHESTRAZIONE
+# ============================================================================
+
+def build_tasks(project_ids: List[str], locale_arg: Optional[str], max_issues: int) -> Tuple[List[Dict], Dict[str, Dict]]:
+    """Un task per (progetto, lingua) con i path già risolti, più le info di ogni progetto"""
+    tasks, projects = [], {}
+    for project_id in project_ids:
+        project_config = sync.load_project_config(project_id)
+        if not project_config:
+            projects[project_id] = {"error": "Configurazione progetto non trovata"}
+            continue
+        project_config["sourceLocale"] = "en-GB"
+
+        en_files = [str(sync.resolve_project_path(project_config, f["file"])) for f in sync.get_source_files(project_config)]
+        if not any(os.path.exists(f) for f in en_files):
+            projects[project_id] = {"error": "Nessun file sorgente trovato", "sourceFiles": en_files}
+            continue
+
+        memory_file = sync.memory_path_for(project_id)
+        locales = [l for l in sync.select_locales(project_id, locale_arg) if l.lower() != "en-gb"]
+        projects[project_id] = {"sourceFiles": en_files, "locales": locales}
+        for locale in locales:
+            tasks.append({
+                "project": project_id,
+                "locale": locale,
+                "en_files": en_files,
+                "target_files": [str(sync.resolve_project_path(project_config, f["file"])) for f in sync.get_files_for_locale(project_config, locale)],
+                "sharded": bool(project_config.get("shards")),
+                "memory_file": str(memory_file) if memory_file.exists() else None,
+                "max_issues": max_issues,
+            })
+    return tasks, projects
+
+def run_verify(project_ids: List[str], locale_arg: Optional[str] = None, workers: Optional[int] = None,
+               max_identical: Optional[float] = None, max_issues: int = DEFAULT_MAX_ISSUES,
+               output_path: Optional[str] = None, verbose: bool = True) -> int:
+    """Verifica i progetti richiesti e ritorna l'exit code (0 = ok, 1 = errori)"""
+    started = time.perf_counter()
+    tasks, projects = build_tasks(project_ids, locale_arg, max_issues)
+
+    workers = max(1, min(workers or os.cpu_count() or 1, len(tasks) or 1))
+    if workers == 1:
+        results = [verify_locale(task) for task in tasks]
+    else:
+        # Task ordinati per progetto: chunk contigui riusano la cache EN del worker
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(verify_locale, tasks, chunksize=max(1, len(tasks) // (workers * 4))))
+
+    failed = any("error" in info for info in projects.values())
+    for result in results:
+        result["identicalExceeded"] = max_identical is not None and result["identicalRatio"] > max_identical
+        if result["errors"] or result["identicalExceeded"]:
+            failed = True
+        projects[result["project"]].setdefault("results", []).append(result)
+
+    elapsed = time.perf_counter() - started
+    if verbose:
+        print_report(projects, max_identical)
+        print(f"\n⚡ {len(tasks)} lingue verificate in {elapsed * 1000:.0f} ms ({workers} processi)")
+
+    if output_path:
+        totals = Counter()
+        for result in results:
+            totals.update(result["counts"])
+        report = {
+            "_schema": VERIFY_SCHEMA,
+            "ok": not failed,
+            "generatedAt": round(time.time(), 3),
+            "elapsedMs": round(elapsed * 1000, 1),
+            "maxIdentical": max_identical,
+            "totals": dict(totals),
+            "projects": projects,
+        }
+        sync.save_json(Path(output_path), report)
+        if verbose:
+            print(f"💾 Report salvato in {output_path}")
+
+    return 1 if failed else 0
+
+def print_report(projects: Dict[str, Dict], max_identical: Optional[float]):
+    print(f"\n🔍 VERIFICA i18n (offline)\n")
+    for project_id, info in projects.items():
+        if "error" in info:
+            print(f"❌ {project_id}: {info['error']}")
+            continue
+        results = info.get("results", [])
+        bad = [r for r in results if r["errors"] or r["identicalExceeded"]]
+        print(f"{'✅' if not bad else '❌'} {project_id}: {len(results) - len(bad)}/{len(results)} lingue OK")
+        for r in results:
+            if not (r["errors"] or r["warnings"] or r["identicalExceeded"]):
+                continue
+            counts = ", ".join(f"{check}={n}" for check, n in sorted(r["counts"].items()))
+            identical = f", identiche {r['identicalRatio']:.0%}" if r["identicalExceeded"] else ""
+            print(f"   {'❌' if r['errors'] or r['identicalExceeded'] else '⚠️ '} {r['locale']}: {counts}{identical}")
+            for issue in r["issues"][:3]:
+                detail = f" ({issue['detail']})" if issue["detail"] else ""
+                print(f"      {issue['check']}: {issue['path']}{detail}")
+    if max_identical is not None:
+        print(f"\n   Soglia identiche a EN: {max_identical:.0%}")
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description='Verifica offline struttura, placeholder e tag dei file i18n (nessuna API key)')
+    parser.add_argument('--project', default='all', help='Progetti (comma-separated) o "all" (default)')
+    parser.add_argument('--locale', help='Locale specifici, comma-separated (default: tutti)')
+    parser.add_argument('--workers', type=int, help='Processi paralleli (default: numero di CPU)')
+    parser.add_argument('--max-identical', type=float, help='Quota massima di stringhe identiche a EN per lingua (0-1), oltre = errore')
+    parser.add_argument('--max-issues', type=int, default=DEFAULT_MAX_ISSUES, help=f'Problemi riportati per lingua (i conteggi sono sempre completi, default: {DEFAULT_MAX_ISSUES})')
+    parser.add_argument('--output', help='Salva il report JSON in questo file')
+    args = parser.parse_args(argv)
+
+    exit_code = run_verify(sync.parse_project_ids(args.project), args.locale, args.workers,
+                           args.max_identical, args.max_issues, args.output)
+    sys.exit(exit_code)
+
+if __name__ == "__main__":
+    main()
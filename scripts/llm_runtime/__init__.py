@@ -0,0 +1,62 @@
+"""
+Runtime condiviso per le chiamate LLM (Grok / Perplexity) degli script Alice.
+
+Usato da scripts/sync_and_translate_grok_2026.py e dagli script in
+scripts/builders/compliance_builder/ (che aggiungono scripts/ al sys.path).
+"""
+
+from llm_runtime.cache import (
+    CachedRequest,
+    ResponseCache,
+    completion_from_cache,
+    completion_to_cache,
+    configure_response_cache,
+    get_response_cache,
+)
+from llm_runtime.calls import add_runtime_arguments, post_json_cached
+from llm_runtime.concurrency import AIMDController, get_controller
+from llm_runtime.http_pool import (
+    aclose_http_clients,
+    close_http_clients,
+    get_async_http_client,
+    get_http_client,
+)
+from llm_runtime.jobs import JobResult, RateLimiter, get_rate_limiter, run_jobs, run_jobs_async
+from llm_runtime.retry import (
+    ResponseParseError,
+    RetryPolicy,
+    TruncatedResponse,
+    classify_error,
+    get_retry_policy,
+    retry_scope,
+    start_retry_run,
+)
+
+__all__ = [
+    "CachedRequest",
+    "ResponseCache",
+    "completion_from_cache",
+    "completion_to_cache",
+    "configure_response_cache",
+    "get_response_cache",
+    "add_runtime_arguments",
+    "post_json_cached",
+    "AIMDController",
+    "get_controller",
+    "aclose_http_clients",
+    "close_http_clients",
+    "get_async_http_client",
+    "get_http_client",
+    "JobResult",
+    "RateLimiter",
+    "get_rate_limiter",
+    "run_jobs",
+    "run_jobs_async",
+    "ResponseParseError",
+    "RetryPolicy",
+    "TruncatedResponse",
+    "classify_error",
+    "get_retry_policy",
+    "retry_scope",
+    "start_retry_run",
+]
@@ -0,0 +1,234 @@
+"""
+Cache su disco delle risposte LLM (Grok / Perplexity), condivisa da tutti gli script.
+
+- Chiave: sha256 di (endpoint, body della richiesta) → modello, messaggi e parametri
+  (temperature, max_tokens, response_format, ...); header e API key non ne fanno parte
+- Un file JSON per voce in LLM_CACHE_DIR (default scripts/.llm_cache/), sotto-cartella
+  per i primi 2 caratteri della chiave, scrittura atomica (più thread / processi insieme)
+- Solo risposte riuscite: il chiamante fa store() dopo aver verificato che la risposta non
+  sia troncata e che il JSON sia utilizzabile (errori e troncamenti non arrivano mai qui)
+- TTL (LLM_CACHE_TTL_HOURS, default 168): le voci scadute sono ignorate e cancellate
+- LRU per dimensione (LLM_CACHE_MAX_MB, default 512): una hit aggiorna l'mtime del file,
+  oltre il limite si cancellano le voci usate meno di recente
+
+Modalità (LLM_CACHE, o --no-cache / --refresh-cache negli script):
+  on      → legge e scrive (default)
+  refresh → non legge, ma salva le nuove risposte (sovrascrive quelle vecchie)
+  off     → bypass completo
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+MODE_ON = "on"
+MODE_REFRESH = "refresh"
+MODE_OFF = "off"
+MODES = (MODE_ON, MODE_REFRESH, MODE_OFF)
+
+CACHE_SCHEMA = 1
+DEFAULT_DIR = Path(__file__).resolve().parent.parent / ".llm_cache"
+EVICT_TO_RATIO = 0.9  # dopo un'eviction la cache scende al 90% del limite
+
+class CachedRequest:
+    """Una richiesta vista dalla cache: lookup() prima dell'invio, store() solo a risposta verificata"""
+
+    def __init__(self, cache: "ResponseCache", key: str, refresh: bool = False):
+        self.cache = cache
+        self.key = key
+        self.refresh = refresh
+        self.hit = False
+
+    def lookup(self) -> Optional[Any]:
+        if self.refresh:
+            return None
+        response = self.cache.get(self.key)
+        self.hit = response is not None
+        return response
+
+    def store(self, response: Any):
+        if not self.hit:
+            self.cache.put(self.key, response)
+
+    def discard(self):
+        """Toglie la voce dalla cache (risposta letta dalla cache che non supera la validazione)"""
+        self.cache.delete(self.key)
+        self.hit = False  # la risposta che la sostituisce, presa dalla rete, va salvata
+
+class ResponseCache:
+    """Cache risposte su disco con TTL e LRU per dimensione, thread-safe"""
+
+    def __init__(self, directory: Path = DEFAULT_DIR, mode: str = MODE_ON, ttl_seconds: float = 168 * 3600,
+                 max_bytes: int = 512 * 1024 * 1024):
+        if mode not in MODES:
+            raise ValueError(f"modalità cache non valida: {mode} (valori: {', '.join(MODES)})")
+        self.directory = Path(directory)
+        self.mode = mode
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._size: Optional[int] = None  # calcolata alla prima scrittura
+        self.stats: Dict[str, int] = {"hits": 0, "misses": 0, "stored": 0, "expired": 0, "evicted": 0}
+
+    @staticmethod
+    def key(endpoint: str, body: Dict) -> str:
+        canonical = json.dumps([str(endpoint), body], sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def request(self, endpoint: str, body: Dict, refresh: bool = False) -> CachedRequest:
+        """Handle per una richiesta; refresh=True salta la lettura (es. nuovo tentativo dopo una risposta scartata)"""
+        return CachedRequest(self, self.key(endpoint, body), refresh=refresh or self.mode == MODE_REFRESH)
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
+
+    def _count(self, stat: str, amount: int = 1):
+        with self._lock:
+            self.stats[stat] += amount
+
+    def get(self, key: str) -> Optional[Any]:
+        if self.mode != MODE_ON:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            self._count("misses")
+            return None
+        if entry.get("_schema") != CACHE_SCHEMA or time.time() - entry.get("created", 0) > self.ttl_seconds:
+            self._remove(path)
+            self._count("expired")
+            self._count("misses")
+            return None
+        try:
+            os.utime(path)  # LRU: l'ultima lettura conta come uso
+        except OSError:
+            pass
+        self._count("hits")
+        return entry["response"]
+
+    def put(self, key: str, response: Any):
+        if self.mode == MODE_OFF:
+            return
+        path = self._path(key)
+        content = json.dumps({"_schema": CACHE_SCHEMA, "created": time.time(), "response": response}, ensure_ascii=False)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            previous = path.stat().st_size if path.exists() else 0
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+        except OSError:
+            tmp_path.unlink(missing_ok=True)
+            return
+        self._count("stored")
+
+        with self._lock:
+            if self._size is None:
+                self._size = self._scan_size()
+            else:
+                self._size += len(content.encode("utf-8")) - previous
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def delete(self, key: str):
+        removed = self._remove(self._path(key))
+        with self._lock:
+            if removed and self._size is not None:
+                self._size -= removed
+
+    def _scan_size(self) -> int:
+        return sum(p.stat().st_size for p in self.directory.glob("*/*.json"))
+
+    def _remove(self, path: Path) -> int:
+        try:
+            size = path.stat().st_size
+            path.unlink()
+            return size
+        except OSError:
+            return 0
+
+    def _evict(self):
+        """Cancella le voci usate meno di recente finché la cache non scende sotto il limite (con il lock)"""
+        entries = []
+        for path in self.directory.glob("*/*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+        size = sum(e[1] for e in entries)
+        target = self.max_bytes * EVICT_TO_RATIO
+        for _, _, path in entries:
+            if size <= target:
+                break
+            size -= self._remove(path)
+            self.stats["evicted"] += 1
+        self._size = size
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {"mode": self.mode, "directory": str(self.directory), **self.stats}
+
+    def describe(self) -> str:
+        snap = self.snapshot()
+        if snap["mode"] == MODE_OFF:
+            return "cache LLM: disattivata"
+        return (f"cache LLM ({snap['mode']}): {snap['hits']} hit, {snap['misses']} miss, {snap['stored']} salvate"
+                f"{', ' + str(snap['evicted']) + ' rimosse (LRU)' if snap['evicted'] else ''}")
+
+# ============================================================================
+# RISPOSTE OPENAI (Grok via SDK openai)
+# ============================================================================
+
+def completion_to_cache(response: Any) -> Dict:
+    """ChatCompletion dell'SDK openai → dict JSON salvabile"""
+    return response.model_dump(mode="json")
+
+def completion_from_cache(data: Dict) -> Any:
+    """Dict salvato → ChatCompletion (stessi attributi: choices, usage, ...)"""
+    from openai.types.chat import ChatCompletion
+    return ChatCompletion.model_validate(data)
+
+# ============================================================================
+# CACHE CONDIVISA PER RUN
+# ============================================================================
+
+_cache: Optional[ResponseCache] = None
+_registry_lock = threading.Lock()
+
+def _cache_from_env(**overrides) -> ResponseCache:
+    options = {
+        "directory": Path(os.getenv("LLM_CACHE_DIR", str(DEFAULT_DIR))),
+        "mode": os.getenv("LLM_CACHE", MODE_ON).lower(),
+        "ttl_seconds": float(os.getenv("LLM_CACHE_TTL_HOURS", "168")) * 3600,
+        "max_bytes": int(float(os.getenv("LLM_CACHE_MAX_MB", "512")) * 1024 * 1024),
+    }
+    options.update({k: v for k, v in overrides.items() if v is not None})
+    return ResponseCache(**options)
+
+def get_response_cache() -> ResponseCache:
+    """Cache condivisa da tutte le chiamate del processo (configurata da env LLM_CACHE*)"""
+    global _cache
+    with _registry_lock:
+        if _cache is None:
+            _cache = _cache_from_env()
+        return _cache
+
+def configure_response_cache(no_cache: bool = False, refresh: bool = False, **overrides) -> ResponseCache:
+    """Nuova cache per la run (--no-cache → off, --refresh-cache → refresh, altrimenti env)"""
+    global _cache
+    if no_cache:
+        overrides["mode"] = MODE_OFF
+    elif refresh:
+        overrides["mode"] = MODE_REFRESH
+    with _registry_lock:
+        _cache = _cache_from_env(**overrides)
+        return _cache
@@ -0,0 +1,53 @@
+"""
+Chiamata HTTP JSON completa per gli script che parlano direttamente con l'API (Perplexity),
+e le opzioni CLI del runtime condivise da quegli script.
+
+post_json_cached() mette insieme i pezzi del runtime nell'ordine giusto:
+- cache risposte su disco (lookup prima dell'invio; store() lo fa il chiamante, solo dopo aver
+  validato la risposta, con il CachedRequest restituito)
+- client httpx condiviso del provider (keep-alive, HTTP/2 se disponibile)
+- slot del controller AIMD del provider (429 / timeout abbassano il limite)
+- retry policy del provider (429 / timeout / 5xx con backoff e Retry-After, 4xx subito)
+"""
+
+import argparse
+from typing import Any, Dict, Optional, Tuple
+
+from llm_runtime.cache import CachedRequest, get_response_cache
+from llm_runtime.concurrency import get_controller
+from llm_runtime.http_pool import get_http_client
+from llm_runtime.jobs import DEFAULT_RPM
+from llm_runtime.retry import get_retry_policy
+
+def post_json_cached(provider: str, url: str, headers: Dict[str, str], payload: Dict[str, Any],
+                     label: Optional[str] = None, refresh: bool = False) -> Tuple[Any, CachedRequest]:
+    """(JSON della risposta, richiesta in cache); cached_request.hit dice se è stata servita dalla cache"""
+    cached_request = get_response_cache().request(url, payload, refresh=refresh)
+    data = cached_request.lookup()
+    if data is not None:
+        return data, cached_request
+
+    client = get_http_client(provider)
+
+    def post():
+        with get_controller(provider).slot():
+            response = client.post(url, headers=headers, json=payload)
+            response.raise_for_status()
+        return response
+
+    response = get_retry_policy(provider).call(post, label=label or provider)
+    return response.json(), cached_request
+
+def add_runtime_arguments(parser: argparse.ArgumentParser, provider: str = "perplexity"):
+    """--no-cache, --refresh-cache, --max-concurrency, --rpm (da passare a configure_response_cache,
+    get_controller(max_limit=...) e run_jobs(rpm=...))"""
+    default_rpm = DEFAULT_RPM.get(provider)
+    rpm_default = f"env {provider.upper()}_RPM / LLM_RPM " + (f"o {default_rpm}" if default_rpm else "o nessun limite")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Non usa la cache delle risposte LLM (né lettura né scrittura)")
+    parser.add_argument("--refresh-cache", action="store_true",
+                        help="Ignora le risposte in cache ma salva quelle nuove")
+    parser.add_argument("--max-concurrency", type=int,
+                        help="Massimo di richieste in volo (AIMD adattivo, default: env LLM_MAX_CONCURRENCY o 16)")
+    parser.add_argument("--rpm", type=float,
+                        help=f"Richieste {provider} al minuto (default: {rpm_default}; 0 = nessun limite)")
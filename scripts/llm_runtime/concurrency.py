@@ -0,0 +1,275 @@
+"""
+Controller AIMD (Additive Increase / Multiplicative Decrease) per la concorrenza delle chiamate LLM.
+
+- Successo con latenza sana  → limite += increase / limite (≈ +1 richiesta in volo per "giro")
+- 429, timeout o picco di latenza → limite *= decrease_factor (al massimo un taglio per finestra)
+- Tasso di errori (5xx, rete) oltre soglia nella finestra recente → taglio moltiplicativo
+
+Utilizzabile da thread (with controller.slot()) e da asyncio (async with controller.aslot()).
+I controller sono condivisi per provider tramite get_controller(name).
+"""
+
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import Dict, Optional
+
+OUTCOME_OK = "ok"
+OUTCOME_THROTTLED = "throttled"
+OUTCOME_TIMEOUT = "timeout"
+OUTCOME_ERROR = "error"
+
+def classify_outcome(exc: BaseException) -> str:
+    """Mappa un'eccezione (openai / httpx) sull'esito usato dal controller"""
+    status = getattr(exc, "status_code", None)
+    if status is None:
+        response = getattr(exc, "response", None)
+        status = getattr(response, "status_code", None)
+    if status == 429:
+        return OUTCOME_THROTTLED
+    name = type(exc).__name__.lower()
+    if "timeout" in name or isinstance(exc, TimeoutError):
+        return OUTCOME_TIMEOUT
+    return OUTCOME_ERROR
+
+class Slot:
+    """Richiesta in volo: registra l'esito a fine chiamata"""
+
+    def __init__(self, controller: "AIMDController", size: Optional[float]):
+        self.controller = controller
+        self.size = size
+        self.started_at = time.monotonic()
+        self.outcome: Optional[str] = None
+
+    def fail(self, outcome: str):
+        """Segna esplicitamente l'esito (es. risposta 200 ma troncata → OUTCOME_ERROR)"""
+        self.outcome = outcome
+
+class AIMDController:
+    """Limite di concorrenza adattivo, thread-safe e usabile da asyncio"""
+
+    def __init__(
+        self,
+        name: str = "default",
+        initial_limit: float = 2,
+        min_limit: float = 1,
+        max_limit: float = 16,
+        increase: float = 1.0,
+        decrease_factor: float = 0.5,
+        latency_spike_factor: float = 3.0,
+        error_rate_threshold: float = 0.2,
+        window: int = 20,
+    ):
+        self.name = name
+        self.min_limit = float(min_limit)
+        self.max_limit = float(max_limit)
+        self.limit = min(max(float(initial_limit), self.min_limit), self.max_limit)
+        self.increase = increase
+        self.decrease_factor = decrease_factor
+        self.latency_spike_factor = latency_spike_factor
+        self.error_rate_threshold = error_rate_threshold
+
+        self.in_flight = 0
+        self.latency_ewma: Optional[float] = None
+        self._recent = deque(maxlen=window)
+        self._last_decrease_at = 0.0
+        self._cond = threading.Condition()
+        self._async_waiters = deque()
+        self.stats = {
+            "requests": 0,
+            "ok": 0,
+            "throttled": 0,
+            "timeouts": 0,
+            "errors": 0,
+            "latency_spikes": 0,
+            "increases": 0,
+            "decreases": 0,
+            "max_in_flight": 0,
+        }
+
+    # ------------------------------------------------------------------ acquire
+
+    def set_bounds(self, min_limit: Optional[float] = None, max_limit: Optional[float] = None):
+        """Aggiorna i limiti (es. da --max-concurrency) mantenendo il limite corrente nel range"""
+        with self._cond:
+            if min_limit is not None:
+                self.min_limit = float(min_limit)
+            if max_limit is not None:
+                self.max_limit = float(max_limit)
+            self.limit = min(max(self.limit, self.min_limit), self.max_limit)
+            self._wake_waiters()
+
+    def _can_start(self) -> bool:
+        return self.in_flight < int(self.limit)
+
+    def _start(self, size: Optional[float]) -> Slot:
+        self.in_flight += 1
+        self.stats["requests"] += 1
+        self.stats["max_in_flight"] = max(self.stats["max_in_flight"], self.in_flight)
+        return Slot(self, size)
+
+    def acquire(self, size: Optional[float] = None) -> Slot:
+        """Blocca finché c'è spazio sotto il limite corrente"""
+        with self._cond:
+            while not self._can_start():
+                self._cond.wait()
+            return self._start(size)
+
+    async def acquire_async(self, size: Optional[float] = None) -> Slot:
+        """Variante asyncio: attende senza bloccare l'event loop"""
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._cond:
+                if self._can_start():
+                    return self._start(size)
+                waiter = loop.create_future()
+                self._async_waiters.append((loop, waiter))
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                with self._cond:
+                    if (loop, waiter) in self._async_waiters:
+                        self._async_waiters.remove((loop, waiter))
+                raise
+
+    def _wake_waiters(self):
+        """Sveglia thread e coroutine in attesa (chiamato con il lock preso)"""
+        self._cond.notify_all()
+        while self._async_waiters:
+            loop, waiter = self._async_waiters.popleft()
+            loop.call_soon_threadsafe(lambda w=waiter: w.done() or w.set_result(None))
+
+    # ------------------------------------------------------------------ release
+
+    def release(self, slot: Slot, outcome: str = OUTCOME_OK):
+        """Chiude lo slot e adatta il limite in base all'esito"""
+        outcome = slot.outcome or outcome
+        latency = time.monotonic() - slot.started_at
+        with self._cond:
+            self.in_flight -= 1
+            if outcome == OUTCOME_OK:
+                self._on_success(slot, latency)
+            elif outcome == OUTCOME_THROTTLED:
+                self.stats["throttled"] += 1
+                self._recent.append(False)
+                self._decrease(slot)
+            elif outcome == OUTCOME_TIMEOUT:
+                self.stats["timeouts"] += 1
+                self._recent.append(False)
+                self._decrease(slot)
+            else:
+                self.stats["errors"] += 1
+                self._recent.append(False)
+                if len(self._recent) >= 5 and self._error_rate() > self.error_rate_threshold:
+                    self._decrease(slot)
+            self._wake_waiters()
+
+    def _on_success(self, slot: Slot, latency: float):
+        self.stats["ok"] += 1
+        self._recent.append(True)
+        normalized = latency / slot.size if slot.size else latency
+
+        if self.latency_ewma is not None and self.stats["ok"] > 3 and normalized > self.latency_ewma * self.latency_spike_factor:
+            self.stats["latency_spikes"] += 1
+            self._decrease(slot)
+        else:
+            self.limit = min(self.max_limit, self.limit + self.increase / max(self.limit, 1.0))
+            self.stats["increases"] += 1
+
+        self.latency_ewma = normalized if self.latency_ewma is None else 0.8 * self.latency_ewma + 0.2 * normalized
+
+    def _decrease(self, slot: Slot):
+        # Un solo taglio per "finestra": ignora esiti di richieste partite prima dell'ultimo taglio
+        if slot.started_at < self._last_decrease_at:
+            return
+        self.limit = max(self.min_limit, self.limit * self.decrease_factor)
+        self._last_decrease_at = time.monotonic()
+        self.stats["decreases"] += 1
+
+    def _error_rate(self) -> float:
+        if not self._recent:
+            return 0.0
+        return sum(1 for ok in self._recent if not ok) / len(self._recent)
+
+    # ------------------------------------------------------------------ context manager
+
+    @contextmanager
+    def slot(self, size: Optional[float] = None):
+        """with controller.slot(size=token_stimati) as s: ... (eccezioni → esito classificato)"""
+        slot = self.acquire(size)
+        try:
+            yield slot
+        except BaseException as e:
+            self.release(slot, classify_outcome(e))
+            raise
+        else:
+            self.release(slot, OUTCOME_OK)
+
+    @asynccontextmanager
+    async def aslot(self, size: Optional[float] = None):
+        """async with controller.aslot() as s: ..."""
+        slot = await self.acquire_async(size)
+        try:
+            yield slot
+        except BaseException as e:
+            self.release(slot, classify_outcome(e))
+            raise
+        else:
+            self.release(slot, OUTCOME_OK)
+
+    # ------------------------------------------------------------------ telemetria
+
+    def snapshot(self) -> Dict:
+        """Stato corrente per log / file di progresso"""
+        with self._cond:
+            return {
+                "name": self.name,
+                "limit": round(self.limit, 2),
+                "in_flight": self.in_flight,
+                "min_limit": self.min_limit,
+                "max_limit": self.max_limit,
+                "latency_ewma": round(self.latency_ewma, 4) if self.latency_ewma is not None else None,
+                "error_rate": round(self._error_rate(), 3),
+                **self.stats,
+            }
+
+    def describe(self) -> str:
+        snap = self.snapshot()
+        return (f"{snap['name']}: limite {snap['limit']:.1f} (in volo {snap['in_flight']}, "
+                f"ok {snap['ok']}, 429 {snap['throttled']}, timeout {snap['timeouts']}, errori {snap['errors']})")
+
+# ============================================================================
+# REGISTRO CONTROLLER CONDIVISI
+# ============================================================================
+
+_controllers: Dict[str, AIMDController] = {}
+_registry_lock = threading.Lock()
+
+def get_controller(name: str = "grok", **overrides) -> AIMDController:
+    """
+    Controller condiviso per provider (grok, perplexity, ...).
+    Default da env: LLM_INITIAL_CONCURRENCY, LLM_MAX_CONCURRENCY (o <NAME>_MAX_CONCURRENCY).
+    initial_limit vale solo alla prima creazione; min_limit/max_limit aggiornano anche un controller esistente.
+    """
+    with _registry_lock:
+        controller = _controllers.get(name)
+        if controller is None:
+            prefix = name.upper()
+            options = {
+                "initial_limit": float(os.getenv(f"{prefix}_INITIAL_CONCURRENCY", os.getenv("LLM_INITIAL_CONCURRENCY", "2"))),
+                "max_limit": float(os.getenv(f"{prefix}_MAX_CONCURRENCY", os.getenv("LLM_MAX_CONCURRENCY", "16"))),
+            }
+            options.update({k: v for k, v in overrides.items() if v is not None})
+            controller = AIMDController(name=name, **options)
+            _controllers[name] = controller
+        else:
+            controller.set_bounds(overrides.get("min_limit"), overrides.get("max_limit"))
+        return controller
+
+def all_controllers() -> Dict[str, AIMDController]:
+    """Tutti i controller creati nel processo (per telemetria finale)"""
+    with _registry_lock:
+        return dict(_controllers)
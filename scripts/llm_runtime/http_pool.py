@@ -0,0 +1,101 @@
+"""
+Client httpx condivisi (connection pool + keep-alive) per le chiamate HTTP dirette (Perplexity).
+
+- Un client sync per provider per processo (thread-safe): niente handshake TCP+TLS per ogni paese
+- Un client async per provider per event loop (run_jobs_async, servizi asyncio)
+- HTTP/2 se il pacchetto h2 è installato (httpx[http2]); LLM_HTTP2=0 lo disattiva
+- Timeout e limiti da env, con override per provider (<NAME>_HTTP_TIMEOUT, ...):
+    LLM_HTTP_TIMEOUT           timeout lettura/scrittura in secondi (default 120)
+    LLM_HTTP_CONNECT_TIMEOUT   timeout connessione (default 10)
+    LLM_HTTP_MAX_CONNECTIONS   connessioni massime per client (default 32)
+    LLM_HTTP_MAX_KEEPALIVE     connessioni tenute aperte in idle (default 16)
+    LLM_HTTP_KEEPALIVE_EXPIRY  secondi prima di chiudere una connessione idle (default 30)
+I client sync si chiudono all'uscita del processo (atexit) o con close_http_clients().
+"""
+
+import asyncio
+import atexit
+import importlib.util
+import os
+import threading
+from typing import Dict, Optional, Tuple
+
+import httpx
+
+def _env(name: str, key: str, default: str) -> str:
+    return os.getenv(f"{name.upper()}_{key}", os.getenv(f"LLM_{key}", default))
+
+def http2_available() -> bool:
+    """HTTP/2 richiede il pacchetto opzionale h2 (pip install 'httpx[http2]')"""
+    return os.getenv("LLM_HTTP2", "1") != "0" and importlib.util.find_spec("h2") is not None
+
+def client_options(name: str, **overrides) -> Dict:
+    """Argomenti per httpx.Client / httpx.AsyncClient del provider (env + override)"""
+    options = {
+        "timeout": httpx.Timeout(
+            float(_env(name, "HTTP_TIMEOUT", "120")),
+            connect=float(_env(name, "HTTP_CONNECT_TIMEOUT", "10")),
+        ),
+        "limits": httpx.Limits(
+            max_connections=int(_env(name, "HTTP_MAX_CONNECTIONS", "32")),
+            max_keepalive_connections=int(_env(name, "HTTP_MAX_KEEPALIVE", "16")),
+            keepalive_expiry=float(_env(name, "HTTP_KEEPALIVE_EXPIRY", "30")),
+        ),
+        "http2": http2_available(),
+    }
+    options.update({k: v for k, v in overrides.items() if v is not None})
+    return options
+
+# ============================================================================
+# REGISTRO CLIENT CONDIVISI
+# ============================================================================
+
+_clients: Dict[str, httpx.Client] = {}
+_async_clients: Dict[Tuple[str, int], Tuple[asyncio.AbstractEventLoop, httpx.AsyncClient]] = {}
+_registry_lock = threading.Lock()
+
+def get_http_client(name: str = "perplexity", **overrides) -> httpx.Client:
+    """
+    Client sync condiviso per provider. Gli override (timeout, limits, http2, ...) valgono solo
+    alla creazione: per cambiarli chiudere prima i client con close_http_clients().
+    """
+    with _registry_lock:
+        client = _clients.get(name)
+        if client is None or client.is_closed:
+            client = httpx.Client(**client_options(name, **overrides))
+            _clients[name] = client
+        return client
+
+def get_async_http_client(name: str = "perplexity", **overrides) -> httpx.AsyncClient:
+    """Client async condiviso per provider, legato all'event loop corrente (uno per loop)"""
+    loop = asyncio.get_running_loop()
+    key = (name, id(loop))
+    with _registry_lock:
+        # Client di loop già chiusi (asyncio.run precedenti): non più utilizzabili, si scartano
+        for stale_key, (stale_loop, _) in list(_async_clients.items()):
+            if stale_loop.is_closed():
+                del _async_clients[stale_key]
+        entry = _async_clients.get(key)
+        if entry is None or entry[0] is not loop or entry[1].is_closed:
+            entry = (loop, httpx.AsyncClient(**client_options(name, **overrides)))
+            _async_clients[key] = entry
+        return entry[1]
+
+async def aclose_http_clients(name: Optional[str] = None):
+    """Chiude i client async dell'event loop corrente (tutti i provider o solo name)"""
+    loop = asyncio.get_running_loop()
+    with _registry_lock:
+        keys = [k for k, (l, _) in _async_clients.items() if l is loop and (name is None or k[0] == name)]
+        clients = [_async_clients.pop(k)[1] for k in keys]
+    for client in clients:
+        await client.aclose()
+
+def close_http_clients(name: Optional[str] = None):
+    """Chiude i client sync (tutti i provider o solo name); il prossimo get_http_client ne crea uno nuovo"""
+    with _registry_lock:
+        names = [n for n in _clients if name is None or n == name]
+        clients = [_clients.pop(n) for n in names]
+    for client in clients:
+        client.close()
+
+atexit.register(close_http_clients)
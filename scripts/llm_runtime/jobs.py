@@ -0,0 +1,180 @@
+"""
+Runner asyncio per job "uno per paese" (o per batch) degli script compliance_builder.
+
+- worker: coroutine function, oppure funzione sync (chiamate httpx / openai esistenti) eseguita
+  in un pool di thread dedicato; riceve l'item e ritorna il risultato del job
+- concorrenza: al massimo max_workers job in corso (default: max_limit del controller AIMD del
+  provider); le richieste reali restano governate dal controller (slot() / aslot())
+- rate limit per provider: partenze distanziate a <PROVIDER>_RPM / LLM_RPM richieste al minuto
+  (default 50 per perplexity, nessun limite per grok), --rpm negli script
+- retry del job: attempts > 1 → errori ritentabili (classify_error) con il backoff e il budget
+  della retry policy del provider; i retry HTTP restano dentro le chiamate
+- risultati: on_result(result) nel thread dell'event loop, nell'ordine di completamento (merge e
+  salvataggi senza lock); run_jobs ritorna i JobResult nell'ordine degli item
+"""
+
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from llm_runtime.concurrency import get_controller
+from llm_runtime.retry import classify_error, get_retry_policy
+
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_RPM = {"perplexity": 50}
+
+class JobResult:
+    """Esito di un job: value se riuscito, error (ultima eccezione) altrimenti"""
+
+    def __init__(self, index: int, item: Any, label: str):
+        self.index = index
+        self.item = item
+        self.label = label
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+        self.attempts = 0
+        self.elapsed = 0.0
+        self.done = 0  # posizione nell'ordine di completamento (1-based)
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+# ============================================================================
+# RATE LIMIT PER PROVIDER
+# ============================================================================
+
+class RateLimiter:
+    """Distanzia le partenze a intervalli regolari (per_minute al minuto), thread-safe e usabile da asyncio"""
+
+    def __init__(self, per_minute: float):
+        self.per_minute = float(per_minute)
+        self.interval = 60.0 / self.per_minute
+        self._lock = threading.Lock()
+        self._next_at = 0.0
+
+    def reserve(self) -> float:
+        """Prenota la prossima partenza libera; ritorna i secondi da attendere"""
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_at)
+            self._next_at = start + self.interval
+            return start - now
+
+    def acquire(self):
+        time.sleep(self.reserve())
+
+    async def acquire_async(self):
+        await asyncio.sleep(self.reserve())
+
+    def describe(self) -> str:
+        return f"{self.per_minute:g} richieste/min"
+
+_limiters: Dict[str, RateLimiter] = {}
+_registry_lock = threading.Lock()
+
+def get_rate_limiter(name: str, per_minute: Optional[float] = None) -> Optional[RateLimiter]:
+    """
+    Limiter condiviso per provider. Default da env <NAME>_RPM o LLM_RPM, poi DEFAULT_RPM;
+    0 (o nessun valore) = nessun limite. per_minute (es. da --rpm) sostituisce il limiter esistente.
+    """
+    with _registry_lock:
+        if per_minute is None:
+            if name in _limiters:
+                return _limiters[name]
+            per_minute = float(os.getenv(f"{name.upper()}_RPM", os.getenv("LLM_RPM", DEFAULT_RPM.get(name, 0))))
+        limiter = RateLimiter(per_minute) if per_minute > 0 else None
+        _limiters[name] = limiter
+        return limiter
+
+# ============================================================================
+# RUNNER
+# ============================================================================
+
+def _format_seconds(seconds: float) -> str:
+    seconds = int(round(seconds))
+    return f"{seconds // 60}m{seconds % 60:02d}s" if seconds >= 60 else f"{seconds}s"
+
+async def run_jobs_async(
+    items: Iterable[Any],
+    worker: Callable,
+    label: Callable[[Any], str] = str,
+    provider: Optional[str] = None,
+    max_workers: Optional[int] = None,
+    rpm: Optional[float] = None,
+    attempts: int = 1,
+    on_result: Optional[Callable[[JobResult], None]] = None,
+    progress_every: int = 10,
+    log: Callable = print,
+) -> List[JobResult]:
+    """Esegue worker(item) per ogni item con concorrenza limitata; vedi docstring del modulo"""
+    items = list(items)
+    total = len(items)
+    if max_workers is None:
+        max_workers = int(get_controller(provider).max_limit) if provider else DEFAULT_MAX_WORKERS
+    max_workers = max(1, min(max_workers, total or 1))
+    limiter = get_rate_limiter(provider, rpm) if provider else None
+    policy = get_retry_policy(provider or "default")
+
+    loop = asyncio.get_running_loop()
+    is_async = asyncio.iscoroutinefunction(worker)
+    executor = None if is_async else ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+    semaphore = asyncio.Semaphore(max_workers)
+    results = [JobResult(index, item, label(item)) for index, item in enumerate(items)]
+    counts = {"ok": 0, "failed": 0}
+    started = time.monotonic()
+
+    async def execute(result: JobResult) -> JobResult:
+        async with semaphore:
+            history: Dict[str, int] = {}
+            job_started = time.monotonic()
+            while True:
+                result.attempts += 1
+                if limiter:
+                    await limiter.acquire_async()
+                try:
+                    if is_async:
+                        result.value = await worker(result.item)
+                    else:
+                        result.value = await loop.run_in_executor(executor, worker, result.item)
+                    result.error = None
+                    break
+                except Exception as e:
+                    result.error = e
+                    if result.attempts >= attempts:
+                        break
+                    delay = policy.next_delay(e, result.attempts, attempts, history)
+                    if delay is None:
+                        break
+                    log(f"      🔄 Job {result.label}: tentativo {result.attempts + 1}/{attempts} tra {delay:.1f}s "
+                        f"[{classify_error(e)}: {str(e)[:120]}]")
+                    await asyncio.sleep(delay)
+            result.elapsed = time.monotonic() - job_started
+            return result
+
+    tasks = [asyncio.create_task(execute(result)) for result in results]
+    try:
+        for done, future in enumerate(asyncio.as_completed(tasks), 1):
+            result = await future
+            result.done = done
+            counts["ok" if result.ok else "failed"] += 1
+            if on_result:
+                on_result(result)
+            if progress_every and (done % progress_every == 0 or done == total):
+                elapsed = time.monotonic() - started
+                eta = elapsed / done * (total - done)
+                log(f"📊 Job {done}/{total} ({done / total * 100:.0f}%) · ok {counts['ok']} · falliti {counts['failed']} · "
+                    f"{_format_seconds(elapsed)} trascorsi, ETA {_format_seconds(eta)}")
+    finally:
+        for task in tasks:
+            task.cancel()
+        if executor:
+            executor.shutdown(wait=False, cancel_futures=True)
+    return results
+
+def run_jobs(items: Iterable[Any], worker: Callable, **options) -> List[JobResult]:
+    """Entry point sync per gli script: asyncio.run(run_jobs_async(...))"""
+    return asyncio.run(run_jobs_async(items, worker, **options))
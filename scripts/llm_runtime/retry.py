@@ -0,0 +1,237 @@
+"""
+Politica di retry unica per le chiamate LLM, basata sulla classificazione dell'errore.
+
+Categorie:
+- rate_limit   (429)                → retry con backoff, rispetta Retry-After
+- timeout      (timeout / rete)     → retry con backoff
+- server_5xx   (500-599)            → retry con backoff
+- truncation   (finish_reason=length) → NESSUN retry alla stessa dimensione: il chiamante divide il lavoro
+- parse_error  (JSON non valido)    → al massimo `parse_retries` retry
+- client_error (400/401/403/404/..., errori di codice) → nessun retry
+
+Ogni retry consuma il budget della run (condiviso tra thread): esaurito il budget si smette di ritentare.
+Un servizio di lunga durata apre un budget per richiesta con retry_scope() (context variable: vale nel
+task corrente e nei thread avviati con contextvars.copy_context()).
+"""
+
+import asyncio
+import contextvars
+import json
+import os
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Callable, Dict, Optional
+
+RATE_LIMIT = "rate_limit"
+TIMEOUT = "timeout"
+SERVER_ERROR = "server_5xx"
+TRUNCATION = "truncation"
+PARSE_ERROR = "parse_error"
+CLIENT_ERROR = "client_error"
+
+BACKOFF_CATEGORIES = {RATE_LIMIT, TIMEOUT, SERVER_ERROR}
+
+class TruncatedResponse(Exception):
+    """Risposta tagliata dal limite di token (finish_reason == "length")"""
+
+class ResponseParseError(ValueError):
+    """Risposta ricevuta ma senza un JSON utilizzabile"""
+
+def _status_code(exc: BaseException) -> Optional[int]:
+    status = getattr(exc, "status_code", None)
+    if status is None:
+        status = getattr(getattr(exc, "response", None), "status_code", None)
+    return status if isinstance(status, int) else None
+
+def classify_error(exc: BaseException) -> str:
+    """Mappa un'eccezione (openai, httpx, parsing) su una categoria di retry"""
+    if isinstance(exc, TruncatedResponse):
+        return TRUNCATION
+    if isinstance(exc, (ResponseParseError, json.JSONDecodeError)):
+        return PARSE_ERROR
+    status = _status_code(exc)
+    if status == 429:
+        return RATE_LIMIT
+    if status == 408:
+        return TIMEOUT
+    if status is not None and status >= 500:
+        return SERVER_ERROR
+    if status is not None and status >= 400:
+        return CLIENT_ERROR
+    name = type(exc).__name__.lower()
+    if isinstance(exc, (TimeoutError, ConnectionError)) or "timeout" in name or "connect" in name:
+        return TIMEOUT
+    return CLIENT_ERROR
+
+def retry_after_seconds(exc: BaseException) -> Optional[float]:
+    """Legge Retry-After / retry-after-ms dalla risposta HTTP, se presente"""
+    headers = getattr(getattr(exc, "response", None), "headers", None)
+    if not headers:
+        return None
+    try:
+        value = headers.get("retry-after-ms")
+        if value is not None:
+            return max(0.0, float(value) / 1000)
+        value = headers.get("retry-after")
+        if value is None:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+class RetryPolicy:
+    """Backoff esponenziale con jitter, solo per errori dove un retry può servire"""
+
+    def __init__(
+        self,
+        name: str = "default",
+        max_attempts: int = 4,
+        base_delay: float = 1.0,
+        max_delay: float = 30.0,
+        budget: int = 50,
+        parse_retries: int = 1,
+    ):
+        self.name = name
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget = budget
+        self.parse_retries = parse_retries
+        self._lock = threading.Lock()
+        self.stats: Dict[str, int] = {"retries": 0, "budget_exhausted": 0, "gave_up": 0}
+        self.errors: Dict[str, int] = {}
+
+    def backoff(self, attempt: int) -> float:
+        """Full jitter: uniforme in [0, min(max_delay, base * 2^(attempt-1))]"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+    def next_delay(self, exc: BaseException, attempt: int, max_attempts: Optional[int] = None, history: Optional[Dict[str, int]] = None) -> Optional[float]:
+        """
+        Attesa prima del prossimo tentativo, oppure None se non conviene ritentare.
+        attempt = numero del tentativo appena fallito (1-based); history = errori per categoria
+        nella stessa chiamata (aggiornato qui). Consuma budget se ritorna un'attesa.
+        """
+        category = classify_error(exc)
+        with self._lock:
+            self.errors[category] = self.errors.get(category, 0) + 1
+        history = history if history is not None else {}
+        history[category] = history.get(category, 0) + 1
+
+        if attempt >= (max_attempts or self.max_attempts):
+            return None
+        if category in BACKOFF_CATEGORIES:
+            delay = self.backoff(attempt)
+            server_hint = retry_after_seconds(exc)
+            if server_hint is not None:
+                delay = max(delay, server_hint + random.uniform(0, self.base_delay / 2))
+            delay = min(delay, self.max_delay)
+        elif category == PARSE_ERROR and history[category] <= self.parse_retries:
+            delay = random.uniform(0, self.base_delay / 2)
+        else:
+            return None
+
+        with self._lock:
+            if self.budget <= 0:
+                self.stats["budget_exhausted"] += 1
+                return None
+            self.budget -= 1
+            self.stats["retries"] += 1
+        return delay
+
+    def _log_retry(self, label: str, exc: BaseException, attempt: int, max_attempts: int, delay: float, log: Callable):
+        log(f"      🔄 Retry {attempt + 1}/{max_attempts} in {delay:.1f}s{' (' + label + ')' if label else ''} "
+            f"[{classify_error(exc)}: {type(exc).__name__}: {str(exc)[:120]}]")
+
+    def call(self, fn: Callable, *args, label: str = "", max_attempts: Optional[int] = None, log: Callable = print, **kwargs):
+        """Esegue fn con retry; rilancia l'ultima eccezione se non si può (o non conviene) ritentare"""
+        max_attempts = max_attempts or self.max_attempts
+        attempt = 1
+        history: Dict[str, int] = {}
+        while True:
+            try:
+                return fn(*args, **kwargs)
+            except Exception as e:
+                delay = self.next_delay(e, attempt, max_attempts, history)
+                if delay is None:
+                    with self._lock:
+                        self.stats["gave_up"] += 1
+                    raise
+                self._log_retry(label, e, attempt, max_attempts, delay, log)
+                time.sleep(delay)
+                attempt += 1
+
+    async def call_async(self, fn: Callable, *args, label: str = "", max_attempts: Optional[int] = None, log: Callable = print, **kwargs):
+        """Variante asyncio di call() (fn è una coroutine function)"""
+        max_attempts = max_attempts or self.max_attempts
+        attempt = 1
+        history: Dict[str, int] = {}
+        while True:
+            try:
+                return await fn(*args, **kwargs)
+            except Exception as e:
+                delay = self.next_delay(e, attempt, max_attempts, history)
+                if delay is None:
+                    with self._lock:
+                        self.stats["gave_up"] += 1
+                    raise
+                self._log_retry(label, e, attempt, max_attempts, delay, log)
+                await asyncio.sleep(delay)
+                attempt += 1
+
+    def snapshot(self) -> Dict:
+        """Stato per log / file di progresso"""
+        with self._lock:
+            return {"name": self.name, "budget_left": self.budget, **self.stats, "errors": dict(self.errors)}
+
+    def describe(self) -> str:
+        snap = self.snapshot()
+        errors = ", ".join(f"{k} {v}" for k, v in sorted(snap["errors"].items())) or "nessuno"
+        return f"retry {snap['name']}: {snap['retries']} eseguiti, budget residuo {snap['budget_left']} (errori: {errors})"
+
+# ============================================================================
+# REGISTRO POLICY PER RUN
+# ============================================================================
+
+_policies: Dict[str, RetryPolicy] = {}
+_registry_lock = threading.Lock()
+# Policy con budget proprio per il contesto corrente (retry_scope), prima di quelle di processo
+_scoped_policies: contextvars.ContextVar[Dict[str, RetryPolicy]] = contextvars.ContextVar("retry_scoped_policies", default={})
+
+def _policy_from_env(name: str, **overrides) -> RetryPolicy:
+    prefix = name.upper()
+    options = {
+        "budget": int(os.getenv(f"{prefix}_RETRY_BUDGET", os.getenv("LLM_RETRY_BUDGET", "50"))),
+        "max_attempts": int(os.getenv(f"{prefix}_MAX_ATTEMPTS", os.getenv("LLM_MAX_ATTEMPTS", "4"))),
+    }
+    options.update({k: v for k, v in overrides.items() if v is not None})
+    return RetryPolicy(name=name, **options)
+
+def get_retry_policy(name: str = "grok") -> RetryPolicy:
+    """Policy condivisa per provider (budget da env LLM_RETRY_BUDGET, default 50 retry per run)"""
+    scoped = _scoped_policies.get().get(name)
+    if scoped is not None:
+        return scoped
+    with _registry_lock:
+        policy = _policies.get(name)
+        if policy is None:
+            policy = _policy_from_env(name)
+            _policies[name] = policy
+        return policy
+
+def start_retry_run(name: str = "grok", **overrides) -> RetryPolicy:
+    """Nuova run: budget e contatori azzerati (override es. budget=args.retry_budget)"""
+    with _registry_lock:
+        policy = _policy_from_env(name, **overrides)
+        _policies[name] = policy
+        return policy
+
+def retry_scope(name: str = "grok", **overrides) -> RetryPolicy:
+    """Budget nuovo per il contesto corrente (es. un job del servizio), senza toccare quello di processo"""
+    policy = _policy_from_env(name, **overrides)
+    _scoped_policies.set({**_scoped_policies.get(), name: policy})
+    return policy
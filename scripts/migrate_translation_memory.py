@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Migra i file translation_memory_*.json allo schema compatto (schema 2).
+
+Schema legacy: ogni path ripete {value, last_translated_at, token_usage}.
+Schema 2: ogni path è [valore, id_richiesta]; timestamp, modello e token usage stanno
+una sola volta nel registro "_requests" (vedi sync_and_translate_grok_2026.py).
+
+La migrazione avviene comunque in automatico al primo load_memory(); questo script
+serve per convertire i file in blocco e vedere il guadagno di spazio.
+
+Uso:
+    python scripts/migrate_translation_memory.py                  # tutti i file in scripts/
+    python scripts/migrate_translation_memory.py --project app     # solo translation_memory_app.json
+    python scripts/migrate_translation_memory.py --check           # solo report, nessuna scrittura
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent))
+
+import sync_and_translate_grok_2026 as sync
+
+def migrate_file(memory_path: Path, check_only: bool = False) -> dict:
+    """Migra un file di memoria e ritorna dimensioni e tempi di caricamento prima/dopo"""
+    size_before = memory_path.stat().st_size
+    started = time.perf_counter()
+    with open(memory_path, 'r', encoding='utf-8') as f:
+        memory = json.load(f)
+    load_before = time.perf_counter() - started
+
+    converted = sync.migrate_memory(memory)
+    sync.prune_memory_requests(memory)
+    serialized = sync.dump_memory(memory)
+
+    started = time.perf_counter()
+    json.loads(serialized)
+    load_after = time.perf_counter() - started
+
+    if converted and not check_only:
+        with open(memory_path, 'w', encoding='utf-8') as f:
+            f.write(serialized)
+
+    return {
+        "file": memory_path.name,
+        "entries": sum(len(memory[locale]) for locale in sync.memory_locales(memory)),
+        "requests": len(memory.get("_requests", {})),
+        "converted": converted,
+        "size_before": size_before,
+        "size_after": len(serialized.encode("utf-8")),
+        "load_ms_before": round(load_before * 1000, 1),
+        "load_ms_after": round(load_after * 1000, 1),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Migra la memoria traduzioni allo schema compatto')
+    parser.add_argument('--project', help='Solo translation_memory_<project>.json')
+    parser.add_argument('--check', action='store_true', help='Mostra il report senza riscrivere i file')
+    args = parser.parse_args()
+
+    if args.project:
+        paths = [sync.memory_path_for(args.project)]
+    else:
+        paths = sorted((sync.ROOT_DIR / "scripts").glob("translation_memory_*.json"))
+
+    paths = [p for p in paths if p.exists()]
+    if not paths:
+        print("ℹ️  Nessun file di memoria trovato")
+        return
+
+    for memory_path in paths:
+        report = migrate_file(memory_path, check_only=args.check)
+        if not report["converted"]:
+            print(f"✅ {report['file']}: già allo schema {sync.MEMORY_SCHEMA_VERSION} ({report['entries']} voci)")
+            continue
+        ratio = report["size_before"] / report["size_after"] if report["size_after"] else 0
+        action = "da migrare" if args.check else "migrato"
+        print(f"🔁 {report['file']} {action}: {report['converted']} voci → {report['requests']} richieste")
+        print(f"   📦 {report['size_before'] / 1024:.0f} KB → {report['size_after'] / 1024:.0f} KB ({ratio:.1f}x)")
+        print(f"   ⏱️  json.load {report['load_ms_before']} ms → {report['load_ms_after']} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+"""
+Mock server locale compatibile OpenAI (chat completions) per benchmark offline.
+
+Simula xAI/Grok (e Perplexity, stesso formato) senza chiavi API:
+- modalità "pseudo": traduce per finta il JSON del prompt prefissando ogni stringa con [locale]
+- modalità "echo": restituisce il JSON del prompt invariato
+
+Fault injection configurabile (tutte le probabilità sono 0..1):
+- latenza con distribuzione fixed / uniform / exponential / lognormal + tempo per token di output
+- 429 (con header Retry-After) e 5xx
+- troncamento (contenuto tagliato a metà, finish_reason="length")
+- JSON malformato e output racchiuso in ```json ... ```
+
+Endpoint:
+- POST /v1/chat/completions (e /chat/completions)
+- GET  /stats        contatori richieste ed esiti
+- POST /stats/reset  azzera i contatori
+
+Uso:
+    python scripts/mock_grok_server.py --port 8799 --rate-429 0.05 --rate-truncate 0.02
+    GROK_BASE_URL=http://127.0.0.1:8799/v1 GROK_API_KEY=mock python scripts/sync_and_translate_grok_2026.py --project site
+"""
+
+import argparse
+import json
+import math
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+
+DEFAULT_OPTIONS = {
+    "mode": "pseudo",
+    "latency_dist": "fixed",
+    "latency_ms": 50.0,
+    "latency_jitter_ms": 0.0,
+    "output_tokens_per_sec": 0.0,
+    "rate_429": 0.0,
+    "rate_5xx": 0.0,
+    "rate_truncate": 0.0,
+    "rate_malformed": 0.0,
+    "rate_fenced": 0.0,
+    "retry_after": 1.0,
+    "seed": None,
+}
+
+PAYLOAD_MARKER = re.compile(r'^JSON(?: to translate)?:\s*$', re.MULTILINE)
+LOCALE_PATTERN = re.compile(r'\(([a-z]{2,3}-[A-Z]{2})\)')
+
+# ============================================================================
+# PSEUDO-TRADUZIONE
+# ============================================================================
+
+def extract_payload(prompt: str) -> Optional[object]:
+    """Estrae il JSON da tradurre dal prompt (dopo l'ultima riga 'JSON:' / 'JSON to translate:')"""
+    matches = list(PAYLOAD_MARKER.finditer(prompt))
+    if matches:
+        try:
+            return json.loads(prompt[matches[-1].end():].strip())
+        except json.JSONDecodeError:
+            pass
+
+    # Fallback: ultimo oggetto JSON decodificabile che inizia a capo
+    decoder = json.JSONDecoder()
+    starts = [m.start() + 1 for m in re.finditer(r'\n\{', prompt)]
+    if prompt.startswith('{'):
+        starts.insert(0, 0)
+    for start in reversed(starts):
+        try:
+            payload, _ = decoder.raw_decode(prompt[start:])
+            return payload
+        except json.JSONDecodeError:
+            continue
+    return None
+
+def pseudo_translate(data, locale: str):
+    """Prefissa ogni stringa con [locale] preservando chiavi, numeri, booleani e null"""
+    if isinstance(data, dict):
+        return {k: pseudo_translate(v, locale) for k, v in data.items()}
+    if isinstance(data, list):
+        return [pseudo_translate(v, locale) for v in data]
+    if isinstance(data, str) and data:
+        return f"[{locale}] {data}"
+    return data
+
+def build_content(prompt: str, mode: str) -> str:
+    """Costruisce il contenuto della risposta del modello per un prompt"""
+    payload = extract_payload(prompt)
+    if payload is None:
+        return "{}"
+    if mode == "pseudo":
+        match = LOCALE_PATTERN.search(prompt)
+        locale = match.group(1) if match else "xx-XX"
+        payload = pseudo_translate(payload, locale)
+    return json.dumps(payload, ensure_ascii=False)
+
+# ============================================================================
+# FAULT INJECTION
+# ============================================================================
+
+def sample_latency(options: Dict, rng: random.Random, output_tokens: int) -> float:
+    """Latenza simulata in secondi secondo la distribuzione configurata"""
+    mean = options["latency_ms"] / 1000
+    jitter = options["latency_jitter_ms"] / 1000
+    dist = options["latency_dist"]
+
+    if dist == "uniform":
+        latency = rng.uniform(max(0.0, mean - jitter), mean + jitter)
+    elif dist == "exponential":
+        latency = rng.expovariate(1 / mean) if mean > 0 else 0.0
+    elif dist == "lognormal":
+        # jitter = deviazione standard della latenza (in ms), mean = media
+        if mean > 0:
+            sigma = math.sqrt(math.log(1 + (jitter / mean) ** 2)) if jitter else 0.0
+            mu = math.log(mean) - sigma ** 2 / 2
+            latency = rng.lognormvariate(mu, sigma)
+        else:
+            latency = 0.0
+    else:
+        latency = mean
+
+    if options["output_tokens_per_sec"] > 0:
+        latency += output_tokens / options["output_tokens_per_sec"]
+    return latency
+
+def pick_fault(options: Dict, rng: random.Random) -> str:
+    """Sceglie l'esito della richiesta (ok o un guasto) in base alle probabilità"""
+    roll = rng.random()
+    for fault in ("429", "5xx", "truncate", "malformed", "fenced"):
+        rate = options[f"rate_{fault}"]
+        if roll < rate:
+            return fault
+        roll -= rate
+    return "ok"
+
+# ============================================================================
+# SERVER HTTP
+# ============================================================================
+
+class MockGrokHandler(BaseHTTPRequestHandler):
+    """Handler chat completions con fault injection"""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, body: Dict, headers: Dict[str, str] = None):
+        raw = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(raw)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(raw)
+
+    def do_GET(self):
+        if self.path.rstrip("/") == "/stats":
+            self._send_json(200, self.server.snapshot_stats())
+        else:
+            self._send_json(404, {"error": {"message": "not found"}})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        raw = self.rfile.read(length) if length else b""
+
+        if self.path.rstrip("/") == "/stats/reset":
+            self.server.reset_stats()
+            self._send_json(200, {"ok": True})
+            return
+
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": "not found"}})
+            return
+
+        try:
+            request = json.loads(raw or b"{}")
+        except json.JSONDecodeError:
+            self.server.count("bad_request")
+            self._send_json(400, {"error": {"message": "invalid JSON body", "type": "invalid_request_error"}})
+            return
+
+        messages = request.get("messages") or []
+        prompt = "\n".join(str(m.get("content", "")) for m in messages if m.get("role") == "user")
+        options = self.server.options
+        fault = self.server.next_fault()
+
+        content = build_content(prompt, options["mode"])
+        prompt_tokens = len(prompt) // 4
+        completion_tokens = len(content) // 4
+
+        self.server.begin_request()
+        try:
+            time.sleep(self.server.next_latency(completion_tokens))
+
+            if fault == "429":
+                self._send_json(
+                    429,
+                    {"error": {"message": "Rate limit exceeded (mock)", "type": "rate_limit_error"}},
+                    {"Retry-After": f"{options['retry_after']:g}"}
+                )
+                return
+            if fault == "5xx":
+                self._send_json(503, {"error": {"message": "Service unavailable (mock)", "type": "server_error"}})
+                return
+
+            finish_reason = "stop"
+            if fault == "truncate":
+                content = content[:max(1, len(content) // 2)]
+                finish_reason = "length"
+            elif fault == "malformed":
+                content = content.rstrip("}") + ',,'
+            elif fault == "fenced":
+                content = f"```json\n{content}\n```"
+
+            self._send_json(200, {
+                "id": f"mock-{int(time.time() * 1000)}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": request.get("model", "mock"),
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": finish_reason,
+                }],
+                "usage": {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": len(content) // 4,
+                    "total_tokens": prompt_tokens + len(content) // 4,
+                },
+            })
+        finally:
+            self.server.end_request(fault, prompt_tokens, completion_tokens)
+
+class MockGrokServer(ThreadingHTTPServer):
+    """Server mock con opzioni, RNG deterministico e contatori thread-safe"""
+
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], options: Dict):
+        super().__init__(address, MockGrokHandler)
+        self.options = {**DEFAULT_OPTIONS, **options}
+        self._rng = random.Random(self.options["seed"])
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    def next_fault(self) -> str:
+        with self._lock:
+            return pick_fault(self.options, self._rng)
+
+    def next_latency(self, output_tokens: int) -> float:
+        with self._lock:
+            return sample_latency(self.options, self._rng, output_tokens)
+
+    def count(self, key: str):
+        with self._lock:
+            self._stats["outcomes"][key] = self._stats["outcomes"].get(key, 0) + 1
+
+    def begin_request(self):
+        with self._lock:
+            self._in_flight += 1
+            self._stats["max_in_flight"] = max(self._stats["max_in_flight"], self._in_flight)
+
+    def end_request(self, fault: str, prompt_tokens: int, completion_tokens: int):
+        with self._lock:
+            self._in_flight -= 1
+            self._stats["requests"] += 1
+            self._stats["outcomes"][fault] = self._stats["outcomes"].get(fault, 0) + 1
+            self._stats["prompt_tokens"] += prompt_tokens
+            self._stats["completion_tokens"] += completion_tokens
+
+    def reset_stats(self):
+        with self._lock:
+            self._in_flight = 0
+            self._stats = {
+                "requests": 0,
+                "outcomes": {},
+                "prompt_tokens": 0,
+                "completion_tokens": 0,
+                "max_in_flight": 0,
+            }
+
+    def snapshot_stats(self) -> Dict:
+        with self._lock:
+            return json.loads(json.dumps(self._stats))
+
+def start_mock_server(host: str = "127.0.0.1", port: int = 0, **options) -> Tuple[MockGrokServer, str]:
+    """Avvia il mock in un thread daemon. Ritorna (server, base_url con /v1)"""
+    server = MockGrokServer((host, port), options)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    bound_host, bound_port = server.server_address[:2]
+    return server, f"http://{bound_host}:{bound_port}/v1"
+
+def add_fault_arguments(parser: argparse.ArgumentParser):
+    """Argomenti CLI del mock (condivisi con il benchmark)"""
+    parser.add_argument('--mode', choices=['pseudo', 'echo'], default=DEFAULT_OPTIONS["mode"], help='pseudo: prefissa [locale]; echo: restituisce il JSON invariato')
+    parser.add_argument('--latency-dist', choices=['fixed', 'uniform', 'exponential', 'lognormal'], default=DEFAULT_OPTIONS["latency_dist"], help='Distribuzione della latenza')
+    parser.add_argument('--latency-ms', type=float, default=DEFAULT_OPTIONS["latency_ms"], help='Latenza media (ms)')
+    parser.add_argument('--latency-jitter-ms', type=float, default=DEFAULT_OPTIONS["latency_jitter_ms"], help='Ampiezza (uniform) o deviazione standard (lognormal) in ms')
+    parser.add_argument('--output-tokens-per-sec', type=float, default=DEFAULT_OPTIONS["output_tokens_per_sec"], help='Velocità di generazione simulata (0 = istantanea)')
+    parser.add_argument('--rate-429', type=float, default=DEFAULT_OPTIONS["rate_429"], help='Probabilità di risposta 429')
+    parser.add_argument('--rate-5xx', type=float, default=DEFAULT_OPTIONS["rate_5xx"], help='Probabilità di risposta 503')
+    parser.add_argument('--rate-truncate', type=float, default=DEFAULT_OPTIONS["rate_truncate"], help='Probabilità di troncamento (finish_reason=length)')
+    parser.add_argument('--rate-malformed', type=float, default=DEFAULT_OPTIONS["rate_malformed"], help='Probabilità di JSON malformato')
+    parser.add_argument('--rate-fenced', type=float, default=DEFAULT_OPTIONS["rate_fenced"], help='Probabilità di output in ```json fence')
+    parser.add_argument('--retry-after', type=float, default=DEFAULT_OPTIONS["retry_after"], help='Valore header Retry-After sui 429 (secondi)')
+    parser.add_argument('--seed', type=int, default=None, help='Seed RNG per run riproducibili')
+
+def options_from_args(args: argparse.Namespace) -> Dict:
+    """Estrae le opzioni del mock da un Namespace argparse"""
+    return {key: getattr(args, key) for key in DEFAULT_OPTIONS if hasattr(args, key)}
+
+def main():
+    parser = argparse.ArgumentParser(description='Mock server OpenAI-compatibile con fault injection')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8799)
+    add_fault_arguments(parser)
+    args = parser.parse_args()
+
+    server = MockGrokServer((args.host, args.port), options_from_args(args))
+    print(f"🧪 Mock Grok in ascolto su http://{args.host}:{args.port}/v1")
+    print(f"   Modalità: {args.mode} | Latenza: {args.latency_dist} {args.latency_ms:g}ms")
+    print(f"   Guasti: 429={args.rate_429} 5xx={args.rate_5xx} truncate={args.rate_truncate} "
+          f"malformed={args.rate_malformed} fenced={args.rate_fenced}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n📊 Statistiche finali:")
+        print(json.dumps(server.snapshot_stats(), indent=2))
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Migrazione tra file unico per lingua e output shardato (un file per paese + manifest).
+
+Lo split legge {locale}/compliance.json (filePattern del progetto) e scrive gli shard con il
+layout "shards" di config/i18n-projects.json (o quello di default per la KB, così si può
+migrare prima di attivarlo nel config). Il merge fa il contrario, per tornare al file unico.
+Gli shard già uguali (sha1 nel manifest) non vengono riscritti.
+
+Uso:
+    python scripts/shard_locales.py --project kb                      # split di tutte le lingue + en-GB
+    python scripts/shard_locales.py --project kb --locale it-IT,fr-FR
+    python scripts/shard_locales.py --project kb --merge              # shard → compliance.json
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+sys.path.append(str(Path(__file__).parent))
+
+import sync_and_translate_grok_2026 as sync
+
+DEFAULT_SHARDS = {
+    "block": "fused_by_iso",
+    "pattern": "{locale}/compliance/{key}.json",
+    "manifest": "{locale}/compliance/index.json",
+}
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description='Divide (o riunisce) i file lingua in shard per chiave + manifest')
+    parser.add_argument('--project', default='kb', help='Progetto (default: kb)')
+    parser.add_argument('--locale', help='Lingue (comma-separated), default tutte le lingue del progetto + EN')
+    parser.add_argument('--merge', action='store_true', help='Riunisce gli shard nel file unico (filePattern)')
+    args = parser.parse_args(argv)
+
+    project_config = sync.load_project_config(args.project)
+    if not project_config:
+        print(f"❌ Configurazione progetto '{args.project}' non trovata")
+        sys.exit(1)
+    if project_config.get("files"):
+        print(f"❌ {args.project} è multi-file: lo sharding è supportato solo per progetti a file unico")
+        sys.exit(1)
+
+    sharded_config = project_config if project_config.get("shards") else {**project_config, "shards": DEFAULT_SHARDS}
+    if not project_config.get("shards"):
+        print(f"ℹ️  Nessun layout \"shards\" nel config di {args.project}, uso {DEFAULT_SHARDS['manifest']}")
+
+    source_locale = project_config.get("sourceLocale", "en-GB")
+    locales = sync.select_locales(args.project, args.locale)
+    if not args.locale and source_locale not in locales:
+        locales = [source_locale, *locales]
+
+    started = time.time()
+    total_written = 0
+    for locale in locales:
+        layout = sync.get_shard_layout(sharded_config, locale)
+        manifest_path = sync.resolve_project_path(sharded_config, layout["file"])
+        single_file = sync.resolve_project_path(project_config, sync.get_file_for_locale(project_config, locale))
+
+        if args.merge:
+            if not manifest_path.exists():
+                print(f"   ⏭️  {locale}: nessun manifest")
+                continue
+            sync.save_json(single_file, sync.load_sharded_data(manifest_path))
+            print(f"   ✅ {locale}: {single_file.name} ricostruito")
+            continue
+
+        if not single_file.exists():
+            print(f"   ⏭️  {locale}: {single_file.name} non trovato")
+            continue
+        data = sync.load_json(single_file)
+        written = sync.save_target_file(sharded_config, layout, data)
+        total_written += written
+        shards = len(data.get(layout["shardBlock"], {}))
+        print(f"   ✅ {locale}: {shards} shard ({written} scritti)")
+
+    if not args.merge:
+        print(f"\n💾 {total_written} shard scritti in {sync.format_duration(time.time() - started)}")
+        if not project_config.get("shards"):
+            print(f"   Per usarli nel sync aggiungi a {args.project} in config/i18n-projects.json:")
+            print(f"   \"shards\": {DEFAULT_SHARDS}".replace("'", '"'))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Watch dei file sorgente EN per sync_and_translate_grok_2026.py --watch.
+
+- Linux: inotify via ctypes (nessuna dipendenza), watch sulle cartelle dei file così
+  funzionano anche gli editor che salvano con file temporaneo + rename
+- Altrove (o con force_polling): polling di mtime/dimensione
+
+wait_for_changes() blocca fino alla prima modifica e poi aspetta che i salvataggi si
+fermino per `debounce` secondi, così un salvataggio multiplo diventa un solo evento.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+# Costanti inotify (linux/inotify.h)
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_Q_OVERFLOW = 0x00004000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = getattr(os, "O_CLOEXEC", 0o2000000)
+EVENT_HEADER = struct.Struct("iIII")
+
+class PollingWatcher:
+    """Fallback portabile: confronta (mtime_ns, size) dei file a ogni intervallo"""
+
+    kind = "polling"
+
+    def __init__(self, paths: Iterable[Path], interval: float = 1.0):
+        self.paths = [Path(p) for p in paths]
+        self.interval = interval
+        self._signatures = {path: self._signature(path) for path in self.paths}
+
+    @staticmethod
+    def _signature(path: Path) -> Optional[Tuple[int, int]]:
+        try:
+            stat = path.stat()
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def poll(self, timeout: float) -> Set[Path]:
+        """File cambiati entro `timeout` secondi (insieme vuoto se nessuno)"""
+        deadline = time.monotonic() + timeout
+        while True:
+            changed = set()
+            for path in self.paths:
+                signature = self._signature(path)
+                if signature != self._signatures[path]:
+                    self._signatures[path] = signature
+                    if signature is not None:
+                        changed.add(path)
+            remaining = deadline - time.monotonic()
+            if changed or remaining <= 0:
+                return changed
+            time.sleep(min(self.interval, remaining))
+
+    def close(self):
+        pass
+
+class InotifyWatcher:
+    """inotify sulle cartelle dei file osservati (scritture chiuse e rename verso il file)"""
+
+    kind = "inotify"
+
+    def __init__(self, paths: Iterable[Path]):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 fallita")
+        self._dirs: Dict[int, Path] = {}
+        self.paths = {Path(p).resolve() for p in paths}
+        for directory in {path.parent for path in self.paths}:
+            wd = libc.inotify_add_watch(self._fd, os.fsencode(directory), IN_CLOSE_WRITE | IN_MOVED_TO)
+            if wd < 0:
+                os.close(self._fd)
+                raise OSError(ctypes.get_errno(), f"inotify_add_watch fallita su {directory}")
+            self._dirs[wd] = directory
+
+    def poll(self, timeout: float) -> Set[Path]:
+        readable, _, _ = select.select([self._fd], [], [], max(0.0, timeout))
+        if not readable:
+            return set()
+        changed = set()
+        try:
+            buffer = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return changed
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(buffer):
+            wd, mask, _, name_len = EVENT_HEADER.unpack_from(buffer, offset)
+            offset += EVENT_HEADER.size
+            name = buffer[offset:offset + name_len].rstrip(b"\0")
+            offset += name_len
+            if mask & IN_Q_OVERFLOW:
+                # Coda piena: considera cambiati tutti i file osservati
+                return set(self.paths)
+            if wd in self._dirs and name:
+                path = self._dirs[wd] / os.fsdecode(name)
+                if path in self.paths:
+                    changed.add(path)
+        return changed
+
+    def close(self):
+        os.close(self._fd)
+
+def open_watcher(paths: Iterable[Path], poll_interval: float = 1.0, force_polling: bool = False):
+    """inotify se disponibile (Linux), altrimenti polling"""
+    paths = [Path(p).resolve() for p in paths]
+    if not force_polling and sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(paths)
+        except (OSError, AttributeError) as e:
+            print(f"⚠️  inotify non disponibile ({e}), uso il polling")
+    return PollingWatcher(paths, poll_interval)
+
+def wait_for_changes(watcher, debounce: float = 1.0, idle_timeout: Optional[float] = None) -> Set[Path]:
+    """
+    Blocca fino alla prima modifica, poi raccoglie le altre finché i file restano fermi
+    per `debounce` secondi. Con idle_timeout ritorna un insieme vuoto se non cambia nulla.
+    """
+    started = time.monotonic()
+    changed: Set[Path] = set()
+    while not changed:
+        if idle_timeout is not None and time.monotonic() - started >= idle_timeout:
+            return changed
+        changed |= watcher.poll(1.0)
+    while True:
+        more = watcher.poll(debounce)
+        if not more:
+            return changed
+        changed |= more
@@ -10,18 +10,32 @@ OTTIMIZZAZIONI 2026:
 2. KB: filtra ricorsivamente vuoti/null PRIMA di inviare a Grok (riduce token 50%)
    - Merge finale con JSON original per preservare tutte chiavi vuote
 
-3. Chunking KB: dividi fused_by_iso in 6 batch (~34 paesi ciascuno) per 6 chiamate totali
+3. Chunking KB: dividi fused_by_iso in batch da 18 paesi, solo i paesi (o le sezioni, con
+   --kb-granularity section) con path nuove/cambiate nel diff EN o non ancora tradotte
 
-4. Parallel async per batch (asyncio.gather, max 5 concorrenti)
+4. Batch e blocchi in parallelo (thread pool) con concorrenza adattiva AIMD
+   (llm_runtime.concurrency: +1 con latenza sana, dimezza su 429/timeout/picchi)
 
-5. Log token usati + costo stimato per batch
+5. Log token usati + costo stimato per batch; in memoria un record per richiesta
+   (timestamp, modello, token) referenziato dalle path tradotte (schema 2, file compatto)
 
-6. Retry con backoff esponenziale (max 3 tentativi)
+6. Retry classificati (llm_runtime.retry): backoff + jitter solo per 429/timeout/5xx,
+   Retry-After rispettato, budget per run, batch troncati divisi in due invece di ritentati
 
 7. Mantieni logica esistente: diff, memoria, merge_preserving_structure, glossario, context
+   (selezione blocchi da indice stati per lingua: translation_state_{progetto}.json, --status)
 
 8. Usa grok-4-fast-non-reasoning
 
+9. Più progetti in un solo processo (--project site,app,kb o all): un thread per progetto,
+   stesso client, limite AIMD e budget retry; log con prefisso [progetto]
+
+10. --watch: processo residente (inotify o polling, con debounce) che traduce e scrive
+    solo le path EN nuove/cambiate in tutte le lingue, con memoria e client già caldi
+
+11. Output shardato opzionale ("shards" nel config del progetto, es. KB): un file per paese
+    per lingua + manifest con sha1, vengono riscritti solo gli shard cambiati
+
 LOGICA:
 1. en-gb.json è sempre source of truth
 2. Per ogni lingua:
@@ -33,16 +47,25 @@ LOGICA:
 3. Garantisce che tutti i JSON abbiano stessa struttura di EN
 """
 
+import base64
+import contextvars
+import hashlib
 import json
 import sys
 import os
 import time
-import asyncio
-import random
+import threading
+import zlib
+import re
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
 from openai import OpenAI
-from openai import AsyncOpenAI
+
+sys.path.append(str(Path(__file__).parent))
+from llm_runtime.cache import completion_from_cache, completion_to_cache, configure_response_cache, get_response_cache
+from llm_runtime.concurrency import OUTCOME_ERROR, get_controller
+from llm_runtime.retry import ResponseParseError, TruncatedResponse, classify_error, get_retry_policy, start_retry_run
 
 # ============================================================================
 # CONFIGURAZIONE
@@ -76,7 +99,7 @@ MEMORY_PATH = ROOT_DIR / "scripts" / "translation_memory.json"
 
 # Grok API - Configura la tua API key
 GROK_API_KEY = os.getenv("GROK_API_KEY", "")
-GROK_BASE_URL = "https://api.x.ai/v1"
+GROK_BASE_URL = os.getenv("GROK_BASE_URL", "https://api.x.ai/v1")  # override per mock locale (mock_grok_server.py)
 GROK_MODEL = "grok-4-fast-non-reasoning"  # OTTIMIZZAZIONE 2026: modello fisso
 
 # Costi per token (DEPRECATO - non più usato per calcolo reale)
@@ -91,6 +114,63 @@ COST_PER_TOKEN_KB = 0.35 / 1_000_000   # $0.35 effective for 1M token (50% reduc
 # UTILITY BASE
 # ============================================================================
 
+# Cache file di configurazione (glossario, contesto, lingue, mapping KB): riletti solo se
+# cambiano (mtime/size), così una run multi-progetto non li ricarica per ogni lingua.
+# I valori in cache sono condivisi: trattarli come sola lettura.
+_FILE_CACHE: Dict[Path, Tuple[Tuple[int, int], object]] = {}
+_FILE_CACHE_LOCK = threading.Lock()
+
+def read_cached_file(filepath: Path, parse: Callable[[str], object]) -> object:
+    """Legge e parsa un file, riusando il risultato finché mtime e dimensione non cambiano"""
+    stat = filepath.stat()
+    signature = (stat.st_mtime_ns, stat.st_size)
+    with _FILE_CACHE_LOCK:
+        cached = _FILE_CACHE.get(filepath)
+        if cached and cached[0] == signature:
+            return cached[1]
+    with open(filepath, 'r', encoding='utf-8') as f:
+        value = parse(f.read())
+    with _FILE_CACHE_LOCK:
+        _FILE_CACHE[filepath] = (signature, value)
+    return value
+
+# Log multi-progetto: ogni riga stampata da un progetto (e dai suoi worker) porta il prefisso [id]
+LOG_PREFIX: contextvars.ContextVar[str] = contextvars.ContextVar("LOG_PREFIX", default="")
+
+class PrefixedStdout:
+    """Wrapper di stdout che antepone LOG_PREFIX a ogni riga, senza mescolare righe di thread diversi"""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self._lock = threading.Lock()
+        self._partial: Dict[int, str] = {}
+
+    def write(self, text: str) -> int:
+        thread_id = threading.get_ident()
+        prefix = LOG_PREFIX.get()
+        with self._lock:
+            buffered = self._partial.pop(thread_id, "") + text
+            *lines, rest = buffered.split("\n")
+            if lines:
+                self.stream.write("".join(f"{prefix}{line}\n" for line in lines))
+            if rest:
+                self._partial[thread_id] = rest
+        return len(text)
+
+    def flush(self):
+        with self._lock:
+            for rest in self._partial.values():
+                self.stream.write(f"{LOG_PREFIX.get()}{rest}\n")
+            self._partial.clear()
+            self.stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+def submit_in_context(executor: ThreadPoolExecutor, fn: Callable, *args, **kwargs):
+    """executor.submit che porta nel worker il contesto corrente (prefisso log del progetto)"""
+    return executor.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
 def load_json(filepath: Path) -> Dict:
     """Carica un file JSON"""
     if not filepath.exists():
@@ -124,23 +204,6 @@ def flatten_json(data: Dict, prefix: str = "") -> Dict[str, object]:
         flat[prefix] = data
     return flat
 
-def load_memory(project_id: str = "site") -> Dict[str, Dict[str, object]]:
-    """Carica la memoria traduzioni per lingua (path -> valore tradotto)"""
-    memory_path = ROOT_DIR / "scripts" / f"translation_memory_{project_id}.json"
-    if not memory_path.exists():
-        return {}
-    try:
-        with open(memory_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except Exception as e:
-        print(f"   ⚠️  Errore caricamento memoria {project_id}: {e}")
-        return {}
-
-def save_memory(memory: Dict[str, Dict[str, object]], project_id: str = "site"):
-    """Salva la memoria traduzioni"""
-    memory_path = ROOT_DIR / "scripts" / f"translation_memory_{project_id}.json"
-    save_json(memory_path, memory)
-
 def load_en_snapshot(project: Dict) -> Dict:
     """Carica snapshot precedente del file EN"""
     source_locale = project.get("sourceLocale", "en-GB")
@@ -210,69 +273,145 @@ def remove_paths(target: Dict, paths: set):
             if isinstance(ref, dict) and last in ref:
                 ref.pop(last)
 
+# Structural sharing: merge/sync riusano i sotto-alberi non modificati (EN, target o tradotti)
+# invece di copiarli, e creano un nuovo dict solo dove il risultato differisce. Sotto il primo
+# livello gli alberi risultanti sono condivisi (anche tra lingue): vanno trattati come immutabili,
+# le modifiche si fanno riassegnando il blocco (synced_data[block_name] = ...).
+
+_MISSING = object()
+
 def merge_preserving_structure(original: any, translated: any) -> any:
     """
     Merge dei dati tradotti con quelli originali preservando TUTTE le chiavi.
     - Se una chiave esiste in translated, usa quella (tradotta)
     - Se una chiave esiste solo in original, mantienila (anche se vuota/null)
     - Preserva la struttura completa di original
+    Ritorna direttamente translated (o original) quando il merge non cambierebbe nulla.
     """
     if not isinstance(original, dict) or not isinstance(translated, dict):
         if translated is not None and translated != original:
             return translated
         return original
 
-    merged = {}
+    items = []
+    same_as_original = True
+    same_as_translated = True
 
     for key, original_value in original.items():
-        if key in translated:
-            translated_value = translated[key]
-
-            if isinstance(original_value, dict) and isinstance(translated_value, dict):
-                merged[key] = merge_preserving_structure(original_value, translated_value)
-            elif isinstance(original_value, list) and isinstance(translated_value, list):
-                merged[key] = translated_value
-            else:
-                merged[key] = translated_value
+        translated_value = translated.get(key, _MISSING)
+        if translated_value is _MISSING:
+            value = original_value
+            same_as_translated = False
+        elif isinstance(original_value, dict) and isinstance(translated_value, dict):
+            value = merge_preserving_structure(original_value, translated_value)
+            same_as_translated = same_as_translated and value is translated_value
         else:
-            merged[key] = original_value
+            value = translated_value
+        same_as_original = same_as_original and value is original_value
+        items.append((key, value))
+
+    if len(translated) > len(original) or not same_as_translated:
+        extra = [(key, value) for key, value in translated.items() if key not in original]
+    else:
+        extra = []
 
-    for key, translated_value in translated.items():
-        if key not in merged:
-            merged[key] = translated_value
+    if same_as_original and not extra:
+        return original
+    if same_as_translated and len(translated) == len(original) and list(translated) == list(original):
+        return translated
 
+    merged = dict(items)
+    merged.update(extra)
     return merged
 
+def overlay_kb_sections(current_country: any, new_country: any, sent_country: any) -> any:
+    """
+    Paese KB aggiornato dopo una traduzione: le sezioni inviate (sent_country) vengono da
+    new_country, le altre restano come nel target (selezione per sezione, vuoti EN filtrati).
+    """
+    if not all(isinstance(d, dict) for d in (current_country, new_country, sent_country)):
+        return new_country
+    return {key: value if key in sent_country else current_country.get(key, value) for key, value in new_country.items()}
+
 def sync_structure(en_data: Dict, target_data: Dict) -> Dict:
     """
     Sincronizza la struttura di target_data con en_data.
-    - Aggiunge chiavi mancanti (copia da EN)
+    - Aggiunge chiavi mancanti (riferimento al sotto-albero EN, senza copia)
     - Mantiene valori esistenti tradotti
+    - Riusa i sotto-alberi target già allineati a EN
+    Il dict di primo livello è sempre nuovo: i blocchi possono essere riassegnati liberamente.
     """
-    synced = {}
-
-    def sync_recursive(en_dict: Dict, target_dict: Dict, result: Dict):
-        """Sincronizza ricorsivamente"""
-        for key, en_value in en_dict.items():
-            if isinstance(en_value, dict):
-                if key not in target_dict or not isinstance(target_dict[key], dict):
-                    result[key] = json.loads(json.dumps(en_value))
-                else:
-                    result[key] = {}
-                    sync_recursive(en_value, target_dict[key], result[key])
-            elif isinstance(en_value, list):
-                if key in target_dict and isinstance(target_dict[key], list):
-                    result[key] = target_dict[key]
-                else:
-                    result[key] = json.loads(json.dumps(en_value))
-            else:
-                if key in target_dict:
-                    result[key] = target_dict[key]
-                else:
-                    result[key] = en_value
-
-    sync_recursive(en_data, target_data, synced)
-    return synced
+    def sync_node(en_value, target_value):
+        if isinstance(en_value, dict):
+            if not isinstance(target_value, dict):
+                return en_value
+            items = []
+            reusable = len(target_value) == len(en_value)
+            for key, en_child in en_value.items():
+                target_child = target_value.get(key, _MISSING)
+                child = sync_node(en_child, target_child)
+                reusable = reusable and child is target_child
+                items.append((key, child))
+            if reusable and list(target_value) == list(en_value):
+                return target_value
+            return dict(items)
+        if isinstance(en_value, list):
+            return target_value if isinstance(target_value, list) else en_value
+        return en_value if target_value is _MISSING else target_value
+
+    return {key: sync_node(en_value, target_data.get(key, _MISSING)) for key, en_value in en_data.items()}
+
+def changed_subtree(new_value: any, old_value: any = _MISSING) -> any:
+    """
+    Sotto-albero di new_value con le sole foglie nuove o cambiate rispetto a old_value
+    (liste e valori semplici interi). _MISSING se non è cambiato nulla.
+    """
+    if isinstance(new_value, dict) and isinstance(old_value, dict):
+        delta = {}
+        for key, new_child in new_value.items():
+            child = changed_subtree(new_child, old_value.get(key, _MISSING))
+            if child is not _MISSING:
+                delta[key] = child
+        return delta if delta else _MISSING
+    return _MISSING if new_value == old_value else new_value
+
+def subtree_for_paths(value: any, paths: set) -> any:
+    """
+    Sotto-albero di value con le sole foglie in paths (path di flatten_json); una lista
+    viene presa intera se contiene almeno una path richiesta. _MISSING se nessuna.
+    """
+    list_prefixes = {path[:idx] for path in paths for idx, char in enumerate(path) if char == "["}
+
+    def select(node, prefix):
+        if isinstance(node, dict):
+            subtree = {}
+            for key, child in node.items():
+                child_subtree = select(child, f"{prefix}.{key}" if prefix else key)
+                if child_subtree is not _MISSING:
+                    subtree[key] = child_subtree
+            return subtree if subtree else _MISSING
+        if isinstance(node, list):
+            return node if prefix in list_prefixes else _MISSING
+        return node if prefix in paths else _MISSING
+
+    return select(value, "")
+
+def replace_leaves(value: any, flat_values: Dict[str, object], prefix: str = "") -> any:
+    """Copia di value con le foglie sostituite da flat_values (path di flatten_json)"""
+    if isinstance(value, dict):
+        return {key: replace_leaves(child, flat_values, f"{prefix}.{key}" if prefix else key) for key, child in value.items()}
+    if isinstance(value, list):
+        return [replace_leaves(item, flat_values, f"{prefix}[{idx}]") for idx, item in enumerate(value)]
+    return flat_values.get(prefix, value)
+
+def overlay_tree(base: any, patch: any) -> any:
+    """Applica le foglie di patch su base creando nuovi dict solo lungo le path toccate"""
+    if not isinstance(base, dict) or not isinstance(patch, dict):
+        return patch
+    merged = dict(base)
+    for key, patch_value in patch.items():
+        merged[key] = overlay_tree(base.get(key), patch_value)
+    return merged
 
 def values_match(en_value, target_value) -> bool:
     """Verifica se due valori sono identici (non tradotto)"""
@@ -294,6 +433,352 @@ def values_match(en_value, target_value) -> bool:
     else:
         return en_value == target_value
 
+# ============================================================================
+# MEMORIA TRADUZIONI (schema 2)
+# ============================================================================
+#
+# {
+#   "_schema": 2,
+#   "_requests": {"17": {"t": 1766769673.986, "model": "grok-...", "requests": 1,
+#                        "usage": {"input_tokens": ..., "output_tokens": ..., "total_tokens": ...}}},
+#   "fr-FR": {"pages.common.refresh": ["Actualiser", "17"], ...}
+# }
+#
+# Ogni path punta al record della richiesta che l'ha tradotta: timestamp, modello e token
+# sono salvati una volta per richiesta (non copiati su ogni foglia) e restano verificabili.
+# Le chiavi che iniziano con "_" non sono locale.
+
+MEMORY_SCHEMA_VERSION = 2
+
+def memory_path_for(project_id: str) -> Path:
+    return ROOT_DIR / "scripts" / f"translation_memory_{project_id}.json"
+
+def memory_locales(memory: Dict) -> List[str]:
+    """Locale presenti in memoria (esclude _schema, _requests)"""
+    return [key for key in memory if not key.startswith("_")]
+
+def memory_entry_value(entry: object) -> object:
+    """Valore tradotto di una voce: [valore, id_richiesta] (schema 2), dict legacy o valore semplice"""
+    if isinstance(entry, list) and len(entry) == 2:
+        return entry[0]
+    if isinstance(entry, dict) and "value" in entry:
+        return entry["value"]
+    return entry
+
+def new_memory_request(memory: Dict, token_usage: Optional[Dict] = None, requests: Optional[int] = 1, model: Optional[str] = GROK_MODEL, timestamp: Optional[float] = None) -> str:
+    """Registra una richiesta (o un gruppo di richieste per lo stesso blocco) e ritorna il suo id"""
+    registry = memory.setdefault("_requests", {})
+    next_id = len(registry) + 1
+    while str(next_id) in registry:
+        next_id += 1
+    req_id = str(next_id)
+    registry[req_id] = {
+        "t": round(timestamp if timestamp is not None else time.time(), 3),
+        "model": model,
+        "requests": requests,
+        "usage": token_usage or {},
+    }
+    return req_id
+
+def migrate_memory(memory: Dict) -> int:
+    """
+    Converte in place una memoria legacy ({path: {value, last_translated_at, token_usage}})
+    nello schema 2. Le voci con stesso token_usage e stesso secondo di traduzione (= stessa
+    richiesta) condividono un record. Ritorna il numero di voci convertite.
+    """
+    if memory.get("_schema") == MEMORY_SCHEMA_VERSION:
+        return 0
+
+    converted = 0
+    for locale in memory_locales(memory):
+        groups: Dict[Tuple[str, int], str] = {}
+        for path, entry in memory[locale].items():
+            if isinstance(entry, list) and len(entry) == 2:
+                continue
+            if isinstance(entry, dict) and "value" in entry:
+                timestamp = entry.get("last_translated_at") or 0.0
+                usage = entry.get("token_usage") or {}
+                group_key = (json.dumps(usage, sort_keys=True), int(timestamp))
+                if group_key not in groups:
+                    groups[group_key] = new_memory_request(memory, usage, requests=None, model=None, timestamp=timestamp)
+                    memory["_requests"][groups[group_key]]["migrated"] = True
+                memory[locale][path] = [entry["value"], groups[group_key]]
+            else:
+                # Valore semplice (schema originale): nessun metadato da conservare
+                memory[locale][path] = [entry, None]
+            converted += 1
+
+    memory["_schema"] = MEMORY_SCHEMA_VERSION
+    return converted
+
+def prune_memory_requests(memory: Dict) -> int:
+    """Elimina i record richiesta non più referenziati da alcuna voce"""
+    registry = memory.get("_requests", {})
+    referenced = {entry[1] for locale in memory_locales(memory) for entry in memory[locale].values()
+                  if isinstance(entry, list) and len(entry) == 2}
+    stale = [req_id for req_id in registry if req_id not in referenced]
+    for req_id in stale:
+        registry.pop(req_id)
+    return len(stale)
+
+def load_memory(project_id: str = "site") -> Dict[str, Dict[str, object]]:
+    """Carica la memoria traduzioni (migra automaticamente i file con lo schema legacy)"""
+    memory_path = memory_path_for(project_id)
+    if not memory_path.exists():
+        return {"_schema": MEMORY_SCHEMA_VERSION, "_requests": {}}
+    try:
+        with open(memory_path, 'r', encoding='utf-8') as f:
+            memory = json.load(f)
+    except Exception as e:
+        print(f"   ⚠️  Errore caricamento memoria {project_id}: {e}")
+        return {"_schema": MEMORY_SCHEMA_VERSION, "_requests": {}}
+
+    converted = migrate_memory(memory)
+    if converted:
+        print(f"   🔁 Memoria {project_id} migrata allo schema {MEMORY_SCHEMA_VERSION} ({converted} voci, {len(memory['_requests'])} richieste)")
+    return memory
+
+def dump_memory(memory: Dict) -> str:
+    """JSON compatto, una voce per riga (diff leggibili, file molto più piccolo dell'indentato)"""
+    def compact(value) -> str:
+        return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+    sections = [f'"_schema":{compact(memory.get("_schema", MEMORY_SCHEMA_VERSION))}']
+    for key in ["_requests"] + memory_locales(memory):
+        entries = memory.get(key, {})
+        body = ",\n".join(f"{compact(path)}:{compact(entry)}" for path, entry in entries.items())
+        sections.append(f"{compact(key)}:{{\n{body}\n}}" if body else f"{compact(key)}:{{}}")
+    return "{\n" + ",\n".join(sections) + "\n}\n"
+
+def save_memory(memory: Dict[str, Dict[str, object]], project_id: str = "site"):
+    """Salva la memoria traduzioni (record richiesta orfani eliminati)"""
+    memory_path = memory_path_for(project_id)
+    memory_path.parent.mkdir(parents=True, exist_ok=True)
+    prune_memory_requests(memory)
+    with open(memory_path, 'w', encoding='utf-8') as f:
+        f.write(dump_memory(memory))
+
+# ============================================================================
+# INDICE STATO TRADUZIONI (per lingua)
+# ============================================================================
+#
+# Un byte di stato per ogni (lingua, path EN), nell'ordine di flatten_json su EN:
+# la selezione dei blocchi diventa un conteggio su range contigui invece di un walk
+# dell'albero + lookup in memoria. Persistito in translation_state_{project}.json
+# (stati compressi zlib + base64); una lingua è valida finché l'impronta EN,
+# mtime/dimensione dei suoi file target e l'impronta della sua memoria non cambiano,
+# altrimenti si ricalcola. Lo stato si calcola sempre sui file target così come sono
+# su disco (prima di sync_structure), altrimenti le path mancanti risulterebbero "identiche".
+
+STATE_MISSING = 0      # path EN assente nel target
+STATE_PENDING = 1      # valore identico a EN e non confermato dalla memoria
+STATE_TRANSLATED = 2   # tradotto (diverso da EN) o identico ma confermato dalla memoria
+
+STATE_INDEX_SCHEMA = 2
+
+# Selezione KB dentro fused_by_iso: "country" (default) = solo i paesi con path nuove,
+# cambiate o non tradotte; "section" = solo quelle sezioni del paese; "block" = tutto il blocco
+KB_GRANULARITIES = ("block", "country", "section")
+DEFAULT_KB_GRANULARITY = "country"
+
+def state_index_path_for(project_id: str) -> Path:
+    return ROOT_DIR / "scripts" / f"translation_state_{project_id}.json"
+
+def status_matrix_path() -> Path:
+    return ROOT_DIR / "data" / "i18n-status.json"
+
+def refresh_status_matrix(project_config: Dict):
+    """
+    Riscrive la colonna del progetto in data/i18n-status.json (servito da /api/i18n/status)
+    dopo che i file di lingua sono cambiati: stati dall'indice appena salvato, nessuna rilettura.
+    """
+    from build_i18n_status import update_status_file  # import locale: build_i18n_status importa questo modulo
+    try:
+        update_status_file([project_config], status_matrix_path(), verbose=False)
+    except Exception as e:
+        print(f"   ⚠️  Matrice stato i18n non aggiornata ({status_matrix_path().name}): {e}")
+
+def kb_selection_units(view: Dict, start: int, granularity: str) -> List[Tuple[Tuple[str, ...], int, int]]:
+    """Range (paese,) o (paese, sezione) di fused_by_iso nella vista piatta, nello stesso ordine di flatten_json"""
+    units = []
+    offset = start
+    for country_iso, country_data in view.items():
+        if granularity == "section" and isinstance(country_data, dict):
+            for section, section_data in country_data.items():
+                size = len(flatten_json({section: section_data}))
+                units.append(((country_iso, section), offset, offset + size))
+                offset += size
+        else:
+            size = len(flatten_json({country_iso: country_data}))
+            units.append(((country_iso,), offset, offset + size))
+            offset += size
+    return units
+
+def build_en_layout(en_data: Dict, project_id: str, new_paths: set = frozenset(), changed_paths: set = frozenset(),
+                    kb_granularity: str = DEFAULT_KB_GRANULARITY) -> Dict:
+    """
+    Vista piatta di EN condivisa da tutte le lingue della run:
+    paths = [(path, valore EN)], blocks = {blocco: (start, end)}, views = blocchi EN
+    (filtrati dai vuoti per KB), forced = blocchi con path nuove/cambiate, fingerprint.
+    Per KB fused_by_iso anche units = {blocco: [(chiave, start, end)]} per paese o sezione
+    e forced_units = {blocco: indici delle unità con path nuove/cambiate}.
+    """
+    paths: List[Tuple[str, object]] = []
+    blocks: Dict[str, Tuple[int, int]] = {}
+    views: Dict[str, object] = {}
+    units: Dict[str, List[Tuple[Tuple[str, ...], int, int]]] = {}
+    for block_name, block_data in en_data.items():
+        # Per KB: filtra vuoti ricorsivamente PRIMA del confronto
+        view = filter_empty_values_recursive(block_data) if project_id == "kb" else block_data
+        if project_id == "kb" and not view:
+            continue
+        start = len(paths)
+        paths.extend(flatten_json({block_name: view}).items())
+        blocks[block_name] = (start, len(paths))
+        views[block_name] = view
+        if project_id == "kb" and block_name == "fused_by_iso" and kb_granularity != "block" and isinstance(view, dict):
+            units[block_name] = kb_selection_units(view, start, kb_granularity)
+
+    forced = set()
+    forced_units: Dict[str, set] = {}
+    if new_paths or changed_paths:
+        def touched(start: int, end: int) -> bool:
+            return any(path in new_paths or path in changed_paths for path, _ in paths[start:end])
+
+        for block_name, (start, end) in blocks.items():
+            if block_name in units:
+                forced_units[block_name] = {idx for idx, (_, u_start, u_end) in enumerate(units[block_name]) if touched(u_start, u_end)}
+            elif touched(start, end):
+                forced.add(block_name)
+
+    fingerprint = hashlib.sha1(json.dumps(paths, ensure_ascii=False).encode("utf-8")).hexdigest()
+    return {"paths": paths, "blocks": blocks, "views": views, "forced": forced, "fingerprint": fingerprint,
+            "units": units, "forced_units": forced_units}
+
+def compute_locale_state(layout: Dict, target_data: Dict, mem_for_locale: Dict) -> bytearray:
+    """Stato di ogni path EN nel target (walk completo: solo quando l'indice non è valido o dopo una scrittura)"""
+    paths = layout["paths"]
+    state = bytearray(len(paths))
+    for block_name, (start, end) in layout["blocks"].items():
+        target_flat = flatten_json({block_name: target_data[block_name]}) if block_name in target_data else {}
+        for idx in range(start, end):
+            path, en_value = paths[idx]
+            target_value = target_flat.get(path, _MISSING)
+            if target_value is _MISSING:
+                state[idx] = STATE_MISSING
+            elif en_value != target_value:
+                state[idx] = STATE_TRANSLATED
+            else:
+                # Identico a EN: va bene solo se la memoria lo conferma ([valore, id_richiesta])
+                mem_value = memory_entry_value(mem_for_locale[path]) if path in mem_for_locale else None
+                state[idx] = STATE_TRANSLATED if mem_value is not None and mem_value == target_value else STATE_PENDING
+    return state
+
+def select_blocks_from_state(layout: Dict, state: bytearray) -> List[Tuple[str, Dict]]:
+    """
+    Blocchi da tradurre: forzati dal diff EN o con almeno una path non tradotta.
+    I blocchi divisi in unità (KB fused_by_iso) contengono solo i paesi/sezioni da tradurre.
+    """
+    selected = []
+    for block_name, (start, end) in layout["blocks"].items():
+        block_units = layout.get("units", {}).get(block_name)
+        if block_units is None:
+            if block_name in layout["forced"] or state.count(STATE_TRANSLATED, start, end) != end - start:
+                selected.append((block_name, layout["views"][block_name]))
+            continue
+
+        view = layout["views"][block_name]
+        forced_units = layout["forced_units"].get(block_name, ())
+        subset = {}
+        for idx, (key, u_start, u_end) in enumerate(block_units):
+            if idx in forced_units or state.count(STATE_TRANSLATED, u_start, u_end) != u_end - u_start:
+                if len(key) == 1:
+                    subset[key[0]] = view[key[0]]
+                else:
+                    subset.setdefault(key[0], {})[key[1]] = view[key[0]][key[1]]
+        if subset:
+            selected.append((block_name, subset))
+    return selected
+
+def summarize_state(state: bytearray) -> Dict[str, int]:
+    return {
+        "total": len(state),
+        "translated": state.count(STATE_TRANSLATED),
+        "pending": state.count(STATE_PENDING),
+        "missing": state.count(STATE_MISSING),
+    }
+
+def locale_files_signature(project_config: Dict, locale: str) -> Dict[str, Optional[List[int]]]:
+    """(mtime_ns, dimensione) dei file target della lingua: cambia se qualcuno li riscrive"""
+    signature = {}
+    for file_info in get_files_for_locale(project_config, locale):
+        target_file = resolve_project_path(project_config, file_info["file"])
+        try:
+            stat = target_file.stat()
+            signature[file_info["file"]] = [stat.st_mtime_ns, stat.st_size]
+        except FileNotFoundError:
+            signature[file_info["file"]] = None
+            continue
+        if file_info.get("shardBlock"):
+            # Uno shard modificato a mano non tocca il manifest: conta anche la cartella shard
+            shard_dir = resolve_project_path(project_config, file_info["shardPattern"].replace("{key}", "_")).parent
+            try:
+                with os.scandir(shard_dir) as entries:
+                    mtimes = [entry.stat().st_mtime_ns for entry in entries if entry.name.endswith(".json")]
+            except FileNotFoundError:
+                mtimes = []  # lingua nuova: manifest senza ancora la cartella shard
+            signature[file_info["file"]] += [max(mtimes, default=0), len(mtimes)]
+    return signature
+
+def load_state_index(project_id: str) -> Dict:
+    """Indice stati persistito (le lingue vengono decodificate solo quando servono)"""
+    empty = {"_schema": STATE_INDEX_SCHEMA, "locales": {}}
+    index_path = state_index_path_for(project_id)
+    if not index_path.exists():
+        return empty
+    try:
+        index = load_json(index_path)
+    except Exception as e:
+        print(f"   ⚠️  Errore caricamento indice stati {project_id}: {e}")
+        return empty
+    return index if index.get("_schema") == STATE_INDEX_SCHEMA else empty
+
+def save_state_index(index: Dict, project_id: str):
+    save_json(state_index_path_for(project_id), index)
+
+def memory_fingerprint(mem_for_locale: Dict) -> str:
+    """Impronta dei valori in memoria della lingua (gli id richiesta non contano per lo stato)"""
+    values = {path: memory_entry_value(entry) for path, entry in mem_for_locale.items()}
+    return hashlib.sha1(json.dumps(values, ensure_ascii=False, sort_keys=True).encode("utf-8")).hexdigest()
+
+def cached_locale_state(index: Dict, layout: Dict, project_config: Dict, locale: str,
+                        mem_for_locale: Dict) -> Optional[bytearray]:
+    """Stato persistito della lingua, se ancora valido per questo EN, questi file target e questa memoria"""
+    entry = index.get("locales", {}).get(locale)
+    if not entry or entry.get("fingerprint") != layout["fingerprint"]:
+        return None
+    if entry.get("files") != locale_files_signature(project_config, locale):
+        return None
+    if entry.get("memory") != memory_fingerprint(mem_for_locale):
+        return None
+    state = bytearray(zlib.decompress(base64.b64decode(entry["state"])))
+    return state if len(state) == len(layout["paths"]) else None
+
+def store_locale_state(index: Dict, layout: Dict, project_config: Dict, locale: str, state: bytearray,
+                       mem_for_locale: Dict):
+    """
+    Aggiorna l'indice dopo un calcolo completo o una scrittura dei file target
+    (state deve venire dai file così come sono su disco e da questa memoria)
+    """
+    index.setdefault("locales", {})[locale] = {
+        "fingerprint": layout["fingerprint"],
+        "files": locale_files_signature(project_config, locale),
+        "memory": memory_fingerprint(mem_for_locale),
+        "state": base64.b64encode(zlib.compress(bytes(state), 9)).decode("ascii"),
+        "summary": summarize_state(state),
+        "updated_at": round(time.time(), 3),
+    }
+
 # ============================================================================
 # CARICAMENTO CONFIGURAZIONE PROGETTI
 # ============================================================================
@@ -358,7 +843,10 @@ def get_snapshot_file_for_locale(project: Dict, locale: str) -> str:
     return pattern.replace("{locale}", normalized_locale)
 
 def get_files_for_locale(project: Dict, locale: str) -> List[Dict[str, str]]:
-    """Ottiene tutti i file per una locale (supporta progetti multi-file)"""
+    """Ottiene tutti i file per una locale (supporta progetti multi-file e output shardato)"""
+    if project.get("shards"):
+        return [get_shard_layout(project, locale)]
+
     files_config = project.get("files", [])
     if files_config:
         use_original_format = any("/" in f.get("pattern", "") for f in files_config)
@@ -395,6 +883,129 @@ def get_source_files(project: Dict) -> List[Dict[str, str]]:
         "snapshot": project.get("snapshotPattern", "{locale}.snapshot.json").replace("{locale}", normalized_locale)
     }]
 
+# ============================================================================
+# OUTPUT SHARDATO (opzionale: un file per chiave del blocco + manifest per lingua)
+# ============================================================================
+# Con "shards" nel config del progetto, ad es. per la KB:
+#   "shards": {"block": "fused_by_iso", "pattern": "{locale}/compliance/{key}.json",
+#              "manifest": "{locale}/compliance/index.json"}
+# ogni paese finisce in un file proprio e il manifest contiene le altre chiavi top-level
+# più l'indice degli shard (file, sha1, byte). Il salvataggio riscrive solo gli shard
+# il cui contenuto è cambiato; il frontend può caricare il manifest e poi un solo paese.
+SHARD_MANIFEST_SCHEMA = 1
+
+def get_shard_layout(project: Dict, locale: str) -> Dict[str, str]:
+    """File info della lingua per un progetto shardato ("file" è il manifest)"""
+    shards = project["shards"]
+    manifest_pattern = shards.get("manifest", "{locale}/index.json")
+    locale_for_pattern = locale if "/" in manifest_pattern else locale.lower()
+    return {
+        "file": manifest_pattern.replace("{locale}", locale_for_pattern),
+        "snapshot": get_snapshot_file_for_locale(project, locale),
+        "shardBlock": shards.get("block", "fused_by_iso"),
+        "shardPattern": shards.get("pattern", "{locale}/{key}.json").replace("{locale}", locale_for_pattern),
+    }
+
+def serialize_json(data: object) -> str:
+    """Stesso formato di save_json (indent 2, UTF-8, newline finale)"""
+    return json.dumps(data, indent=2, ensure_ascii=False) + "\n"
+
+def load_sharded_data(manifest_path: Path, strict: bool = False) -> Dict:
+    """
+    Riassembla manifest + shard nell'oggetto che avrebbe il file unico (stesso ordine chiavi).
+    strict: shard mancanti o JSON non valido sollevano eccezioni invece di essere saltati.
+    """
+    if strict:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    else:
+        manifest = load_json(manifest_path)
+    if not manifest:
+        return {}
+
+    block = manifest.get("block")
+    shard_data = {}
+    for key, entry in manifest.get("shards", {}).items():
+        shard_path = manifest_path.parent / entry["file"]
+        if strict:
+            with open(shard_path, 'r', encoding='utf-8') as f:
+                shard_data[key] = json.load(f)
+        elif shard_path.exists():
+            shard_data[key] = load_json(shard_path)
+
+    other = manifest.get("data", {})
+    return {
+        key: shard_data if key == block else other[key]
+        for key in manifest.get("order", [block, *other])
+        if key == block or key in other
+    }
+
+def save_sharded_data(manifest_path: Path, shard_path_for: Callable[[str], Path], data: Dict, block: str) -> int:
+    """
+    Salva `data` come shard (una chiave di data[block] per file) + manifest.
+    Scrive solo gli shard con sha1 diverso da quello nel manifest precedente, elimina
+    quelli di chiavi rimosse e riscrive il manifest solo se cambia. Ritorna gli shard scritti.
+    """
+    previous = load_json(manifest_path) if manifest_path.exists() else {}
+    previous_shards = previous.get("shards", {}) if previous.get("_schema") == SHARD_MANIFEST_SCHEMA else {}
+
+    shards = {}
+    written = 0
+    block_data = data.get(block)
+    for key, value in (block_data.items() if isinstance(block_data, dict) else ()):
+        shard_path = shard_path_for(key)
+        content = serialize_json(value)
+        encoded = content.encode("utf-8")
+        digest = hashlib.sha1(encoded).hexdigest()
+        relative = os.path.relpath(shard_path, manifest_path.parent).replace(os.sep, "/")
+        if previous_shards.get(key, {}).get("sha1") != digest or not shard_path.exists():
+            shard_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(shard_path, 'w', encoding='utf-8') as f:
+                f.write(content)
+            written += 1
+        shards[key] = {"file": relative, "sha1": digest, "bytes": len(encoded)}
+
+    for key, entry in previous_shards.items():
+        if key not in shards:
+            (manifest_path.parent / entry["file"]).unlink(missing_ok=True)
+
+    manifest = {
+        "_schema": SHARD_MANIFEST_SCHEMA,
+        "block": block,
+        "order": list(data.keys()),
+        "data": {key: value for key, value in data.items() if key != block},
+        "shards": shards,
+    }
+    if manifest != previous:
+        save_json(manifest_path, manifest)
+    return written
+
+def load_target_file(project: Dict, file_info: Dict) -> Dict:
+    """Contenuto di un file target (manifest + shard riassemblati se il progetto è shardato)"""
+    target_file = resolve_project_path(project, file_info["file"])
+    if file_info.get("shardBlock"):
+        return load_sharded_data(target_file)
+    return load_json(target_file)
+
+def save_target_file(project: Dict, file_info: Dict, data: Dict) -> int:
+    """Salva un file target; per i progetti shardati scrive solo gli shard cambiati"""
+    target_file = resolve_project_path(project, file_info["file"])
+    if file_info.get("shardBlock"):
+        return save_sharded_data(
+            target_file,
+            lambda key: resolve_project_path(project, file_info["shardPattern"].replace("{key}", key)),
+            data,
+            file_info["shardBlock"],
+        )
+    save_json(target_file, data)
+    return 1
+
+def save_source_shards(project: Dict, en_data: Dict) -> int:
+    """Shard EN con lo stesso layout delle lingue (per il frontend); il sorgente resta il file unico"""
+    if not project.get("shards"):
+        return 0
+    return save_target_file(project, get_shard_layout(project, project.get("sourceLocale", "en-GB")), en_data)
+
 # ============================================================================
 # CARICAMENTO CONFIGURAZIONE
 # ============================================================================
@@ -404,9 +1015,7 @@ def load_kb_locale_mapping() -> Dict:
     mapping_file = ROOT_DIR / "web" / "src" / "config" / "kb-locale-mapping.json"
     if mapping_file.exists():
         try:
-            with open(mapping_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                return data
+            return read_cached_file(mapping_file, json.loads)
         except Exception as e:
             print(f"⚠️  Errore caricamento mapping KB: {e}")
     return None
@@ -415,25 +1024,24 @@ def load_language_config(project_id: str = "site") -> Dict:
     """Carica configurazione lingue - filtra per progetto (KB = 53 lingue, altri = 103)"""
     if CONFIG_FILE.exists():
         try:
-            with open(CONFIG_FILE, 'r') as f:
-                config = json.load(f)
-                full_config = config.get("language_model_config", {})
-                
-                # Per KB: usa solo le 53 lingue ristrette
-                if project_id == "kb":
-                    kb_mapping = load_kb_locale_mapping()
-                    if kb_mapping and kb_mapping.get("reduced_locales"):
-                        reduced_locales = set(kb_mapping["reduced_locales"])
-                        # Filtra config mantenendo solo le lingue ristrette
-                        filtered_config = {
-                            locale: info 
-                            for locale, info in full_config.items() 
-                            if locale in reduced_locales
-                        }
-                        return filtered_config
-                
-                # Per App/Site: restituisci tutte le lingue
-                return full_config
+            config = read_cached_file(CONFIG_FILE, json.loads)
+            full_config = config.get("language_model_config", {})
+            
+            # Per KB: usa solo le 53 lingue ristrette
+            if project_id == "kb":
+                kb_mapping = load_kb_locale_mapping()
+                if kb_mapping and kb_mapping.get("reduced_locales"):
+                    reduced_locales = set(kb_mapping["reduced_locales"])
+                    # Filtra config mantenendo solo le lingue ristrette
+                    filtered_config = {
+                        locale: info 
+                        for locale, info in full_config.items() 
+                        if locale in reduced_locales
+                    }
+                    return filtered_config
+            
+            # Per App/Site: restituisci tutte le lingue
+            return full_config
         except Exception as e:
             print(f"⚠️  Errore caricamento config: {e}")
 
@@ -648,8 +1256,7 @@ def load_glossary() -> Dict:
     """Carica il glossario"""
     if GLOSSARY_PATH.exists():
         try:
-            with open(GLOSSARY_PATH, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            return read_cached_file(GLOSSARY_PATH, json.loads)
         except:
             pass
     return {}
@@ -658,8 +1265,7 @@ def load_context() -> str:
     """Carica il contesto"""
     if CONTEXT_PATH.exists():
         try:
-            with open(CONTEXT_PATH, 'r', encoding='utf-8') as f:
-                return f.read()
+            return read_cached_file(CONTEXT_PATH, str)
         except:
             pass
     return ""
@@ -709,7 +1315,7 @@ def calculate_tokens_for_json(data: Dict) -> int:
     json_str = json.dumps(data, ensure_ascii=False)
     return int(len(json_str) / 4)
 
-def chunk_kb_countries(fused_dict: Dict, batch_size: int = 20, max_tokens_per_batch: int = None) -> List[Dict]:
+def chunk_kb_countries(fused_dict: Dict, batch_size: int = 20, max_tokens_per_batch: int = None, verbose: bool = True) -> List[Dict]:
     """
     OTTIMIZZAZIONE 2026: Filtra vuoti PRIMA, poi chunking per batch ottimali
     
@@ -723,14 +1329,16 @@ def chunk_kb_countries(fused_dict: Dict, batch_size: int = 20, max_tokens_per_ba
     """
 
     # 1. FILTRA TUTTI I PAESI VUOTI PRIMA del chunking
-    print(f"      🔍 Filtrando paesi con contenuto...")
+    if verbose:
+        print(f"      🔍 Filtrando paesi con contenuto...")
     filtered_countries = {}
     for country_code, country_data in fused_dict.items():
         clean_data = filter_empty_values_recursive(country_data)
         if clean_data:  # Solo paesi con dati effettivi
             filtered_countries[country_code] = clean_data
 
-    print(f"      ✅ {len(filtered_countries)}/{len(fused_dict)} paesi hanno contenuto")
+    if verbose:
+        print(f"      ✅ {len(filtered_countries)}/{len(fused_dict)} paesi hanno contenuto")
 
     # 2. CHUNKING: usa token-based se specificato, altrimenti numero fisso
     if max_tokens_per_batch is None:
@@ -858,295 +1466,256 @@ def init_grok_client() -> Optional[OpenAI]:
         return None
 
     try:
+        # max_retries=0: i retry li gestisce solo la policy (llm_runtime.retry), non l'SDK
         client = OpenAI(
             api_key=GROK_API_KEY,
-            base_url=GROK_BASE_URL
+            base_url=GROK_BASE_URL,
+            max_retries=0
         )
         return client
     except Exception as e:
         print(f"❌ Errore inizializzazione Grok: {e}")
         return None
 
-def init_async_grok_client() -> Optional[AsyncOpenAI]:
-    """Inizializza il client Grok asincrono"""
-    if not GROK_API_KEY:
-        return None
+def build_request_units(project_id: str, block_name: str, block_data: Dict, verbose: bool = True) -> List[Tuple[str, str, Dict]]:
+    """
+    Divide un blocco nelle unità (kind, nome, dati) effettivamente inviate a Grok
+    (stessa logica per traduzione e --plan):
+    - KB fused_by_iso → batch da 18 paesi, vuoti filtrati
+    - blocchi fino a ~10k token → una sola richiesta
+    - blocchi più grandi → chunk da ~6k token ("{blocco}_chunk_{n}")
+    """
+    if project_id == "kb" and block_name == "fused_by_iso":
+        # OTTIMIZZAZIONE 2026: Batch fissi di 18 paesi (limitazione pratica Grok ~46k token output)
+        # 18 paesi = ~46k token output (limite osservato), input ~30k token = ~76k totale (ben dentro 256k)
+        batches = chunk_kb_countries(block_data, batch_size=18, verbose=verbose)
+        return [("batch", f"batch_{idx}", batch) for idx, batch in enumerate(batches, 1)]
+
+    # Stima token basata sui caratteri (~4 caratteri per token)
+    estimated_tokens = len(json.dumps(block_data, ensure_ascii=False)) // 4
+    if estimated_tokens <= 10000:  # Soglia per evitare problemi (ridotta per sicurezza)
+        return [("block", block_name, block_data)]
+
+    chunks = split_block_into_chunks(block_data, max_tokens_per_chunk=6000)
+    return [("block", f"{block_name}_chunk_{idx}", chunk) for idx, chunk in enumerate(chunks, 1)]
+
+def build_request_prompt(project_id: str, kind: str, unit_name: str, unit_data: Dict, locale: str, lang_name: str, glossary: Dict, context: str) -> Optional[str]:
+    """Prompt per un'unità di build_request_units (None = blocco vuoto, nessuna richiesta)"""
+    if kind == "batch":
+        return build_prompt_by_project(project_id, "batch", unit_data, locale, lang_name, glossary, context)
+    return build_prompt_by_project("generic", unit_name, {unit_name: unit_data}, locale, lang_name, glossary, context)
+
+def request_params_for(prompt: str, project_id: str, kind: str) -> Dict:
+    """Body della chat completion, identico per traduzione e --plan (kind: "batch" | "block")"""
+    if kind == "batch":
+        # OTTIMIZZAZIONE 2026: max_tokens dinamico per progetto
+        # KB: 200k (per batch grandi ~110k input, output può essere ~140k+ per 57 paesi)
+        # Altri: 16k (sufficiente per batch piccoli)
+        # Nota: max_tokens limita l'OUTPUT, non l'input. Grok deve solo tradurre tutto.
+        max_output_tokens = 200000 if project_id == "kb" else 16000
+        # OTTIMIZZAZIONE 2026: niente response_format per batch KB grandi (problemi con JSON molto grandi)
+        use_json_format = project_id != "kb"
+    else:
+        max_output_tokens = 8000
+        use_json_format = True
+
+    request_params = {
+        "model": GROK_MODEL,
+        "messages": [{"role": "user", "content": prompt}],
+        "temperature": 0.0,
+        "max_tokens": max_output_tokens,
+    }
+    if use_json_format:
+        request_params["response_format"] = {"type": "json_object"}
+    return request_params
+
+def grok_controller():
+    """Controller AIMD condiviso per tutte le chiamate Grok del processo"""
+    return get_controller("grok")
+
+def extract_json_object(content: str) -> Dict:
+    """Estrae il primo oggetto JSON bilanciato dalla risposta (fence markdown, testo extra, virgole finali)"""
+    content = re.sub(r'```json\s*', '', content)
+    content = re.sub(r'```\s*$', '', content, flags=re.MULTILINE)
+    content = content.strip()
+
+    first_brace = content.find('{')
+    if first_brace == -1:
+        raise ResponseParseError(f"Nessun JSON trovato nella risposta (lunghezza: {len(content)} char)")
+
+    brace_count = 0
+    end_pos = -1
+    for i in range(first_brace, len(content)):
+        if content[i] == '{':
+            brace_count += 1
+        elif content[i] == '}':
+            brace_count -= 1
+            if brace_count == 0:
+                end_pos = i + 1
+                break
+
+    # Bilanciamento non trovato: prova comunque l'intera risposta (graffe dentro stringhe)
+    json_str = content[first_brace:end_pos] if end_pos != -1 else content[first_brace:]
+    json_str = re.sub(r',\s*}', '}', json_str)
+    json_str = re.sub(r',\s*]', ']', json_str)
 
     try:
-        client = AsyncOpenAI(
-            api_key=GROK_API_KEY,
-            base_url=GROK_BASE_URL
-        )
-        return client
-    except Exception as e:
-        print(f"❌ Errore inizializzazione Grok async: {e}")
-        return None
+        return json.loads(json_str)
+    except json.JSONDecodeError as json_err:
+        raise ResponseParseError(f"JSON non valido (pos {json_err.pos}): {str(json_err)[:200]}") from json_err
+
+def unwrap_batch_result(result: Dict, expected_keys) -> Dict:
+    """Grok può wrappare il JSON tradotto (json, data, result, ...): ritorna il dict con le chiavi del batch"""
+    if not isinstance(result, dict):
+        return result
+    # Quando response_format={"type": "json_object"}, Grok potrebbe wrappare in "json" o altre chiavi
+    possible_keys = ['json', 'translated_data', 'data', 'result', 'output', 'content', 'translation']
+    if not any(k in result for k in expected_keys):
+        for key in possible_keys:
+            if key in result and isinstance(result[key], dict) and any(k in result[key] for k in expected_keys):
+                print(f"      🔍 Trovato dati tradotti in chiave: {key}")
+                return result[key]
+    return result
+
+def batch_result_matches(result: object, batch_data: Dict) -> bool:
+    """Risposta strutturalmente completa: tutte le chiavi del batch e, per ogni elemento dict, tutte le sue chiavi"""
+    translated = unwrap_batch_result(result, batch_data.keys())
+    if not isinstance(translated, dict):
+        return False
+    for key, value in batch_data.items():
+        if key not in translated:
+            return False
+        if isinstance(value, dict) and (not isinstance(translated[key], dict) or not set(value) <= set(translated[key])):
+            return False
+    return True
+
+def block_result_matches(result: object, block_name: str, block_data: object) -> bool:
+    """Risposta di translate_block utilizzabile: {block_name: ...} e, per un blocco dict, tutte le sue chiavi"""
+    if not isinstance(result, dict) or block_name not in result:
+        return False
+    translated = result[block_name]
+    return not isinstance(block_data, dict) or (isinstance(translated, dict) and set(block_data) <= set(translated))
+
+def save_debug_response(content: str, attempt: int, batch_idx: int = None):
+    """DEBUG: salva la risposta raw di ogni tentativo (così puoi interrompere e vedere)"""
+    debug_dir = ROOT_DIR / "debug_grok_responses"
+    debug_dir.mkdir(exist_ok=True)
+    batch_suffix = f"_batch{batch_idx}" if batch_idx else ""
+    debug_file = debug_dir / f"attempt_{attempt}{batch_suffix}_raw.txt"
+    try:
+        with open(debug_file, 'w', encoding='utf-8') as f:
+            f.write(f"=== RAW RESPONSE (tentativo {attempt}) ===\n")
+            f.write(content)
+            f.write(f"\n\n=== RESPONSE LENGTH ===\n")
+            f.write(f"Characters: {len(content)}\n")
+            f.write(f"Estimated tokens: {len(content) / 4:.0f}\n")
+        print(f"      💾 Risposta raw salvata in {debug_file}", flush=True)
+    except Exception:
+        pass
 
 def translate_batch_with_cost_tracking_sync(batch_data: Dict, locale: str, lang_name: str, project_id: str, glossary: Dict, context: str, client: OpenAI, max_retries: int = 3, cost_per_token: float = 0.00000035, batch_idx: int = None) -> Tuple[Optional[Dict], float, int, Dict]:
-    """Versione sincrona per ambienti con problemi asyncio"""
-    prompt = build_prompt_by_project(project_id, "batch", batch_data, locale, lang_name, glossary, context)
+    """
+    Traduce un batch (eseguito nel pool di thread, concorrenza gestita da grok_controller).
+    Retry secondo la policy della run; se la risposta è troncata il batch viene diviso in due.
+    """
+    prompt = build_request_prompt(project_id, "batch", "batch", batch_data, locale, lang_name, glossary, context)
 
     input_tokens = len(prompt) / 4  # Stima token input
+    request_params = request_params_for(prompt, project_id, "batch")
+    cached_request = get_response_cache().request(str(client.base_url), request_params)
+
+    attempts = 0
+
+    def attempt_once():
+        nonlocal attempts
+        attempts += 1
+        # Solo il primo tentativo legge la cache: i successivi seguono un errore e vanno in rete
+        cached = cached_request.lookup() if attempts == 1 else None
+        if cached is not None:
+            response, truncated = completion_from_cache(cached), False
+            print(f"      💾 Risposta dalla cache (batch{' ' + str(batch_idx) if batch_idx else ''}, nessuna chiamata)", flush=True)
+        else:
+            print(f"      ⏳ Invio a Grok (batch{' ' + str(batch_idx) if batch_idx else ''})...", flush=True)
 
-    for attempt in range(1, max_retries + 1):
-        try:
-            if attempt > 1:
-                print(f"      🔄 Retry {attempt}/{max_retries}...", flush=True)
-                time.sleep(2 + random.uniform(0, 2))  # Sleep sincrono
-
-            print(f"      ⏳ Invio a Grok (batch)...", flush=True)
-
-            # OTTIMIZZAZIONE 2026: max_tokens dinamico per progetto
-            # KB: 200k (per batch grandi ~110k input, output può essere ~140k+ per 57 paesi)
-            # Altri: 16k (sufficiente per batch piccoli)
-            # Nota: max_tokens limita l'OUTPUT, non l'input. Grok deve solo tradurre tutto.
-            max_output_tokens = 200000 if project_id == "kb" else 16000
-
-            # Usa client sincrono invece di async
-            # OTTIMIZZAZIONE 2026: Rimuoviamo response_format per batch KB grandi
-            # response_format può causare problemi con JSON molto grandi
-            use_json_format = project_id != "kb"  # Solo per site/app, non per KB batch grandi
-            request_params = {
-                "model": GROK_MODEL,
-                "messages": [{"role": "user", "content": prompt}],
-                "temperature": 0.0,
-                "max_tokens": max_output_tokens,
-            }
-            if use_json_format:
-                request_params["response_format"] = {"type": "json_object"}
-            
-            response = client.chat.completions.create(**request_params)
+            with grok_controller().slot(size=input_tokens) as slot:
+                response = client.chat.completions.create(**request_params)
+                truncated = bool(response.choices) and response.choices[0].finish_reason == "length"
+                if truncated:
+                    slot.fail(OUTCOME_ERROR)
 
             print(f"      📥 Risposta ricevuta", flush=True)
 
-            # Usa token reali di Grok se disponibili, altrimenti stima
-            if hasattr(response, 'usage') and response.usage:
-                input_tokens_real = response.usage.prompt_tokens
-                output_tokens_real = response.usage.completion_tokens
-                total_tokens_real = response.usage.total_tokens
-                print(f"      📊 Token reali Grok: {input_tokens_real:,} input + {output_tokens_real:,} output = {total_tokens_real:,} total", flush=True)
-            else:
-                # Fallback a stime se non disponibili
-                input_tokens_real = int(input_tokens)
-                output_tokens_real = len(response.choices[0].message.content) / 4
-                total_tokens_real = input_tokens_real + output_tokens_real
-                print(f"      ⚠️  Token stimati (Grok non ha restituito usage): {input_tokens_real:,} input + {output_tokens_real:,.0f} output = {total_tokens_real:,.0f} total", flush=True)
-
-            content = response.choices[0].message.content.strip()
-
-            # Parse JSON (stesso codice della versione async)
-            import re
-            content = re.sub(r'```json\s*', '', content)
-            content = re.sub(r'```\s*$', '', content, flags=re.MULTILINE)
-            content = content.strip()
-
-            # DEBUG: Salva risposta SUBITO per ogni tentativo (così puoi interrompere e vedere)
-            debug_dir = ROOT_DIR / "debug_grok_responses"
-            debug_dir.mkdir(exist_ok=True)
-            batch_suffix = f"_batch{batch_idx}" if batch_idx else ""
-            debug_file = debug_dir / f"attempt_{attempt}{batch_suffix}_raw.txt"
-            try:
-                with open(debug_file, 'w', encoding='utf-8') as f:
-                    f.write(f"=== RAW RESPONSE (tentativo {attempt}) ===\n")
-                    f.write(content)
-                    f.write(f"\n\n=== RESPONSE LENGTH ===\n")
-                    f.write(f"Characters: {len(content)}\n")
-                    f.write(f"Estimated tokens: {len(content) / 4:.0f}\n")
-                print(f"      💾 Risposta raw salvata in {debug_file}", flush=True)
-            except Exception as e:
-                pass
-
-            first_brace = content.find('{')
-            if first_brace == -1:
-                print(f"      ❌ ERRORE: Nessun JSON trovato nella risposta (lunghezza: {len(content)} char)", flush=True)
-                print(f"      📄 Primi 500 caratteri della risposta:", flush=True)
-                print(f"      {content[:500]}", flush=True)
-                if attempt == 2:
-                    print(f"      🛑 FERMANDO al primo retry per analisi", flush=True)
-                    return None, 0, attempt, {}
-                continue
-
-            brace_count = 0
-            end_pos = -1
-            for i in range(first_brace, len(content)):
-                if content[i] == '{':
-                    brace_count += 1
-                elif content[i] == '}':
-                    brace_count -= 1
-                    if brace_count == 0:
-                        end_pos = i + 1
-                        break
-
-            if end_pos == -1:
-                print(f"      ⚠️  Avviso: Algoritmo bilanciamento non ha trovato fine JSON (lunghezza: {len(content)} char)", flush=True)
-                
-                # Salva risposta completa per analisi
-                debug_dir = ROOT_DIR / "debug_grok_responses"
-                debug_dir.mkdir(exist_ok=True)
-                debug_file = debug_dir / f"batch_unbalanced_response_attempt_{attempt}.txt"
-                try:
-                    with open(debug_file, 'w', encoding='utf-8') as f:
-                        f.write(content)
-                    print(f"      💾 Risposta completa salvata in {debug_file}", flush=True)
-                except Exception as e:
-                    pass
-                
-                # Prova comunque a parsare l'intero content (forse è completo)
-                try:
-                    print(f"      🔍 Provo a parsare l'intera risposta come JSON...", flush=True)
-                    result = json.loads(content)
-                    print(f"      ✅ JSON valido! Lunghezza: {len(content)} char", flush=True)
-                    # Se funziona, continua normalmente
-                except json.JSONDecodeError as json_err:
-                    print(f"      ❌ JSON non valido. Errore a pos {json_err.pos}: {str(json_err)[:200]}", flush=True)
-                    print(f"      📄 Ultimi 500 caratteri: {content[-500:]}", flush=True)
-                    
-                    # Conta paesi nella risposta (cerca pattern "CODICE":{"continent)
-                    import re
-                    country_codes_found = re.findall(r'"([A-Z]{2})"\s*:\s*\{', content)
-                    print(f"      🔍 Paesi trovati nella risposta: {len(country_codes_found)} - {country_codes_found[:10]}...", flush=True)
-                    
-                    if attempt == 2:
-                        print(f"      🛑 FERMANDO al primo retry per analisi", flush=True)
-                        return None, 0, attempt, {}
-                    continue
-
-            json_str = content[first_brace:end_pos]
-            try:
-                result = json.loads(json_str)
-            except json.JSONDecodeError as json_err:
-                print(f"      ❌ ERRORE: Parsing JSON fallito (pos {json_err.pos}): {str(json_err)[:200]}", flush=True)
-                print(f"      📄 JSON estratto (primi 1000 char): {json_str[:1000]}", flush=True)
-                if attempt == 2:
-                    print(f"      🛑 FERMANDO al primo retry per analisi", flush=True)
-                    return None, 0, attempt, {}
-                continue
-
-            # Calcola costo usando prezzi ufficiali Grok: $0.20/1M input + $0.50/1M output
-            input_cost = (input_tokens_real / 1_000_000) * 0.20
-            output_cost = (output_tokens_real / 1_000_000) * 0.50
-            cost = input_cost + output_cost
-            print(f"      💰 Costo batch: ${cost:.6f} (input: ${input_cost:.6f} + output: ${output_cost:.6f})", flush=True)
-
-            token_usage = {
-                "input_tokens": int(input_tokens_real),
-                "output_tokens": int(output_tokens_real),
-                "total_tokens": int(total_tokens_real)
-            }
-
-            return result, cost, attempt, token_usage
-
-        except Exception as e:
-            error_msg = str(e)
-            error_type = type(e).__name__
-            print(f"      ⚠️  Errore tentativo {attempt}/{max_retries}: {error_type}: {error_msg[:200]}", flush=True)
-            
-            # Al primo retry (attempt == 2), fermati per analisi
-            if attempt == 2:
-                print(f"      🛑 FERMANDO al primo retry per analisi", flush=True)
-                print(f"      📊 Dettagli errore:", flush=True)
-                print(f"         Tipo: {error_type}", flush=True)
-                print(f"         Messaggio completo: {error_msg}", flush=True)
-                if hasattr(e, '__cause__') and e.__cause__:
-                    print(f"         Causa: {e.__cause__}", flush=True)
-                return None, 0, attempt, {}
-            
-            if attempt == max_retries:
-                print(f"      ❌ Batch fallito dopo {max_retries} tentativi: {error_type}: {error_msg[:100]}")
-                return None, 0, max_retries, {}
-            continue
-
-def translate_batch_with_cost_tracking(client: AsyncOpenAI, batch_data: Dict, locale: str, lang_name: str, project_id: str, glossary: Dict, context: str, max_retries: int = 3) -> Tuple[Optional[Dict], float, int, Dict]:
-    """OTTIMIZZAZIONE 2026: Traduci batch con retry backoff e tracking costi"""
-    prompt = build_prompt_by_project(project_id, "batch", batch_data, locale, lang_name, glossary, context)
-
-    input_tokens = len(prompt) / 4  # Stima token input
-
-    for attempt in range(1, max_retries + 1):
-        try:
-            if attempt > 1:
-                backoff = 2 ** (attempt - 1) + random.uniform(0, 1)  # Backoff esponenziale + jitter
-                print(f"      🔄 Retry {attempt}/{max_retries} in {backoff:.1f}s...", flush=True)
-                asyncio.run(asyncio.sleep(backoff))
-
-            # OTTIMIZZAZIONE 2026: max_tokens dinamico per progetto
-            # KB: 200k (per batch grandi ~110k input, output può essere ~140k+ per 57 paesi)
-            # Altri: 16k (sufficiente per batch piccoli)
-            # Nota: max_tokens limita l'OUTPUT, non l'input. Grok deve solo tradurre tutto.
-            max_output_tokens = 200000 if project_id == "kb" else 16000
-
-            response = asyncio.run(client.chat.completions.create(
-                model=GROK_MODEL,
-                messages=[{"role": "user", "content": prompt}],
-                response_format={"type": "json_object"},
-                temperature=0.0,
-                max_tokens=max_output_tokens,
-            ))
-
-            content = response.choices[0].message.content.strip()
-
-            # Parse JSON
-            import re
-            content = re.sub(r'```json\s*', '', content)
-            content = re.sub(r'```\s*$', '', content, flags=re.MULTILINE)
-            content = content.strip()
-
-            # Trova JSON bilanciato
-            first_brace = content.find('{')
-            if first_brace == -1:
-                continue
-
-            brace_count = 0
-            end_pos = -1
-            for i in range(first_brace, len(content)):
-                if content[i] == '{':
-                    brace_count += 1
-                elif content[i] == '}':
-                    brace_count -= 1
-                    if brace_count == 0:
-                        end_pos = i + 1
-                        break
-
-            if end_pos == -1:
-                continue
-
-            json_str = content[first_brace:end_pos]
-            json_str = re.sub(r',\s*}', '}', json_str)
-            json_str = re.sub(r',\s*]', ']', json_str)
-
-            result = json.loads(json_str)
-
-            # Log token reali se disponibili - DEBUG ESTESO
-            print(f"      🔍 Debug response object: {type(response)}")
-            print(f"      🔍 Has usage attr: {hasattr(response, 'usage')}")
-            if hasattr(response, 'usage'):
-                print(f"      🔍 Usage object: {response.usage}")
-                if response.usage:
-                    print(f"      🔍 Usage dict: {dict(response.usage) if hasattr(response.usage, '__dict__') else str(response.usage)}")
-
-            token_usage = {
-                "prompt_tokens": getattr(getattr(response, 'usage', {}), 'prompt_tokens', int(input_tokens)),
-                "completion_tokens": getattr(getattr(response, 'usage', {}), 'completion_tokens', int(len(json_str) / 4)),
-                "total_tokens": getattr(getattr(response, 'usage', {}), 'total_tokens', int(input_tokens + len(json_str) / 4))
-            }
-
-            print(f"      📊 Token reali: {token_usage['total_tokens']} total ({token_usage['prompt_tokens']} in + {token_usage['completion_tokens']} out)")
-
-            # Calcola costo usando prezzi ufficiali Grok: $0.20/1M input + $0.50/1M output
-            input_cost = (token_usage['prompt_tokens'] / 1_000_000) * 0.20
-            output_cost = (token_usage['completion_tokens'] / 1_000_000) * 0.50
-            cost = input_cost + output_cost
-            print(f"      💰 Costo batch: ${cost:.6f} (input: ${input_cost:.6f} + output: ${output_cost:.6f})")
-
-            return result, cost, attempt, token_usage
-
-        except Exception as e:
-            if attempt == max_retries:
-                print(f"      ❌ Batch fallito dopo {max_retries} tentativi: {str(e)[:100]}")
-                return None, 0, max_retries, {}
-            continue
+        # Usa token reali di Grok se disponibili, altrimenti stima
+        if hasattr(response, 'usage') and response.usage:
+            input_tokens_real = response.usage.prompt_tokens
+            output_tokens_real = response.usage.completion_tokens
+            total_tokens_real = response.usage.total_tokens
+            print(f"      📊 Token reali Grok: {input_tokens_real:,} input + {output_tokens_real:,} output = {total_tokens_real:,} total", flush=True)
+        else:
+            # Fallback a stime se non disponibili
+            input_tokens_real = int(input_tokens)
+            output_tokens_real = len(response.choices[0].message.content) / 4
+            total_tokens_real = input_tokens_real + output_tokens_real
+            print(f"      ⚠️  Token stimati (Grok non ha restituito usage): {input_tokens_real:,} input + {output_tokens_real:,.0f} output = {total_tokens_real:,.0f} total", flush=True)
+
+        content = (response.choices[0].message.content or "").strip()
+        save_debug_response(content, attempts, batch_idx)
+
+        if truncated:
+            raise TruncatedResponse(f"risposta troncata a {output_tokens_real:,} token output ({len(batch_data)} elementi nel batch)")
+
+        result = extract_json_object(content)
+        # In cache solo risposte con tutti i paesi/chiavi del batch: una risposta parsabile ma incompleta
+        # verrebbe altrimenti riproposta a ogni run fino alla scadenza del TTL
+        if batch_result_matches(result, batch_data):
+            cached_request.store(completion_to_cache(response))
+        elif cached is not None:
+            cached_request.discard()
+        if cached is not None:
+            # Dalla cache: nessun costo e nessun token consumato in questa run
+            return result, 0.0, {"input_tokens": 0, "output_tokens": 0, "total_tokens": 0}
+
+        # Calcola costo usando prezzi ufficiali Grok: $0.20/1M input + $0.50/1M output
+        input_cost = (input_tokens_real / 1_000_000) * 0.20
+        output_cost = (output_tokens_real / 1_000_000) * 0.50
+        cost = input_cost + output_cost
+        print(f"      💰 Costo batch: ${cost:.6f} (input: ${input_cost:.6f} + output: ${output_cost:.6f})", flush=True)
+
+        token_usage = {
+            "input_tokens": int(input_tokens_real),
+            "output_tokens": int(output_tokens_real),
+            "total_tokens": int(total_tokens_real)
+        }
+        return result, cost, token_usage
 
-    return None, 0, max_retries, {}
+    label = f"batch {batch_idx}" if batch_idx else "batch"
+    try:
+        result, cost, token_usage = get_retry_policy("grok").call(attempt_once, label=label, max_attempts=max_retries)
+        return result, cost, attempts, token_usage
+    except TruncatedResponse as e:
+        if len(batch_data) < 2:
+            print(f"      ❌ Batch fallito: {e} (impossibile dividere ulteriormente)", flush=True)
+            return None, 0, attempts, {}
+        # Non ritentare alla stessa dimensione: due metà, ognuna con la propria policy di retry
+        keys = list(batch_data.keys())
+        halves = [{k: batch_data[k] for k in keys[:len(keys) // 2]}, {k: batch_data[k] for k in keys[len(keys) // 2:]}]
+        print(f"      ✂️  {e} → divido in {len(halves[0])} + {len(halves[1])}", flush=True)
+        merged, total_cost, usage_sum = {}, 0.0, {"input_tokens": 0, "output_tokens": 0, "total_tokens": 0}
+        for half in halves:
+            half_result, half_cost, half_attempts, half_usage = translate_batch_with_cost_tracking_sync(
+                half, locale, lang_name, project_id, glossary, context, client, max_retries=max_retries, batch_idx=batch_idx
+            )
+            attempts += half_attempts
+            if half_result is None:
+                return None, total_cost + half_cost, attempts, {}
+            merged.update(unwrap_batch_result(half_result, half.keys()))
+            total_cost += half_cost
+            for k in usage_sum:
+                usage_sum[k] += half_usage.get(k, 0)
+        return merged, total_cost, attempts, usage_sum
+    except Exception as e:
+        print(f"      ❌ Batch fallito dopo {attempts} tentativi [{classify_error(e)}]: {type(e).__name__}: {str(e)[:200]}", flush=True)
+        return None, 0, attempts, {}
 
 # ============================================================================
 # LOGICA TRADUZIONE PRINCIPALE
@@ -1159,101 +1728,99 @@ def find_blocks_to_translate(
     new_paths: set,
     changed_paths: set,
     memory: Dict[str, Dict[str, object]],
-    project_id: str
+    project_id: str,
+    layout: Optional[Dict] = None,
+    state: Optional[bytearray] = None
 ) -> List[Tuple[str, Dict]]:
     """
     Trova i blocchi da tradurre considerando:
     - path nuove o cambiate in EN
     - path mancanti nel target
     - valori identici a EN ma non marcati in memoria
+    Con uno stato già calcolato (indice per lingua) è solo una scansione dei range dei blocchi.
     """
-    blocks_to_translate = []
-    mem_for_locale = memory.get(locale, {})
-
-    for block_name, block_data in en_data.items():
-        # Per KB: filtra vuoti ricorsivamente PRIMA del confronto
-        if project_id == "kb":
-            filtered_block_data = filter_empty_values_recursive(block_data)
-            if not filtered_block_data:
-                continue
-        else:
-            filtered_block_data = block_data
-
-        if block_name not in target_data:
-            blocks_to_translate.append((block_name, filtered_block_data))
-            continue
-
-        target_block = target_data[block_name]
-
-        en_flat = flatten_json({block_name: filtered_block_data})
-        target_flat = flatten_json({block_name: target_block})
-
-        missing_paths = set(en_flat.keys()) - set(target_flat.keys())
-
-        needs_translation = set()
-
-        for path in en_flat.keys():
-            if path in new_paths or path in changed_paths or path in missing_paths:
-                needs_translation.add(path)
-                continue
-
-            if path not in target_flat:
-                needs_translation.add(path)
-                continue
+    if layout is None:
+        layout = build_en_layout(en_data, project_id, new_paths, changed_paths)
+    if state is None:
+        state = compute_locale_state(layout, target_data, memory.get(locale, {}))
+    return select_blocks_from_state(layout, state)
+
+def load_locale_data(project_config: Dict, locale: str) -> Dict:
+    """Unisce i file target della lingua così come sono su disco"""
+    target_data = {}
+    for file_info in get_files_for_locale(project_config, locale):
+        target_file = resolve_project_path(project_config, file_info["file"])
+        if target_file.exists():
+            file_data = load_target_file(project_config, file_info)
+            target_data = {**target_data, **file_data}
+    return target_data
 
-            if en_flat[path] == target_flat[path]:
-                # Controlla memoria (supporta nuova struttura con metadata)
-                mem_value = None
-                if path in mem_for_locale:
-                    mem_entry = mem_for_locale[path]
-                    if isinstance(mem_entry, dict):
-                        mem_value = mem_entry.get("value")
-                    else:
-                        mem_value = mem_entry
+def save_locale_data(project_config: Dict, locale: str, synced_data: Dict):
+    """Salva i dati della lingua, divisi tra i file del progetto come i file sorgente EN"""
+    locale_files = get_files_for_locale(project_config, locale)
+    if len(locale_files) > 1:
+        # Multi-file: dividi dati
+        source_files = get_source_files(project_config)
+        key_to_file_map = {}
+        for source_file_info in source_files:
+            source_file_path = resolve_project_path(project_config, source_file_info["file"])
+            if source_file_path.exists():
+                source_file_data = load_json(source_file_path)
+                for key in source_file_data.keys():
+                    key_to_file_map[key] = source_file_info["file"]
 
-                # se memoria dice che va bene così, salta
-                if mem_value is not None and mem_value == target_flat[path]:
-                    continue
-                # altrimenti richiede traduzione
-                needs_translation.add(path)
+        file_data_map = {}
+        for file_info in locale_files:
+            file_data_map[file_info["file"]] = {}
 
-        if needs_translation:
-            blocks_to_translate.append((block_name, filtered_block_data))
+        for key, value in synced_data.items():
+            source_file = key_to_file_map.get(key)
+            if source_file:
+                for file_info in locale_files:
+                    source_pattern = source_file.split("/")[-1]
+                    target_pattern = file_info["file"].split("/")[-1]
+                    if source_pattern == target_pattern:
+                        file_data_map[file_info["file"]][key] = value
+                        break
+            else:
+                first_file = list(file_data_map.keys())[0]
+                file_data_map[first_file][key] = value
 
-    return blocks_to_translate
+        for file_info in locale_files:
+            target_file = resolve_project_path(project_config, file_info["file"])
+            file_data = file_data_map.get(file_info["file"], {})
+            save_json(target_file, file_data)
+    else:
+        # Single-file (o manifest + shard)
+        save_target_file(project_config, locale_files[0], synced_data)
 
-def translate_locale(
+def prepare_locale(
     locale: str,
     en_data: Dict,
-    client: OpenAI,
     new_paths: set,
     changed_paths: set,
     removed_paths: set,
     memory: Dict[str, Dict[str, object]],
     project_config: Dict,
-    dry_run: bool = False,
-    args: any = None
-) -> Tuple[bool, Dict, Dict[str, Dict[str, object]], float]:
+    verbose: bool = True,
+    layout: Optional[Dict] = None,
+    state_index: Optional[Dict] = None
+) -> Tuple[Dict, List[Tuple[str, Dict]]]:
     """
-    Traduce una lingua completa.
-    Returns: (success, translated_data, memory, total_cost)
+    Carica i file target della lingua, applica le rimozioni EN, sincronizza la struttura
+    e trova i blocchi da tradurre (usato sia dalla traduzione sia da --plan).
+    Con layout + state_index la selezione usa lo stato persistito se ancora valido
+    (altrimenti lo ricalcola e lo aggiorna nell'indice).
+    Returns: (synced_data, blocks_to_translate)
     """
     project_id = project_config.get("id", "site")
-    config = load_language_config(project_id)
-    lang_info = config.get(locale, {'name': locale})
-    lang_name = lang_info.get('name', locale)
-
-    print(f"\n🌍 {locale} ({lang_name})")
+    if layout is None:
+        layout = build_en_layout(en_data, project_id, new_paths, changed_paths)
+    state = (cached_locale_state(state_index, layout, project_config, locale, memory.get(locale, {}))
+             if state_index is not None else None)
 
     # Carica tutti i file target per questa locale
-    locale_files = get_files_for_locale(project_config, locale)
-    target_data = {}
-
-    for file_info in locale_files:
-        target_file = resolve_project_path(project_config, file_info["file"])
-        if target_file.exists():
-            file_data = load_json(target_file)
-            target_data = {**target_data, **file_data}
+    target_data = load_locale_data(project_config, locale)
 
     # Rimuovi path eliminati in EN
     if removed_paths:
@@ -1264,12 +1831,23 @@ def translate_locale(
                 if p in removed_paths:
                     mem.pop(p, None)
 
+    # Stato dai file target così come sono su disco (prima del sync, che riempie le path mancanti con EN)
+    if state is not None:
+        if verbose:
+            print(f"   ⚡ Stato da indice: {summarize_state(state)['translated']}/{len(state)} path tradotte")
+    else:
+        if verbose:
+            print(f"   🔍 Cercando blocchi da tradurre...")
+        state = compute_locale_state(layout, target_data, memory.get(locale, {}))
+        if state_index is not None:
+            store_locale_state(state_index, layout, project_config, locale, state, memory.get(locale, {}))
+
     # Sincronizza struttura con EN
-    print(f"   🔄 Sincronizzando struttura...")
+    if verbose:
+        print(f"   🔄 Sincronizzando struttura...")
     synced_data = sync_structure(en_data, target_data)
 
     # Trova blocchi da tradurre
-    print(f"   🔍 Cercando blocchi da tradurre...")
     blocks_to_translate = find_blocks_to_translate(
         locale,
         en_data,
@@ -1277,9 +1855,43 @@ def translate_locale(
         new_paths,
         changed_paths,
         memory,
-        project_id
+        project_id,
+        layout=layout,
+        state=state
     )
+    return synced_data, blocks_to_translate
 
+def translate_locale(
+    locale: str,
+    en_data: Dict,
+    client: OpenAI,
+    new_paths: set,
+    changed_paths: set,
+    removed_paths: set,
+    memory: Dict[str, Dict[str, object]],
+    project_config: Dict,
+    dry_run: bool = False,
+    args: any = None,
+    layout: Optional[Dict] = None,
+    state_index: Optional[Dict] = None
+) -> Tuple[bool, Dict, Dict[str, Dict[str, object]], float]:
+    """
+    Traduce una lingua completa (state_index, se passato, viene aggiornato dopo il salvataggio).
+    Returns: (success, translated_data, memory, total_cost)
+    """
+    project_id = project_config.get("id", "site")
+    config = load_language_config(project_id)
+    lang_info = config.get(locale, {'name': locale})
+    lang_name = lang_info.get('name', locale)
+
+    print(f"\n🌍 {locale} ({lang_name})")
+
+    if layout is None:
+        layout = build_en_layout(en_data, project_id, new_paths, changed_paths)
+    synced_data, blocks_to_translate = prepare_locale(
+        locale, en_data, new_paths, changed_paths, removed_paths, memory, project_config,
+        layout=layout, state_index=state_index
+    )
 
     if not blocks_to_translate:
         print(f"   ✅ Già completo e tradotto!")
@@ -1305,6 +1917,8 @@ def translate_locale(
                 "total": total,
                 "percentage": round((current / total) * 100, 1) if total > 0 else 0,
                 "block_name": block_name,
+                "concurrency": controller.snapshot(),
+                "retries": get_retry_policy("grok").snapshot(),
                 "timestamp": time.time()
             }
             with open(progress_file, 'w', encoding='utf-8') as f:
@@ -1312,218 +1926,224 @@ def translate_locale(
         except Exception as e:
             pass
 
-    update_progress(0, len(blocks_to_translate), "Inizio traduzione...")
-
-    for idx, (block_name, block_data) in enumerate(blocks_to_translate, 1):
-        print(f"\n   [{idx}/{len(blocks_to_translate)}] {block_name}...")
-        update_progress(idx - 1, len(blocks_to_translate), block_name)
-
-        # OTTIMIZZAZIONE 2026: Chunking speciale per KB fused_by_iso
-        if project_id == "kb" and block_name == "fused_by_iso":
-            print(f"      📍 Traduco fused_by_iso in batch paralleli...")
-
-            # Crea batch per fused_by_iso (dict di paesi) - TRADUCI TUTTO!
-            # OTTIMIZZAZIONE 2026: Batch fissi di 18 paesi (limitazione pratica Grok ~46k token output)
-            # 18 paesi = ~46k token output (limite osservato), input ~30k token = ~76k totale (ben dentro 256k)
-            all_batches = chunk_kb_countries(block_data, batch_size=18)  # 18 paesi per batch
-            batches = all_batches  # Traduciamo tutti i batch
-            if batches:
-                avg_countries = sum(len(b) for b in batches) / len(batches)
-                print(f"      📦 {len(batches)} batch creati (~{avg_countries:.0f} paesi/batch in media)")
+    # Concorrenza adattiva: tutte le richieste vengono inviate subito al pool, il controller AIMD
+    # limita quelle in volo; i risultati sono applicati in ordine nel thread principale
+    controller = grok_controller()
+    executor = ThreadPoolExecutor(max_workers=max(1, int(controller.max_limit)))
+    block_usage = {
+        block_name: []
+        for block_name, _ in blocks_to_translate
+        if not (project_id == "kb" and block_name == "fused_by_iso")
+    }
+    pending_blocks = {
+        block_name: submit_in_context(executor, translate_block_chunks, client, locale, lang_name, block_name, block_data, glossary, context,
+                                    dry_run=dry_run, usage_sink=block_usage[block_name])
+        for block_name, block_data in blocks_to_translate
+        if block_name in block_usage
+    }
 
-            # Traduzione parallela con max 5 concorrenti
-            async def translate_batches_parallel():
-                async_client = init_async_grok_client()
-                if not async_client:
-                    return []
+    try:
+        update_progress(0, len(blocks_to_translate), "Inizio traduzione...")
 
-                semaphore = asyncio.Semaphore(5)  # Max 5 concorrenti
+        for idx, (block_name, block_data) in enumerate(blocks_to_translate, 1):
+            print(f"\n   [{idx}/{len(blocks_to_translate)}] {block_name}...")
+            update_progress(idx - 1, len(blocks_to_translate), block_name)
 
-                async def translate_single_batch(batch_idx: int, batch: Dict):
-                    async with semaphore:
-                        result, cost, attempts, token_usage = await translate_batch_with_cost_tracking(
-                            async_client, batch, locale, lang_name, project_id, glossary, context
-                        )
-                        return batch_idx, result, cost, list(batch.keys()), token_usage
+            # OTTIMIZZAZIONE 2026: Chunking speciale per KB fused_by_iso
+            if project_id == "kb" and block_name == "fused_by_iso":
+                print(f"      📍 Traduco fused_by_iso in batch paralleli ({len(block_data)}/{len(en_data.get(block_name, {}))} paesi)...")
+                # Paesi non selezionati (già tradotti) restano come nel target
+                current_countries = synced_data.get(block_name, {})
+                original_countries_data = en_data.get(block_name, {})
 
-                tasks = [translate_single_batch(idx + 1, batch) for idx, batch in enumerate(batches)]
-                return await asyncio.gather(*tasks, return_exceptions=True)
+                def fallback_country(country_iso: str):
+                    return overlay_kb_sections(current_countries.get(country_iso), original_countries_data[country_iso], block_data.get(country_iso))
 
-            # Per ora, esegui sempre sequenzialmente per evitare problemi asyncio
-            print(f"      📋 Eseguo traduzione sequenziale dei batch...")
+                # Crea batch per fused_by_iso (dict di paesi) - TRADUCI TUTTO! (vedi build_request_units)
+                batches = [batch for _, _, batch in build_request_units(project_id, block_name, block_data)]
+                if batches:
+                    avg_countries = sum(len(b) for b in batches) / len(batches)
+                    print(f"      📦 {len(batches)} batch creati (~{avg_countries:.0f} paesi/batch in media)")
 
-            if dry_run:
-                # In dry-run, simula la traduzione senza chiamare l'API
-                translated_countries = {}
-                original_countries_data = en_data.get(block_name, {})
-                for batch_idx, batch in enumerate(batches, 1):
-                    print(f"      🔹 Batch {batch_idx}/{len(batches)} (DRY-RUN)...")
-                    # Simula traduzione riuscita
-                    result = batch  # In dry-run, restituisci i dati originali
-                    for country_iso, country_data in result.items():
-                        if country_iso in original_countries_data:
-                            translated_countries[country_iso] = country_data
-                synced_data[block_name] = translated_countries
-                translated_count += 1
-                print(f"      ✅ fused_by_iso completato (dry-run)")
-            else:
-                sync_client = init_grok_client()
-                if not sync_client:
-                    print(f"      ❌ Client Grok non disponibile")
-                    synced_data[block_name] = en_data.get(block_name, {})
-                else:
+                if dry_run:
+                    # In dry-run, simula la traduzione senza chiamare l'API
                     translated_countries = {}
-                    original_countries_data = en_data.get(block_name, {})
-
                     for batch_idx, batch in enumerate(batches, 1):
-                        print(f"      🔹 Batch {batch_idx}/{len(batches)}...")
-                        # Traduci sequenzialmente invece di parallelamente
+                        print(f"      🔹 Batch {batch_idx}/{len(batches)} (DRY-RUN)...")
+                        # Simula traduzione riuscita
+                        result = batch  # In dry-run, restituisci i dati originali
+                        for country_iso, country_data in result.items():
+                            if country_iso in original_countries_data:
+                                translated_countries[country_iso] = overlay_kb_sections(
+                                    current_countries.get(country_iso),
+                                    merge_preserving_structure(original_countries_data[country_iso], country_data),
+                                    country_data,
+                                )
+                    synced_data[block_name] = {**current_countries, **translated_countries}
+                    translated_count += 1
+                    print(f"      ✅ fused_by_iso completato (dry-run)")
+                else:
+                    sync_client = init_grok_client()
+                    if not sync_client:
+                        print(f"      ❌ Client Grok non disponibile")
+                        synced_data[block_name] = {
+                            **current_countries,
+                            **{iso: fallback_country(iso) for iso in block_data if iso in original_countries_data},
+                        }
+                    else:
+                        translated_countries = {}
+
+                        print(f"      📋 Invio {len(batches)} batch in parallelo (limite adattivo attuale: {controller.limit:.0f})...")
                         cost_per_token = COST_PER_TOKEN_KB if project_id == 'kb' else COST_PER_TOKEN_APP
-                        batch_result = translate_batch_with_cost_tracking_sync(
-                            batch, locale, lang_name, project_id, glossary, context, sync_client, cost_per_token=cost_per_token, batch_idx=batch_idx
-                        )
-                        if batch_result is None:
-                            result, cost, attempts, token_usage = None, 0, 3, {}
-                        else:
-                            result, cost, attempts, token_usage = batch_result
-
-                        if result:
-                            # DEBUG: Verifica struttura risultato
-                            result_keys = list(result.keys())[:10] if isinstance(result, dict) else []
-                            print(f"      🔍 Result type: {type(result)}, Keys: {result_keys}")
+                        batch_futures = [
+                            submit_in_context(
+                                executor,
+                                translate_batch_with_cost_tracking_sync,
+                                batch, locale, lang_name, project_id, glossary, context, sync_client, cost_per_token=cost_per_token, batch_idx=batch_idx
+                            )
+                            for batch_idx, batch in enumerate(batches, 1)
+                        ]
+
+                        for batch_idx, (batch, batch_future) in enumerate(zip(batches, batch_futures), 1):
+                            print(f"      🔹 Batch {batch_idx}/{len(batches)}...")
+                            batch_result = batch_future.result()
+                            if batch_result is None:
+                                result, cost, attempts, token_usage = None, 0, 3, {}
+                            else:
+                                result, cost, attempts, token_usage = batch_result
+
+                            if result:
+                                # Un record per batch: tutti i paesi del batch puntano alla stessa richiesta
+                                req_id = new_memory_request(memory, token_usage, requests=attempts)
+                                # DEBUG: Verifica struttura risultato
+                                result_keys = list(result.keys())[:10] if isinstance(result, dict) else []
+                                print(f"      🔍 Result type: {type(result)}, Keys: {result_keys}")
                             
-                            # Grok potrebbe restituire il JSON direttamente o wrappato
-                            # Se result ha le stesse chiavi del batch, usa direttamente
-                            # Altrimenti cerca in sottosezioni comuni
-                            translated_batch = result
-                            if isinstance(result, dict):
-                                # Cerca nelle chiavi comuni che Grok potrebbe usare
-                                # Quando response_format={"type": "json_object"}, Grok potrebbe wrappare in "json" o altre chiavi
-                                possible_keys = ['json', 'translated_data', 'data', 'result', 'output', 'content', 'translation']
-                                for key in possible_keys:
-                                    if key in result and isinstance(result[key], dict):
-                                        # Verifica se contiene chiavi paese
-                                        if any(k in result[key] for k in batch.keys()):
-                                            translated_batch = result[key]
-                                            print(f"      🔍 Trovato dati tradotti in chiave: {key}")
-                                            break
-                                
-                                # Se non trovato, verifica se result stesso ha le chiavi paese
-                                if translated_batch == result and any(k in result for k in batch.keys()):
-                                    translated_batch = result
-                                    print(f"      🔍 Usando result direttamente (contiene chiavi paese)")
+                                # Grok potrebbe restituire il JSON direttamente o wrappato
+                                translated_batch = unwrap_batch_result(result, batch.keys())
                             
-                            # Verifica se le chiavi corrispondono ai codici paese attesi
-                            expected_country_codes = set(batch.keys())
-                            if isinstance(translated_batch, dict):
-                                actual_keys = set(translated_batch.keys())
-                                matching_keys = actual_keys & expected_country_codes
-                                extra_keys = actual_keys - expected_country_codes
-                                missing_keys = expected_country_codes - actual_keys
+                                # Verifica se le chiavi corrispondono ai codici paese attesi
+                                expected_country_codes = set(batch.keys())
+                                if isinstance(translated_batch, dict):
+                                    actual_keys = set(translated_batch.keys())
+                                    matching_keys = actual_keys & expected_country_codes
+                                    extra_keys = actual_keys - expected_country_codes
+                                    missing_keys = expected_country_codes - actual_keys
                                 
-                                # PROBLEMA 1: Nessuna chiave corrisponde
-                                if not matching_keys:
-                                    print(f"      ⚠️  ERRORE: Nessuna chiave paese trovata!")
-                                    print(f"         Attese: {sorted(list(expected_country_codes))[:5]}")
-                                    print(f"         Ricevute: {sorted(list(actual_keys))[:5]}")
+                                    # PROBLEMA 1: Nessuna chiave corrisponde
+                                    if not matching_keys:
+                                        print(f"      ⚠️  ERRORE: Nessuna chiave paese trovata!")
+                                        print(f"         Attese: {sorted(list(expected_country_codes))[:5]}")
+                                        print(f"         Ricevute: {sorted(list(actual_keys))[:5]}")
                                     
-                                    # Salva risposta raw per debug
-                                    debug_file = f"debug_grok_response_batch_{batch_idx}.json"
-                                    try:
-                                        with open(debug_file, 'w', encoding='utf-8') as f:
-                                            json.dump({
-                                                "batch_idx": batch_idx,
-                                                "expected_keys": list(expected_country_codes),
-                                                "actual_keys": list(actual_keys),
-                                                "grok_response": translated_batch,
-                                                "original_batch_keys": list(batch.keys())
-                                            }, f, indent=2, ensure_ascii=False)
-                                        print(f"      💾 Risposta salvata in {debug_file}")
-                                    except Exception as e:
-                                        print(f"      ❌ Errore salvataggio debug: {e}")
+                                        # Salva risposta raw per debug
+                                        debug_file = f"debug_grok_response_batch_{batch_idx}.json"
+                                        try:
+                                            with open(debug_file, 'w', encoding='utf-8') as f:
+                                                json.dump({
+                                                    "batch_idx": batch_idx,
+                                                    "expected_keys": list(expected_country_codes),
+                                                    "actual_keys": list(actual_keys),
+                                                    "grok_response": translated_batch,
+                                                    "original_batch_keys": list(batch.keys())
+                                                }, f, indent=2, ensure_ascii=False)
+                                            print(f"      💾 Risposta salvata in {debug_file}")
+                                        except Exception as e:
+                                            print(f"      ❌ Errore salvataggio debug: {e}")
                                     
-                                    # Fallback: usa dati originali per questo batch
-                                    for country_iso in batch.keys():
-                                        if country_iso in original_countries_data:
-                                            translated_countries[country_iso] = original_countries_data[country_iso]
-                                    continue
+                                        # Fallback: usa dati originali per questo batch
+                                        for country_iso in batch.keys():
+                                            if country_iso in original_countries_data:
+                                                translated_countries[country_iso] = fallback_country(country_iso)
+                                        continue
                                 
-                                # PROBLEMA 2: Ci sono chiavi extra (non sono codici paese)
-                                if extra_keys:
-                                    print(f"      ⚠️  ATTENZIONE: Chiavi extra trovate: {sorted(list(extra_keys))[:5]}")
-                                    print(f"         Filtro chiavi extra prima del merge...")
-                                    # Filtra: mantieni solo le chiavi che sono codici paese attesi
-                                    filtered_translated_batch = {
-                                        k: v for k, v in translated_batch.items() 
-                                        if k in expected_country_codes
-                                    }
-                                    translated_batch = filtered_translated_batch
-                                    print(f"         ✅ Mantenute {len(filtered_translated_batch)}/{len(expected_country_codes)} chiavi paese")
+                                    # PROBLEMA 2: Ci sono chiavi extra (non sono codici paese)
+                                    if extra_keys:
+                                        print(f"      ⚠️  ATTENZIONE: Chiavi extra trovate: {sorted(list(extra_keys))[:5]}")
+                                        print(f"         Filtro chiavi extra prima del merge...")
+                                        # Filtra: mantieni solo le chiavi che sono codici paese attesi
+                                        filtered_translated_batch = {
+                                            k: v for k, v in translated_batch.items() 
+                                            if k in expected_country_codes
+                                        }
+                                        translated_batch = filtered_translated_batch
+                                        print(f"         ✅ Mantenute {len(filtered_translated_batch)}/{len(expected_country_codes)} chiavi paese")
                                 
-                                # PROBLEMA 3: Mancano alcune chiavi paese
-                                if missing_keys:
-                                    print(f"      ⚠️  ATTENZIONE: Chiavi paese mancanti: {sorted(list(missing_keys))[:5]}")
-                                    print(f"         Uso dati originali per i paesi mancanti...")
-                                    # Per i paesi mancanti, usa i dati originali (non tradotti)
-                                    for country_iso in missing_keys:
-                                        if country_iso in original_countries_data:
-                                            translated_batch[country_iso] = original_countries_data[country_iso]
+                                    # PROBLEMA 3: Mancano alcune chiavi paese
+                                    if missing_keys:
+                                        print(f"      ⚠️  ATTENZIONE: Chiavi paese mancanti: {sorted(list(missing_keys))[:5]}")
+                                        print(f"         Uso dati originali per i paesi mancanti...")
+                                        # Per i paesi mancanti, usa i dati originali (non tradotti)
+                                        for country_iso in missing_keys:
+                                            if country_iso in original_countries_data:
+                                                translated_batch[country_iso] = original_countries_data[country_iso]
                             
-                            # Merge con dati originali EN per preservare chiavi vuote
-                            if isinstance(translated_batch, dict):
-                                merged_count = 0
-                                for country_iso, country_data in translated_batch.items():
-                                    if country_iso in original_countries_data:
-                                        merged_country_data = merge_preserving_structure(
-                                            original_countries_data[country_iso], country_data
-                                        )
-                                        translated_countries[country_iso] = merged_country_data
-                                        update_memory_for_block(locale, f"{block_name}.{country_iso}", merged_country_data, memory, token_usage)
-                                        merged_count += 1
-                                print(f"      ✅ Merge completato: {merged_count}/{len(batch)} paesi")
+                                # Merge con dati originali EN per preservare chiavi vuote
+                                if isinstance(translated_batch, dict):
+                                    merged_count = 0
+                                    for country_iso, country_data in translated_batch.items():
+                                        if country_iso in original_countries_data:
+                                            merged_country_data = overlay_kb_sections(
+                                                current_countries.get(country_iso),
+                                                merge_preserving_structure(original_countries_data[country_iso], country_data),
+                                                batch[country_iso],
+                                            )
+                                            translated_countries[country_iso] = merged_country_data
+                                            if isinstance(batch[country_iso], dict) and isinstance(merged_country_data, dict):
+                                                for section in batch[country_iso]:
+                                                    update_memory_for_block(locale, f"{block_name}.{country_iso}.{section}",
+                                                                            merged_country_data[section], memory, req_id)
+                                            else:
+                                                update_memory_for_block(locale, f"{block_name}.{country_iso}", merged_country_data, memory, req_id)
+                                            merged_count += 1
+                                    print(f"      ✅ Merge completato: {merged_count}/{len(batch)} paesi")
+                                else:
+                                    print(f"      ⚠️  Struttura risultato non valida: {type(translated_batch)}")
+                                    # Fallback per questo batch
+                                    for country_iso in batch.keys():
+                                        if country_iso in original_countries_data:
+                                            translated_countries[country_iso] = fallback_country(country_iso)
                             else:
-                                print(f"      ⚠️  Struttura risultato non valida: {type(translated_batch)}")
-                                # Fallback per questo batch
+                                # Fallback: usa originali per questo batch
+                                print(f"      ⚠️  Batch fallito, uso dati originali per {len(batch)} paesi")
                                 for country_iso in batch.keys():
                                     if country_iso in original_countries_data:
-                                        translated_countries[country_iso] = original_countries_data[country_iso]
-                        else:
-                            # Fallback: usa originali per questo batch
-                            print(f"      ⚠️  Batch fallito, uso dati originali per {len(batch)} paesi")
-                            for country_iso in batch.keys():
-                                if country_iso in original_countries_data:
-                                    translated_countries[country_iso] = original_countries_data[country_iso]
+                                        translated_countries[country_iso] = fallback_country(country_iso)
 
-                        total_cost += cost
+                            total_cost += cost
 
-                    synced_data[block_name] = translated_countries
-                    translated_count += 1
-                    print(f"      ✅ fused_by_iso completato - Costo totale: ${total_cost:.4f}")
+                        synced_data[block_name] = {**current_countries, **translated_countries}
+                        translated_count += 1
+                        print(f"      ✅ fused_by_iso completato - Costo totale: ${total_cost:.4f}")
 
-        else:
-            # Traduzione normale per altri blocchi (con chunking automatico se necessario)
-            result = translate_block_chunks(client, locale, lang_name, block_name, block_data, glossary, context, dry_run=dry_run)
-
-            if result and block_name in result:
-                original_block_data = en_data.get(block_name, block_data)
-                translated_block_data = result[block_name]
-                merged_block_data = merge_preserving_structure(original_block_data, translated_block_data)
-
-                synced_data[block_name] = merged_block_data
-                update_memory_for_block(locale, block_name, merged_block_data, memory)
-                translated_count += 1
-                print(f"      ✅ Tradotto")
             else:
-                failed_blocks.append(block_name)
-                synced_data[block_name] = en_data.get(block_name, block_data)
-                print(f"      ❌ Fallito - mantengo originale da EN")
-
-        update_progress(idx, len(blocks_to_translate), block_name)
-
-        if idx < len(blocks_to_translate):
-            time.sleep(1)
-
+                # Traduzione normale per altri blocchi (con chunking automatico se necessario), già inviata al pool
+                result = pending_blocks[block_name].result()
+
+                if result and block_name in result:
+                    original_block_data = en_data.get(block_name, block_data)
+                    translated_block_data = result[block_name]
+                    merged_block_data = merge_preserving_structure(original_block_data, translated_block_data)
+
+                    synced_data[block_name] = merged_block_data
+                    # Un record per blocco: somma delle richieste (chunk / metà) che lo hanno tradotto
+                    usage_records = block_usage[block_name]
+                    token_usage = {key: sum(u[key] for u in usage_records) for key in ("input_tokens", "output_tokens", "total_tokens")}
+                    req_id = new_memory_request(memory, token_usage, requests=len(usage_records))
+                    update_memory_for_block(locale, block_name, merged_block_data, memory, req_id)
+                    translated_count += 1
+                    print(f"      ✅ Tradotto")
+                else:
+                    failed_blocks.append(block_name)
+                    synced_data[block_name] = en_data.get(block_name, block_data)
+                    print(f"      ❌ Fallito - mantengo originale da EN")
+
+            update_progress(idx, len(blocks_to_translate), block_name)
+    finally:
+        # Anche se un blocco solleva: niente thread pool (e richieste in coda) lasciati vivi
+        executor.shutdown(cancel_futures=True)
     update_progress(len(blocks_to_translate), len(blocks_to_translate), "Completato")
+    print(f"\n   ⚙️  Concorrenza {controller.describe()}")
 
     # Verifica completezza
     en_keys = set(en_data.keys())
@@ -1534,43 +2154,12 @@ def translate_locale(
         synced_data = sync_structure(en_data, synced_data)
 
     # Salva
-    locale_files = get_files_for_locale(project_config, locale)
-    if len(locale_files) > 1:
-        # Multi-file: dividi dati
-        source_files = get_source_files(project_config)
-        key_to_file_map = {}
-        for source_file_info in source_files:
-            source_file_path = resolve_project_path(project_config, source_file_info["file"])
-            if source_file_path.exists():
-                source_file_data = load_json(source_file_path)
-                for key in source_file_data.keys():
-                    key_to_file_map[key] = source_file_info["file"]
+    save_locale_data(project_config, locale, synced_data)
 
-        file_data_map = {}
-        for file_info in locale_files:
-            file_data_map[file_info["file"]] = {}
-
-        for key, value in synced_data.items():
-            source_file = key_to_file_map.get(key)
-            if source_file:
-                for file_info in locale_files:
-                    source_pattern = source_file.split("/")[-1]
-                    target_pattern = file_info["file"].split("/")[-1]
-                    if source_pattern == target_pattern:
-                        file_data_map[file_info["file"]][key] = value
-                        break
-            else:
-                first_file = list(file_data_map.keys())[0]
-                file_data_map[first_file][key] = value
-
-        for file_info in locale_files:
-            target_file = resolve_project_path(project_config, file_info["file"])
-            file_data = file_data_map.get(file_info["file"], {})
-            save_json(target_file, file_data)
-    else:
-        # Single-file
-        target_file = resolve_project_path(project_config, locale_files[0]["file"])
-        save_json(target_file, synced_data)
+    # Indice stati: i file sono appena stati riscritti con synced_data, ricalcola lo stato della lingua
+    if state_index is not None:
+        store_locale_state(state_index, layout, project_config, locale,
+                           compute_locale_state(layout, synced_data, memory.get(locale, {})), memory.get(locale, {}))
 
     # Rimuovi file progresso
     try:
@@ -1582,32 +2171,11 @@ def translate_locale(
     success = len(failed_blocks) == 0
     return success, synced_data, memory, total_cost
 
-def update_memory_for_block(locale: str, block_name: str, block_data: Dict, memory: Dict[str, Dict[str, object]], token_usage: Dict = None):
-    """Aggiorna la memoria per tutte le path del blocco con timestamp e token"""
-    import time
+def update_memory_for_block(locale: str, block_name: str, block_data: Dict, memory: Dict[str, Dict[str, object]], req_id: Optional[str] = None):
+    """Aggiorna la memoria per tutte le path del blocco, collegandole al record della richiesta (vedi new_memory_request)"""
     mem = memory.setdefault(locale, {})
-    flat = flatten_json({block_name: block_data})
-
-    # Aggiungi metadata per audit
-    for path in flat.keys():
-        if path not in mem or mem[path] != flat[path]:
-            mem[path] = {
-                "value": flat[path],
-                "last_translated_at": time.time(),
-                "token_usage": token_usage or {}
-            }
-        elif isinstance(mem[path], dict):
-            # Aggiorna timestamp se già esistente
-            mem[path]["last_translated_at"] = time.time()
-            if token_usage:
-                mem[path]["token_usage"] = token_usage
-        else:
-            # Converti valore semplice in dict con metadata
-            mem[path] = {
-                "value": flat[path],
-                "last_translated_at": time.time(),
-                "token_usage": token_usage or {}
-            }
+    for path, value in flatten_json({block_name: block_data}).items():
+        mem[path] = [value, req_id]
 
 def split_block_into_chunks(block_data: Dict, max_tokens_per_chunk: int = 8000) -> List[Dict]:
     """Divide un blocco grande in chunk più piccoli per evitare limiti di token"""
@@ -1642,163 +2210,754 @@ def split_block_into_chunks(block_data: Dict, max_tokens_per_chunk: int = 8000)
 
     return chunks
 
-def translate_block_chunks(client: OpenAI, locale: str, lang_name: str, block_name: str, block_data: Dict, glossary: Dict, context: str, max_keys_per_chunk: int = 50, dry_run: bool = False) -> Optional[Dict]:
-    """Traduce un blocco, dividendolo in chunk se necessario"""
-    # Stima token più accurata basata sui caratteri (~4 caratteri per token)
-    import json
-    total_chars = len(json.dumps(block_data, ensure_ascii=False))
-    estimated_tokens = total_chars // 4
+def translate_block_chunks(client: OpenAI, locale: str, lang_name: str, block_name: str, block_data: Dict, glossary: Dict, context: str, max_keys_per_chunk: int = 50, dry_run: bool = False, usage_sink: Optional[List[Dict]] = None) -> Optional[Dict]:
+    """Traduce un blocco, dividendolo in chunk se necessario (vedi build_request_units)"""
+    units = build_request_units("generic", block_name, block_data)
 
-    if estimated_tokens <= 10000:  # Soglia per evitare problemi (ridotta per sicurezza)
+    if len(units) == 1:
         # Traduzione normale
-        return translate_block(client, locale, lang_name, block_name, block_data, glossary, context, dry_run=dry_run)
+        return translate_block(client, locale, lang_name, block_name, block_data, glossary, context, dry_run=dry_run, usage_sink=usage_sink)
 
+    estimated_tokens = len(json.dumps(block_data, ensure_ascii=False)) // 4
     print(f"      📦 Blocco grande ({len(block_data)} chiavi, ~{estimated_tokens} token) - divido in chunk...")
-
-    # Divide in chunk
-    chunks = split_block_into_chunks(block_data, max_tokens_per_chunk=6000)
-    print(f"      📦 {len(chunks)} chunk creati (~{sum(len(c) for c in chunks)/len(chunks):.0f} chiavi/chunk)")
+    print(f"      📦 {len(units)} chunk creati (~{sum(len(c) for _, _, c in units)/len(units):.0f} chiavi/chunk)")
 
     translated_data = {}
-    total_cost = 0.0
 
-    for chunk_idx, chunk in enumerate(chunks, 1):
-        print(f"      🔹 Chunk {chunk_idx}/{len(chunks)}...")
-        chunk_result = translate_block(client, locale, lang_name, f"{block_name}_chunk_{chunk_idx}", chunk, glossary, context, dry_run=dry_run)
+    # Chunk in parallelo: il controller AIMD decide quante richieste sono davvero in volo
+    with ThreadPoolExecutor(max_workers=len(units)) as executor:
+        futures = [
+            submit_in_context(executor, translate_block, client, locale, lang_name, unit_name, chunk, glossary, context, dry_run=dry_run, usage_sink=usage_sink)
+            for _, unit_name, chunk in units
+        ]
+
+    for chunk_idx, ((_, unit_name, chunk), future) in enumerate(zip(units, futures), 1):
+        print(f"      🔹 Chunk {chunk_idx}/{len(units)}...")
+        chunk_result = future.result()
 
-        if chunk_result and f"{block_name}_chunk_{chunk_idx}" in chunk_result:
-            chunk_translated = chunk_result[f"{block_name}_chunk_{chunk_idx}"]
+        if chunk_result and unit_name in chunk_result:
+            chunk_translated = chunk_result[unit_name]
             translated_data.update(chunk_translated)
             print(f"      ✅ Chunk {chunk_idx} tradotto")
         else:
             print(f"      ❌ Chunk {chunk_idx} fallito - uso originali")
             translated_data.update(chunk)
 
-        time.sleep(0.5)  # Piccola pausa tra chunk
-
     return {block_name: translated_data}
 
-def translate_block(client: OpenAI, locale: str, lang_name: str, block_name: str, block_data: Dict, glossary: Dict, context: str, nearby_blocks: Dict = None, max_retries: int = 2, dry_run: bool = False) -> Optional[Dict]:
-    """Traduce un blocco usando Grok API"""
-    for attempt in range(1, max_retries + 1):
-        try:
-            if attempt > 1:
-                print(f"      🔄 Retry {attempt}/{max_retries}...", flush=True)
-                time.sleep(2)
+def translate_block(client: OpenAI, locale: str, lang_name: str, block_name: str, block_data: Dict, glossary: Dict, context: str, nearby_blocks: Dict = None, max_retries: int = 3, dry_run: bool = False, usage_sink: Optional[List[Dict]] = None) -> Optional[Dict]:
+    """
+    Traduce un blocco usando Grok API (retry secondo la policy della run, blocco diviso se troncato).
+    usage_sink: se passato, riceve il token usage di ogni richiesta andata a buon fine (per la memoria).
+    """
+    prompt = build_request_prompt("generic", "block", block_name, block_data, locale, lang_name, glossary, context)
+
+    if prompt is None:
+        print(f"      ⏭️  Blocco vuoto/null, salto", flush=True)
+        return {block_name: block_data}
+
+    if dry_run:
+        print(f"      🔍 DRY-RUN: Prompt per blocco '{block_name}' ({len(block_data)} chiavi)")
+        print(f"         📝 Prompt: {prompt[:200]}..." if len(prompt) > 200 else f"         📝 Prompt: {prompt}")
+        print(f"         📊 Dati: {len(str(block_data))} caratteri, {len(block_data)} chiavi")
+        return {block_name: block_data}  # Ritorna dati originali in dry-run
+
+    request_params = request_params_for(prompt, "generic", "block")
+    cached_request = get_response_cache().request(str(client.base_url), request_params)
+    attempts = 0
+
+    def attempt_once():
+        nonlocal attempts
+        attempts += 1
+        # Solo il primo tentativo legge la cache: i successivi seguono un errore e vanno in rete
+        cached = cached_request.lookup() if attempts == 1 else None
+        if cached is not None:
+            result = extract_json_object((completion_from_cache(cached).choices[0].message.content or "").strip())
+            if block_result_matches(result, block_name, block_data):
+                print(f"      💾 Risposta dalla cache (nessuna chiamata)", flush=True)
+                if usage_sink is not None:
+                    usage_sink.append({"input_tokens": 0, "output_tokens": 0, "total_tokens": 0})
+                return result
+            # Voce incompleta (scritta prima della validazione): si scarta e si va in rete
+            cached_request.discard()
+
+        print(f"      ⏳ Invio a Grok...", flush=True)
+
+        with grok_controller().slot(size=len(prompt) / 4) as slot:
+            response = client.chat.completions.create(**request_params)
+            truncated = bool(response.choices) and response.choices[0].finish_reason == "length"
+            if truncated:
+                slot.fail(OUTCOME_ERROR)
+
+        print(f"      📥 Risposta ricevuta", flush=True)
+
+        # Debug token usage per blocchi normali
+        token_info = {}
+        if hasattr(response, 'usage') and response.usage:
+            token_info = {
+                "prompt_tokens": getattr(response.usage, 'prompt_tokens', 0),
+                "completion_tokens": getattr(response.usage, 'completion_tokens', 0),
+                "total_tokens": getattr(response.usage, 'total_tokens', 0)
+            }
+            # Calcola costo usando prezzi ufficiali Grok: $0.20/1M input + $0.50/1M output
+            input_cost = (token_info['prompt_tokens'] / 1_000_000) * 0.20
+            output_cost = (token_info['completion_tokens'] / 1_000_000) * 0.50
+            cost = input_cost + output_cost
+            print(f"      📊 Token: {token_info['total_tokens']} total | Costo: ${cost:.6f} (input: ${input_cost:.6f} + output: ${output_cost:.6f})")
+
+        if truncated:
+            size = f"{len(block_data)} chiavi" if isinstance(block_data, dict) else "valore singolo"
+            raise TruncatedResponse(f"risposta troncata ({size} nel blocco '{block_name}')")
+
+        result = extract_json_object((response.choices[0].message.content or "").strip())
+        # Come per i batch: in cache solo risposte con il blocco/unità richiesto e tutte le sue chiavi
+        if block_result_matches(result, block_name, block_data):
+            cached_request.store(completion_to_cache(response))
+        if usage_sink is not None:
+            usage_sink.append({
+                "input_tokens": token_info.get("prompt_tokens", 0),
+                "output_tokens": token_info.get("completion_tokens", 0),
+                "total_tokens": token_info.get("total_tokens", 0),
+            })
+        return result
+
+    try:
+        return get_retry_policy("grok").call(attempt_once, label=block_name, max_attempts=max_retries)
+    except TruncatedResponse as e:
+        if not isinstance(block_data, dict) or len(block_data) < 2:
+            print(f"      ❌ Errore: {e} (impossibile dividere ulteriormente)")
+            return None
+        # Non ritentare alla stessa dimensione: traduci le due metà separatamente
+        keys = list(block_data.keys())
+        halves = [{k: block_data[k] for k in keys[:len(keys) // 2]}, {k: block_data[k] for k in keys[len(keys) // 2:]}]
+        print(f"      ✂️  {e} → divido in {len(halves[0])} + {len(halves[1])} chiavi")
+        merged = {}
+        for half in halves:
+            half_result = translate_block(client, locale, lang_name, block_name, half, glossary, context, max_retries=max_retries, usage_sink=usage_sink)
+            if not half_result or block_name not in half_result:
+                return None
+            merged.update(half_result[block_name])
+        return {block_name: merged}
+    except Exception as e:
+        print(f"      ❌ Errore [{classify_error(e)}]: {str(e)[:100]}")
+        return None
+
+# ============================================================================
+# PLAN (zero API): richieste, token, costo e tempo stimati prima di una run
+# ============================================================================
+
+# Prezzi ufficiali Grok (grok-4-fast-non-reasoning)
+GROK_INPUT_PRICE_PER_M = 0.20
+GROK_OUTPUT_PRICE_PER_M = 0.50
+
+# Ipotesi del planner (sovrascrivibili da CLI)
+PLAN_OUTPUT_RATIO = 1.15           # token output / token del JSON inviato (le traduzioni sono un po' più lunghe di EN)
+PLAN_BASE_LATENCY_SEC = 1.5        # latenza fissa per richiesta (rete + time-to-first-token)
+PLAN_OUTPUT_TOKENS_PER_SEC = 120   # velocità di generazione osservata
+
+def load_en_data(project_config: Dict) -> Dict:
+    """Unisce i file sorgente EN del progetto (source of truth)"""
+    en_data = {}
+    for source_file_info in get_source_files(project_config):
+        en_file = resolve_project_path(project_config, source_file_info["file"])
+        if en_file.exists():
+            en_data = {**en_data, **load_json(en_file)}
+        else:
+            print(f"⚠️  {en_file} non trovato, continuo con gli altri file...")
+    return en_data
 
-            prompt = build_prompt_by_project("generic", block_name, {block_name: block_data}, locale, lang_name, glossary, context)
+def select_locales(project_id: str, locale_arg: Optional[str]) -> List[str]:
+    """Lingue configurate per il progetto, filtrate da --locale (comma-separated)"""
+    config = load_language_config(project_id)
+    if not locale_arg:
+        return list(config.keys())
+    requested = [l.strip() for l in locale_arg.split(",") if l.strip()]
+    missing = [l for l in requested if l not in config]
+    if missing:
+        print(f"⚠️  Locale non trovati nella configurazione di '{project_id}': {', '.join(missing)}")
+    return [l for l in requested if l in config]
+
+def plan_locale(project_config: Dict, locale: str, en_data: Dict, new_paths: set, changed_paths: set, removed_paths: set,
+                memory: Dict, glossary: Dict, context: str, output_ratio: float = PLAN_OUTPUT_RATIO,
+                layout: Optional[Dict] = None, state_index: Optional[Dict] = None) -> List[Dict]:
+    """Richieste esatte che translate_locale invierebbe per questa lingua (nessuna chiamata API)"""
+    project_id = project_config.get("id", "site")
+    lang_name = load_language_config(project_id).get(locale, {}).get("name", locale)
 
+    _, blocks_to_translate = prepare_locale(
+        locale, en_data, new_paths, changed_paths, removed_paths, memory, project_config, verbose=False,
+        layout=layout, state_index=state_index
+    )
+
+    requests = []
+    for block_name, block_data in blocks_to_translate:
+        prompt_project = project_id if project_id == "kb" and block_name == "fused_by_iso" else "generic"
+        for kind, unit_name, unit_data in build_request_units(project_id, block_name, block_data, verbose=False):
+            prompt = build_request_prompt(prompt_project, kind, unit_name, unit_data, locale, lang_name, glossary, context)
             if prompt is None:
-                print(f"      ⏭️  Blocco vuoto/null, salto", flush=True)
-                return {block_name: block_data}
+                continue
+            params = request_params_for(prompt, prompt_project, kind)
+            payload_tokens = len(json.dumps(unit_data, ensure_ascii=False)) // 4
+            input_tokens = len(prompt) // 4
+            output_tokens = min(params["max_tokens"], int(payload_tokens * output_ratio))
+            requests.append({
+                "project": project_id,
+                "locale": locale,
+                "block": block_name,
+                "unit": unit_name,
+                "kind": kind,
+                "input_tokens": input_tokens,
+                "output_tokens": output_tokens,
+                "cost": input_tokens / 1_000_000 * GROK_INPUT_PRICE_PER_M + output_tokens / 1_000_000 * GROK_OUTPUT_PRICE_PER_M,
+                "body": params,
+            })
+    return requests
+
+def projected_wall_time(durations: List[float], concurrency: int) -> float:
+    """Makespan con `concurrency` slot: ogni richiesta va sul primo slot libero, in ordine di invio"""
+    import heapq
+    slots = [0.0] * max(1, concurrency)
+    for duration in durations:
+        heapq.heappush(slots, heapq.heappop(slots) + duration)
+    return max(slots)
+
+def run_plan(project_ids: List[str], locale_arg: Optional[str], concurrencies: List[int], output_path: Optional[str] = None,
+             requests_path: Optional[str] = None, output_ratio: float = PLAN_OUTPUT_RATIO,
+             base_latency: float = PLAN_BASE_LATENCY_SEC, tokens_per_sec: float = PLAN_OUTPUT_TOKENS_PER_SEC,
+             kb_granularity: str = DEFAULT_KB_GRANULARITY) -> Dict:
+    """
+    Pre-flight di una run: diff EN, memoria e batching reali, zero rete e zero API key.
+    Le lingue sono tradotte una dopo l'altra, quindi il tempo stimato è la somma dei makespan per lingua.
+    L'indice stati viene letto ma non salvato (il plan non scrive nulla nel repo).
+    """
+    glossary = load_glossary()
+    context = load_context()
+    all_requests = []
+    summary = {}
 
-            if dry_run:
-                print(f"      🔍 DRY-RUN: Prompt per blocco '{block_name}' ({len(block_data)} chiavi)")
-                print(f"         📝 Prompt: {prompt[:200]}..." if len(prompt) > 200 else f"         📝 Prompt: {prompt}")
-                print(f"         📊 Dati: {len(str(block_data))} caratteri, {len(block_data)} chiavi")
-                return {block_name: block_data}  # Ritorna dati originali in dry-run
-
-            print(f"      ⏳ Invio a Grok...", flush=True)
-
-            response = client.chat.completions.create(
-                model=GROK_MODEL,
-                messages=[
-                    {"role": "user", "content": prompt}
-                ],
-                response_format={"type": "json_object"},
-                temperature=0.0,
-                max_tokens=8000
-            )
+    print(f"🧮 PLAN (nessuna chiamata API) - progetti: {', '.join(project_ids)}\n")
 
-            print(f"      📥 Risposta ricevuta", flush=True)
+    for project_id in project_ids:
+        project_config = load_project_config(project_id)
+        if not project_config:
+            print(f"❌ Progetto '{project_id}' non trovato in {PROJECTS_CONFIG}")
+            continue
+        project_config["sourceLocale"] = "en-GB"
 
-            # Debug token usage per blocchi normali
-            if hasattr(response, 'usage') and response.usage:
-                token_info = {
-                    "prompt_tokens": getattr(response.usage, 'prompt_tokens', 0),
-                    "completion_tokens": getattr(response.usage, 'completion_tokens', 0),
-                    "total_tokens": getattr(response.usage, 'total_tokens', 0)
-                }
-                # Calcola costo usando prezzi ufficiali Grok: $0.20/1M input + $0.50/1M output
-                input_cost = (token_info['prompt_tokens'] / 1_000_000) * 0.20
-                output_cost = (token_info['completion_tokens'] / 1_000_000) * 0.50
-                cost = input_cost + output_cost
-                print(f"      📊 Token: {token_info['total_tokens']} total | Costo: ${cost:.6f} (input: ${input_cost:.6f} + output: ${output_cost:.6f})")
-
-            content = response.choices[0].message.content.strip()
-
-            import re
-            content = re.sub(r'```json\s*', '', content)
-            content = re.sub(r'```\s*$', '', content, flags=re.MULTILINE)
-            content = content.strip()
-
-            first_brace = content.find('{')
-            if first_brace == -1:
-                if attempt < max_retries:
-                    continue
-                print(f"      ⚠️  Nessun JSON trovato")
-                return None
+        en_data = load_en_data(project_config)
+        if not en_data:
+            print(f"❌ {project_id}: nessun file sorgente trovato")
+            continue
+        new_paths, changed_paths, removed_paths = diff_en(en_data, load_en_snapshot(project_config))
+        memory = load_memory(project_id)
+        locales = select_locales(project_id, locale_arg)
+        layout = build_en_layout(en_data, project_id, new_paths, changed_paths, kb_granularity)
+        state_index = load_state_index(project_id)
 
-            brace_count = 0
-            end_pos = -1
-            for i in range(first_brace, len(content)):
-                if content[i] == '{':
-                    brace_count += 1
-                elif content[i] == '}':
-                    brace_count -= 1
-                    if brace_count == 0:
-                        end_pos = i + 1
-                        break
+        per_locale = {}
+        for locale in locales:
+            requests = plan_locale(project_config, locale, en_data, new_paths, changed_paths, removed_paths,
+                                   memory, glossary, context, output_ratio, layout, state_index)
+            durations = [base_latency + r["output_tokens"] / tokens_per_sec for r in requests]
+            per_locale[locale] = {
+                "requests": len(requests),
+                "input_tokens": sum(r["input_tokens"] for r in requests),
+                "output_tokens": sum(r["output_tokens"] for r in requests),
+                "cost": sum(r["cost"] for r in requests),
+                "wall_time_sec": {str(c): projected_wall_time(durations, c) for c in concurrencies},
+            }
+            all_requests.extend(requests)
+
+        summary[project_id] = {
+            "diff": {"new": len(new_paths), "changed": len(changed_paths), "removed": len(removed_paths)},
+            "locales": per_locale,
+            "requests": sum(l["requests"] for l in per_locale.values()),
+            "input_tokens": sum(l["input_tokens"] for l in per_locale.values()),
+            "output_tokens": sum(l["output_tokens"] for l in per_locale.values()),
+            "cost": sum(l["cost"] for l in per_locale.values()),
+            "wall_time_sec": {str(c): sum(l["wall_time_sec"][str(c)] for l in per_locale.values()) for c in concurrencies},
+        }
 
-            if end_pos == -1:
-                if attempt < max_retries:
-                    continue
-                return None
+    # Riepilogo
+    wall_headers = "".join(f" {'@' + str(c):>9}" for c in concurrencies)
+    print(f"{'Progetto':<9} {'Lingue':>6} {'Da fare':>7} {'Richieste':>9} {'Token in':>12} {'Token out':>12} {'Costo $':>10}{wall_headers}")
+    print('─' * (70 + 10 * len(concurrencies)))
+    for project_id, p in summary.items():
+        pending = sum(1 for l in p["locales"].values() if l["requests"])
+        walls = "".join(f" {format_duration(p['wall_time_sec'][str(c)]):>9}" for c in concurrencies)
+        print(f"{project_id:<9} {len(p['locales']):>6} {pending:>7} {p['requests']:>9} {p['input_tokens']:>12,} {p['output_tokens']:>12,} {p['cost']:>10.4f}{walls}")
+    total_cost = sum(p["cost"] for p in summary.values())
+    total_walls = {str(c): sum(p["wall_time_sec"][str(c)] for p in summary.values()) for c in concurrencies}
+    print('─' * (70 + 10 * len(concurrencies)))
+    walls = "".join(f" {format_duration(total_walls[str(c)]):>9}" for c in concurrencies)
+    print(f"{'TOTALE':<9} {'':>6} {'':>7} {len(all_requests):>9} {sum(r['input_tokens'] for r in all_requests):>12,} "
+          f"{sum(r['output_tokens'] for r in all_requests):>12,} {total_cost:>10.4f}{walls}")
+    print(f"\n   Ipotesi: output ≈ {output_ratio}× JSON inviato, latenza {base_latency}s + {tokens_per_sec} token/s, "
+          f"prezzi ${GROK_INPUT_PRICE_PER_M}/1M input + ${GROK_OUTPUT_PRICE_PER_M}/1M output, senza retry")
+
+    if requests_path:
+        # Body esatti delle chat completion, una riga per richiesta
+        with open(requests_path, 'w', encoding='utf-8') as f:
+            for r in all_requests:
+                f.write(json.dumps({k: r[k] for k in ("project", "locale", "block", "unit", "body")}, ensure_ascii=False) + "\n")
+        print(f"\n📝 {len(all_requests)} richieste salvate in {requests_path}")
+
+    plan = {
+        "generated_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "model": GROK_MODEL,
+        "assumptions": {
+            "output_ratio": output_ratio,
+            "base_latency_sec": base_latency,
+            "output_tokens_per_sec": tokens_per_sec,
+            "input_price_per_m": GROK_INPUT_PRICE_PER_M,
+            "output_price_per_m": GROK_OUTPUT_PRICE_PER_M,
+        },
+        "concurrency": concurrencies,
+        "projects": summary,
+        "totals": {
+            "requests": len(all_requests),
+            "input_tokens": sum(r["input_tokens"] for r in all_requests),
+            "output_tokens": sum(r["output_tokens"] for r in all_requests),
+            "cost": total_cost,
+            "wall_time_sec": total_walls,
+        },
+        "requests": [
+            {
+                **{k: r[k] for k in ("project", "locale", "block", "unit", "kind", "input_tokens", "output_tokens", "cost")},
+                "max_tokens": r["body"]["max_tokens"],
+                "prompt_sha256": hashlib.sha256(r["body"]["messages"][0]["content"].encode("utf-8")).hexdigest(),
+            }
+            for r in all_requests
+        ],
+    }
+    if output_path:
+        save_json(Path(output_path), plan)
+        print(f"💾 Piano salvato in {output_path}")
+    return plan
+
+def format_duration(seconds: float) -> str:
+    """1h02m / 3m20s / 12s"""
+    seconds = int(round(seconds))
+    if seconds >= 3600:
+        return f"{seconds // 3600}h{(seconds % 3600) // 60:02d}m"
+    if seconds >= 60:
+        return f"{seconds // 60}m{seconds % 60:02d}s"
+    return f"{seconds}s"
 
-            json_str = content[first_brace:end_pos]
+# ============================================================================
+# STATUS (zero API): stato traduzioni per lingua dall'indice
+# ============================================================================
 
-            json_str = re.sub(r',\s*}', '}', json_str)
-            json_str = re.sub(r',\s*]', ']', json_str)
+def run_status(project_config: Dict, locales: List[str], en_data: Dict, new_paths: set, changed_paths: set,
+               removed_paths: set, layout: Dict, state_index: Dict) -> Dict[str, Dict]:
+    """
+    Stato per lingua dall'indice: scansione dei byte di stato, file target riletti solo
+    per le lingue il cui stato non è più valido (poi salvato nell'indice).
+    """
+    project_id = project_config.get("id", "site")
+    memory = load_memory(project_id)
+    report = {}
+    recomputed = 0
 
-            try:
-                result = json.loads(json_str)
-                return result
-            except json.JSONDecodeError as e:
-                if attempt < max_retries:
-                    continue
-                print(f"      ⚠️  JSON non valido: {str(e)[:100]}")
+    started = time.perf_counter()
+    for locale in locales:
+        state = cached_locale_state(state_index, layout, project_config, locale, memory.get(locale, {}))
+        if state is None:
+            prepare_locale(locale, en_data, new_paths, changed_paths, removed_paths, memory, project_config,
+                           verbose=False, layout=layout, state_index=state_index)
+            state = cached_locale_state(state_index, layout, project_config, locale, memory.get(locale, {}))
+            recomputed += 1
+        report[locale] = {**summarize_state(state), "blocks": [name for name, _ in select_blocks_from_state(layout, state)]}
+    elapsed_ms = (time.perf_counter() - started) * 1000
+
+    print(f"{'Lingua':<10} {'Tradotte':>10} {'%':>7} {'Da fare':>8} {'Mancanti':>9} {'Blocchi':>8}")
+    print('─' * 56)
+    for locale, r in report.items():
+        pct = r["translated"] / r["total"] * 100 if r["total"] else 100.0
+        print(f"{locale:<10} {r['translated']:>10} {pct:>6.1f}% {r['pending']:>8} {r['missing']:>9} {len(r['blocks']):>8}")
+    print('─' * 56)
+    print(f"⚡ {len(locales)} lingue in {elapsed_ms:.1f} ms ({len(locales) - recomputed} da indice, {recomputed} ricalcolate)")
+
+    if recomputed:
+        save_state_index(state_index, project_id)
+    return report
+
+# ============================================================================
+# WATCH: modifiche EN tradotte in modo incrementale (solo le path toccate)
+# ============================================================================
+
+def read_en_sources(project_config: Dict) -> Optional[Dict]:
+    """Come load_en_data, ma None se un file sorgente non è leggibile (es. salvataggio a metà)"""
+    en_data = {}
+    for source_file_info in get_source_files(project_config):
+        en_file = resolve_project_path(project_config, source_file_info["file"])
+        if not en_file.exists():
+            continue
+        try:
+            with open(en_file, 'r', encoding='utf-8') as f:
+                en_data = {**en_data, **json.load(f)}
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"⚠️  {en_file.name} non leggibile ({e}), attendo il prossimo salvataggio")
+            return None
+    return en_data
+
+def load_watched_project(project_id: str, locale_arg: Optional[str]) -> Optional[Dict]:
+    """Stato caldo di un progetto in watch: config, lingue, EN di riferimento, memoria, indice stati"""
+    project_config = load_project_config(project_id)
+    if not project_config:
+        print(f"❌ Configurazione progetto '{project_id}' non trovata")
+        return None
+    project_config["sourceLocale"] = "en-GB"
+
+    source_files = [resolve_project_path(project_config, f["file"]) for f in get_source_files(project_config)]
+    source_files = [path for path in source_files if path.exists()]
+    if not source_files:
+        print(f"❌ {project_id}: nessun file sorgente trovato")
+        return None
+
+    snapshot_path = resolve_project_path(project_config, get_snapshot_file_for_locale(project_config, "en-GB"))
+    return {
+        "id": project_id,
+        "config": project_config,
+        "source_files": source_files,
+        "locales": [l for l in select_locales(project_id, locale_arg) if l.lower() != "en-gb"],
+        # Riferimento del primo diff = snapshot EN: le modifiche fatte a watch spento vengono recuperate all'avvio
+        "en_data": load_json(snapshot_path) or read_en_sources(project_config) or {},
+        "snapshot_path": snapshot_path,
+        "memory": load_memory(project_id),
+        "state_index": load_state_index(project_id),
+    }
+
+def translate_delta_block(client: OpenAI, project_id: str, locale: str, lang_name: str, block_name: str, delta: any,
+                          glossary: Dict, context: str, dry_run: bool, usage_sink: List[Dict]) -> Optional[any]:
+    """Traduce solo le path cambiate di un blocco (stessi prompt della run completa)"""
+    if project_id == "kb" and block_name == "fused_by_iso":
+        translated = {}
+        for _, _, batch in build_request_units(project_id, block_name, delta, verbose=False):
+            if dry_run:
+                translated.update(batch)
+                continue
+            result, _, _, token_usage = translate_batch_with_cost_tracking_sync(
+                batch, locale, lang_name, project_id, glossary, context, client, cost_per_token=COST_PER_TOKEN_KB
+            )
+            if not result:
                 return None
+            usage_sink.append(token_usage)
+            translated.update({k: v for k, v in unwrap_batch_result(result, batch.keys()).items() if k in batch})
+        return translated
+
+    result = translate_block_chunks(client, locale, lang_name, block_name, delta, glossary, context, dry_run=dry_run, usage_sink=usage_sink)
+    return result.get(block_name) if result else None
+
+def apply_en_update(watched: Dict, client: Optional[OpenAI], args, executor: ThreadPoolExecutor):
+    """Rilegge EN, traduce le path nuove/cambiate per tutte le lingue e scrive solo quelle"""
+    project_id = watched["id"]
+    project_config = watched["config"]
+    en_data = read_en_sources(project_config)
+    if en_data is None:
+        return
+    old_en = watched["en_data"]
+    new_paths, changed_paths, removed_paths = diff_en(en_data, old_en)
+    if not (new_paths or changed_paths or removed_paths):
+        return
 
-        except Exception as e:
-            if attempt < max_retries:
+    started = time.time()
+    # delta = foglie EN nuove/cambiate (fallback se la traduzione fallisce), to_send = delta senza i vuoti KB
+    delta, to_send = {}, {}
+    for block_name, block_data in en_data.items():
+        block_delta = changed_subtree(block_data, old_en.get(block_name, _MISSING))
+        if block_delta is _MISSING:
+            continue
+        delta[block_name] = block_delta
+        if project_id == "kb" and isinstance(block_delta, dict):
+            block_delta = filter_empty_values_recursive(block_delta)
+        if block_delta not in ({}, None, ""):
+            to_send[block_name] = block_delta
+
+    # Solo lingue con file esistenti: il watch non crea file nuovi (vedi --create-missing)
+    locales = [l for l in watched["locales"] if any(locale_files_signature(project_config, l).values())]
+    print(f"\n✏️  EN {project_id}: ➕ {len(new_paths)} | ✏️ {len(changed_paths)} | 🗑️ {len(removed_paths)} "
+          f"→ {len(to_send)} blocchi × {len(locales)} lingue")
+
+    glossary = load_glossary()
+    context = load_context()
+    config = load_language_config(project_id)
+    jobs = {}
+    for locale in locales:
+        lang_name = config.get(locale, {}).get("name", locale)
+        for block_name, block_delta in to_send.items():
+            usage = []
+            future = submit_in_context(executor, translate_delta_block, client, project_id, locale, lang_name, block_name,
+                                       block_delta, glossary, context, args.dry_run, usage)
+            jobs[(locale, block_name)] = (future, usage)
+
+    # Risultati applicati nel thread del watch (memoria e file non sono condivisi con i worker)
+    memory = watched["memory"]
+    layout = build_en_layout(en_data, project_id)
+    translated_paths = 0
+    failed = []
+    for locale in locales:
+        results = {block_name: jobs[(locale, block_name)] for block_name in to_send}
+        translated = {block_name: future.result() for block_name, (future, _) in results.items()}
+        if args.dry_run:
+            continue
+
+        target_data = load_locale_data(project_config, locale)
+        if removed_paths:
+            remove_paths(target_data, removed_paths)
+            mem = memory.get(locale, {})
+            for path in removed_paths:
+                mem.pop(path, None)
+        synced_data = sync_structure(en_data, target_data)
+
+        for block_name, block_delta in delta.items():
+            synced_data[block_name] = overlay_tree(synced_data[block_name], block_delta)
+            if block_name not in to_send:
                 continue
-            print(f"      ❌ Errore: {str(e)[:100]}")
-            return None
+            if translated[block_name] is None:
+                failed.append(locale)
+                continue
+            merged_delta = merge_preserving_structure(to_send[block_name], translated[block_name])
+            synced_data[block_name] = overlay_tree(synced_data[block_name], merged_delta)
+            usage_records = results[block_name][1]
+            token_usage = {key: sum(u.get(key, 0) for u in usage_records) for key in ("input_tokens", "output_tokens", "total_tokens")}
+            update_memory_for_block(locale, block_name, merged_delta, memory, new_memory_request(memory, token_usage, requests=len(usage_records)))
+            translated_paths += len(flatten_json({block_name: merged_delta}))
+
+        save_locale_data(project_config, locale, synced_data)
+        store_locale_state(watched["state_index"], layout, project_config, locale,
+                           compute_locale_state(layout, synced_data, memory.get(locale, {})), memory.get(locale, {}))
+
+    watched["en_data"] = en_data
+    if args.dry_run:
+        print(f"🔍 {project_id}: DRY-RUN, nessun file scritto")
+        return
+    save_memory(memory, project_id)
+    save_state_index(watched["state_index"], project_id)
+    save_json(watched["snapshot_path"], en_data)
+    save_source_shards(project_config, en_data)
+    refresh_status_matrix(project_config)
+    failed = sorted(set(failed))
+    print(f"{'✅' if not failed else '⚠️ '} {project_id}: {translated_paths} path tradotte in "
+          f"{len(locales) - len(failed)}/{len(locales)} lingue ({format_duration(time.time() - started)})"
+          + (f" - fallite: {', '.join(failed)}" if failed else ""))
+
+def run_watch(project_ids: List[str], args, client: Optional[OpenAI], stop_event: Optional[threading.Event] = None):
+    """
+    Processo residente: EN, memoria, indici e client restano caldi; ogni salvataggio dei file
+    sorgente (inotify, o polling) viene tradotto solo per le path toccate, in tutte le lingue.
+    """
+    from source_watcher import open_watcher, wait_for_changes
+
+    projects = {}
+    for project_id in project_ids:
+        watched = load_watched_project(project_id, args.locale)
+        if watched:
+            projects[project_id] = watched
+    if not projects:
+        sys.exit(1)
 
-    return None
+    owners: Dict[Path, List[str]] = {}
+    for project_id, watched in projects.items():
+        for path in watched["source_files"]:
+            owners.setdefault(path.resolve(), []).append(project_id)
+
+    watcher = open_watcher(owners.keys(), poll_interval=args.watch_interval, force_polling=args.watch_polling)
+    executor = ThreadPoolExecutor(max_workers=max(1, int(grok_controller().max_limit)))
+    print(f"👀 Watch ({watcher.kind}) su {len(owners)} file EN: {', '.join(projects)} "
+          f"(debounce {args.watch_debounce}s, Ctrl+C per uscire)")
+    try:
+        for watched in projects.values():
+            apply_en_update(watched, client, args, executor)
+        while stop_event is None or not stop_event.is_set():
+            changed = wait_for_changes(watcher, args.watch_debounce, idle_timeout=1.0)
+            for project_id in dict.fromkeys(pid for path in changed for pid in owners.get(path, [])):
+                apply_en_update(projects[project_id], client, args, executor)
+    except KeyboardInterrupt:
+        print("\n👋 Watch terminato")
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+        watcher.close()
 
 # ============================================================================
 # MAIN
 # ============================================================================
 
-def main():
+def main(argv: Optional[List[str]] = None):
     import argparse
 
     parser = argparse.ArgumentParser(description='Sincronizza e traduce JSON i18n con Grok API - Versione OTTIMIZZATA 2026')
-    parser.add_argument('--locale', help='Locale specifico (default: tutti)')
+    parser.add_argument('--locale', help='Locale specifici, comma-separated (default: tutti)')
     parser.add_argument('--create-missing', action='store_true', help='Crea file mancanti da EN')
-    parser.add_argument('--verify-only', action='store_true', help='Solo verifica, non traduce')
+    parser.add_argument('--verify-only', action='store_true', help='Solo verifica offline (struttura, placeholder, tag HTML; vedi i18n_verify.py), non traduce')
     parser.add_argument('--all', action='store_true', help='Forza tutte le lingue configurate')
-    parser.add_argument('--project', default='site', help='ID progetto (site, app, kb) - default: site')
+    parser.add_argument('--project', default='site', help='ID progetto (site, app, kb) - default: site. Più progetti comma-separated o "all": un solo processo, client e limite di concorrenza condivisi')
     parser.add_argument('--limit-blocks', help='Limita traduzione a blocchi specifici (comma-separated)')
     parser.add_argument('--dry-run', action='store_true', help='Mostra cosa verrebbe inviato a Grok senza chiamare l\'API')
+    parser.add_argument('--max-concurrency', type=int, help='Tetto richieste Grok in volo (default: env LLM_MAX_CONCURRENCY o 16)')
+    parser.add_argument('--initial-concurrency', type=int, help='Richieste in volo iniziali prima dell\'adattamento AIMD (default: 2)')
+    parser.add_argument('--retry-budget', type=int, help='Retry massimi per questa run, tutti i batch insieme (default: env LLM_RETRY_BUDGET o 50)')
+    parser.add_argument('--no-cache', action='store_true', help='Non usa la cache delle risposte LLM (né lettura né scrittura)')
+    parser.add_argument('--refresh-cache', action='store_true', help='Ignora le risposte in cache ma salva quelle nuove')
+    parser.add_argument('--plan', action='store_true', help='Pre-flight senza API key né rete: richieste, token, costo e tempo stimati')
+    parser.add_argument('--plan-concurrency', default='1,4,8,16', help='Concorrenze per cui stimare il tempo (comma-separated, default: 1,4,8,16)')
+    parser.add_argument('--plan-output', help='Salva il piano (riepilogo + elenco richieste) in questo file JSON')
+    parser.add_argument('--plan-requests', help='Salva i body esatti delle richieste in questo file JSONL')
+    parser.add_argument('--kb-granularity', choices=KB_GRANULARITIES, default=DEFAULT_KB_GRANULARITY,
+                        help='KB: ritraduce solo i paesi (country, default) o le sezioni (section) con path nuove/cambiate/mancanti; block = tutto fused_by_iso')
+    parser.add_argument('--status', action='store_true', help='Stato traduzioni per lingua dall\'indice (nessuna chiamata API)')
+    parser.add_argument('--watch', action='store_true', help='Resta in ascolto sui file EN e traduce subito solo le path modificate')
+    parser.add_argument('--watch-debounce', type=float, default=1.0, help='Secondi senza nuovi salvataggi prima di tradurre (default: 1.0)')
+    parser.add_argument('--watch-polling', action='store_true', help='Usa il polling invece di inotify')
+    parser.add_argument('--watch-interval', type=float, default=1.0, help='Intervallo del polling in secondi (default: 1.0)')
+
+    args = parser.parse_args(argv)
+
+    if args.plan:
+        project_ids = parse_project_ids(args.project)
+        concurrencies = [int(c) for c in args.plan_concurrency.split(",") if c.strip()]
+        run_plan(project_ids, args.locale, concurrencies, args.plan_output, args.plan_requests,
+                 kb_granularity=args.kb_granularity)
+        return
+
+    project_ids = parse_project_ids(args.project)
+    if not project_ids:
+        print("❌ Nessun progetto da processare")
+        sys.exit(1)
+
+    # Verifica offline (scripts/i18n_verify.py): nessuna API key, lingue in parallelo su più processi
+    if args.verify_only:
+        if args.create_missing:
+            for project_id in project_ids:
+                project_config = load_project_config(project_id)
+                if project_config:
+                    project_config["sourceLocale"] = "en-GB"
+                    create_missing_files(project_config, select_locales(project_id, args.locale))
+        from i18n_verify import run_verify
+        sys.exit(run_verify(project_ids, args.locale))
+
+    # Verifica API key (dry-run e status non chiamano mai l'API)
+    client = None
+    if not args.dry_run and not args.status:
+        if not GROK_API_KEY:
+            print("❌ GROK_API_KEY non configurata!")
+            print("   Imposta: export GROK_API_KEY='la_tua_api_key'")
+            print("   Per una stima senza API key usa --plan")
+            sys.exit(1)
+
+        print("🔍 Inizializzando Grok API...")
+        client = init_grok_client()
+        if not client:
+            sys.exit(1)
+        print("✅ Grok API OK\n")
+
+    # Client, limite di concorrenza e budget retry condivisi da tutti i progetti della run
+    controller = get_controller("grok", initial_limit=args.initial_concurrency, max_limit=args.max_concurrency)
+    retry_policy = start_retry_run("grok", budget=args.retry_budget)
+    response_cache = configure_response_cache(no_cache=args.no_cache, refresh=args.refresh_cache)
+    print(f"🔁 Budget retry per questa run: {retry_policy.budget}")
+    print(f"💾 Cache risposte: {response_cache.mode} ({response_cache.directory})")
+    print(f"⚙️  Concorrenza adattiva: limite iniziale {controller.limit:.0f}, massimo {controller.max_limit:.0f}\n")
+
+    if args.watch:
+        run_watch(project_ids, args, client)
+        return
+
+    if len(project_ids) == 1:
+        run_project(project_ids[0], args, client)
+        return
+
+    run_projects_parallel(project_ids, args, client)
+
+def parse_project_ids(project_arg: str) -> List[str]:
+    """--project: un id, più id comma-separated o "all" (tutti i progetti in config/i18n-projects.json)"""
+    if project_arg == "all":
+        return [p.get("id") for p in load_json(PROJECTS_CONFIG).get("projects", []) if p.get("id")]
+    return list(dict.fromkeys(p.strip() for p in project_arg.split(",") if p.strip()))
+
+def run_projects_parallel(project_ids: List[str], args, client: Optional[OpenAI]):
+    """Più progetti nello stesso processo: un thread per progetto, stesso client e stesso limite AIMD.
+
+    Le lingue KB (batch grandi) si sovrappongono a site/app invece di aspettarne la fine;
+    ogni progetto mantiene la propria memoria e il proprio indice stati.
+    """
+    print(f"🧩 Progetti in parallelo: {', '.join(project_ids)}\n")
+    started = time.time()
+    stdout = sys.stdout
+    sys.stdout = PrefixedStdout(stdout)
+    results = {}
+    try:
+        with ThreadPoolExecutor(max_workers=len(project_ids)) as executor:
+            futures = {}
+            for project_id in project_ids:
+                context = contextvars.copy_context()
+                context.run(LOG_PREFIX.set, f"[{project_id}] ")
+                futures[project_id] = executor.submit(context.run, run_project, project_id, args, client)
+            for project_id, future in futures.items():
+                try:
+                    results[project_id] = future.result()
+                except SystemExit as e:
+                    results[project_id] = {"project": project_id, "error": f"uscita con codice {e.code}"}
+                except Exception as e:
+                    results[project_id] = {"project": project_id, "error": str(e)}
+    finally:
+        sys.stdout.flush()
+        sys.stdout = stdout
 
-    args = parser.parse_args()
+    print(f"\n{'='*60}")
+    print("📊 RIEPILOGO PROGETTI")
+    print('='*60)
+    total_cost = 0.0
+    for project_id in project_ids:
+        result = results.get(project_id) or {}
+        if result.get("error"):
+            print(f"❌ {project_id}: {result['error']}")
+            continue
+        if result.get("success") is None:
+            print(f"✅ {project_id}: completato")
+            continue
+        total = len(result["success"]) + len(result["failed"])
+        total_cost += result["cost"]
+        print(f"{'✅' if not result['failed'] else '⚠️ '} {project_id}: {len(result['success'])}/{total} lingue, ${result['cost']:.4f}")
+    print(f"\n💰 Costo TOTALE: ${total_cost:.4f}")
+    print(f"⏱️  Tempo totale: {format_duration(time.time() - started)}")
+    print(f"⚙️  Concorrenza {grok_controller().describe()}")
+    print(f"🔁 {get_retry_policy('grok').describe()}")
+    print(f"💾 {get_response_cache().describe()}")
+
+    if any(result.get("error") for result in results.values()):
+        sys.exit(1)
+
+def source_data_for_target(project_config: Dict, file_info: Dict) -> Dict:
+    """Contenuto EN da cui creare un file target mancante (per gli shard: tutto il sorgente)"""
+    target_pattern = file_info["file"].split("/")[-1]
+    for source_file_info in get_source_files(project_config):
+        source_pattern = source_file_info["file"].split("/")[-1]
+        if file_info.get("shardBlock") or source_pattern == target_pattern:
+            source_file = resolve_project_path(project_config, source_file_info["file"])
+            if source_file.exists():
+                return load_json(source_file)
+    return {}
+
+def create_missing_files(project_config: Dict, locales: List[str]):
+    """Crea i file target mancanti copiando il file EN corrispondente"""
+    for locale in locales:
+        for file_info in get_files_for_locale(project_config, locale):
+            target_file = resolve_project_path(project_config, file_info["file"])
+            if not target_file.exists():
+                source_data = source_data_for_target(project_config, file_info)
+                if source_data:
+                    print(f"📝 Creando {file_info['file']} da EN...")
+                    save_target_file(project_config, file_info, source_data)
+                else:
+                    print(f"⚠️  Nessun file sorgente corrispondente per {file_info['file']}")
 
+def run_project(project_id: str, args, client: Optional[OpenAI]) -> Dict:
+    """Sync + traduzione di un progetto; ritorna lingue completate/fallite e costo"""
     # Carica configurazione progetto
-    project_config = load_project_config(args.project)
+    project_config = load_project_config(project_id)
     if not project_config:
-        print(f"⚠️  Configurazione progetto '{args.project}' non trovata, uso default 'site'")
+        print(f"⚠️  Configurazione progetto '{project_id}' non trovata, uso default 'site'")
         project_config = load_project_config("site") or {
             "id": "site",
             "basePath": "src/i18n",
@@ -1815,44 +2974,13 @@ def main():
     project_config["sourceLocale"] = "en-GB"
     # Rimossi override - ora usa il config del progetto
 
-    # Aggiorna percorsi
-    global I18N_DIR, EN_SNAPSHOT_PATH, MEMORY_PATH
-    I18N_DIR = resolve_project_path(project_config)
+    # Percorsi del progetto (locali: più progetti possono girare nello stesso processo)
     source_locale = "en-GB"
     snapshot_file = get_snapshot_file_for_locale(project_config, source_locale)
-    EN_SNAPSHOT_PATH = resolve_project_path(project_config, snapshot_file)
-    memory_file = project_config.get("memoryFile", "../scripts/translation_memory.json")
-    if memory_file.startswith("../"):
-        clean_path = memory_file.replace("../", "", 1)
-        MEMORY_PATH = ROOT_DIR / clean_path
-    else:
-        MEMORY_PATH = ROOT_DIR / memory_file
-
-    # Verifica API key
-    if not GROK_API_KEY:
-        print("❌ GROK_API_KEY non configurata!")
-        print("   Imposta: export GROK_API_KEY='la_tua_api_key'")
-        sys.exit(1)
-
-    print("🔍 Inizializzando Grok API...")
-    client = init_grok_client()
-    if not client:
-        sys.exit(1)
-    print("✅ Grok API OK\n")
+    en_snapshot_path = resolve_project_path(project_config, snapshot_file)
 
     # Carica EN (source of truth)
-    source_files = get_source_files(project_config)
-    en_data = {}
-    key_to_file_map = {}
-    for source_file_info in source_files:
-        en_file = resolve_project_path(project_config, source_file_info["file"])
-        if en_file.exists():
-            file_data = load_json(en_file)
-            for key in file_data.keys():
-                key_to_file_map[key] = source_file_info["file"]
-            en_data = {**en_data, **file_data}
-        else:
-            print(f"⚠️  {en_file} non trovato, continuo con gli altri file...")
+    en_data = load_en_data(project_config)
 
     if not en_data:
         print(f"❌ Nessun file sorgente trovato!")
@@ -1866,19 +2994,8 @@ def main():
     else:
         print("   ✅ Nessuna differenza rispetto allo snapshot EN")
 
-    # Carica config lingue (filtra per progetto: KB = 53, altri = 103)
-    config = load_language_config(project_id)
-    if not config:
-        print("⚠️  Configurazione lingue non trovata, uso lista completa predefinita")
-        config = load_language_config(project_id)
-
-    # Determina lingue
-    if args.locale:
-        locales = [args.locale] if args.locale in config else []
-        if not locales:
-            print(f"⚠️  Locale '{args.locale}' non trovato nella configurazione")
-    else:
-        locales = list(config.keys())
+    # Determina lingue (config filtrata per progetto: KB = 53, altri = 103)
+    locales = select_locales(project_id, args.locale)
 
     if not locales:
         print("❌ Nessuna lingua da processare")
@@ -1887,61 +3004,17 @@ def main():
     print(f"📋 Lingue: {len(locales)}")
     print(f"   {', '.join(locales)}\n")
 
-    # Crea file mancanti se richiesto
-    if args.create_missing:
-        for locale in locales:
-            locale_files = get_files_for_locale(project_config, locale)
-            source_files = get_source_files(project_config)
-
-            for file_info in locale_files:
-                target_file = resolve_project_path(project_config, file_info["file"])
-                if not target_file.exists():
-                    target_pattern = file_info["file"].split("/")[-1]
-                    source_data = {}
-                    for source_file_info in source_files:
-                        source_pattern = source_file_info["file"].split("/")[-1]
-                        if source_pattern == target_pattern:
-                            source_file = resolve_project_path(project_config, source_file_info["file"])
-                            if source_file.exists():
-                                source_data = load_json(source_file)
-                                break
-
-                    if source_data:
-                        print(f"📝 Creando {file_info['file']} da EN...")
-                        save_json(target_file, source_data)
-                    else:
-                        print(f"⚠️  Nessun file sorgente corrispondente per {file_info['file']}")
-
-    # Verifica solo se richiesto
-    if args.verify_only:
-        print("\n🔍 VERIFICA STRUTTURA\n")
-        for locale in locales:
-            locale_files = get_files_for_locale(project_config, locale)
-            target_data = {}
+    # Vista piatta di EN + indice stati per lingua (selezione blocchi senza walk dell'albero)
+    layout = build_en_layout(en_data, project_id, new_paths, changed_paths, args.kb_granularity)
+    state_index = load_state_index(project_id)
 
-            for file_info in locale_files:
-                target_file = resolve_project_path(project_config, file_info["file"])
-                if target_file.exists():
-                    file_data = load_json(target_file)
-                    target_data = {**target_data, **file_data}
+    if args.status:
+        run_status(project_config, locales, en_data, new_paths, changed_paths, removed_paths, layout, state_index)
+        return {"project": project_id}
 
-            if not target_data:
-                print(f"❌ {locale}: nessun file trovato")
-                continue
-
-            target_keys = set(target_data.keys())
-
-            if en_keys == target_keys:
-                print(f"✅ {locale}: struttura OK ({len(target_keys)} chiavi)")
-            else:
-                missing = en_keys - target_keys
-                extra = target_keys - en_keys
-                print(f"⚠️  {locale}: struttura non allineata")
-                if missing:
-                    print(f"   Mancanti: {', '.join(list(missing)[:5])}")
-                if extra:
-                    print(f"   Extra: {', '.join(list(extra)[:5])}")
-        return
+    # Crea file mancanti se richiesto
+    if args.create_missing:
+        create_missing_files(project_config, locales)
 
     # Memoria traduzioni
     memory = load_memory(project_id)
@@ -1960,23 +3033,13 @@ def main():
         locale_files = get_files_for_locale(project_config, locale)
 
         # Crea file mancanti
-        source_files = get_source_files(project_config)
         for file_info in locale_files:
             target_file = resolve_project_path(project_config, file_info["file"])
             if not target_file.exists():
-                target_pattern = file_info["file"].split("/")[-1]
-                source_data = {}
-                for source_file_info in source_files:
-                    source_pattern = source_file_info["file"].split("/")[-1]
-                    if source_pattern == target_pattern:
-                        source_file = resolve_project_path(project_config, source_file_info["file"])
-                        if source_file.exists():
-                            source_data = load_json(source_file)
-                            break
-
+                source_data = source_data_for_target(project_config, file_info)
                 if source_data:
                     print(f"⚠️  {file_info['file']} non esiste, creo da EN...")
-                    save_json(target_file, source_data)
+                    save_target_file(project_config, file_info, source_data)
 
         ok, translated_data, memory, locale_cost = translate_locale(
             locale,
@@ -1988,7 +3051,9 @@ def main():
             memory,
             project_config,
             dry_run=args.dry_run,
-            args=args
+            args=args,
+            layout=layout,
+            state_index=state_index
         )
 
         total_cost_all_locales += locale_cost
@@ -2004,10 +3069,6 @@ def main():
             print(f"   ⚠️  Struttura non allineata dopo traduzione!")
             failed.append(locale)
 
-        # Pausa tra lingue
-        if idx < len(locales):
-            print(f"\n⏸️  Pausa 3 secondi...")
-            time.sleep(3)
 
     # Riepilogo
     print(f"\n{'='*60}")
@@ -2021,19 +3082,15 @@ def main():
         print(f"   {', '.join(failed)}")
 
     print(f"\n💰 Costo TOTALE: ${total_cost_all_locales:.4f}")
+    print(f"⚙️  Concorrenza {grok_controller().describe()}")
+    print(f"🔁 {get_retry_policy('grok').describe()}")
+    print(f"💾 {get_response_cache().describe()}")
 
     # Verifica struttura finale
     print(f"\n🔍 Verifica struttura finale...")
     all_ok = True
     for locale in locales:
-        locale_files = get_files_for_locale(project_config, locale)
-        target_data = {}
-
-        for file_info in locale_files:
-            target_file = resolve_project_path(project_config, file_info["file"])
-            if target_file.exists():
-                file_data = load_json(target_file)
-                target_data = {**target_data, **file_data}
+        target_data = load_locale_data(project_config, locale)
 
         if target_data:
             target_keys = set(target_data.keys())
@@ -2047,9 +3104,14 @@ def main():
     if all_ok:
         print(f"   ✅ Tutte le lingue hanno struttura corretta!")
 
-    # Salva memoria e snapshot EN aggiornato
+    # Salva memoria, indice stati e snapshot EN aggiornato
     save_memory(memory, project_id)
-    save_json(EN_SNAPSHOT_PATH, en_data)
+    save_state_index(state_index, project_id)
+    save_json(en_snapshot_path, en_data)
+    save_source_shards(project_config, en_data)
+    refresh_status_matrix(project_config)
+
+    return {"project": project_id, "success": success, "failed": failed, "cost": total_cost_all_locales}
 
 if __name__ == "__main__":
     main()
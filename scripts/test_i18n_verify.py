@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Test dell'estrazione placeholder di i18n_verify (i18next e argomenti ICU annidati).
+
+    python -m unittest test_i18n_verify      (dalla cartella scripts)
+"""
+
+import unittest
+
+from i18n_verify import LocaleChecker, placeholders
+
+
+class PlaceholdersTest(unittest.TestCase):
+
+    def test_simple_and_i18next(self):
+        self.assertEqual(placeholders("Hi {name}, {{user}} has {n, number}"), {"name", "user", "n,number"})
+
+    def test_plural_branches_are_text(self):
+        self.assertEqual(placeholders("{count, plural, one {item} other {items}}"), {"count,plural"})
+        self.assertEqual(placeholders("{count, plural, one {articolo} other {articoli}}"), {"count,plural"})
+
+    def test_nested_arguments(self):
+        text = "{gender, select, male {{count, plural, one {# file di {owner}} other {# files}}} other {nessuno}}"
+        self.assertEqual(placeholders(text), {"gender,select", "count,plural", "owner"})
+        self.assertEqual(placeholders("{count, plural, offset:1 =0 {none} other {# others}}"), {"count,plural"})
+
+    def test_literal_braces(self):
+        self.assertEqual(placeholders("{ not an arg } {a}"), {"a"})
+
+
+class PluralCheckTest(unittest.TestCase):
+
+    def test_translated_plural_passes(self):
+        checker = LocaleChecker(memory={}, max_issues=10)
+        checker.compare({"cart": "{count, plural, one {# item} other {# items}}"},
+                        {"cart": "{count, plural, one {# articolo} other {# articoli}}"}, "")
+        self.assertEqual(checker.counts["placeholder"], 0)
+
+    def test_renamed_argument_fails(self):
+        checker = LocaleChecker(memory={}, max_issues=10)
+        checker.compare({"cart": "{count, plural, one {# item} other {# items}}"},
+                        {"cart": "{numero, plural, one {# articolo} other {# articoli}}"}, "")
+        self.assertEqual(checker.counts["placeholder"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,514 @@
+#!/usr/bin/env python3
+"""
+Servizio HTTP locale (asyncio) sopra il motore di traduzione di sync_and_translate_grok_2026.py,
+usato da /api/i18n/translate quando I18N_SERVICE_URL è configurata.
+
+Stesso comportamento della pipeline batch: prompt per progetto, glossario e contesto, batch KB,
+concorrenza adattiva AIMD condivisa, budget retry per job, memoria traduzioni e indice stati.
+- Le path già in memoria (con EN invariato rispetto allo snapshot) vengono servite senza modello
+- Richieste concorrenti per le stesse path della stessa lingua condividono la stessa richiesta
+- I file target, la memoria e l'indice stati vengono aggiornati come in una run normale
+
+Endpoint (JSON):
+- POST   /translate         {project, locale, paths?, dryRun?, wait?} → job (risultato incluso con wait)
+- GET    /jobs              job recenti
+- GET    /jobs/{id}         stato, avanzamento e risultato di un job
+- DELETE /jobs/{id}         annulla un job (le richieste già inviate al modello terminano comunque)
+- GET    /memory?project=&locale=&path=...   valori in memoria per le path richieste
+- GET    /health            job attivi, path in volo, concorrenza
+
+Senza "paths" il job traduce tutte le path non ancora tradotte della lingua (come la run batch).
+Con I18N_SERVICE_TOKEN impostata le richieste devono avere "Authorization: Bearer <token>".
+
+Uso:
+    python scripts/translation_service.py --port 8787
+    I18N_SERVICE_URL=http://127.0.0.1:8787 npm run dev
+"""
+
+import argparse
+import asyncio
+import contextvars
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+sys.path.append(str(Path(__file__).parent))
+
+import sync_and_translate_grok_2026 as sync
+from llm_runtime import get_controller, retry_scope
+
+DEFAULT_PORT = 8787
+MAX_BODY_BYTES = 4 * 1024 * 1024
+MAX_FINISHED_JOBS = 200
+
+# Id progetto della dashboard → id del traduttore
+PROJECT_ALIASES = {"compliance": "kb"}
+
+class HttpError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+# ============================================================================
+# SERVIZIO
+# ============================================================================
+
+class TranslationService:
+    """Stato caldo del servizio: progetti, job e path in traduzione"""
+
+    def __init__(self, client, dry_run: bool = False, retry_budget: Optional[int] = None):
+        self.client = client
+        self.dry_run = dry_run
+        self.retry_budget = retry_budget
+        self.jobs: Dict[str, Dict] = {}
+        self.tasks: Dict[str, asyncio.Task] = {}
+        # (progetto, lingua, path) → future del valore tradotto (None se la traduzione fallisce)
+        self.inflight: Dict[Tuple[str, str, str], asyncio.Future] = {}
+        self.projects: Dict[str, Dict] = {}
+        self.project_locks: Dict[str, asyncio.Lock] = {}
+        self.executor = ThreadPoolExecutor(max_workers=max(1, int(sync.grok_controller().max_limit)))
+
+    # ------------------------------------------------------------------ progetti
+
+    def load_project(self, project_id: str) -> Dict:
+        """Config, memoria e indice stati restano in memoria; EN viene riletto solo se cambia su disco"""
+        project = self.projects.get(project_id)
+        if project is None:
+            project_config = sync.load_project_config(project_id)
+            if not project_config:
+                raise HttpError(404, f"Progetto '{project_id}' non trovato")
+            project_config["sourceLocale"] = "en-GB"
+            project = {
+                "id": project_id,
+                "config": project_config,
+                "locales": set(sync.select_locales(project_id, None)),
+                "memory": sync.load_memory(project_id),
+                "state_index": sync.load_state_index(project_id),
+                # Memoria e indice stati sono scritti e letti da thread diversi (to_thread): stesso lock per tutti
+                "lock": threading.Lock(),
+                "source_key": None,
+            }
+            self.projects[project_id] = project
+
+        sources = []
+        for source_file_info in sync.get_source_files(project["config"]):
+            en_file = sync.resolve_project_path(project["config"], source_file_info["file"])
+            if en_file.exists():
+                sources.append(sync.read_cached_file(en_file, json.loads))
+        if not sources:
+            raise HttpError(409, f"Nessun file sorgente EN per '{project_id}'")
+
+        # read_cached_file ritorna lo stesso oggetto finché il file non cambia
+        source_key = tuple(id(source) for source in sources)
+        if source_key != project["source_key"]:
+            en_data = {}
+            for source in sources:
+                en_data = {**en_data, **source}
+            _, changed_paths, _ = sync.diff_en(en_data, sync.load_en_snapshot(project["config"]))
+            project.update({
+                "source_key": source_key,
+                "en_data": en_data,
+                "layout": sync.build_en_layout(en_data, project_id),
+                "changed_paths": changed_paths,
+            })
+            project["en_flat"] = dict(project["layout"]["paths"])
+        return project
+
+    def pending_paths(self, project: Dict, locale: str) -> List[str]:
+        """Path non ancora tradotte della lingua (stato dall'indice, ricalcolato se non valido)"""
+        layout = project["layout"]
+        with project["lock"]:
+            mem_for_locale = project["memory"].get(locale, {})
+            state = sync.cached_locale_state(project["state_index"], layout, project["config"], locale, mem_for_locale)
+            if state is None:
+                state = sync.compute_locale_state(layout, sync.load_locale_data(project["config"], locale), mem_for_locale)
+        return [path for idx, (path, _) in enumerate(layout["paths"]) if state[idx] != sync.STATE_TRANSLATED]
+
+    def memory_hits(self, project: Dict, locale: str, paths: List[str]) -> Dict[str, object]:
+        """Path con una traduzione in memoria ancora valida (EN non cambiato dallo snapshot)"""
+        hits = {}
+        with project["lock"]:
+            mem = project["memory"].get(locale, {})
+            for path in paths:
+                if path in mem and path not in project["changed_paths"]:
+                    value = sync.memory_entry_value(mem[path])
+                    if value is not None:
+                        hits[path] = value
+        return hits
+
+    # ------------------------------------------------------------------ job
+
+    def create_job(self, request: Dict) -> Dict:
+        project_id = PROJECT_ALIASES.get(request.get("project"), request.get("project"))
+        locale = request.get("locale") or request.get("targetLocale")
+        if not project_id or not locale:
+            raise HttpError(400, "project e locale sono obbligatori")
+        paths = request.get("paths")
+        if paths is not None and (not isinstance(paths, list) or not all(isinstance(p, str) for p in paths)):
+            raise HttpError(400, "paths deve essere una lista di path (notazione flatten: a.b[0].c)")
+
+        job_id = uuid.uuid4().hex[:12]
+        job = {
+            "id": job_id,
+            "project": project_id,
+            "locale": locale,
+            "status": "queued",
+            "dryRun": bool(request.get("dryRun")) or self.dry_run,
+            "requestedPaths": paths,
+            "progress": {"requested": 0, "memoryHits": 0, "coalesced": 0, "translated": 0, "failed": 0},
+            "result": None,
+            "error": None,
+            "createdAt": round(time.time(), 3),
+            "finishedAt": None,
+        }
+        self.jobs[job_id] = job
+        self.tasks[job_id] = asyncio.get_running_loop().create_task(self.run_job(job))
+        self.prune_jobs()
+        return job
+
+    def prune_jobs(self):
+        finished = [job_id for job_id, job in self.jobs.items() if job["finishedAt"] is not None]
+        for job_id in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            self.jobs.pop(job_id, None)
+
+    def cancel_job(self, job_id: str) -> Dict:
+        job = self.jobs.get(job_id)
+        if job is None:
+            raise HttpError(404, f"Job '{job_id}' non trovato")
+        task = self.tasks.get(job_id)
+        if task and not task.done():
+            task.cancel()
+        return job
+
+    async def run_job(self, job: Dict):
+        job["status"] = "running"
+        try:
+            job["result"] = await self.translate(job)
+            job["status"] = "done"
+        except asyncio.CancelledError:
+            job["status"] = "cancelled"
+        except HttpError as e:
+            job["status"] = "failed"
+            job["error"] = str(e)
+        except Exception as e:
+            job["status"] = "failed"
+            job["error"] = f"{type(e).__name__}: {e}"
+        finally:
+            job["finishedAt"] = round(time.time(), 3)
+            self.tasks.pop(job["id"], None)
+
+    async def translate(self, job: Dict) -> Dict:
+        project_id, locale = job["project"], job["locale"]
+        # Budget retry del job (il task ha il suo contesto): un periodo di errori non lo consuma per i job successivi
+        retry_policy = retry_scope("grok", budget=self.retry_budget)
+        project = await asyncio.to_thread(self.load_project, project_id)
+        if locale not in project["locales"]:
+            raise HttpError(404, f"Lingua '{locale}' non configurata per '{project_id}'")
+
+        errors = []
+        if job["requestedPaths"] is None:
+            paths = await asyncio.to_thread(self.pending_paths, project, locale)
+        else:
+            paths = [p for p in dict.fromkeys(job["requestedPaths"]) if p in project["en_flat"]]
+            unknown = len(job["requestedPaths"]) - len(paths)
+            if unknown:
+                errors.append(f"{unknown} path non presenti in EN (o vuote per KB) ignorate")
+
+        hits = await asyncio.to_thread(self.memory_hits, project, locale, paths)
+        to_translate = [path for path in paths if path not in hits]
+        progress = job["progress"]
+        progress.update({"requested": len(paths), "memoryHits": len(hits)})
+
+        result = {
+            "locale": locale,
+            "keysTranslated": 0,
+            "memoryHits": len(hits),
+            "coalesced": 0,
+            "tokensUsed": {"input": 0, "output": 0},
+            "cost": 0.0,
+            "files": [],
+            "errors": errors,
+        }
+        if job["dryRun"]:
+            delta = sync.subtree_for_paths(project["layout"]["views"], set(to_translate))
+            tokens = 0 if delta is sync._MISSING else sync.calculate_tokens_for_json(delta)
+            result["keysTranslated"] = len(to_translate)
+            result["tokensUsed"] = {"input": tokens, "output": int(tokens * sync.PLAN_OUTPUT_RATIO)}
+            result["cost"] = self.cost_for(result["tokensUsed"])
+            return result
+
+        # Path già in volo per un altro job: si aspetta quel risultato invece di richiederle di nuovo
+        owned, shared = [], {}
+        for path in to_translate:
+            future = self.inflight.get((project_id, locale, path))
+            if future is not None and not future.done():
+                shared[path] = future
+            else:
+                owned.append(path)
+        progress["coalesced"] = result["coalesced"] = len(shared)
+
+        usage: List[Dict] = []
+        owned_futures = self.start_units(project, locale, owned, usage) if owned else {}
+
+        values = dict(hits)
+        translated_owned = {}
+        for path, future in {**owned_futures, **shared}.items():
+            value = await asyncio.shield(future)
+            if value is None:
+                progress["failed"] += 1
+                continue
+            values[path] = value
+            progress["translated"] += 1
+            if path in owned_futures:
+                translated_owned[path] = value
+        if progress["failed"]:
+            errors.append(f"{progress['failed']} path non tradotte (restano in EN)")
+
+        if values:
+            async with self.project_locks.setdefault(project_id, asyncio.Lock()):
+                result["files"] = await asyncio.to_thread(self.write_values, project, locale, values, translated_owned, usage)
+
+        result["keysTranslated"] = len(values) - len(hits)
+        result["tokensUsed"] = {
+            "input": sum(u.get("input_tokens", 0) for u in usage),
+            "output": sum(u.get("output_tokens", 0) for u in usage),
+        }
+        result["cost"] = self.cost_for(result["tokensUsed"])
+        result["retries"] = retry_policy.snapshot()
+        return result
+
+    def start_units(self, project: Dict, locale: str, paths: List[str], usage: List[Dict]) -> Dict[str, asyncio.Future]:
+        """Invia le path (raggruppate per blocco, stessi prompt della run) e registra un future per path"""
+        loop = asyncio.get_running_loop()
+        project_id = project["id"]
+        lang_name = sync.load_language_config(project_id).get(locale, {}).get("name", locale)
+        glossary, context = sync.load_glossary(), sync.load_context()
+        delta = sync.subtree_for_paths(project["layout"]["views"], set(paths))
+
+        futures = {}
+        for block_name, block_delta in delta.items():
+            block_paths = list(sync.flatten_json({block_name: block_delta}))
+            path_futures = {path: loop.create_future() for path in block_paths if path in paths}
+            for path, future in path_futures.items():
+                self.inflight[(project_id, locale, path)] = future
+            futures.update(path_futures)
+
+            # Contesto del job nel worker: retry sul budget del job
+            unit = loop.run_in_executor(
+                self.executor, contextvars.copy_context().run, sync.translate_delta_block, self.client, project_id,
+                locale, lang_name, block_name, block_delta, glossary, context, False, usage
+            )
+            unit.add_done_callback(lambda done, block_name=block_name, block_delta=block_delta, path_futures=path_futures:
+                                   self.resolve_unit(project_id, locale, block_name, block_delta, path_futures, done))
+        return futures
+
+    def resolve_unit(self, project_id: str, locale: str, block_name: str, block_delta: object,
+                     path_futures: Dict[str, asyncio.Future], done: asyncio.Future):
+        translated = None if done.cancelled() or done.exception() else done.result()
+        flat = {}
+        if translated is not None:
+            flat = sync.flatten_json({block_name: sync.merge_preserving_structure(block_delta, translated)})
+        for path, future in path_futures.items():
+            self.inflight.pop((project_id, locale, path), None)
+            if not future.done():
+                future.set_result(flat.get(path))
+
+    def write_values(self, project: Dict, locale: str, values: Dict[str, object], translated: Dict[str, object],
+                     usage: List[Dict]) -> List[str]:
+        """Scrive le path tradotte nei file della lingua, aggiorna memoria e indice stati"""
+        with project["lock"]:
+            return self._write_values(project, locale, values, translated, usage)
+
+    def _write_values(self, project: Dict, locale: str, values: Dict[str, object], translated: Dict[str, object],
+                      usage: List[Dict]) -> List[str]:
+        project_config, memory = project["config"], project["memory"]
+        patch = sync.replace_leaves(sync.subtree_for_paths(project["en_data"], set(values)), values)
+        synced_data = sync.sync_structure(project["en_data"], sync.load_locale_data(project_config, locale))
+        for block_name, block_patch in patch.items():
+            synced_data[block_name] = sync.overlay_tree(synced_data[block_name], block_patch)
+
+        if translated:
+            token_usage = {key: sum(u.get(key, 0) for u in usage) for key in ("input_tokens", "output_tokens", "total_tokens")}
+            req_id = sync.new_memory_request(memory, token_usage, requests=len(usage))
+            owned_patch = sync.replace_leaves(sync.subtree_for_paths(project["en_data"], set(translated)), translated)
+            for block_name, block_patch in owned_patch.items():
+                sync.update_memory_for_block(locale, block_name, block_patch, memory, req_id)
+
+        sync.save_locale_data(project_config, locale, synced_data)
+        sync.store_locale_state(project["state_index"], project["layout"], project_config, locale,
+                                sync.compute_locale_state(project["layout"], synced_data, memory.get(locale, {})),
+                                memory.get(locale, {}))
+        sync.save_memory(memory, project["id"])
+        sync.save_state_index(project["state_index"], project["id"])
+        return [file_info["file"] for file_info in sync.get_files_for_locale(project_config, locale)]
+
+    @staticmethod
+    def cost_for(tokens: Dict[str, int]) -> float:
+        return round(tokens["input"] / 1_000_000 * sync.GROK_INPUT_PRICE_PER_M
+                     + tokens["output"] / 1_000_000 * sync.GROK_OUTPUT_PRICE_PER_M, 6)
+
+    async def memory_lookup(self, query: Dict[str, List[str]]) -> Dict:
+        project_id = PROJECT_ALIASES.get(query.get("project", [""])[0], query.get("project", [""])[0])
+        locale = query.get("locale", [""])[0]
+        if not project_id or not locale:
+            raise HttpError(400, "project e locale sono obbligatori")
+        project = await asyncio.to_thread(self.load_project, project_id)
+        paths = query.get("path", [])
+
+        def lookup() -> Dict:
+            with project["lock"]:
+                mem = project["memory"].get(locale, {})
+                return {
+                    "project": project_id,
+                    "locale": locale,
+                    "values": {path: sync.memory_entry_value(mem[path]) if path in mem else None for path in paths},
+                    "stale": [path for path in paths if path in mem and path in project["changed_paths"]],
+                }
+        return await asyncio.to_thread(lookup)
+
+    def health(self) -> Dict:
+        return {
+            "ok": True,
+            "jobs": {status: sum(1 for job in self.jobs.values() if job["status"] == status)
+                     for status in ("queued", "running", "done", "failed", "cancelled")},
+            "inflightPaths": len(self.inflight),
+            "concurrency": sync.grok_controller().snapshot(),
+        }
+
+# ============================================================================
+# HTTP (asyncio streams, HTTP/1.1 con Connection: close)
+# ============================================================================
+
+async def read_request(reader: asyncio.StreamReader) -> Tuple[str, str, Dict[str, str], bytes]:
+    request_line = (await reader.readline()).decode("latin-1").strip()
+    if not request_line:
+        raise HttpError(400, "Richiesta vuota")
+    method, target, _ = request_line.split(" ", 2)
+    headers = {}
+    while True:
+        line = (await reader.readline()).decode("latin-1")
+        if line in ("\r\n", "\n", ""):
+            break
+        name, _, value = line.partition(":")
+        headers[name.strip().lower()] = value.strip()
+    length = int(headers.get("content-length", "0") or 0)
+    if length > MAX_BODY_BYTES:
+        raise HttpError(413, "Body troppo grande")
+    body = await reader.readexactly(length) if length else b""
+    return method.upper(), target, headers, body
+
+async def write_response(writer: asyncio.StreamWriter, status: int, payload: Dict):
+    body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    reason = {200: "OK", 202: "Accepted", 400: "Bad Request", 401: "Unauthorized", 404: "Not Found",
+              405: "Method Not Allowed", 409: "Conflict", 413: "Payload Too Large", 500: "Internal Server Error"}.get(status, "OK")
+    writer.write(
+        f"HTTP/1.1 {status} {reason}\r\nContent-Type: application/json; charset=utf-8\r\n"
+        f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode("latin-1") + body
+    )
+    await writer.drain()
+
+def public_job(job: Dict) -> Dict:
+    return {key: value for key, value in job.items() if key != "requestedPaths"}
+
+async def route(service: TranslationService, method: str, target: str, body: bytes) -> Tuple[int, Dict]:
+    url = urlsplit(target)
+    parts = [part for part in url.path.split("/") if part]
+
+    if parts == ["health"] and method == "GET":
+        return 200, service.health()
+
+    if parts == ["translate"] and method == "POST":
+        try:
+            request = json.loads(body or b"{}")
+        except json.JSONDecodeError as e:
+            raise HttpError(400, f"JSON non valido: {e}")
+        job = service.create_job(request)
+        if request.get("wait", True):
+            task = service.tasks.get(job["id"])
+            if task is not None:
+                await asyncio.shield(task)
+            return 200, public_job(job)
+        return 202, public_job(job)
+
+    if parts == ["jobs"] and method == "GET":
+        return 200, {"jobs": [public_job(job) for job in list(service.jobs.values())[-50:]]}
+
+    if len(parts) == 2 and parts[0] == "jobs":
+        if method == "GET":
+            job = service.jobs.get(parts[1])
+            if job is None:
+                raise HttpError(404, f"Job '{parts[1]}' non trovato")
+            return 200, public_job(job)
+        if method == "DELETE":
+            return 202, public_job(service.cancel_job(parts[1]))
+
+    if len(parts) == 3 and parts[0] == "jobs" and parts[2] == "cancel" and method == "POST":
+        return 202, public_job(service.cancel_job(parts[1]))
+
+    if parts == ["memory"] and method == "GET":
+        return 200, await service.memory_lookup(parse_qs(url.query))
+
+    raise HttpError(404 if method in ("GET", "POST", "DELETE") else 405, f"{method} {url.path} non supportato")
+
+def make_handler(service: TranslationService, token: Optional[str]):
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            try:
+                method, target, headers, body = await read_request(reader)
+                if token and headers.get("authorization") != f"Bearer {token}":
+                    raise HttpError(401, "Unauthorized")
+                status, payload = await route(service, method, target, body)
+            except HttpError as e:
+                status, payload = e.status, {"error": str(e)}
+            except (ValueError, asyncio.IncompleteReadError) as e:
+                status, payload = 400, {"error": f"Richiesta non valida: {e}"}
+            except Exception as e:
+                status, payload = 500, {"error": f"{type(e).__name__}: {e}"}
+            await write_response(writer, status, payload)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+    return handle
+
+async def serve(host: str, port: int, service: TranslationService, token: Optional[str]):
+    server = await asyncio.start_server(make_handler(service, token), host, port)
+    bound = server.sockets[0].getsockname()
+    print(f"🌐 Servizio traduzioni su http://{bound[0]}:{bound[1]} ({'token richiesto' if token else 'senza token'})")
+    async with server:
+        await server.serve_forever()
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description='Servizio HTTP locale per tradurre path i18n con il motore batch')
+    parser.add_argument('--host', default='127.0.0.1', help='Indirizzo di ascolto (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=int(os.getenv("I18N_SERVICE_PORT", DEFAULT_PORT)), help=f'Porta (default: env I18N_SERVICE_PORT o {DEFAULT_PORT})')
+    parser.add_argument('--dry-run', action='store_true', help='Solo stime: nessuna chiamata al modello, nessun file scritto')
+    parser.add_argument('--max-concurrency', type=int, help='Tetto richieste Grok in volo (default: env LLM_MAX_CONCURRENCY o 16)')
+    parser.add_argument('--retry-budget', type=int, help='Retry massimi per job (default: env LLM_RETRY_BUDGET o 50)')
+    args = parser.parse_args(argv)
+
+    client = None
+    if not args.dry_run:
+        if not sync.GROK_API_KEY:
+            print("❌ GROK_API_KEY non configurata (usa --dry-run per le sole stime)")
+            sys.exit(1)
+        client = sync.init_grok_client()
+        if not client:
+            sys.exit(1)
+
+    get_controller("grok", max_limit=args.max_concurrency)
+    service = TranslationService(client, dry_run=args.dry_run, retry_budget=args.retry_budget)
+    try:
+        asyncio.run(serve(args.host, args.port, service, os.getenv("I18N_SERVICE_TOKEN") or None))
+    except KeyboardInterrupt:
+        print("\n👋 Servizio terminato")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+/**
+ * Compliance (KB) data API - Public endpoint
+ *
+ * GET /api/i18n/compliance?locale=it-IT              - Country index (keys, sha1, bytes) + shared data
+ * GET /api/i18n/compliance?locale=it-IT&country=IT   - One country's compliance data
+ *
+ * Reads the sharded layout written by scripts/sync_and_translate_grok_2026.py
+ * ({locale}/compliance/index.json + one file per country) so a page only loads
+ * the country it shows. Falls back to {locale}/compliance.json when the locale
+ * has not been sharded yet, and to the source locale when the locale is missing.
+ */
+
+import { NextRequest, NextResponse } from 'next/server';
+import { promises as fs } from 'fs';
+import path from 'path';
+import { PROJECTS } from '@/lib/i18n-config';
+
+export const dynamic = 'force-dynamic';
+
+const corsHeaders = {
+  'Access-Control-Allow-Origin': '*',
+  'Access-Control-Allow-Methods': 'GET, OPTIONS',
+  'Access-Control-Allow-Headers': 'Content-Type, Authorization, X-Alice-Token',
+  'Cache-Control': 's-maxage=300, stale-while-revalidate=300',
+};
+
+const KEY_PATTERN = /^[A-Za-z0-9_-]+$/;
+
+interface ShardEntry {
+  file: string;
+  sha1: string;
+  bytes: number;
+}
+
+interface ShardManifest {
+  _schema: number;
+  block: string;
+  order: string[];
+  data: Record<string, unknown>;
+  shards: Record<string, ShardEntry>;
+}
+
+async function readJson<T>(filePath: string): Promise<T | null> {
+  try {
+    return JSON.parse(await fs.readFile(filePath, 'utf-8')) as T;
+  } catch {
+    return null;
+  }
+}
+
+function localePath(basePath: string, pattern: string, locale: string): string {
+  return path.join(basePath, pattern.replace(/{locale}/g, locale));
+}
+
+export async function OPTIONS() {
+  return NextResponse.json({}, { headers: corsHeaders });
+}
+
+export async function GET(request: NextRequest) {
+  try {
+    const { searchParams } = new URL(request.url);
+    const requestedLocale = searchParams.get('locale') || 'en-GB';
+    const country = searchParams.get('country')?.toUpperCase();
+
+    if (!KEY_PATTERN.test(requestedLocale) || (country && !KEY_PATTERN.test(country))) {
+      return NextResponse.json({ error: 'Invalid locale or country' }, { status: 400, headers: corsHeaders });
+    }
+
+    const project = PROJECTS.find(p => p.id === 'compliance');
+    if (!project) {
+      return NextResponse.json({ error: 'Project not found' }, { status: 404, headers: corsHeaders });
+    }
+
+    for (const locale of Array.from(new Set([requestedLocale, project.sourceLocale]))) {
+      // Sharded layout: manifest first, then only the requested country's file
+      if (project.shards) {
+        const manifestPath = localePath(project.basePath, project.shards.manifest, locale);
+        const manifest = await readJson<ShardManifest>(manifestPath);
+        if (manifest) {
+          if (!country) {
+            return NextResponse.json({
+              locale,
+              sharded: true,
+              countries: manifest.shards,
+              data: manifest.data,
+            }, { headers: corsHeaders });
+          }
+          const entry = manifest.shards[country];
+          if (!entry) {
+            return NextResponse.json({ error: `Country ${country} not found` }, { status: 404, headers: corsHeaders });
+          }
+          const countryData = await readJson<unknown>(path.join(path.dirname(manifestPath), entry.file));
+          if (countryData !== null) {
+            return NextResponse.json({ locale, country, sharded: true, data: countryData }, {
+              headers: { ...corsHeaders, ETag: `"${entry.sha1}"` },
+            });
+          }
+        }
+      }
+
+      // Single file per locale
+      const fileData = await readJson<Record<string, unknown>>(localePath(project.basePath, project.files[0].pattern, locale));
+      if (!fileData) {
+        continue;
+      }
+      const block = project.shards?.block || 'fused_by_iso';
+      const countries = (fileData[block] || {}) as Record<string, unknown>;
+      if (!country) {
+        const data = Object.fromEntries(Object.entries(fileData).filter(([key]) => key !== block));
+        return NextResponse.json({
+          locale,
+          sharded: false,
+          countries: Object.fromEntries(Object.keys(countries).map(key => [key, {}])),
+          data,
+        }, { headers: corsHeaders });
+      }
+      if (!(country in countries)) {
+        return NextResponse.json({ error: `Country ${country} not found` }, { status: 404, headers: corsHeaders });
+      }
+      return NextResponse.json({ locale, country, sharded: false, data: countries[country] }, { headers: corsHeaders });
+    }
+
+    return NextResponse.json({ error: `No compliance data for ${requestedLocale}` }, { status: 404, headers: corsHeaders });
+  } catch (error) {
+    console.error('Error reading compliance data:', error);
+    return NextResponse.json({ error: 'Failed to read compliance data' }, { status: 500, headers: corsHeaders });
+  }
+}
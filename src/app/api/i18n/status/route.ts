@@ -3,7 +3,9 @@
  * 
  * GET /api/i18n/status?project=site|app
  * 
- * Scans translation files and returns status for all languages
+ * Serves the coverage matrix built by scripts/build_i18n_status.py (data/i18n-status.json)
+ * when available; otherwise (or with ?refresh=1) scans translation files for all languages.
+ * The translator rewrites the project's entry at the end of every run and after each --watch update.
  */
 
 import { NextRequest, NextResponse } from 'next/server';
@@ -23,6 +25,9 @@ interface LanguageStatus {
   progress: number;
   estimatedCost: number;
   files: string[];
+  identicalCount?: number;
+  missingCount?: number;
+  staleCount?: number;
 }
 
 interface ProjectStatus {
@@ -35,8 +40,30 @@ interface ProjectStatus {
   translatedLanguages: number;
   missingLanguages: number;
   totalEstimatedCost: number;
+  source?: 'cache' | 'scan';
+  generatedAt?: string;
 }
 
+// Columnar per-project entry written by scripts/build_i18n_status.py
+interface CachedProjectColumns {
+  name: string;
+  sourceLocale: string;
+  sourceKeyCount: number;
+  sourceTokens: number;
+  locales: string[];
+  files: string[][];
+  translated: number[];
+  identical: number[];
+  missing: number[];
+  stale: number[];
+  generatedAt: number;
+}
+
+const STATUS_CACHE_FILE = process.env.I18N_STATUS_FILE || path.join(process.cwd(), 'data', 'i18n-status.json');
+
+// Route project id → project id used by the Python scripts (config/i18n-projects.json)
+const CACHE_PROJECT_IDS: Record<string, string> = { compliance: 'kb' };
+
 async function fileExists(filePath: string): Promise<boolean> {
   try {
     await fs.access(filePath);
@@ -55,6 +82,60 @@ async function loadJson(filePath: string): Promise<any> {
   }
 }
 
+function sortByStatus(languages: LanguageStatus[]) {
+  // Sort: missing first, then partial, then complete
+  const statusOrder = { missing: 0, partial: 1, complete: 2 };
+  languages.sort((a, b) => statusOrder[a.status] - statusOrder[b.status]);
+}
+
+async function loadCachedStatus(projectId: string): Promise<ProjectStatus | null> {
+  const cache = await loadJson(STATUS_CACHE_FILE);
+  const columns: CachedProjectColumns | undefined = cache?.projects?.[CACHE_PROJECT_IDS[projectId] || projectId];
+  if (!columns || !columns.locales || !columns.sourceKeyCount) return null;
+
+  const languageStatuses: LanguageStatus[] = columns.locales.map((code, i) => {
+    const lang = ALL_LANGUAGES.find(l => l.code.toLowerCase() === code.toLowerCase());
+    const translated = columns.translated[i];
+    const hasFiles = columns.files[i].length > 0;
+    const progress = Math.round((translated / columns.sourceKeyCount) * 100);
+    const status: LanguageStatus['status'] = !hasFiles ? 'missing' : progress >= 95 ? 'complete' : 'partial';
+
+    const tokensToTranslate = columns.sourceTokens * ((columns.sourceKeyCount - translated) / columns.sourceKeyCount);
+    const estimatedCost = status === 'complete' ? 0 : estimateCost(tokensToTranslate, tokensToTranslate * 1.2);
+
+    return {
+      code: lang?.code || code,
+      name: lang?.name || code,
+      flag: lang?.flag || '🏳️',
+      status,
+      keyCount: translated + columns.identical[i],
+      sourceKeyCount: columns.sourceKeyCount,
+      progress,
+      estimatedCost: Math.round(estimatedCost * 10000) / 10000,
+      files: columns.files[i],
+      identicalCount: columns.identical[i],
+      missingCount: columns.missing[i],
+      staleCount: columns.stale[i],
+    };
+  });
+
+  sortByStatus(languageStatuses);
+
+  return {
+    projectId,
+    projectName: columns.name,
+    sourceLocale: columns.sourceLocale,
+    sourceKeyCount: columns.sourceKeyCount,
+    languages: languageStatuses,
+    totalLanguages: languageStatuses.length,
+    translatedLanguages: languageStatuses.filter(l => l.status === 'complete').length,
+    missingLanguages: languageStatuses.filter(l => l.status === 'missing').length,
+    totalEstimatedCost: languageStatuses.reduce((sum, l) => sum + l.estimatedCost, 0),
+    source: 'cache',
+    generatedAt: new Date(columns.generatedAt * 1000).toISOString(),
+  };
+}
+
 function countKeys(obj: any, prefix = ''): number {
   if (obj === null || obj === undefined) return 0;
   if (typeof obj !== 'object') return 1;
@@ -71,6 +152,13 @@ export async function GET(request: NextRequest) {
     const { searchParams } = new URL(request.url);
     const projectId = searchParams.get('project') || 'site';
 
+    if (searchParams.get('refresh') !== '1') {
+      const cached = await loadCachedStatus(projectId);
+      if (cached) {
+        return NextResponse.json(cached);
+      }
+    }
+
     const project = PROJECTS.find(p => p.id === projectId);
     if (!project) {
       return NextResponse.json({ error: 'Project not found' }, { status: 404 });
@@ -175,11 +263,7 @@ export async function GET(request: NextRequest) {
       });
     }
 
-    // Sort: missing first, then partial, then complete
-    languageStatuses.sort((a, b) => {
-      const statusOrder = { missing: 0, partial: 1, complete: 2 };
-      return statusOrder[a.status] - statusOrder[b.status];
-    });
+    sortByStatus(languageStatuses);
 
     const result: ProjectStatus = {
       projectId: project.id,
@@ -191,6 +275,7 @@ export async function GET(request: NextRequest) {
       translatedLanguages: languageStatuses.filter(l => l.status === 'complete').length,
       missingLanguages: languageStatuses.filter(l => l.status === 'missing').length,
       totalEstimatedCost: languageStatuses.reduce((sum, l) => sum + l.estimatedCost, 0),
+      source: 'scan',
     };
 
     return NextResponse.json(result);
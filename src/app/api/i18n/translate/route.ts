@@ -3,7 +3,10 @@
  * 
  * POST /api/i18n/translate
  * 
- * Translates missing keys using Grok API
+ * Translates missing keys using Grok API.
+ * With I18N_SERVICE_URL set, requests go to the local translation service
+ * (scripts/translation_service.py): same engine as the batch pipeline, with
+ * translation memory hits, request coalescing and shared rate limits.
  */
 
 import { NextRequest, NextResponse } from 'next/server';
@@ -18,6 +21,7 @@ interface TranslateRequest {
   project: string;
   targetLocale: string;
   dryRun?: boolean;
+  paths?: string[];
 }
 
 interface TranslationResult {
@@ -27,6 +31,49 @@ interface TranslationResult {
   cost: number;
   files: string[];
   errors: string[];
+  memoryHits?: number;
+  coalesced?: number;
+}
+
+const TRANSLATION_SERVICE_URL = process.env.I18N_SERVICE_URL?.replace(/\/$/, '');
+// Dashboard project id → translator project id
+const SERVICE_PROJECT_IDS: Record<string, string> = { compliance: 'kb' };
+
+// Translate through the local service; null when the service is unreachable
+async function translateViaService(
+  projectId: string,
+  targetLocale: string,
+  dryRun: boolean,
+  paths?: string[]
+): Promise<TranslationResult | null> {
+  const headers: Record<string, string> = { 'Content-Type': 'application/json' };
+  if (process.env.I18N_SERVICE_TOKEN) {
+    headers.Authorization = `Bearer ${process.env.I18N_SERVICE_TOKEN}`;
+  }
+
+  let response: Response;
+  try {
+    response = await fetch(`${TRANSLATION_SERVICE_URL}/translate`, {
+      method: 'POST',
+      headers,
+      body: JSON.stringify({
+        project: SERVICE_PROJECT_IDS[projectId] ?? projectId,
+        locale: targetLocale,
+        paths,
+        dryRun,
+        wait: true,
+      }),
+    });
+  } catch (error) {
+    console.warn('Translation service unreachable, using direct Grok calls:', error);
+    return null;
+  }
+
+  const job = await response.json();
+  if (!response.ok || job.status !== 'done') {
+    throw new Error(job.error || `Translation service job ${job.status}`);
+  }
+  return job.result as TranslationResult;
 }
 
 // Load JSON file
@@ -203,6 +250,18 @@ export async function POST(request: NextRequest) {
       return NextResponse.json({ error: 'Project not found' }, { status: 404 });
     }
 
+    if (TRANSLATION_SERVICE_URL) {
+      const serviceResult = await translateViaService(projectId, targetLocale, dryRun, body.paths);
+      if (serviceResult) {
+        return NextResponse.json({
+          success: true,
+          dryRun,
+          result: serviceResult,
+          source: 'service',
+        });
+      }
+    }
+
     // Check Grok API key
     if (!dryRun && !process.env.GROK_API_KEY) {
       return NextResponse.json({ error: 'GROK_API_KEY not configured' }, { status: 500 });
@@ -135,6 +135,12 @@ export interface ProjectConfig {
     pattern: string;
     snapshotPattern: string;
   }[];
+  // Optional sharded output (one file per key of `block` + manifest), see scripts/shard_locales.py
+  shards?: {
+    block: string;
+    pattern: string;
+    manifest: string;
+  };
 }
 
 export const PROJECTS: ProjectConfig[] = [
@@ -175,7 +181,13 @@ export const PROJECTS: ProjectConfig[] = [
     sourceLocale: 'en-GB',
     files: [
       { pattern: '{locale}/compliance.json', snapshotPattern: '{locale}/compliance.snapshot.json' }  // Dati compliance per paese
-    ]
+    ],
+    // Used by /api/i18n/compliance when the manifest exists, otherwise compliance.json is read
+    shards: {
+      block: 'fused_by_iso',
+      pattern: '{locale}/compliance/{key}.json',
+      manifest: '{locale}/compliance/index.json',
+    }
   }
 ];
 
@@ -6,6 +6,12 @@ export interface ProjectFile {
   snapshotPattern: string;
 }
 
+export interface ShardConfig {
+  block: string;    // Chiave top-level divisa in shard (es. fused_by_iso)
+  pattern: string;  // Un file per chiave, es. {locale}/compliance/{key}.json
+  manifest: string; // Indice per lingua, es. {locale}/compliance/index.json
+}
+
 export interface ProjectConfig {
   id: string;
   name: string;
@@ -16,6 +22,7 @@ export interface ProjectConfig {
   snapshotPattern: string;
   memoryFile: string;
   files?: ProjectFile[]; // Opzionale: array di file per progetti multi-file
+  shards?: ShardConfig;  // Opzionale: output shardato (un file per paese + manifest)
 }
 
 export interface ProjectsConfig {